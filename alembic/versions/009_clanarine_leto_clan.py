@@ -0,0 +1,22 @@
+"""indeks clanarine(leto, clan_id) za EXISTS filter plačanih članov
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+"""
+from typing import Union
+
+from alembic import op
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_clanarine_leto_clan_id", "clanarine", ["leto", "clan_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_clanarine_leto_clan_id", table_name="clanarine")
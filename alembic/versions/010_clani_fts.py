@@ -0,0 +1,57 @@
+"""clani_fts – FTS5 indeks članov (ime, klicni znak, e-pošta, naslov, opombe) s prožilci
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+"""
+from typing import Union
+
+from alembic import op
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels = None
+depends_on = None
+
+_STOLPCI = "priimek, ime, klicni_znak, elektronska_posta, naslov_ulica, naslov_posta, opombe"
+_NEW = ", ".join(f"new.{s.strip()}" for s in _STOLPCI.split(","))
+_OLD = ", ".join(f"old.{s.strip()}" for s in _STOLPCI.split(","))
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(f"""
+        CREATE VIRTUAL TABLE clani_fts USING fts5(
+            {_STOLPCI},
+            content='clani', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+    """)
+    op.execute(f"""
+        CREATE TRIGGER clani_fts_ai AFTER INSERT ON clani BEGIN
+            INSERT INTO clani_fts(rowid, {_STOLPCI}) VALUES (new.id, {_NEW});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER clani_fts_ad AFTER DELETE ON clani BEGIN
+            INSERT INTO clani_fts(clani_fts, rowid, {_STOLPCI}) VALUES ('delete', old.id, {_OLD});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER clani_fts_au AFTER UPDATE OF {_STOLPCI} ON clani BEGIN
+            INSERT INTO clani_fts(clani_fts, rowid, {_STOLPCI}) VALUES ('delete', old.id, {_OLD});
+            INSERT INTO clani_fts(rowid, {_STOLPCI}) VALUES (new.id, {_NEW});
+        END
+    """)
+    # Napolni indeks iz obstoječih članov
+    op.execute("INSERT INTO clani_fts(clani_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS clani_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS clani_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS clani_fts_ai")
+    op.execute("DROP TABLE IF EXISTS clani_fts")
@@ -0,0 +1,37 @@
+"""unikaten indeks clanarine(clan_id, leto) za upsert pri uvozu plačil
+
+Morebitne podvojene članarine (isti član in leto) se pred tem združijo:
+obdrži se vnos z datumom plačila, med enakovrednimi najnovejši (največji id).
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-18
+"""
+from typing import Union
+
+from alembic import op
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        DELETE FROM clanarine WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY clan_id, leto
+                    ORDER BY CASE WHEN datum_placila IS NULL THEN 1 ELSE 0 END, id DESC
+                ) AS zap
+                FROM clanarine
+            ) AS podvojene
+            WHERE zap > 1
+        )
+    """)
+    op.create_index("ux_clanarine_clan_id_leto", "clanarine", ["clan_id", "leto"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ux_clanarine_clan_id_leto", table_name="clanarine")
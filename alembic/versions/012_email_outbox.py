@@ -0,0 +1,58 @@
+"""email_opravila in email_outbox – skupinsko pošiljanje obvestil v ozadju
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-18
+"""
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "email_opravila",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("ustvarjeno", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("koncano", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("uporabnik", sa.String(), nullable=True),
+        sa.Column("bulk_filter", sa.String(), nullable=False),
+        sa.Column("leto", sa.Integer(), nullable=False),
+        sa.Column("zadeva", sa.String(), nullable=False),
+        sa.Column("telo_html", sa.Text(), nullable=False),
+        sa.Column("vkljuci_qr", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("prilozi_kartico", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("stanje", sa.String(), nullable=False, server_default="caka"),
+        sa.Column("napaka", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_email_opravila_id", "email_opravila", ["id"], unique=False)
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("opravilo_id", sa.Integer(), nullable=False),
+        sa.Column("clan_id", sa.Integer(), nullable=True),
+        sa.Column("prejemnik", sa.String(), nullable=False),
+        sa.Column("naslov", sa.String(), nullable=True),
+        sa.Column("stanje", sa.String(), nullable=False, server_default="caka"),
+        sa.Column("poskusi", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("naslednji_poskus", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("poslano_ob", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("napaka", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(["opravilo_id"], ["email_opravila.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_email_outbox_opravilo_stanje", "email_outbox", ["opravilo_id", "stanje"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_outbox_opravilo_stanje", table_name="email_outbox")
+    op.drop_table("email_outbox")
+    op.drop_index("ix_email_opravila_id", table_name="email_opravila")
+    op.drop_table("email_opravila")
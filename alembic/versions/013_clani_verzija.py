@@ -0,0 +1,30 @@
+"""clani.verzija – žig različice za predpomnilnik strani člana
+
+Vsaka pisalna pot, ki spremeni člana ali njegove članarine, aktivnosti,
+vloge ali skupine, poveča ``verzija``; izrisani deli strani ``/clani/{id}``
+so v predpomnilniku pod ključem (id, verzija).
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-18
+"""
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "clani",
+        sa.Column("verzija", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("clani", "verzija")
@@ -0,0 +1,45 @@
+"""statistika_leto in statistika_tip – materializirani seštevki za nadzorno ploščo
+
+Tabeli napolni aplikacija ob prvem zagonu (``statistika.obnovi_ce_prazna``),
+ker seštevanje zneskov zahteva razčlenjevanje besedilnega ``znesek``.
+Ročna obnova: ``python3 maintenance/obnovi_statistiko.py``.
+
+Revision ID: 014
+Revises: 013
+Create Date: 2026-10-18
+"""
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "statistika_leto",
+        sa.Column("leto", sa.Integer(), nullable=False),
+        sa.Column("placniki", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("skupaj_centi", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("brez_zneska", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("neberljivi", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("aktivnosti", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("ure", sa.Float(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("leto"),
+    )
+    op.create_table(
+        "statistika_tip",
+        sa.Column("tip_clanstva", sa.String(), nullable=False),
+        sa.Column("aktivni", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("vsi", sa.Integer(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("tip_clanstva"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("statistika_tip")
+    op.drop_table("statistika_leto")
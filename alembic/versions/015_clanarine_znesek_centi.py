@@ -0,0 +1,84 @@
+"""clanarine.znesek_centi – številski znesek za seštevke v SQL
+
+Stolpec se napolni iz besedilnega ``znesek`` v paketih po ``id``. Neberljivi
+zneski (npr. "25 EUR/2") ostanejo z ``znesek_centi = NULL`` in se izpišejo v
+dnevnik migracije (id in vrednost) za ročni popravek. Razčlenjevanje je
+namenoma kopija ``app.statistika.znesek_v_cente`` – migracija ne sme biti
+odvisna od kasnejših sprememb aplikacije.
+
+Revision ID: 015
+Revises: 014
+Create Date: 2026-10-18
+"""
+import logging
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "015"
+down_revision: Union[str, None] = "014"
+branch_labels = None
+depends_on = None
+
+PAKET = 500
+_MEJA_CENTI = 2 ** 63   # SQLite INTEGER je 64-bitni
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _v_cente(znesek: str | None) -> int | None:
+    if not znesek:
+        return None
+    niz = znesek.replace("€", "").replace(" ", "").replace(",", ".").strip()
+    try:
+        vrednost = Decimal(niz)
+        if not vrednost.is_finite():
+            return None
+        centi = int((vrednost * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    except InvalidOperation:  # tudi quantize pri prevelikih vrednostih (npr. "1e30")
+        return None
+    return centi if -_MEJA_CENTI <= centi < _MEJA_CENTI else None
+
+
+def upgrade() -> None:
+    op.add_column("clanarine", sa.Column("znesek_centi", sa.Integer(), nullable=True))
+
+    conn = op.get_bind()
+    clanarine = sa.table("clanarine", sa.column("id", sa.Integer), sa.column("znesek", sa.String),
+                         sa.column("znesek_centi", sa.Integer))
+    posodobi = (
+        sa.update(clanarine)
+        .where(clanarine.c.id == sa.bindparam("b_id"))
+        .values(znesek_centi=sa.bindparam("b_centi"))
+    )
+    neberljivi = 0
+    zadnji_id = 0
+    while True:
+        vrstice = conn.execute(
+            sa.select(clanarine.c.id, clanarine.c.znesek)
+            .where(clanarine.c.id > zadnji_id, clanarine.c.znesek != None)
+            .order_by(clanarine.c.id)
+            .limit(PAKET)
+        ).all()
+        if not vrstice:
+            break
+        paket = []
+        for clanarina_id, znesek in vrstice:
+            centi = _v_cente(znesek)
+            if centi is not None:
+                paket.append({"b_id": clanarina_id, "b_centi": centi})
+            elif znesek.strip():
+                neberljivi += 1
+                logger.warning("clanarine id=%s: neberljiv znesek %r (znesek_centi ostane NULL)",
+                               clanarina_id, znesek)
+        if paket:
+            conn.execute(posodobi, paket)
+        zadnji_id = vrstice[-1][0]
+    if neberljivi:
+        logger.warning("Neberljivih zneskov članarin: %d", neberljivi)
+
+
+def downgrade() -> None:
+    op.drop_column("clanarine", "znesek_centi")
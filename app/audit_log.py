@@ -1,5 +1,172 @@
+"""Audit log: ``log_akcija`` in paketni pisalnik v ozadju.
+
+Ko je pisalnik zagnan (lifespan), ``log_akcija`` vnos samo doda v vrsto v
+pomnilniku; nit v ozadju jih zapisuje v paketih (en ``executemany`` INSERT na
+vsakih ``AUDIT_PAKET`` vnosov ali ``AUDIT_INTERVAL_MS`` milisekund). Zahteva
+tako ne odpre lastne pisalne transakcije samo zaradi audita (npr. ``clan_ogled``).
+
+Seje, ki niso vezane na engine pisalnika (testi, vzdrževalne skripte) ali ko
+pisalnik ne teče, pišejo sinhrono kot doslej.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
 from .models import AuditLog
 
+logger = logging.getLogger(__name__)
+
+AUDIT_PAKET = int(os.getenv("AUDIT_PAKET", "100"))
+AUDIT_INTERVAL_MS = int(os.getenv("AUDIT_INTERVAL_MS", "500"))
+AUDIT_VRSTA = int(os.getenv("AUDIT_VRSTA", "10000"))
+# Koliko največ čaka klicatelj, ko je vrsta polna (backpressure), preden vnos zavrže
+AUDIT_CAKANJE_MS = int(os.getenv("AUDIT_CAKANJE_MS", "200"))
+
+_USTAVI = object()
+
+
+class AuditPisalnik:
+    """Vrsta audit vnosov + nit, ki jih v paketih zapisuje v ``engine``."""
+
+    def __init__(self, engine, paket: int = AUDIT_PAKET, interval_ms: int = AUDIT_INTERVAL_MS,
+                 velikost_vrste: int = AUDIT_VRSTA, cakanje_ms: int = AUDIT_CAKANJE_MS):
+        self.engine = engine
+        self.paket = paket
+        self.interval = interval_ms / 1000
+        self.cakanje = cakanje_ms / 1000
+        self._vrsta: queue.Queue = queue.Queue(maxsize=velikost_vrste)
+        self._nit: threading.Thread | None = None
+        self._zaklep = threading.Lock()
+        self._metrike = {"sprejeti": 0, "zapisani": 0, "izpusceni": 0, "paketi": 0, "napake": 0, "cakanja": 0}
+
+    @property
+    def tece(self) -> bool:
+        return self._nit is not None and self._nit.is_alive()
+
+    def zazeni(self) -> None:
+        if not self.tece:
+            self._nit = threading.Thread(target=self._zanka, name="audit-pisalnik", daemon=True)
+            self._nit.start()
+
+    def ustavi(self, timeout: float = 10.0) -> None:
+        """Zapiše vse, kar je še v vrsti, in ustavi nit (kliče se ob zaustavitvi)."""
+        if not self.tece:
+            return
+        self._vrsta.put(_USTAVI)
+        self._nit.join(timeout)
+        self._nit = None
+
+    def izprazni(self, timeout: float = 5.0) -> bool:
+        """Takoj zapiše vse vnose, ki so že v vrsti (npr. pred prikazom audit loga)."""
+        if not self.tece:
+            return True
+        koncano = threading.Event()
+        try:
+            self._vrsta.put(koncano, timeout=timeout)
+        except queue.Full:
+            return False
+        return koncano.wait(timeout)
+
+    def dodaj(self, uporabnik: str | None, akcija: str, opis: str | None, ip: str | None) -> bool:
+        """Doda vnos v vrsto. Ob polni vrsti počaka največ ``cakanje``; vrne False, če je vnos zavržen."""
+        vnos = {
+            "cas": datetime.now(timezone.utc),
+            "uporabnik": uporabnik, "akcija": akcija, "opis": opis, "ip": ip,
+        }
+        try:
+            self._vrsta.put_nowait(vnos)
+        except queue.Full:
+            self._stej("cakanja")
+            try:
+                self._vrsta.put(vnos, timeout=self.cakanje)
+            except queue.Full:
+                self._stej("izpusceni")
+                logger.warning("Audit vrsta polna – vnos '%s' zavržen", akcija)
+                return False
+        self._stej("sprejeti")
+        return True
+
+    def metrike(self) -> dict[str, int]:
+        with self._zaklep:
+            return {**self._metrike, "v_vrsti": self._vrsta.qsize()}
+
+    def _stej(self, ime: str, n: int = 1) -> None:
+        with self._zaklep:
+            self._metrike[ime] += n
+
+    def _zapisi(self, paket: list[dict]) -> None:
+        if not paket:
+            return
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(insert(AuditLog), paket)
+            self._stej("zapisani", len(paket))
+            self._stej("paketi")
+        except Exception:
+            self._stej("napake")
+            self._stej("izpusceni", len(paket))
+            logger.exception("Zapis paketa audit loga (%d vnosov) ni uspel", len(paket))
+
+    def _zanka(self) -> None:
+        paket: list[dict] = []
+        rok = None
+        while True:
+            cakaj = None if rok is None else max(rok - time.monotonic(), 0)
+            try:
+                element = self._vrsta.get(timeout=cakaj)
+            except queue.Empty:
+                element = None
+
+            if isinstance(element, dict):
+                paket.append(element)
+                if rok is None:
+                    rok = time.monotonic() + self.interval
+                if len(paket) < self.paket:
+                    continue
+
+            # Paket poln, rok potekel (None), izprazni() (Event) ali ustavi()
+            self._zapisi(paket)
+            paket, rok = [], None
+            if isinstance(element, threading.Event):
+                element.set()
+            elif element is _USTAVI:
+                return
+
+
+_pisalnik: AuditPisalnik | None = None
+
+
+def zazeni_pisalnik(engine) -> AuditPisalnik:
+    """Zažene paketni pisalnik za ``engine`` (lifespan)."""
+    global _pisalnik
+    if _pisalnik is None or not _pisalnik.tece:
+        _pisalnik = AuditPisalnik(engine)
+        _pisalnik.zazeni()
+    return _pisalnik
+
+
+def ustavi_pisalnik() -> None:
+    """Zapiše preostale vnose in ustavi pisalnik (lifespan ob zaustavitvi)."""
+    global _pisalnik
+    if _pisalnik is not None:
+        _pisalnik.ustavi()
+        _pisalnik = None
+
+
+def izprazni_audit() -> None:
+    """Počaka, da so vsi vnosi v vrsti zapisani (pred branjem audit loga)."""
+    if _pisalnik is not None:
+        _pisalnik.izprazni()
+
+
+def audit_metrike() -> dict[str, int] | None:
+    return _pisalnik.metrike() if _pisalnik is not None else None
+
 
 def log_akcija(
     db,
@@ -8,7 +175,19 @@ def log_akcija(
     opis: str | None = None,
     ip: str | None = None,
 ):
-    """Zapiše akcijo v audit log. Ob napaki tiho preskočimo (db rollback)."""
+    """Zapiše akcijo v audit log. Ob napaki tiho preskočimo (db rollback).
+
+    Pri zagnanem pisalniku in seji na njegovem engineu se vnos samo uvrsti v vrsto.
+    """
+    pisalnik = _pisalnik
+    if pisalnik is not None and pisalnik.tece:
+        try:
+            bind = db.get_bind()
+        except Exception:
+            bind = None
+        if bind is pisalnik.engine:
+            pisalnik.dodaj(uporabnik, akcija, opis, ip)
+            return
     try:
         entry = AuditLog(uporabnik=uporabnik, akcija=akcija, opis=opis, ip=ip)
         db.add(entry)
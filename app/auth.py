@@ -1,14 +1,16 @@
 import re
-import bcrypt
 from fastapi import Request
 from fastapi.responses import RedirectResponse
 from fastapi.templating import Jinja2Templates
 
+from .gesla_bazen import hash_v_bazenu, preveri_v_bazenu
+
 templates = Jinja2Templates(directory="app/templates")
 
 
 def hash_geslo(geslo: str) -> str:
-    return bcrypt.hashpw(geslo.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    """bcrypt hash s ceno v veljavi (v bazenu gesel; ob polni vrsti ``BazenZaseden``)."""
+    return hash_v_bazenu(geslo)
 
 
 def preveri_zahteve_gesla(geslo: str) -> str | None:
@@ -27,7 +29,8 @@ def preveri_zahteve_gesla(geslo: str) -> str | None:
 
 
 def preveri_geslo(geslo: str, geslo_hash: str) -> bool:
-    return bcrypt.checkpw(geslo.encode("utf-8"), geslo_hash.encode("utf-8"))
+    """bcrypt preverjanje (v bazenu gesel; ob polni vrsti ``BazenZaseden``)."""
+    return preveri_v_bazenu(geslo, geslo_hash)
 
 
 def get_user(request: Request) -> dict | None:
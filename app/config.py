@@ -1,18 +1,101 @@
-"""Pomožne funkcije za branje nastavitev iz baze."""
+"""Pomožne funkcije za branje nastavitev iz baze.
+
+Nastavitve se berejo iz predpomnilnika v procesu: celotna tabela ``nastavitve``
+se naloži z eno poizvedbo (ločeno za vsak engine) in velja, dokler je kak
+commit ne spremeni. Vsak commit, ki doda/spremeni/izbriše ``Nastavitev`` prek
+ORM (``shrani_nastavitve``, seed ob zagonu, testi), predpomnilnik razveljavi
+in poveča ``verzija_nastavitev()``.
+
+Posnetek se shrani samo, če se verzija od začetka transakcije seje ni
+spremenila: pod WAL seja bere iz posnetka baze ob začetku transakcije, zato bi
+sicer lahko stare vrednosti shranila pod novo verzijo.
+"""
+import threading
+import weakref
+from itertools import chain
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from .models import Nastavitev, TIPI_CLANSTVA_PRIVZETO, OPERATERSKI_RAZREDI_PRIVZETO, VLOGE_CLANOV_PRIVZETO
 
+# engine → {kljuc: vrednost} (samo za branje); izprazni se ob vsaki spremembi
+_predpomnilnik: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_verzija = 0
+_zaklep = threading.Lock()
+_SPREMENJENE = "_nastavitve_spremenjene"
+_VERZIJA_OB_ZACETKU = "_nastavitve_verzija"
+
+
+def verzija_nastavitev() -> int:
+    """Števec sprememb nastavitev – za ključe izpeljanih predpomnilnikov."""
+    return _verzija
+
+
+def invalidiraj_nastavitve() -> None:
+    """Razveljavi predpomnilnik nastavitev za vse engine in poveča verzijo."""
+    global _verzija
+    with _zaklep:
+        _verzija += 1
+        _predpomnilnik.clear()
+
+
+def nastavitve_iz_predpomnilnika(engine) -> Mapping[str, str] | None:
+    """Veljaven posnetek nastavitev za engine brez dostopa do baze, ali None."""
+    return _predpomnilnik.get(engine)
+
+
+def nastavitve_slovar(db: Session) -> Mapping[str, str]:
+    """Vse nastavitve kot {kljuc: vrednost} (samo za branje) – ena poizvedba ob zgrešitvi."""
+    engine = db.get_bind()
+    vrednosti = _predpomnilnik.get(engine)
+    if vrednosti is not None:
+        return vrednosti
+    vrednosti = MappingProxyType({
+        kljuc: vrednost for kljuc, vrednost in db.query(Nastavitev.kljuc, Nastavitev.vrednost)
+    })
+    # Verzija ob začetku transakcije (after_begin), ne ob poizvedbi: če je kdo
+    # shranil nastavitve po začetku, je posnetek seje lahko že zastarel
+    verzija = db.info.get(_VERZIJA_OB_ZACETKU)
+    with _zaklep:
+        if verzija == _verzija and not db.info.get(_SPREMENJENE):
+            _predpomnilnik[engine] = vrednosti
+    return vrednosti
+
+
+@event.listens_for(Session, "after_begin")
+def _ob_zacetku(session: Session, transaction, connection) -> None:
+    session.info[_VERZIJA_OB_ZACETKU] = _verzija
+
+
+@event.listens_for(Session, "after_flush")
+def _oznaci_spremembe(session: Session, flush_context) -> None:
+    if any(isinstance(o, Nastavitev) for o in chain(session.new, session.dirty, session.deleted)):
+        session.info[_SPREMENJENE] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _po_commitu(session: Session) -> None:
+    # Razveljavimo šele po commitu, da sočasno branje ne shrani nepotrjenega stanja
+    if session.info.pop(_SPREMENJENE, False):
+        invalidiraj_nastavitve()
+
+
+@event.listens_for(Session, "after_rollback")
+def _po_rollbacku(session: Session) -> None:
+    session.info.pop(_SPREMENJENE, None)
+
 
 def get_nastavitev(db: Session, kljuc: str, privzeto: str = "") -> str:
-    n = db.query(Nastavitev).filter(Nastavitev.kljuc == kljuc).first()
-    return n.vrednost if n and n.vrednost else privzeto
+    return nastavitve_slovar(db).get(kljuc) or privzeto
 
 
 def get_seznam(db: Session, kljuc: str, privzeto: list) -> list:
     """Vrne seznam vrednosti (ena na vrstico) iz nastavitve."""
-    n = db.query(Nastavitev).filter(Nastavitev.kljuc == kljuc).first()
-    if n and n.vrednost and n.vrednost.strip():
-        return [v.strip() for v in n.vrednost.splitlines() if v.strip()]
+    vrednost = nastavitve_slovar(db).get(kljuc)
+    if vrednost and vrednost.strip():
+        return [v.strip() for v in vrednost.splitlines() if v.strip()]
     return privzeto
 
 
@@ -30,11 +113,11 @@ def get_vloge_clanov(db: Session) -> list:
 
 def get_clanarina_zneski(db: Session) -> dict:
     """Vrne slovar {tip_clanstva: znesek_float} iz nastavitve 'clanarina_zneski'."""
-    n = db.query(Nastavitev).filter(Nastavitev.kljuc == "clanarina_zneski").first()
-    if not n or not n.vrednost:
+    vrednost = nastavitve_slovar(db).get("clanarina_zneski")
+    if not vrednost:
         return {}
     result = {}
-    for vrstica in n.vrednost.splitlines():
+    for vrstica in vrednost.splitlines():
         vrstica = vrstica.strip()
         if "=" in vrstica:
             tip, zn_str = vrstica.split("=", 1)
@@ -43,3 +126,23 @@ def get_clanarina_zneski(db: Session) -> dict:
             except ValueError:
                 pass
     return result
+
+
+def shrani_nastavitve(db: Session, vrednosti: dict[str, str], opisi: dict[str, str] | None = None) -> None:
+    """Zapiše (posodobi ali ustvari) nastavitve in potrdi transakcijo.
+
+    ``opisi`` se uporabijo samo pri novih ključih. Commit razveljavi predpomnilnik
+    nastavitev (glej ``_po_commitu``).
+    """
+    opisi = opisi or {}
+    obstojece = {
+        n.kljuc: n
+        for n in db.query(Nastavitev).filter(Nastavitev.kljuc.in_(list(vrednosti)))
+    }
+    for kljuc, vrednost in vrednosti.items():
+        n = obstojece.get(kljuc)
+        if n:
+            n.vrednost = vrednost
+        else:
+            db.add(Nastavitev(kljuc=kljuc, vrednost=vrednost, opis=opisi.get(kljuc)))
+    db.commit()
@@ -1,12 +1,23 @@
 import os
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.orm import sessionmaker, DeclarativeBase, Session
+from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
+
+from .sqlite_profil import engine_kwargs, prijavi_profil
 
 os.makedirs("data", exist_ok=True)
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./data/clanstvo.db")
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# DB_ASYNC=1 → bralne poti (/clani, /dashboard, /upn ...) tečejo prek AsyncSession
+# (aiosqlite / asyncpg) namesto sinhrone seje v threadpoolu. Pisanje ostane sinhrono.
+DB_ASYNC = os.getenv("DB_ASYNC", "").strip().lower() in ("1", "true", "da", "yes")
+
+engine = create_engine(
+    DATABASE_URL, connect_args={"check_same_thread": False}, **engine_kwargs(DATABASE_URL)
+)
+prijavi_profil(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -20,3 +31,72 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_url(url: str) -> str:
+    """Sinhroni DATABASE_URL → URL z asyncio gonilnikom (sqlite → aiosqlite, postgresql → asyncpg)."""
+    for predpona, async_predpona in (
+        ("sqlite+pysqlite://", "sqlite+aiosqlite://"),
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+    ):
+        if url.startswith(predpona):
+            return async_predpona + url[len(predpona):]
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(async_url(DATABASE_URL), **engine_kwargs(DATABASE_URL))
+    prijavi_profil(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+async def get_async_db():
+    """AsyncSession nad ``async_engine`` (samo ko je DB_ASYNC vklopljen)."""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Asinhroni engine ni vklopljen (DB_ASYNC).")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+class BralnaSeja:
+    """Seja za vroče bralne poti, neodvisna od izbranega enginea.
+
+    ``izvedi(fn, ...)`` pokliče ``fn(session, ...)`` z običajno (sinhrono) ORM sejo:
+    pri DB_ASYNC prek ``AsyncSession.run_sync`` (čakanje na bazo ne zasede niti),
+    sicer v threadpoolu. Poizvedbe zato ostanejo napisane enkrat, v obstoječem slogu.
+    """
+
+    def __init__(self, db):
+        self._db = db
+
+    @property
+    def asinhrona(self) -> bool:
+        return not isinstance(self._db, Session)
+
+    async def izvedi(self, fn, *args, **kwargs):
+        if self.asinhrona:
+            return await self._db.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self._db, *args, **kwargs)
+
+
+async def get_bralna_db(db: Session = Depends(get_db)):
+    """Odvisnost za bralne poti – AsyncSession pri DB_ASYNC, sicer seja iz ``get_db``.
+
+    Sinhrona seja se odpre leno (brez povezave, dokler je ne uporabimo), zato
+    odvisnost od ``get_db`` pri DB_ASYNC ne stane ničesar, testi pa lahko še
+    naprej prepišejo samo ``get_db``.
+    """
+    if AsyncSessionLocal is None:
+        yield BralnaSeja(db)
+        return
+    async with AsyncSessionLocal() as adb:
+        yield BralnaSeja(adb)
@@ -1,6 +1,7 @@
 """E-poštno pošiljanje z embedded UPN QR kodo.
 
 Podprti načini SMTP: starttls (port 587), ssl (port 465), plain (port 25).
+Povezave se ponovno uporabijo prek bazena (``smtp_bazen``).
 """
 import smtplib
 from email import encoders
@@ -9,11 +10,12 @@ from email.mime.image import MIMEImage
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
-from jinja2.sandbox import SandboxedEnvironment
 from sqlalchemy.orm import Session
 
 from .config import get_nastavitev, get_clanarina_zneski
 from .models import Clan
+from .predloge_jinja import render_predloge
+from .smtp_bazen import SmtpSeja, smtp_seja
 from .upn import generiraj_upn_png
 
 
@@ -99,14 +101,15 @@ def _render_predloga(telo_html: str, clan: Clan, leto: int, qr_img_tag: str) ->
     Uporablja SandboxedEnvironment, ki preprečuje dostop do nevarnih Python
     atributov in metod iz user-supplied predlog (template injection zaščita).
     autoescape=False je namerno – predloge vsebujejo HTML (vključno z embedded PNG).
+    Prevedena predloga se ponovno uporabi (``predloge_jinja``), zato skupinsko
+    pošiljanje isto predlogo prevede samo enkrat.
 
     Dostopne spremenljivke: ime, priimek, klicni_znak, leto, qr_koda,
     naslov_ulica, naslov_posta, tip_clanstva, klicni_znak_nosilci,
     operaterski_razred, mobilni_telefon, telefon_doma, elektronska_posta,
     veljavnost_rd (DD. MM. LLLL ali ""), es_stevilka, opombe.
     """
-    env = SandboxedEnvironment(autoescape=False)
-    return env.from_string(telo_html).render(**_clan_context(clan, leto, qr_img_tag))
+    return render_predloge(telo_html, _clan_context(clan, leto, qr_img_tag))
 
 
 def posli_email(
@@ -118,10 +121,13 @@ def posli_email(
     db: Session,
     vkljuci_qr: bool = False,
     priponke: list[tuple[str, bytes, str]] | None = None,
+    seja: SmtpSeja | None = None,
 ) -> None:
     """Pošlje personalizirani e-mail, opcijsko z embedded UPN QR kodo in/ali priponkami.
 
     priponke: seznam (ime_datoteke, vsebina_bytes, mime_tip) – npr. PDF kartica.
+    seja: odprta ``smtp_seja`` pri skupinskem pošiljanju (ena povezava za vsa
+    sporočila); brez nje se povezava izposodi iz bazena samo za to sporočilo.
     Vrže smtplib.SMTPException ali ValueError ob napaki pri pošiljanju.
     """
     klub_ime = get_nastavitev(db, "klub_ime", "")
@@ -138,9 +144,8 @@ def posli_email(
     html_telo = _render_predloga(telo_predloga, clan, leto, qr_img_tag)
 
     # Render zadeve (iste spremenljivke kot telo, brez qr_koda)
-    env = SandboxedEnvironment(autoescape=False)
     ctx = _clan_context(clan, leto, klub_ime=klub_ime, klub_oznaka=klub_oznaka)
-    zadeva = env.from_string(zadeva_predloga).render(**ctx)
+    zadeva = render_predloge(zadeva_predloga, ctx)
     # Zaščita pred email header injection: odstrani CR/LF iz zadeve in naslovov
     zadeva = zadeva.replace("\r", "").replace("\n", " ").strip()
     od = smtp_nastavitve["od"].replace("\r", "").replace("\n", "").strip()
@@ -174,27 +179,8 @@ def posli_email(
     send_msg["From"] = od
     send_msg["To"] = na
 
-    host = smtp_nastavitve["host"]
-    port = smtp_nastavitve["port"]
-    nacin = smtp_nastavitve["nacin"]
-    uporabnik = smtp_nastavitve["uporabnik"]
-    geslo = smtp_nastavitve["geslo"]
-
-    if nacin == "ssl":
-        with smtplib.SMTP_SSL(host, port) as server:
-            if uporabnik:
-                server.login(uporabnik, geslo)
-            server.send_message(send_msg)
-    elif nacin == "plain":
-        with smtplib.SMTP(host, port) as server:
-            if uporabnik:
-                server.login(uporabnik, geslo)
-            server.send_message(send_msg)
-    else:  # starttls (privzeto)
-        with smtplib.SMTP(host, port) as server:
-            server.ehlo()
-            server.starttls()
-            server.ehlo()
-            if uporabnik:
-                server.login(uporabnik, geslo)
-            server.send_message(send_msg)
+    if seja is not None:
+        seja.posli(send_msg)
+    else:
+        with smtp_seja(smtp_nastavitve) as nova_seja:
+            nova_seja.posli(send_msg)
@@ -0,0 +1,361 @@
+"""Skupinsko pošiljanje obvestil kot opravilo v ozadju (``email_opravila`` + ``email_outbox``).
+
+Prej je ``/obvestila/posli`` vse e-pošte (render, PDF kartica, SMTP) poslal
+znotraj ene zahteve; pri nekaj sto članih je ta trajala minute, držala DB sejo
+in jo je reverse proxy lahko prekinil. Zdaj zahteva samo zapiše opravilo in po
+eno vrstico ``email_outbox`` za vsakega prejemnika ter preusmeri na stran z
+napredkom, pošilja pa ``EmailDelavec`` (niti v ozadju, zagnane v lifespan).
+
+- Vsak prejemnik ima svoje stanje: ``caka`` → ``poslano`` | ``napaka`` | ``preskoceno``.
+- Neuspešno pošiljanje se ponovi z eksponentnim odmikom (``EMAIL_ODMIK_S``,
+  ``2×``, ``4×`` …), po ``EMAIL_POSKUSI`` poskusih ostane ``napaka``.
+- Stanje je v bazi, zato se po ponovnem zagonu nadaljuje tam, kjer se je
+  ustavilo (opravila ``v_teku`` se ob zagonu vrnejo v ``caka``). Prejemnik,
+  ki mu je bilo sporočilo poslano tik pred zaustavitvijo, a stanje še ni bilo
+  zapisano, lahko dobi sporočilo dvakrat (dostava vsaj enkrat).
+
+Seje, ki niso vezane na engine delavca (testi) ali ko delavec ne teče, opravilo
+obdelajo takoj v isti zahtevi (``oddaj_opravilo``) – enako kot ``log_akcija``.
+"""
+import logging
+import os
+import smtplib
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, exists, func, insert, or_, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from .audit_log import log_akcija
+from .config import get_nastavitev
+from .email import get_smtp_nastavitve, posli_email
+from .kartica import generiraj_kartico_pdf, get_kartica_polja, kartica_filename
+from .models import Clan, EmailOpravilo, EmailOutbox
+from .smtp_bazen import smtp_seja
+
+logger = logging.getLogger(__name__)
+
+EMAIL_DELAVCI = int(os.getenv("EMAIL_DELAVCI", "1"))
+EMAIL_POSKUSI = int(os.getenv("EMAIL_POSKUSI", "4"))
+EMAIL_ODMIK_S = int(os.getenv("EMAIL_ODMIK_S", "30"))
+# Kako pogosto delavec brez obvestila preveri, ali je kakšen ponovni poskus že na vrsti
+_INTERVAL_S = 2.0
+_PAKET = 50
+
+KONCNA_STANJA = ("koncano", "napaka")
+
+
+def _zdaj() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _ima_email(clan: Clan) -> bool:
+    return bool(clan.elektronska_posta) and "@" in clan.elektronska_posta
+
+
+def ustvari_opravilo(
+    db: Session,
+    uporabnik: str | None,
+    predloga,
+    zadeva: str,
+    telo_html: str,
+    leto: int,
+    bulk_filter: str,
+    clani: list[Clan],
+) -> EmailOpravilo:
+    """Zapiše opravilo in vrstico outboxa za vsakega člana (brez e-pošte → ``preskoceno``)."""
+    opravilo = EmailOpravilo(
+        uporabnik=uporabnik,
+        bulk_filter=bulk_filter,
+        leto=leto,
+        zadeva=zadeva,
+        telo_html=telo_html,
+        vkljuci_qr=bool(predloga.vkljuci_qr),
+        prilozi_kartico=bool(predloga.prilozi_kartico),
+        stanje="caka",
+    )
+    db.add(opravilo)
+    db.flush()
+    vrstice = [
+        {
+            "opravilo_id": opravilo.id,
+            "clan_id": c.id,
+            "prejemnik": f"{c.priimek} {c.ime}",
+            "naslov": c.elektronska_posta,
+            "stanje": "caka" if _ima_email(c) else "preskoceno",
+            "poskusi": 0,
+            "napaka": None if _ima_email(c) else "Ni e-poštnega naslova",
+        }
+        for c in clani
+    ]
+    if vrstice:
+        db.execute(insert(EmailOutbox), vrstice)
+    db.commit()
+    return opravilo
+
+
+def napredek(db: Session, opravilo_id: int) -> dict | None:
+    """Stanje opravila in število prejemnikov po stanjih (za stran z napredkom)."""
+    opravilo = db.get(EmailOpravilo, opravilo_id)
+    if opravilo is None:
+        return None
+    po_stanjih = dict(
+        db.query(EmailOutbox.stanje, func.count())
+        .filter(EmailOutbox.opravilo_id == opravilo_id)
+        .group_by(EmailOutbox.stanje)
+        .all()
+    )
+    stevci = {s: po_stanjih.get(s, 0) for s in ("caka", "poslano", "napaka", "preskoceno")}
+    return {
+        "id": opravilo.id,
+        "stanje": opravilo.stanje,
+        "sporocilo": opravilo.napaka,
+        "skupaj": sum(stevci.values()),
+        "koncano": opravilo.stanje in KONCNA_STANJA,
+        **stevci,
+    }
+
+
+def _zakljuci(db: Session, opravilo: EmailOpravilo) -> None:
+    opravilo.stanje = "koncano"
+    opravilo.koncano = _zdaj()
+    db.commit()
+    stanje = napredek(db, opravilo.id)
+    napake = [
+        n for (n,) in db.query(EmailOutbox.naslov)
+        .filter(EmailOutbox.opravilo_id == opravilo.id, EmailOutbox.stanje == "napaka")
+        .order_by(EmailOutbox.id)
+        .limit(5)
+    ]
+    if napake:
+        log_akcija(db, opravilo.uporabnik, "email_bulk_napaka",
+                   f"Napake pri bulk pošiljanju: {', '.join(napake)}")
+    log_akcija(db, opravilo.uporabnik, "email_bulk_poslan",
+               f"Bulk email ({opravilo.bulk_filter}): {stanje['poslano']} poslanih, "
+               f"{stanje['preskoceno'] + stanje['napaka']} preskočenih, leto {opravilo.leto}")
+
+
+def obdelaj_opravilo(
+    db: Session,
+    opravilo_id: int,
+    ustavi: threading.Event | None = None,
+    poskusi: int = EMAIL_POSKUSI,
+    odmik_s: float = EMAIL_ODMIK_S,
+) -> bool:
+    """Pošlje vse prejemnike opravila, ki so na vrsti. Vrne True, ko je opravilo zaključeno.
+
+    Prejemniki z neuspelim pošiljanjem dobijo ``naslednji_poskus`` in ostanejo v
+    ``caka``; opravilo se zaključi šele, ko nobeden več ne čaka.
+    """
+    opravilo = db.get(EmailOpravilo, opravilo_id)
+    if opravilo is None or opravilo.stanje in KONCNA_STANJA:
+        return True
+    try:
+        smtp_nas = get_smtp_nastavitve(db)
+    except ValueError as e:
+        opravilo.stanje = "napaka"
+        opravilo.napaka = str(e)
+        opravilo.koncano = _zdaj()
+        db.commit()
+        return True
+    opravilo.stanje = "v_teku"
+    db.commit()
+
+    leto = opravilo.leto
+    if opravilo.prilozi_kartico:
+        klub_ime = get_nastavitev(db, "klub_ime", "")
+        klub_oznaka = get_nastavitev(db, "klub_oznaka", "")
+        kartica_polja = get_kartica_polja(db)
+
+    def _priponke(clan: Clan) -> list[tuple[str, bytes, str]] | None:
+        if not opravilo.prilozi_kartico:
+            return None
+        pdf_bytes = generiraj_kartico_pdf(clan, leto, klub_ime, klub_oznaka, kartica_polja)
+        return [(kartica_filename(clan, clan.id, leto), pdf_bytes, "application/pdf")]
+
+    try:
+        # Vsa sporočila opravila gredo prek ene povezave iz bazena
+        with smtp_seja(smtp_nas) as seja:
+            while not (ustavi and ustavi.is_set()):
+                vrstice = (
+                    db.query(EmailOutbox)
+                    .filter(EmailOutbox.opravilo_id == opravilo_id, _na_vrsti(_zdaj()))
+                    .order_by(EmailOutbox.id)
+                    .limit(_PAKET)
+                    .all()
+                )
+                if not vrstice:
+                    break
+                for vrstica in vrstice:
+                    if ustavi and ustavi.is_set():
+                        break
+                    _posli_vrstico(db, vrstica, opravilo, smtp_nas, seja, _priponke, poskusi, odmik_s)
+    except smtplib.SMTPException as e:
+        # Vse povezave bazena so zasedene – prejemniki ostanejo v vrsti za naslednji krog
+        logger.warning("Opravilo %s: pošiljanje odloženo (%s)", opravilo_id, e)
+        return False
+
+    caka = db.query(EmailOutbox.id).filter(
+        EmailOutbox.opravilo_id == opravilo_id, EmailOutbox.stanje == "caka"
+    ).first()
+    if caka is not None:
+        return False
+    _zakljuci(db, opravilo)
+    return True
+
+
+def _na_vrsti(zdaj: datetime):
+    return and_(
+        EmailOutbox.stanje == "caka",
+        or_(EmailOutbox.naslednji_poskus.is_(None), EmailOutbox.naslednji_poskus <= zdaj),
+    )
+
+
+def _posli_vrstico(db, vrstica, opravilo, smtp_nas, seja, priponke, poskusi, odmik_s) -> None:
+    """Pošlje enemu prejemniku in takoj zapiše njegovo stanje."""
+    clan = db.get(Clan, vrstica.clan_id) if vrstica.clan_id is not None else None
+    if clan is None or not _ima_email(clan):
+        vrstica.stanje = "preskoceno"
+        vrstica.napaka = "Član ne obstaja več" if clan is None else "Ni e-poštnega naslova"
+        db.commit()
+        return
+    try:
+        posli_email(clan, opravilo.zadeva, opravilo.telo_html, opravilo.leto, smtp_nas, db,
+                    vkljuci_qr=opravilo.vkljuci_qr, priponke=priponke(clan), seja=seja)
+    except Exception as e:
+        logger.error(f"Napaka pri pošiljanju emaila za {clan.elektronska_posta}: {e}")
+        vrstica.poskusi += 1
+        vrstica.napaka = str(e)[:500]
+        if vrstica.poskusi >= poskusi:
+            vrstica.stanje = "napaka"
+            vrstica.naslednji_poskus = None
+        else:
+            vrstica.naslednji_poskus = _zdaj() + timedelta(seconds=odmik_s * 2 ** (vrstica.poskusi - 1))
+    else:
+        vrstica.stanje = "poslano"
+        vrstica.naslov = clan.elektronska_posta
+        vrstica.poslano_ob = _zdaj()
+        vrstica.napaka = None
+    db.commit()
+
+
+class EmailDelavec:
+    """Niti v ozadju, ki obdelujejo nezaključena opravila iz ``email_outbox``."""
+
+    def __init__(self, engine, niti: int = EMAIL_DELAVCI, poskusi: int = EMAIL_POSKUSI,
+                 odmik_s: float = EMAIL_ODMIK_S, interval_s: float = _INTERVAL_S):
+        self.engine = engine
+        self.st_niti = max(niti, 1)
+        self.poskusi = poskusi
+        self.odmik_s = odmik_s
+        self.interval_s = interval_s
+        self._seja = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+        self._niti: list[threading.Thread] = []
+        self._ustavi = threading.Event()
+        self._zbudi = threading.Event()
+        self._zaklep = threading.Lock()
+        self._v_obdelavi: set[int] = set()
+
+    @property
+    def tece(self) -> bool:
+        return any(n.is_alive() for n in self._niti)
+
+    def zazeni(self) -> None:
+        if self.tece:
+            return
+        # Opravila, ki jih je prekinila zaustavitev, se nadaljujejo
+        with self._seja() as db:
+            db.execute(update(EmailOpravilo).where(EmailOpravilo.stanje == "v_teku").values(stanje="caka"))
+            db.commit()
+        self._ustavi.clear()
+        self._niti = [
+            threading.Thread(target=self._zanka, name=f"email-delavec-{i}", daemon=True)
+            for i in range(self.st_niti)
+        ]
+        for nit in self._niti:
+            nit.start()
+
+    def ustavi(self, timeout: float = 10.0) -> None:
+        """Ustavi niti po trenutnem sporočilu; neposlani prejemniki ostanejo v bazi."""
+        self._ustavi.set()
+        self._zbudi.set()
+        for nit in self._niti:
+            nit.join(timeout)
+        self._niti = []
+
+    def obvesti(self) -> None:
+        """Zbudi delavca (novo opravilo)."""
+        self._zbudi.set()
+
+    def _prevzemi(self) -> int | None:
+        """Najstarejše opravilo z vsaj enim prejemnikom na vrsti (ali brez čakajočih – zaključek)."""
+        na_vrsti = exists().where(EmailOutbox.opravilo_id == EmailOpravilo.id, _na_vrsti(_zdaj()))
+        caka = exists().where(EmailOutbox.opravilo_id == EmailOpravilo.id, EmailOutbox.stanje == "caka")
+        with self._zaklep:
+            zasedena = set(self._v_obdelavi)
+        with self._seja() as db:
+            poizvedba = select(EmailOpravilo.id).where(
+                EmailOpravilo.stanje.in_(("caka", "v_teku")), or_(na_vrsti, ~caka),
+            )
+            if zasedena:
+                poizvedba = poizvedba.where(EmailOpravilo.id.not_in(zasedena))
+            opravilo_id = db.execute(poizvedba.order_by(EmailOpravilo.id).limit(1)).scalar()
+        if opravilo_id is None:
+            return None
+        with self._zaklep:
+            if opravilo_id in self._v_obdelavi:
+                return None
+            self._v_obdelavi.add(opravilo_id)
+        return opravilo_id
+
+    def _zanka(self) -> None:
+        while not self._ustavi.is_set():
+            try:
+                opravilo_id = self._prevzemi()
+            except Exception:
+                logger.exception("Branje vrste e-poštnih opravil ni uspelo")
+                opravilo_id = None
+            if opravilo_id is None:
+                self._zbudi.wait(self.interval_s)
+                self._zbudi.clear()
+                continue
+            try:
+                with self._seja() as db:
+                    obdelaj_opravilo(db, opravilo_id, self._ustavi, self.poskusi, self.odmik_s)
+            except Exception:
+                logger.exception("Obdelava e-poštnega opravila %s ni uspela", opravilo_id)
+                self._ustavi.wait(self.interval_s)
+            finally:
+                with self._zaklep:
+                    self._v_obdelavi.discard(opravilo_id)
+
+
+_delavec: EmailDelavec | None = None
+
+
+def zazeni_delavca(engine) -> EmailDelavec:
+    """Zažene delavce za skupinsko pošiljanje na ``engine`` (lifespan)."""
+    global _delavec
+    if _delavec is None or not _delavec.tece:
+        _delavec = EmailDelavec(engine)
+        _delavec.zazeni()
+    return _delavec
+
+
+def ustavi_delavca() -> None:
+    if _delavec is not None:
+        _delavec.ustavi()
+
+
+def oddaj_opravilo(db: Session, opravilo_id: int) -> None:
+    """Preda opravilo delavcu; brez delavca na tem engineu ga obdela takoj."""
+    delavec = _delavec
+    if delavec is not None and delavec.tece:
+        try:
+            bind = db.get_bind()
+        except Exception:
+            bind = None
+        if bind is delavec.engine:
+            delavec.obvesti()
+            return
+    obdelaj_opravilo(db, opravilo_id)
@@ -0,0 +1,105 @@
+"""Predpomnilnik izrisanih delov strani člana (``/clani/{id}``).
+
+Stran člana je prej ob vsakem ogledu z lenimi SELECT-i naložila članarine,
+aktivnosti, skupine in vloge ter znova izrisala vse tabele. Zdaj ``detail``
+relacije naloži z ``selectinload``, bralne dele strani (podatki in skupine,
+tabela plačil, aktivnosti, vloge) pa vzame iz LRU predpomnilnika.
+
+Ključ fragmenta je (id člana, ``Clan.verzija``, del, vloga, današnji datum).
+Vsaka pisalna pot, ki spremeni člana ali njegove članarine, aktivnosti, vloge
+ali skupine, pokliče ``oznaci_spremembo`` (poveča ``verzija``), zato se stari
+fragmenti ne uporabijo več in sčasoma izpadejo. Obrazci za urejanje (dodaj,
+modalna okna) ostanejo dinamični. CSRF žeton je seji lasten, zato je v
+predpomnjenem HTML-ju samo oznaka ``CSRF_OZNAKA``, ki jo ``vstavi_csrf``
+ob vsakem ogledu zamenja z žetonom seje.
+
+Metrike (``fragmenti_metrike``) so vidne v ``/nastavitve/diagnostika``.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+from markupsafe import Markup
+from sqlalchemy.orm import Session
+
+from .models import Clan
+
+FRAGMENTI_CACHE = int(os.getenv("FRAGMENTI_CACHE", "512"))
+
+CSRF_OZNAKA = "__CSRF_ZETON__"
+
+
+class PredpomnilnikFragmentov:
+    """LRU izrisanih HTML fragmentov, varen za niti. Prvi element ključa je id člana."""
+
+    def __init__(self, velikost: int = FRAGMENTI_CACHE):
+        self.velikost = max(velikost, 1)
+        self._fragmenti: OrderedDict[tuple, str] = OrderedDict()
+        self._zaklep = threading.Lock()
+        self._metrike = {"zadetki": 0, "izrisi": 0, "izpadi": 0}
+
+    def fragment(self, kljuc: tuple[Hashable, ...], izrisi: Callable[[], str]) -> str:
+        """Vrne fragment za ``kljuc``; ob zgrešitvi ga izriše z ``izrisi()`` in shrani."""
+        with self._zaklep:
+            html = self._fragmenti.get(kljuc)
+            if html is not None:
+                self._fragmenti.move_to_end(kljuc)
+                self._metrike["zadetki"] += 1
+                return html
+        html = str(izrisi())
+        with self._zaklep:
+            self._metrike["izrisi"] += 1
+            self._fragmenti[kljuc] = html
+            self._fragmenti.move_to_end(kljuc)
+            while len(self._fragmenti) > self.velikost:
+                self._fragmenti.popitem(last=False)
+                self._metrike["izpadi"] += 1
+        return html
+
+    def odstrani_clana(self, clan_id: int) -> None:
+        """Odstrani vse fragmente člana (izbris – SQLite lahko id ponovno uporabi)."""
+        with self._zaklep:
+            for kljuc in [k for k in self._fragmenti if k[0] == clan_id]:
+                del self._fragmenti[kljuc]
+
+    def izprazni(self) -> None:
+        with self._zaklep:
+            self._fragmenti.clear()
+
+    def metrike(self) -> dict[str, int]:
+        with self._zaklep:
+            return {**self._metrike, "fragmentov": len(self._fragmenti)}
+
+
+_predpomnilnik = PredpomnilnikFragmentov()
+
+
+def fragment(kljuc: tuple[Hashable, ...], izrisi: Callable[[], str]) -> str:
+    return _predpomnilnik.fragment(kljuc, izrisi)
+
+
+def vstavi_csrf(html: str, zeton: str) -> Markup:
+    """Zamenja ``CSRF_OZNAKA`` v predpomnjenem fragmentu z žetonom trenutne seje."""
+    return Markup(html.replace(CSRF_OZNAKA, zeton))
+
+
+def oznaci_spremembo(db: Session, *clan_ids: int | None) -> None:
+    """Poveča ``Clan.verzija`` podanim članom (v transakciji klicatelja, pred ``commit``)."""
+    ids = {clan_id for clan_id in clan_ids if clan_id}
+    if ids:
+        db.query(Clan).filter(Clan.id.in_(ids)).update(
+            {Clan.verzija: Clan.verzija + 1}, synchronize_session=False,
+        )
+
+
+def odstrani_clana(clan_id: int) -> None:
+    _predpomnilnik.odstrani_clana(clan_id)
+
+
+def izprazni_fragmente() -> None:
+    _predpomnilnik.izprazni()
+
+
+def fragmenti_metrike() -> dict[str, int]:
+    return _predpomnilnik.metrike()
@@ -0,0 +1,139 @@
+"""Omejen bazen niti za bcrypt (hashiranje in preverjanje gesel) ter kalibracija cene.
+
+bcrypt je namenoma počasen (~250 ms CPU na geslo). Prej je tekel neposredno v
+handlerju, torej v skupnem threadpoolu vseh zahtev – deset hkratnih prijav je
+zasedlo deset niti in vsa jedra, ostali uporabniki pa so čakali. Zdaj gre vsak
+izračun skozi ``GeslaBazen``:
+
+- hkrati teče največ ``GESLA_NITI`` izračunov (ostala jedra ostanejo prosta),
+- čaka jih lahko največ ``GESLA_VRSTA``; ob polni vrsti ``BazenZaseden``
+  (aplikacija vrne 503 z ``Retry-After``), zato napad na prijavo ne more
+  zasesti celotnega threadpoola.
+
+Cena (cost) bcrypt: ``GESLA_BCRYPT_COST`` jo določi fiksno, sicer jo
+``kalibriraj`` ob zagonu izbere tako, da en izračun traja približno
+``GESLA_CILJ_MS`` milisekund (meja ``BCRYPT_MIN_COST``–``BCRYPT_MAX_COST``;
+spodnja meja je prejšnja privzeta cena 12, zato počasen strežnik ne dobi
+šibkejših hashev). Shranjene hashe z nižjo ceno prijava ob naslednji uspešni
+prijavi preračuna (``potrebuje_nov_hash``); navzdol se hashi ne preračunavajo.
+
+Metrike (``gesla_metrike``) so vidne v ``/nastavitve/diagnostika``.
+"""
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import bcrypt
+
+logger = logging.getLogger(__name__)
+
+GESLA_NITI = int(os.getenv("GESLA_NITI", "2"))
+GESLA_VRSTA = int(os.getenv("GESLA_VRSTA", "8"))
+GESLA_CILJ_MS = int(os.getenv("GESLA_CILJ_MS", "250"))
+GESLA_BCRYPT_COST = int(os.getenv("GESLA_BCRYPT_COST", "0"))
+
+BCRYPT_MIN_COST = 12
+BCRYPT_MAX_COST = 16
+PRIVZETI_COST = 12
+_MERILNI_COST = 10
+
+
+class BazenZaseden(Exception):
+    """Vsi izračuni gesel tečejo in vrsta je polna – zahtevo zavrnemo (503)."""
+
+
+class GeslaBazen:
+    """Omejen bazen niti za bcrypt, varen za niti."""
+
+    def __init__(self, niti: int = GESLA_NITI, vrsta: int = GESLA_VRSTA):
+        self.niti = max(niti, 1)
+        self.vrsta = max(vrsta, 0)
+        self._izvajalec = ThreadPoolExecutor(max_workers=self.niti, thread_name_prefix="gesla")
+        self._mesta = threading.BoundedSemaphore(self.niti + self.vrsta)
+        self._zaklep = threading.Lock()
+        self._metrike = {"izracuni": 0, "zavrnjeni": 0, "v_teku": 0, "najvec_hkrati": 0}
+
+    def izvedi(self, fn: Callable, *args):
+        """Izvede ``fn(*args)`` v bazenu in vrne rezultat; ob polni vrsti vrže ``BazenZaseden``."""
+        if not self._mesta.acquire(blocking=False):
+            with self._zaklep:
+                self._metrike["zavrnjeni"] += 1
+            raise BazenZaseden()
+        with self._zaklep:
+            self._metrike["v_teku"] += 1
+            self._metrike["najvec_hkrati"] = max(self._metrike["najvec_hkrati"], self._metrike["v_teku"])
+        try:
+            return self._izvajalec.submit(fn, *args).result()
+        finally:
+            with self._zaklep:
+                self._metrike["v_teku"] -= 1
+                self._metrike["izracuni"] += 1
+            self._mesta.release()
+
+    def metrike(self) -> dict[str, int]:
+        with self._zaklep:
+            return {**self._metrike, "niti": self.niti, "vrsta": self.vrsta}
+
+
+_bazen = GeslaBazen()
+_cost = GESLA_BCRYPT_COST or PRIVZETI_COST
+_kalibrirano = False
+
+
+def _cas_hashiranja(cost: int) -> float:
+    """Najkrajši od treh izračunov (sekunde) – manj občutljivo na obremenitev ob zagonu."""
+    casi = []
+    for _ in range(3):
+        zacetek = time.perf_counter()
+        bcrypt.hashpw(b"kalibracija", bcrypt.gensalt(rounds=cost))
+        casi.append(time.perf_counter() - zacetek)
+    return min(casi)
+
+
+def izberi_cost(cas_merilni_s: float, cilj_ms: int = GESLA_CILJ_MS) -> int:
+    """Cena, pri kateri izračun traja največ ``cilj_ms`` (vsaka stopnja podvoji čas)."""
+    if cas_merilni_s <= 0:
+        return BCRYPT_MAX_COST
+    stopenj = math.floor(math.log2(cilj_ms / 1000 / cas_merilni_s))
+    return min(max(_MERILNI_COST + stopenj, BCRYPT_MIN_COST), BCRYPT_MAX_COST)
+
+
+def kalibriraj(cilj_ms: int = GESLA_CILJ_MS, meri: Callable[[int], float] = _cas_hashiranja) -> int:
+    """Ob zagonu (lifespan) nastavi ceno bcrypt; enkrat na proces. Vrne ceno v veljavi."""
+    global _cost, _kalibrirano
+    if GESLA_BCRYPT_COST or cilj_ms <= 0 or _kalibrirano:
+        return _cost
+    _cost = izberi_cost(meri(_MERILNI_COST), cilj_ms)
+    _kalibrirano = True
+    logger.info("bcrypt cena %d (cilj %d ms)", _cost, cilj_ms)
+    return _cost
+
+
+def bcrypt_cost() -> int:
+    return _cost
+
+
+def hash_v_bazenu(geslo: str) -> str:
+    return _bazen.izvedi(
+        lambda: bcrypt.hashpw(geslo.encode("utf-8"), bcrypt.gensalt(rounds=_cost)).decode("utf-8"),
+    )
+
+
+def preveri_v_bazenu(geslo: str, geslo_hash: str) -> bool:
+    return _bazen.izvedi(lambda: bcrypt.checkpw(geslo.encode("utf-8"), geslo_hash.encode("utf-8")))
+
+
+def potrebuje_nov_hash(geslo_hash: str) -> bool:
+    """True, če je hash izračunan z nižjo ceno, kot je trenutno v veljavi (``$2b$12$...``)."""
+    try:
+        return int(geslo_hash.split("$")[2]) < _cost
+    except (IndexError, ValueError):
+        return False
+
+
+def gesla_metrike() -> dict[str, int]:
+    return {**_bazen.metrike(), "bcrypt_cost": _cost}
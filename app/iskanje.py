@@ -0,0 +1,96 @@
+"""Polnotekstovno iskanje članov (SQLite FTS5 indeks ``clani_fts``).
+
+Indeks je "external content" tabela nad ``clani``; sinhronizirajo ga prožilci
+(migracija 010, v testih pa ``after_create`` dogodek v models.py). Tokenizer
+``unicode61 remove_diacritics 2`` poskrbi, da "sustar" najde "Šuštar".
+Kjer FTS5 ni na voljo (druga baza, SQLite brez FTS5), klicatelji uporabijo LIKE.
+"""
+import re
+import weakref
+
+from sqlalchemy import text, Integer, Float
+from sqlalchemy.orm import Session
+
+FTS_TABELA = "clani_fts"
+FTS_STOLPCI = (
+    "priimek", "ime", "klicni_znak", "elektronska_posta",
+    "naslov_ulica", "naslov_posta", "opombe",
+)
+# Uteži za bm25() v vrstnem redu FTS_STOLPCI – ime in klicni znak štejeta več kot naslov/opombe
+_BM25_UTEZI = "10.0, 5.0, 10.0, 2.0, 1.0, 1.0, 1.0"
+
+_STOLPCI = ", ".join(FTS_STOLPCI)
+_NEW = ", ".join(f"new.{s}" for s in FTS_STOLPCI)
+_OLD = ", ".join(f"old.{s}" for s in FTS_STOLPCI)
+
+FTS_DDL: list[str] = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABELA} USING fts5(
+        {_STOLPCI},
+        content='clani', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS clani_fts_ai AFTER INSERT ON clani BEGIN
+        INSERT INTO {FTS_TABELA}(rowid, {_STOLPCI}) VALUES (new.id, {_NEW});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clani_fts_ad AFTER DELETE ON clani BEGIN
+        INSERT INTO {FTS_TABELA}({FTS_TABELA}, rowid, {_STOLPCI}) VALUES ('delete', old.id, {_OLD});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS clani_fts_au AFTER UPDATE OF {_STOLPCI} ON clani BEGIN
+        INSERT INTO {FTS_TABELA}({FTS_TABELA}, rowid, {_STOLPCI}) VALUES ('delete', old.id, {_OLD});
+        INSERT INTO {FTS_TABELA}(rowid, {_STOLPCI}) VALUES (new.id, {_NEW});
+    END""",
+    f"INSERT INTO {FTS_TABELA}({FTS_TABELA}) VALUES ('rebuild')",
+]
+
+_RE_BESEDA = re.compile(r"\w+", re.UNICODE)
+
+# engine → ali ima baza FTS indeks (preverimo enkrat na engine)
+_na_voljo: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def fts_poizvedba(q: str) -> str | None:
+    """Pretvori uporabniški niz v FTS5 MATCH izraz: vsaka beseda kot predpona, vse obvezne.
+
+    "Novak Jan" → '"Novak"* "Jan"*'. Vrne None, če niz ne vsebuje nobene besede
+    (npr. samo "%"), da klicatelj ne sproži iskanja po celotni tabeli.
+    """
+    besede = _RE_BESEDA.findall(q or "")
+    if not besede:
+        return None
+    return " ".join(f'"{b}"*' for b in besede)
+
+
+def fts_na_voljo(db: Session) -> bool:
+    """Ali ima baza te seje FTS indeks članov."""
+    engine = db.get_bind()
+    if engine not in _na_voljo:
+        if engine.dialect.name != "sqlite":
+            _na_voljo[engine] = False
+        else:
+            _na_voljo[engine] = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :ime"),
+                {"ime": FTS_TABELA},
+            ).first() is not None
+    return _na_voljo[engine]
+
+
+def fts_ids(fts: str):
+    """Podpoizvedba id-jev članov, ki ustrezajo FTS izrazu (za ``Clan.id.in_(...)``)."""
+    return (
+        text(f"SELECT rowid AS id FROM {FTS_TABELA} WHERE {FTS_TABELA} MATCH :fts")
+        .bindparams(fts=fts)
+        .columns(id=Integer)
+    )
+
+
+def fts_rang(fts: str):
+    """Podpoizvedba (id, rang) z bm25 oceno – nižji rang pomeni boljše ujemanje."""
+    return (
+        text(
+            f"SELECT rowid AS id, bm25({FTS_TABELA}, {_BM25_UTEZI}) AS rang "
+            f"FROM {FTS_TABELA} WHERE {FTS_TABELA} MATCH :fts"
+        )
+        .bindparams(fts=fts)
+        .columns(id=Integer, rang=Float)
+        .subquery("fts_rang")
+    )
@@ -1,7 +1,28 @@
-"""Generiranje PDF članske kartice (85.6 × 54 mm)."""
+"""Generiranje PDF članske kartice (85.6 × 54 mm).
+
+Pisavi DejaVu se razčlenita in podmnožita enkrat na proces (``_pisave``):
+izvirni TTF (~6000 znakov) se skrči na latinico, grščino, cirilico in ločila,
+zato ``add_font`` in vdelava pisave v vsak PDF ne obdelujeta celotne pisave.
+Če kartica vsebuje znak izven podmnožice (IPA, puščice …), se v ta PDF dodatno
+dodata celotni pisavi kot nadomestni (``set_fallback_fonts``).
+Prej je to pri vsaki kartici vzelo večino časa (skupinsko pošiljanje s
+``prilozi_kartico`` ga je ponovilo za vsakega prejemnika).
+
+``generiraj_kartice_pdf`` izdela en PDF z več karticami (ena na stran, pisavi
+vdelani enkrat), ``generiraj_kartice`` pa ločen PDF za vsakega člana.
+``generiraj_tiskalno_polo`` razporedi kartice po 10 na list A4 z rezalnimi
+oznakami (za tisk kartic vseh izbranih članov naenkrat).
+"""
+import atexit
 import os
 import re
+import shutil
+import tempfile
+import threading
+from typing import Iterable, Iterator
 
+from fontTools import subset as ft_subset
+from fontTools.ttLib import TTFont
 from fpdf import FPDF
 from sqlalchemy.orm import Session
 
@@ -11,6 +32,15 @@ from .models import Clan
 _FONT_PATH      = os.path.join(os.path.dirname(__file__), "static", "fonts", "DejaVuSans.ttf")
 _FONT_BOLD_PATH = os.path.join(os.path.dirname(__file__), "static", "fonts", "DejaVuSans-Bold.ttf")
 
+# Znaki, ki ostanejo v podmnoženih pisavah: latinica (z razširitvami A/B in
+# Latin Extended Additional – ẞ, vietnamščina), grščina, cirilica, splošna ločila
+# in €. Za ostale znake se uporabita celotni pisavi (``_dodaj_nadomestne``).
+_PISAVE_ZNAKI = [
+    *range(0x20, 0x7F), *range(0xA0, 0x250), *range(0x370, 0x500),
+    *range(0x1E00, 0x1F00), *range(0x2000, 0x2070), 0x20AC,
+]
+_PISAVE_NABOR = frozenset(_PISAVE_ZNAKI)
+
 _KARTICA_POLJA_LABELE: dict[str, str] = {
     "tip_clanstva":       "Tip",
     "operaterski_razred": "Razred",
@@ -20,6 +50,33 @@ _KARTICA_POLJA_LABELE: dict[str, str] = {
 
 _KARTICA_POLJA_PRIVZETO = "klicni_znak,tip_clanstva,operaterski_razred,es_stevilka,veljavnost_rd"
 
+# Postavitev kartice (mm); vse koordinate so relativne na zgornji levi kot kartice
+_W, _H = 85.6, 54.0
+_BLUE      = (0, 70, 127)
+_BLUE_DARK = (0, 50, 100)
+_LIGHT_BG  = (240, 246, 252)
+_GRAY_TEXT = (120, 120, 120)
+_FOOTER_BG = (245, 245, 245)
+
+_HEADER_H = 12.5
+_KZ_BOX_X = _W - 27
+_KZ_BOX_W = 23
+_KZ_BOX_Y = _HEADER_H + 1
+_KZ_BOX_H = 16
+_SEP_Y    = _HEADER_H + _KZ_BOX_H + 1.5
+_FIELDS_Y = _SEP_Y + 1.5
+_ROW_H    = 7.5
+_FOOTER_Y = _H - 7
+
+# Tiskalna pola A4: 2 × 5 kartic brez razmika (en rez loči sosednji kartici)
+KARTIC_NA_STRAN = 10
+_A4_W, _A4_H = 210.0, 297.0
+_POLA_STOLPCI, _POLA_VRSTICE = 2, 5
+_POLA_X = (_A4_W - _POLA_STOLPCI * _W) / 2
+_POLA_Y = (_A4_H - _POLA_VRSTICE * _H) / 2
+_OZNAKA_ODMIK = 2.0    # razmik rezalne oznake od roba kartic (mm)
+_OZNAKA_DOLZINA = 6.0
+
 
 def get_kartica_polja(db: Session) -> list[str]:
     """Prebere seznam polj za kartico iz nastavitev."""
@@ -34,81 +91,177 @@ def kartica_filename(clan: Clan, clan_id: int, leto: int) -> str:
     return f"kartica_{kz_safe}_{leto}.pdf"
 
 
+_pisave_poti: tuple[str, str] | None = None
+_pisave_zaklep = threading.Lock()
+
+
+def _podmnozi_pisavo(vir: str, cilj: str) -> None:
+    pisava = TTFont(vir)
+    moznosti = ft_subset.Options(notdef_outline=True, recommended_glyphs=True, layout_features=[])
+    moznosti.drop_tables += ["GSUB", "GPOS", "GDEF", "kern", "hdmx", "FFTM"]
+    podmnozica = ft_subset.Subsetter(moznosti)
+    podmnozica.populate(unicodes=_PISAVE_ZNAKI)
+    podmnozica.subset(pisava)
+    pisava.save(cilj)
+
+
+def _pisave() -> tuple[str, str]:
+    """Poti do podmnoženih pisav (navadna, krepka); ob prvem klicu v procesu jih pripravi."""
+    global _pisave_poti
+    with _pisave_zaklep:
+        if _pisave_poti is None:
+            mapa = tempfile.mkdtemp(prefix="kartica_pisave_")
+            atexit.register(shutil.rmtree, mapa, True)
+            poti = (os.path.join(mapa, "DejaVuSans.ttf"), os.path.join(mapa, "DejaVuSans-Bold.ttf"))
+            _podmnozi_pisavo(_FONT_PATH, poti[0])
+            _podmnozi_pisavo(_FONT_BOLD_PATH, poti[1])
+            _pisave_poti = poti
+        return _pisave_poti
+
+
+def _nov_pdf(format: tuple[float, float] | str = (_W, _H)) -> FPDF:
+    pisava, pisava_krepka = _pisave()
+    pdf = FPDF(unit="mm", format=format)
+    pdf.set_margins(0, 0, 0)
+    pdf.set_auto_page_break(False)
+    pdf.add_font("DejaVu", style="",  fname=pisava)
+    pdf.add_font("DejaVu", style="B", fname=pisava_krepka)
+    return pdf
+
+
+def _dodaj_nadomestne(pdf: FPDF, *besedila: str | None) -> None:
+    """Če besedilo vsebuje znak izven podmnožice, doda celotni pisavi kot nadomestni (enkrat na PDF)."""
+    if "dejavucelotna" in pdf.fonts:
+        return
+    if all(ord(z) in _PISAVE_NABOR for b in besedila if b for z in b):
+        return
+    pdf.add_font("DejaVuCelotna", style="",  fname=_FONT_PATH)
+    pdf.add_font("DejaVuCelotna", style="B", fname=_FONT_BOLD_PATH)
+    pdf.set_fallback_fonts(["DejaVuCelotna"])
+
+
 def generiraj_kartico_pdf(clan: Clan, leto: int, klub_ime: str,
                            klub_oznaka: str, polja: list[str]) -> bytes:
     """Generira PDF člansko kartico formata 85.6 × 54 mm."""
-    W, H = 85.6, 54.0
-    BLUE      = (0, 70, 127)
-    BLUE_DARK = (0, 50, 100)
-    LIGHT_BG  = (240, 246, 252)
-    GRAY_TEXT = (120, 120, 120)
-    FOOTER_BG = (245, 245, 245)
-
-    pdf = FPDF(unit="mm", format=(W, H))
-    pdf.set_margins(0, 0, 0)
-    pdf.set_auto_page_break(False)
-    pdf.add_font("DejaVu",     style="",  fname=_FONT_PATH)
-    pdf.add_font("DejaVuBold", style="",  fname=_FONT_BOLD_PATH)
+    pdf = _nov_pdf()
     pdf.add_page()
+    _narisi_kartico(pdf, clan, leto, klub_ime, klub_oznaka, polja)
+    return bytes(pdf.output())
+
 
-    HEADER_H = 12.5
-    KZ_BOX_X = W - 27
-    KZ_BOX_W = 23
-    KZ_BOX_Y = HEADER_H + 1
-    KZ_BOX_H = 16
-    SEP_Y    = HEADER_H + KZ_BOX_H + 1.5
-    FIELDS_Y = SEP_Y + 1.5
-    ROW_H    = 7.5
-    FOOTER_Y = H - 7
+def generiraj_kartice_pdf(clani: Iterable[Clan], leto: int, klub_ime: str,
+                          klub_oznaka: str, polja: list[str]) -> bytes:
+    """En PDF z vsemi karticami (ena kartica na stran, pisavi vdelani samo enkrat)."""
+    pdf = _nov_pdf()
+    for clan in clani:
+        pdf.add_page()
+        _narisi_kartico(pdf, clan, leto, klub_ime, klub_oznaka, polja)
+    return bytes(pdf.output())
+
+
+def generiraj_tiskalno_polo(clani: Iterable[Clan], leto: int, klub_ime: str,
+                            klub_oznaka: str, polja: list[str]) -> bytes:
+    """PDF A4 s ``KARTIC_NA_STRAN`` karticami na list in rezalnimi oznakami na robovih."""
+    pdf = _nov_pdf("A4")
+    na_strani = 0
+    for clan in clani:
+        if na_strani == KARTIC_NA_STRAN:
+            na_strani = 0
+        if na_strani == 0:
+            pdf.add_page()
+        stolpec, vrstica = na_strani % _POLA_STOLPCI, na_strani // _POLA_STOLPCI
+        _narisi_kartico(pdf, clan, leto, klub_ime, klub_oznaka, polja,
+                        _POLA_X + stolpec * _W, _POLA_Y + vrstica * _H)
+        na_strani += 1
+        if na_strani == KARTIC_NA_STRAN:
+            _narisi_rezalne_oznake(pdf, _POLA_VRSTICE)
+    if 0 < na_strani < KARTIC_NA_STRAN:
+        _narisi_rezalne_oznake(pdf, (na_strani + _POLA_STOLPCI - 1) // _POLA_STOLPCI)
+    if pdf.page == 0:
+        pdf.add_page()
+    return bytes(pdf.output())
+
+
+def _narisi_rezalne_oznake(pdf: FPDF, vrstic: int) -> None:
+    """Kratke črte v robu lista na podaljških vseh rezov (brez črt čez kartice)."""
+    x_rezi = [_POLA_X + i * _W for i in range(_POLA_STOLPCI + 1)]
+    y_rezi = [_POLA_Y + i * _H for i in range(vrstic + 1)]
+    zgoraj, spodaj = y_rezi[0] - _OZNAKA_ODMIK, y_rezi[-1] + _OZNAKA_ODMIK
+    levo, desno = x_rezi[0] - _OZNAKA_ODMIK, x_rezi[-1] + _OZNAKA_ODMIK
+    pdf.set_draw_color(0, 0, 0)
+    pdf.set_line_width(0.15)
+    for x in x_rezi:
+        pdf.line(x, zgoraj - _OZNAKA_DOLZINA, x, zgoraj)
+        pdf.line(x, spodaj, x, spodaj + _OZNAKA_DOLZINA)
+    for y in y_rezi:
+        pdf.line(levo - _OZNAKA_DOLZINA, y, levo, y)
+        pdf.line(desno, y, desno + _OZNAKA_DOLZINA, y)
+
+
+def generiraj_kartice(clani: Iterable[Clan], leto: int, klub_ime: str,
+                      klub_oznaka: str, polja: list[str]) -> Iterator[tuple[str, bytes]]:
+    """Ločen PDF za vsakega člana: zaporedje (ime datoteke, PDF)."""
+    for clan in clani:
+        yield (kartica_filename(clan, clan.id, leto),
+               generiraj_kartico_pdf(clan, leto, klub_ime, klub_oznaka, polja))
+
+
+def _narisi_kartico(pdf: FPDF, clan: Clan, leto: int, klub_ime: str, klub_oznaka: str,
+                    polja: list[str], x0: float = 0.0, y0: float = 0.0) -> None:
+    """Nariše eno kartico z zgornjim levim kotom v (x0, y0) na trenutno stran."""
+    W, HEADER_H, FOOTER_Y = _W, _HEADER_H, _FOOTER_Y
+    _dodaj_nadomestne(pdf, klub_ime, klub_oznaka, clan.klicni_znak, clan.priimek, clan.ime,
+                      *(str(getattr(clan, polje, None) or "") for polje in polja))
+    KZ_BOX_X, KZ_BOX_Y, KZ_BOX_W, KZ_BOX_H = x0 + _KZ_BOX_X, y0 + _KZ_BOX_Y, _KZ_BOX_W, _KZ_BOX_H
 
     # ── Header ──────────────────────────────────────────────────────────────
-    pdf.set_fill_color(*BLUE)
-    pdf.rect(0, 0, W, HEADER_H, "F")
-    pdf.set_draw_color(*BLUE_DARK)
+    pdf.set_fill_color(*_BLUE)
+    pdf.rect(x0, y0, W, HEADER_H, "F")
+    pdf.set_draw_color(*_BLUE_DARK)
     pdf.set_line_width(0.3)
-    pdf.line(0, HEADER_H, W, HEADER_H)
+    pdf.line(x0, y0 + HEADER_H, x0 + W, y0 + HEADER_H)
 
     pdf.set_text_color(255, 255, 255)
-    pdf.set_font("DejaVuBold", size=8)
-    pdf.set_xy(4, (HEADER_H - 5) / 2)
-    pdf.cell(KZ_BOX_X - 6, HEADER_H, (klub_ime or "Radio klub").upper()[:36])
+    pdf.set_font("DejaVu", "B", size=8)
+    pdf.set_xy(x0 + 4, y0 + (HEADER_H - 5) / 2)
+    pdf.cell(_KZ_BOX_X - 6, HEADER_H, (klub_ime or "Radio klub").upper()[:36])
     if klub_oznaka:
-        pdf.set_font("DejaVuBold", size=9)
-        pdf.set_xy(W - 25, (HEADER_H - 5) / 2)
+        pdf.set_font("DejaVu", "B", size=9)
+        pdf.set_xy(x0 + W - 25, y0 + (HEADER_H - 5) / 2)
         pdf.cell(21, HEADER_H, klub_oznaka[:10], align="R")
 
     # ── Klicni znak – izstopajoč box (desno) ────────────────────────────────
     kz = clan.klicni_znak if clan.klicni_znak and clan.klicni_znak != "–" else None
 
     if kz:
-        pdf.set_fill_color(*LIGHT_BG)
-        pdf.set_draw_color(*BLUE)
+        pdf.set_fill_color(*_LIGHT_BG)
+        pdf.set_draw_color(*_BLUE)
         pdf.set_line_width(0.5)
         pdf.rect(KZ_BOX_X, KZ_BOX_Y, KZ_BOX_W, KZ_BOX_H, "FD")
-        pdf.set_text_color(*GRAY_TEXT)
+        pdf.set_text_color(*_GRAY_TEXT)
         pdf.set_font("DejaVu", size=6)
         pdf.set_xy(KZ_BOX_X, KZ_BOX_Y + 1.5)
         pdf.cell(KZ_BOX_W, 3.5, "klicni znak", align="C")
-        pdf.set_text_color(*BLUE)
-        pdf.set_font("DejaVuBold", size=12)
+        pdf.set_text_color(*_BLUE)
+        pdf.set_font("DejaVu", "B", size=12)
         pdf.set_xy(KZ_BOX_X, KZ_BOX_Y + 5.5)
         pdf.cell(KZ_BOX_W, 8, kz[:10], align="C")
 
     # ── Priimek in ime (levo, dve vrstici) ──────────────────────────────────
-    ime_w = (KZ_BOX_X - 6) if kz else (W - 8)
+    ime_w = (_KZ_BOX_X - 6) if kz else (W - 8)
     pdf.set_text_color(20, 20, 20)
-    pdf.set_font("DejaVuBold", size=11)
-    pdf.set_xy(4, HEADER_H + 2)
+    pdf.set_font("DejaVu", "B", size=11)
+    pdf.set_xy(x0 + 4, y0 + HEADER_H + 2)
     pdf.cell(ime_w, 6.5, clan.priimek[:22])
     pdf.set_font("DejaVu", size=9.5)
     pdf.set_text_color(50, 50, 50)
-    pdf.set_xy(4, HEADER_H + 8)
+    pdf.set_xy(x0 + 4, y0 + HEADER_H + 8)
     pdf.cell(ime_w, 6, clan.ime[:22])
 
     # ── Ločilna črta ────────────────────────────────────────────────────────
     pdf.set_draw_color(190, 210, 230)
     pdf.set_line_width(0.25)
-    pdf.line(4, SEP_Y, W - 4, SEP_Y)
+    pdf.line(x0 + 4, y0 + _SEP_Y, x0 + W - 4, y0 + _SEP_Y)
 
     # ── Konfigurabilna polja ─────────────────────────────────────────────────
     aktivna_polja = []
@@ -127,28 +280,26 @@ def generiraj_kartico_pdf(clan: Clan, leto: int, klub_ime: str,
     for i, (label, vrednost) in enumerate(aktivna_polja[:4]):
         col = i % 2
         row = i // 2
-        x = 4 + col * col_w
-        y = FIELDS_Y + row * ROW_H
-        if y + ROW_H > FOOTER_Y:
+        x = x0 + 4 + col * col_w
+        y = _FIELDS_Y + row * _ROW_H
+        if y + _ROW_H > FOOTER_Y:
             break
-        pdf.set_text_color(*GRAY_TEXT)
+        pdf.set_text_color(*_GRAY_TEXT)
         pdf.set_font("DejaVu", size=6.5)
-        pdf.set_xy(x, y)
+        pdf.set_xy(x, y0 + y)
         pdf.cell(col_w, 3, f"{label}:")
         pdf.set_text_color(20, 20, 20)
         pdf.set_font("DejaVu", size=7.5)
-        pdf.set_xy(x, y + 3)
+        pdf.set_xy(x, y0 + y + 3)
         pdf.cell(col_w, 4, vrednost[:24])
 
     # ── Footer ───────────────────────────────────────────────────────────────
-    pdf.set_fill_color(*FOOTER_BG)
-    pdf.rect(0, FOOTER_Y, W, 7, "F")
+    pdf.set_fill_color(*_FOOTER_BG)
+    pdf.rect(x0, y0 + FOOTER_Y, W, 7, "F")
     pdf.set_draw_color(200, 205, 215)
     pdf.set_line_width(0.2)
-    pdf.line(0, FOOTER_Y, W, FOOTER_Y)
-    pdf.set_text_color(*GRAY_TEXT)
+    pdf.line(x0, y0 + FOOTER_Y, x0 + W, y0 + FOOTER_Y)
+    pdf.set_text_color(*_GRAY_TEXT)
     pdf.set_font("DejaVu", size=6.5)
-    pdf.set_xy(4, FOOTER_Y + 1.5)
-    pdf.cell(0, 4, f"Članska izkaznica {leto}")
-
-    return bytes(pdf.output())
+    pdf.set_xy(x0 + 4, y0 + FOOTER_Y + 1.5)
+    pdf.cell(W - 8, 4, f"Članska izkaznica {leto}")
@@ -1,4 +1,4 @@
-import glob
+import asyncio
 import os
 import time
 import hashlib
@@ -7,14 +7,17 @@ import logging
 from logging.handlers import RotatingFileHandler
 from contextlib import asynccontextmanager
 from datetime import datetime, timezone, timedelta
+from typing import Mapping
 
 from alembic.config import Config as AlembicConfig
 from alembic import command as alembic_command
 
+import anyio
 import pyotp
 from fastapi import FastAPI, Request, Form, Depends
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from fastapi.responses import RedirectResponse, HTMLResponse, Response
+from fastapi.responses import RedirectResponse, HTMLResponse, PlainTextResponse, Response
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
@@ -23,11 +26,21 @@ from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from sqlalchemy import inspect as sa_inspect
 from .database import engine, SessionLocal, get_db
-from .models import Base, Uporabnik, Nastavitev, ZaupljivaNaprava, LoginPoizkus, TIPI_CLANSTVA_PRIVZETO, OPERATERSKI_RAZREDI_PRIVZETO, VLOGE_CLANOV_PRIVZETO
+from .sqlite_profil import periodicno_vzdrzevanje, VZDRZEVANJE_INTERVAL_S
+from .uvoz_seje import periodicno_ciscenje
+from .upn import periodicno_ciscenje_diska, UPN_CACHE_DIR
+from .smtp_bazen import zapri_smtp_povezave
+from .email_vrsta import zazeni_delavca, ustavi_delavca
+from .models import Base, Uporabnik, Nastavitev, ZaupljivaNaprava, TIPI_CLANSTVA_PRIVZETO, OPERATERSKI_RAZREDI_PRIVZETO, VLOGE_CLANOV_PRIVZETO
 from .auth import hash_geslo, preveri_geslo
+from .gesla_bazen import BazenZaseden, kalibriraj, potrebuje_nov_hash
 from .csrf import get_csrf_token, csrf_protect
-from .audit_log import log_akcija
+from .audit_log import log_akcija, zazeni_pisalnik, ustavi_pisalnik
 from .email_predloge_seed import seed_predloge
+from .statistika import obnovi_ce_prazna
+from .omejitev_prijav import (prijava_dovoljena, zabelezi_neuspeh, nalozi_poskuse, shrani_poskuse,
+                              periodicno_shranjevanje)
+from .config import nastavitve_slovar, nastavitve_iz_predpomnilnika
 from .routers import clani, clanarine, izvoz, uporabniki, nastavitve, profil, aktivnosti, skupine, audit, dashboard, vloge, upn, obvestila as obvestila_router
 
 logger = logging.getLogger(__name__)
@@ -72,11 +85,13 @@ PRIVZETE_NASTAVITVE = {
     "smtp_od": ("", "Naslov pošiljatelja"),
 }
 
-_MAX_ATTEMPTS = 10        # max neuspešnih prijav
-_LOCKOUT_SECONDS = 900    # zaklepanje 15 minut
 _INACTIVITY_SECONDS = 30 * 60  # iztok seje ob neaktivnosti (30 min)
 _MAX_BODY_BYTES = 1 * 1024 * 1024  # max velikost normalnega POST zahtevka (1 MB)
 
+# Velikost skupnega threadpoola (anyio), v katerem tečejo sinhroni (def) handlerji
+# in blokirajoči odseki async handlerjev (run_in_threadpool)
+_THREADPOOL_NITI = int(os.getenv("THREADPOOL_NITI", "40"))
+
 
 # ---------------------------------------------------------------------------
 # Varnostni headers middleware
@@ -143,33 +158,34 @@ class InactivityTimeoutMiddleware(BaseHTTPMiddleware):
 
 
 class KlubContextMiddleware(BaseHTTPMiddleware):
-    """Na vsako zahtevo doda request.state.klub_oznaka/klub_ime iz baze in statične app podatke."""
+    """Na vsako zahtevo doda request.state.klub_oznaka/klub_ime iz nastavitev in statične app podatke.
+
+    Nastavitve pridejo iz predpomnilnika (config.nastavitve_slovar), ki ga vsak
+    commit nastavitev razveljavi – baza se bere samo ob prvi zahtevi po spremembi.
+    """
 
     _SKIP_PATHS_PREFIX = ("/static/",)
-    _cache: dict = {"oznaka": "", "ime": "", "ts": 0.0}
-    _CACHE_TTL = 60  # sekund
+
+    @staticmethod
+    def _nalozi() -> Mapping[str, str]:
+        """Naloži nastavitve v predpomnilnik (blokirajoče – kliče se prek threadpoola)."""
+        db = SessionLocal()
+        try:
+            return nastavitve_slovar(db)
+        except Exception:
+            return {}
+        finally:
+            db.close()
 
     async def dispatch(self, request: Request, call_next):
         path = request.url.path
-        skip_db = any(path.startswith(p) for p in self._SKIP_PATHS_PREFIX)
-
-        if not skip_db:
-            now = time.time()
-            if now - self._cache["ts"] > self._CACHE_TTL:
-                db = SessionLocal()
-                try:
-                    oznaka = db.query(Nastavitev).filter(Nastavitev.kljuc == "klub_oznaka").first()
-                    ime = db.query(Nastavitev).filter(Nastavitev.kljuc == "klub_ime").first()
-                    self._cache["oznaka"] = oznaka.vrednost if oznaka else ""
-                    self._cache["ime"] = ime.vrednost if ime else ""
-                    self._cache["ts"] = now
-                except Exception:
-                    pass
-                finally:
-                    db.close()
+        nas = nastavitve_iz_predpomnilnika(engine)
+        if nas is None:
+            skip_db = any(path.startswith(p) for p in self._SKIP_PATHS_PREFIX)
+            nas = {} if skip_db else await run_in_threadpool(self._nalozi)
 
-        request.state.klub_oznaka = self._cache["oznaka"]
-        request.state.klub_ime = self._cache["ime"]
+        request.state.klub_oznaka = nas.get("klub_oznaka") or ""
+        request.state.klub_ime = nas.get("klub_ime") or ""
         request.state.app_version = APP_VERSION
         request.state.app_release_date = APP_RELEASE_DATE
         request.state.app_license = APP_LICENSE
@@ -177,30 +193,13 @@ class KlubContextMiddleware(BaseHTTPMiddleware):
 
 
 # ---------------------------------------------------------------------------
-# Rate limiting za prijavo
+# Zaupljive naprave (2FA)
 # ---------------------------------------------------------------------------
 
 def _device_token_hash(token: str) -> str:
     return hashlib.sha256(token.encode()).hexdigest()
 
 
-def _check_rate_limit(ip: str, db: Session) -> bool:
-    """Vrne True če je IP dovoljen, False če je zaklenjen. Sproti čisti stare vnose."""
-    cutoff = datetime.now(timezone.utc) - timedelta(seconds=_LOCKOUT_SECONDS)
-    db.query(LoginPoizkus).filter(LoginPoizkus.cas < cutoff).delete(synchronize_session=False)
-    db.commit()
-    count = db.query(LoginPoizkus).filter(
-        LoginPoizkus.ip == ip,
-        LoginPoizkus.cas >= cutoff,
-    ).count()
-    return count < _MAX_ATTEMPTS
-
-
-def _record_failed_login(ip: str, db: Session) -> None:
-    db.add(LoginPoizkus(ip=ip, cas=datetime.now(timezone.utc)))
-    db.commit()
-
-
 # ---------------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------------
@@ -249,15 +248,14 @@ def _run_migrations() -> None:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Model izvajanja: handlerji z DB/bcrypt/openpyxl/smtplib so sinhroni (def) in jih
+    # FastAPI izvaja v omejenem threadpoolu, zato event loop ostane odziven
+    anyio.to_thread.current_default_thread_limiter().total_tokens = _THREADPOOL_NITI
     os.makedirs("data", exist_ok=True)
-    # Počisti zaostale začasne datoteke iz prejšnjih sej uvoza
-    for _f in glob.glob("data/tmp/*.xlsx") + glob.glob("data/tmp/akos_api_*.json"):
-        try:
-            os.remove(_f)
-        except OSError:
-            pass
     _nastavi_logging()
     _run_migrations()
+    # Cena bcrypt glede na hitrost strežnika (GESLA_CILJ_MS), enkrat na proces
+    kalibriraj()
     db = SessionLocal()
     try:
         if db.query(Uporabnik).count() == 0:
@@ -283,13 +281,54 @@ async def lifespan(app: FastAPI):
         db.commit()
 
         seed_predloge(db)
+        # Materializirana statistika (statistika_leto/statistika_tip) – po migraciji 014 prazna
+        if obnovi_ce_prazna(db):
+            logger.info("Statistika po letu in tipu članstva obnovljena.")
+        # Neuspele prijave zadnjih 15 minut (zaklep IP-jev velja tudi po ponovnem zagonu)
+        nalozi_poskuse(db)
     finally:
         db.close()
+
+    # Periodični wal_checkpoint(TRUNCATE) + PRAGMA optimize (WAL datoteka ne raste brez meje)
+    vzdrzevanje = None
+    if VZDRZEVANJE_INTERVAL_S > 0:
+        vzdrzevanje = asyncio.create_task(periodicno_vzdrzevanje(engine))
+    # Pretečene seje uvoza (predogled → potrditev) se brišejo ob zagonu in nato periodično
+    ciscenje = asyncio.create_task(periodicno_ciscenje())
+    # Izrisi UPN QR na disku (ime in naslov plačnika) imajo omejeno starost in število
+    ciscenje_upn = asyncio.create_task(periodicno_ciscenje_diska()) if UPN_CACHE_DIR else None
+    # Neuspele prijave se štejejo v pomnilniku, v login_poskusi se zapisujejo v paketih
+    shranjevanje = asyncio.create_task(periodicno_shranjevanje(engine))
+    # Audit vnosi gredo v vrsto in se zapisujejo v paketih (nit v ozadju)
+    zazeni_pisalnik(engine)
+    # Skupinsko pošiljanje obvestil (email_outbox) – nadaljuje tudi opravila, prekinjena ob zaustavitvi
+    zazeni_delavca(engine)
     yield
+    for opravilo in (vzdrzevanje, ciscenje, ciscenje_upn, shranjevanje):
+        if opravilo is None:
+            continue
+        opravilo.cancel()
+        try:
+            await opravilo
+        except asyncio.CancelledError:
+            pass
+    # Delavec konča trenutno sporočilo; neposlani prejemniki ostanejo v email_outbox
+    await run_in_threadpool(ustavi_delavca)
+    # Zapiše še nezapisane audit vnose, preden se proces ustavi
+    await run_in_threadpool(ustavi_pisalnik)
+    await run_in_threadpool(shrani_poskuse, engine)
+    await run_in_threadpool(zapri_smtp_povezave)
 
 
 app = FastAPI(title="Radio klub Člani", lifespan=lifespan)
 
+
+@app.exception_handler(BazenZaseden)
+async def bazen_gesel_zaseden(request: Request, exc: BazenZaseden) -> Response:
+    """Preveč hkratnih izračunov gesel (bcrypt) – 503 namesto čakanja v skupnem threadpoolu."""
+    return PlainTextResponse("Strežnik je preobremenjen. Poskusite znova čez nekaj sekund.",
+                             status_code=503, headers={"Retry-After": "5"})
+
 # Varnostni headers (pred session middleware)
 app.add_middleware(SecurityHeadersMiddleware)
 
@@ -359,7 +398,7 @@ async def login_stran(request: Request) -> Response:
 
 
 @app.post("/login", response_class=HTMLResponse)
-async def login(
+def login(
     request: Request,
     uporabnisko_ime: str = Form(...),
     geslo: str = Form(...),
@@ -369,7 +408,7 @@ async def login(
     ip = request.client.host if request.client else "unknown"
 
     # Rate limiting
-    if not _check_rate_limit(ip, db):
+    if not prijava_dovoljena(ip):
         logger.warning(f"Preveč poskusov prijave z IP {ip}")
         return templates.TemplateResponse(
             request,
@@ -387,9 +426,26 @@ async def login(
     )
 
     # Vedno preverimo geslo (preprečimo timing attack)
-    geslo_ok = preveri_geslo(geslo, u.geslo_hash) if u else False
+    try:
+        geslo_ok = preveri_geslo(geslo, u.geslo_hash) if u else False
+    except BazenZaseden:
+        logger.warning(f"Bazen gesel zaseden – prijava z IP {ip} zavrnjena")
+        return templates.TemplateResponse(
+            request,
+            "login.html",
+            {"request": request, "napaka": "Strežnik je trenutno preobremenjen. Poskusite znova čez nekaj sekund."},
+            status_code=503,
+            headers={"Retry-After": "5"},
+        )
 
     if u and geslo_ok:
+        # Hash z nižjo ceno bcrypt, kot je v veljavi, preračunamo (geslo je zdaj na voljo)
+        if potrebuje_nov_hash(u.geslo_hash):
+            try:
+                u.geslo_hash = hash_geslo(geslo)
+                db.commit()
+            except BazenZaseden:
+                pass
         if u.totp_aktiven and u.totp_skrivnost:
             # Preveri ali je naprava zaupljiva (zapomni si me)
             device_token = request.cookies.get("_2fa_device")
@@ -433,7 +489,7 @@ async def login(
         log_akcija(db, uporabnisko_ime, "login_ok", f"Prijava: {uporabnisko_ime}", ip=ip)
         return RedirectResponse(url="/clani", status_code=302)
 
-    _record_failed_login(ip, db)
+    zabelezi_neuspeh(ip)
     logger.warning(f"Neuspešna prijava: {uporabnisko_ime} ({ip})")
     log_akcija(db, uporabnisko_ime, "login_fail", f"Neuspešna prijava: {uporabnisko_ime}", ip=ip)
     return templates.TemplateResponse(
@@ -451,7 +507,7 @@ async def login_2fa_stran(request: Request) -> Response:
 
 
 @app.post("/login/2fa", response_class=HTMLResponse)
-async def login_2fa(
+def login_2fa(
     request: Request,
     koda: str = Form(...),
     zapomni_naprava: str = Form(""),
@@ -464,7 +520,7 @@ async def login_2fa(
 
     ip = request.client.host if request.client else "unknown"
 
-    if not _check_rate_limit(ip, db):
+    if not prijava_dovoljena(ip):
         return templates.TemplateResponse(
             request,
             "login-2fa.html",
@@ -508,7 +564,7 @@ async def login_2fa(
             log_akcija(db, uporabnisko_ime, "login_2fa_zaupljiva_nova", "Nova zaupljiva naprava shranjena", ip=ip)
         return response
 
-    _record_failed_login(ip, db)
+    zabelezi_neuspeh(ip)
     logger.warning(f"Napačna 2FA koda: {uporabnisko_ime} ({ip})")
     log_akcija(db, uporabnisko_ime, "login_2fa_napaka", f"Napačna 2FA koda: {uporabnisko_ime}", ip=ip)
     return templates.TemplateResponse(
@@ -519,7 +575,7 @@ async def login_2fa(
 
 
 @app.get("/logout")
-async def logout(request: Request) -> RedirectResponse:
+def logout(request: Request) -> RedirectResponse:
     uporabnik_info = request.session.get("uporabnik")
     username = uporabnik_info.get("uporabnisko_ime") if uporabnik_info else None
     ip = request.client.host if request.client else None
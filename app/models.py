@@ -1,9 +1,10 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Float, ForeignKey, Table, Index, Text
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Float, ForeignKey, Table, Index, Text, DDL, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
+from .iskanje import FTS_DDL
 
 
 # Asociacijska tabela za many-to-many: Clan ↔ Skupina
@@ -61,6 +62,8 @@ class Clan(Base):
     opombe = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Žig različice za predpomnilnik strani člana (fragmenti_clana.oznaci_spremembo)
+    verzija = Column(Integer, nullable=False, default=0, server_default="0")
 
     clanarine = relationship("Clanarina", back_populates="clan", cascade="all, delete-orphan",
                              order_by="Clanarina.leto.desc()")
@@ -71,6 +74,11 @@ class Clan(Base):
                          order_by="ClanVloga.datum_od.desc()")
 
 
+# FTS5 indeks članov za create_all (testi, nove baze brez Alembic); v produkciji ga ustvari migracija 010
+for _stavek in FTS_DDL:
+    event.listen(Clan.__table__, "after_create", DDL(_stavek).execute_if(dialect="sqlite"))
+
+
 class Clanarina(Base):
     __tablename__ = "clanarine"
 
@@ -79,10 +87,17 @@ class Clanarina(Base):
     leto = Column(Integer, nullable=False, index=True)
     datum_placila = Column(Date, nullable=True)
     znesek = Column(String, nullable=True)
+    znesek_centi = Column(Integer, nullable=True)  # znesek_v_cente(znesek); None = brez ali neberljiv znesek
     opombe = Column(String, nullable=True)
 
     clan = relationship("Clan", back_populates="clanarine")
 
+    __table_args__ = (
+        Index("ix_clanarine_leto_clan_id", "leto", "clan_id"),
+        # En vnos na člana in leto – cilj ON CONFLICT pri uvozu plačil
+        Index("ux_clanarine_clan_id_leto", "clan_id", "leto", unique=True),
+    )
+
 
 class Aktivnost(Base):
     __tablename__ = "aktivnosti"
@@ -188,3 +203,61 @@ class EmailPredloga(Base):
     vkljuci_qr = Column(Boolean, default=False, nullable=False)
     prilozi_kartico = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class EmailOpravilo(Base):
+    """Skupinsko pošiljanje obvestil, ki ga obdelujejo delavci v ozadju (``email_vrsta``)."""
+    __tablename__ = "email_opravila"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ustvarjeno = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    koncano = Column(DateTime(timezone=True), nullable=True)
+    uporabnik = Column(String, nullable=True)
+    bulk_filter = Column(String, nullable=False)
+    leto = Column(Integer, nullable=False)
+    zadeva = Column(String, nullable=False)
+    telo_html = Column(Text, nullable=False)
+    vkljuci_qr = Column(Boolean, default=False, nullable=False)
+    prilozi_kartico = Column(Boolean, default=False, nullable=False)
+    stanje = Column(String, default="caka", nullable=False)  # caka | v_teku | koncano | napaka
+    napaka = Column(String, nullable=True)
+
+
+class EmailOutbox(Base):
+    """En prejemnik skupinskega pošiljanja s stanjem in ponovnimi poskusi."""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    opravilo_id = Column(Integer, ForeignKey("email_opravila.id", ondelete="CASCADE"), nullable=False)
+    clan_id = Column(Integer, nullable=True)  # brez FK: član je lahko do pošiljanja že izbrisan
+    prejemnik = Column(String, nullable=False)
+    naslov = Column(String, nullable=True)
+    stanje = Column(String, default="caka", nullable=False)  # caka | poslano | napaka | preskoceno
+    poskusi = Column(Integer, default=0, nullable=False)
+    naslednji_poskus = Column(DateTime(timezone=True), nullable=True)
+    poslano_ob = Column(DateTime(timezone=True), nullable=True)
+    napaka = Column(String, nullable=True)
+
+    __table_args__ = (Index("ix_email_outbox_opravilo_stanje", "opravilo_id", "stanje"),)
+
+
+class StatistikaLeto(Base):
+    """Materializirani seštevki po letu (``statistika``) – vzdržujejo jih pisalne poti."""
+    __tablename__ = "statistika_leto"
+
+    leto = Column(Integer, primary_key=True)
+    placniki = Column(Integer, default=0, nullable=False)       # članarine z datumom plačila
+    skupaj_centi = Column(Integer, default=0, nullable=False)   # vsota zneskov plačanih članarin
+    brez_zneska = Column(Integer, default=0, nullable=False)    # plačane brez zneska ali z neberljivim
+    neberljivi = Column(Integer, default=0, nullable=False)     # od tega neberljiv znesek (npr. "25 EUR/2")
+    aktivnosti = Column(Integer, default=0, nullable=False)
+    ure = Column(Float, default=0.0, nullable=False)
+
+
+class StatistikaTip(Base):
+    """Materializirano število članov po tipu članstva (``statistika``)."""
+    __tablename__ = "statistika_tip"
+
+    tip_clanstva = Column(String, primary_key=True)
+    aktivni = Column(Integer, default=0, nullable=False)
+    vsi = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,175 @@
+"""Omejevanje neuspešnih prijav po IP naslovu (drseče okno v pomnilniku).
+
+Prej je vsaka prijava in vsak 2FA poskus izvedel DELETE pretečenih
+``login_poskusi``, COMMIT in COUNT, neuspešna prijava pa še en INSERT s
+COMMIT – napad z ugibanjem gesel je postal nevihta pisanj v isto SQLite
+datoteko, iz katere beremo člane. Zdaj je števec v pomnilniku: za vsak IP
+``deque`` časov zadnjih ``MAX_POSKUSOV`` neuspehov (več jih za odločitev ni
+treba), IP-ji pa so v LRU z največ ``OMEJITEV_IP`` vnosi – ob prekoračitvi
+izpade IP, ki najdlje ni poskusil.
+
+Pravilo zaklepa ostaja: ``MAX_POSKUSOV`` neuspehov v zadnjih ``ZAKLEP_S``
+sekundah zaklene IP (prijava in 2FA si delita števec). Tabela
+``login_poskusi`` služi samo še za obstojnost: neuspehi se zapisujejo v
+paketih v ozadju (``periodicno_shranjevanje``, ob zaustavitvi še zadnjič),
+ob zagonu pa ``nalozi_poskuse`` iz nje obnovi okno.
+
+Metrike (``omejitev_metrike``) so vidne v ``/nastavitve/diagnostika``.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from .models import LoginPoizkus
+
+logger = logging.getLogger(__name__)
+
+MAX_POSKUSOV = 10        # max neuspešnih prijav
+ZAKLEP_S = 900           # zaklepanje 15 minut
+OMEJITEV_IP = int(os.getenv("OMEJITEV_IP", "10000"))
+OMEJITEV_INTERVAL_S = int(os.getenv("OMEJITEV_INTERVAL_S", "10"))
+
+
+class OmejevalnikPrijav:
+    """Drseče okno neuspelih prijav po IP, varno za niti."""
+
+    def __init__(self, max_poskusov: int = MAX_POSKUSOV, okno_s: int = ZAKLEP_S,
+                 najvec_ip: int = OMEJITEV_IP):
+        self.max_poskusov = max_poskusov
+        self.okno_s = okno_s
+        self.najvec_ip = max(najvec_ip, 1)
+        self._poskusi: OrderedDict[str, deque[float]] = OrderedDict()
+        # Neuspehi, ki še niso zapisani v login_poskusi (ob nedelujoči bazi omejeno)
+        self._za_zapis: deque[tuple[str, float]] = deque(maxlen=self.najvec_ip)
+        self._zaklep = threading.Lock()
+        self._metrike = {"neuspehi": 0, "zavrnjeni": 0, "izpadi": 0, "zapisani": 0, "napake": 0}
+
+    def _v_oknu(self, casi: deque[float], zdaj: float) -> int:
+        meja = zdaj - self.okno_s
+        while casi and casi[0] < meja:
+            casi.popleft()
+        return len(casi)
+
+    def dovoljen(self, ip: str, zdaj: float | None = None) -> bool:
+        """Vrne True, če IP ni zaklenjen."""
+        zdaj = time.time() if zdaj is None else zdaj
+        with self._zaklep:
+            casi = self._poskusi.get(ip)
+            if casi is None or self._v_oknu(casi, zdaj) < self.max_poskusov:
+                return True
+            self._metrike["zavrnjeni"] += 1
+            return False
+
+    def zabelezi(self, ip: str, cas: float | None = None) -> None:
+        """Zabeleži neuspešno prijavo (v pomnilnik in v vrsto za zapis)."""
+        cas = time.time() if cas is None else cas
+        with self._zaklep:
+            self._dodaj(ip, cas)
+            self._za_zapis.append((ip, cas))
+            self._metrike["neuspehi"] += 1
+
+    def _dodaj(self, ip: str, cas: float) -> None:
+        casi = self._poskusi.get(ip)
+        if casi is None:
+            casi = self._poskusi[ip] = deque(maxlen=self.max_poskusov)
+        casi.append(cas)
+        self._poskusi.move_to_end(ip)
+        while len(self._poskusi) > self.najvec_ip:
+            self._poskusi.popitem(last=False)
+            self._metrike["izpadi"] += 1
+
+    def nalozi(self, db: Session, zdaj: float | None = None) -> int:
+        """Obnovi okno iz ``login_poskusi`` (lifespan). Vrne število naloženih poskusov."""
+        zdaj = time.time() if zdaj is None else zdaj
+        meja = datetime.fromtimestamp(zdaj - self.okno_s, timezone.utc)
+        vrstice = (
+            db.query(LoginPoizkus.ip, LoginPoizkus.cas)
+            .filter(LoginPoizkus.cas >= meja)
+            .order_by(LoginPoizkus.cas)
+            .all()
+        )
+        with self._zaklep:
+            for ip, cas in vrstice:
+                if cas.tzinfo is None:  # SQLite vrne naiven UTC čas
+                    cas = cas.replace(tzinfo=timezone.utc)
+                self._dodaj(ip, cas.timestamp())
+        return len(vrstice)
+
+    def zapisi(self, engine, zdaj: float | None = None) -> int:
+        """Zapiše čakajoče neuspehe v ``login_poskusi`` in izbriše pretečene vrstice (en paket)."""
+        zdaj = time.time() if zdaj is None else zdaj
+        with self._zaklep:
+            paket = list(self._za_zapis)
+            self._za_zapis.clear()
+            # Pozabi IP-je brez poskusov v oknu
+            for ip in [ip for ip, casi in self._poskusi.items() if not self._v_oknu(casi, zdaj)]:
+                del self._poskusi[ip]
+        meja = datetime.fromtimestamp(zdaj - self.okno_s, timezone.utc)
+        try:
+            with engine.begin() as conn:
+                conn.execute(delete(LoginPoizkus).where(LoginPoizkus.cas < meja))
+                if paket:
+                    conn.execute(insert(LoginPoizkus), [
+                        {"ip": ip, "cas": datetime.fromtimestamp(cas, timezone.utc)} for ip, cas in paket
+                    ])
+        except Exception:
+            with self._zaklep:
+                self._metrike["napake"] += 1
+                self._za_zapis.extendleft(reversed(paket))
+            logger.exception("Zapis neuspelih prijav (%d) ni uspel", len(paket))
+            return 0
+        with self._zaklep:
+            self._metrike["zapisani"] += len(paket)
+        return len(paket)
+
+    def izprazni(self) -> None:
+        with self._zaklep:
+            self._poskusi.clear()
+            self._za_zapis.clear()
+
+    def metrike(self) -> dict[str, int]:
+        with self._zaklep:
+            return {**self._metrike, "ip": len(self._poskusi), "za_zapis": len(self._za_zapis)}
+
+
+_omejevalnik = OmejevalnikPrijav()
+
+
+def prijava_dovoljena(ip: str) -> bool:
+    """Vrne True če je IP dovoljen, False če je zaklenjen."""
+    return _omejevalnik.dovoljen(ip)
+
+
+def zabelezi_neuspeh(ip: str) -> None:
+    _omejevalnik.zabelezi(ip)
+
+
+def nalozi_poskuse(db: Session) -> int:
+    return _omejevalnik.nalozi(db)
+
+
+def shrani_poskuse(engine) -> int:
+    return _omejevalnik.zapisi(engine)
+
+
+async def periodicno_shranjevanje(engine, interval: int = OMEJITEV_INTERVAL_S) -> None:
+    """Vsakih ``interval`` sekund zapiše neuspele prijave v ``login_poskusi`` (lifespan)."""
+    while True:
+        await asyncio.sleep(interval)
+        await run_in_threadpool(shrani_poskuse, engine)
+
+
+def izprazni_omejitev() -> None:
+    _omejevalnik.izprazni()
+
+
+def omejitev_metrike() -> dict[str, int]:
+    return _omejevalnik.metrike()
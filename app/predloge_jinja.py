@@ -0,0 +1,83 @@
+"""Predpomnilnik prevedenih Jinja2 predlog za e-poštna obvestila.
+
+Prej je ``posli_email`` za vsakega prejemnika ustvaril nov
+``SandboxedEnvironment`` ter zadevo in telo znova razčlenil in prevedel
+(``from_string``); pri skupinskem pošiljanju je bila ista predloga prevedena
+stokrat. Zdaj je okolje eno, prevedene predloge pa so v LRU predpomnilniku s
+ključem SHA-256 izvorne kode – sprememba predloge (``EmailPredloga.zadeva`` /
+``telo_html``) da nov ključ, stara predloga pa sčasoma izpade.
+
+Okolje ostane sandbox (zaščita pred template injection) z ``autoescape=False``,
+ker predloge vsebujejo HTML. Prevedena predloga je nespremenljiva, zato je
+``render`` varen iz več niti hkrati.
+
+Metrike (``predloge_metrike``) so vidne v ``/nastavitve/diagnostika``.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from jinja2 import Template
+from jinja2.sandbox import SandboxedEnvironment
+
+PREDLOGE_CACHE = int(os.getenv("PREDLOGE_CACHE", "64"))
+
+_okolje = SandboxedEnvironment(autoescape=False)
+
+
+class PredpomnilnikPredlog:
+    """LRU prevedenih predlog (ključ: SHA-256 izvorne kode), varen za niti."""
+
+    def __init__(self, velikost: int = PREDLOGE_CACHE, okolje: SandboxedEnvironment = _okolje):
+        self.velikost = max(velikost, 1)
+        self.okolje = okolje
+        self._predloge: OrderedDict[str, Template] = OrderedDict()
+        self._zaklep = threading.Lock()
+        self._metrike = {"zadetki": 0, "prevajanja": 0, "izpadi": 0}
+
+    def predloga(self, vir: str) -> Template:
+        """Vrne prevedeno predlogo za ``vir``; ob prvi uporabi jo prevede.
+
+        Napaka v predlogi (``TemplateSyntaxError``) se ne shrani – naslednji klic jo vrže znova.
+        """
+        kljuc = hashlib.sha256(vir.encode("utf-8")).hexdigest()
+        with self._zaklep:
+            predloga = self._predloge.get(kljuc)
+            if predloga is not None:
+                self._predloge.move_to_end(kljuc)
+                self._metrike["zadetki"] += 1
+                return predloga
+        # Prevajanje je izven zaklepa; dve niti lahko isto predlogo prevedeta hkrati, shrani se ena
+        predloga = self.okolje.from_string(vir)
+        with self._zaklep:
+            self._metrike["prevajanja"] += 1
+            self._predloge[kljuc] = predloga
+            self._predloge.move_to_end(kljuc)
+            while len(self._predloge) > self.velikost:
+                self._predloge.popitem(last=False)
+                self._metrike["izpadi"] += 1
+        return predloga
+
+    def render(self, vir: str, kontekst: dict) -> str:
+        return self.predloga(vir).render(**kontekst)
+
+    def izprazni(self) -> None:
+        with self._zaklep:
+            self._predloge.clear()
+
+    def metrike(self) -> dict[str, int]:
+        with self._zaklep:
+            return {**self._metrike, "predlog": len(self._predloge)}
+
+
+_predpomnilnik = PredpomnilnikPredlog()
+
+
+def render_predloge(vir: str, kontekst: dict) -> str:
+    """Renderira predlogo (zadevo ali telo) iz skupnega predpomnilnika prevedenih predlog."""
+    return _predpomnilnik.render(vir, kontekst)
+
+
+def predloge_metrike() -> dict[str, int]:
+    return _predpomnilnik.metrike()
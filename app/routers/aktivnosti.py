@@ -10,6 +10,8 @@ from ..models import Aktivnost, Clan
 from ..auth import require_login, is_editor, is_admin
 from ..csrf import get_csrf_token, csrf_protect
 from ..audit_log import log_akcija
+from ..fragmenti_clana import oznaci_spremembo
+from ..statistika import osvezi_leta
 
 router = APIRouter(prefix="/aktivnosti")
 templates = Jinja2Templates(directory="app/templates")
@@ -17,7 +19,7 @@ templates.env.globals["csrf_token"] = get_csrf_token
 
 
 @router.get("", response_class=HTMLResponse)
-async def seznam(
+def seznam(
     request: Request,
     filter: str = "leto",
     db: Session = Depends(get_db),
@@ -56,7 +58,7 @@ async def seznam(
 
 
 @router.post("/dodaj")
-async def dodaj(
+def dodaj(
     request: Request,
     clan_id: int = Form(...),
     leto: int = Form(...),
@@ -96,6 +98,8 @@ async def dodaj(
         delovne_ure=ure,
     )
     db.add(a)
+    oznaci_spremembo(db, clan_id)
+    osvezi_leta(db, leto)
     db.commit()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "aktivnost_dodana",
@@ -104,7 +108,7 @@ async def dodaj(
 
 
 @router.post("/uredi/{aktivnost_id}")
-async def uredi(
+def uredi(
     request: Request,
     aktivnost_id: int,
     clan_id: int = Form(...),
@@ -144,10 +148,13 @@ async def uredi(
         except ValueError:
             pass
 
+    staro_leto = a.leto
     a.leto = leto
     a.datum = datum_parsed
     a.opis = opis
     a.delovne_ure = ure
+    oznaci_spremembo(db, clan_id)
+    osvezi_leta(db, staro_leto, leto)
     db.commit()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "aktivnost_uredi",
@@ -156,7 +163,7 @@ async def uredi(
 
 
 @router.post("/izbrisi/{aktivnost_id}")
-async def izbrisi(
+def izbrisi(
     request: Request,
     aktivnost_id: int,
     clan_id: int = Form(...),
@@ -175,6 +182,8 @@ async def izbrisi(
     ).first()
     if a:
         db.delete(a)
+        oznaci_spremembo(db, clan_id)
+        osvezi_leta(db, a.leto)
         db.commit()
         ip = request.client.host if request.client else None
         log_akcija(db, user.get("uporabnisko_ime") if user else None, "aktivnost_izbrisana",
@@ -1,16 +1,16 @@
-import io
 from datetime import datetime
 
 from fastapi import APIRouter, Request, Depends
 from fastapi.responses import RedirectResponse, HTMLResponse, StreamingResponse, Response
 from fastapi.templating import Jinja2Templates
-from openpyxl import Workbook
 from sqlalchemy.orm import Session
 
 from ..database import get_db
 from ..models import AuditLog
 from ..auth import require_login, is_admin
 from ..csrf import get_csrf_token
+from ..audit_log import izprazni_audit
+from ..xlsx_tok import xlsx_tok, List as XlsxList, MEDIA_TYPE as XLSX_MEDIA_TYPE
 
 router = APIRouter(prefix="/audit")
 templates = Jinja2Templates(directory="app/templates")
@@ -18,7 +18,7 @@ templates.env.globals["csrf_token"] = get_csrf_token
 
 
 @router.get("", response_class=HTMLResponse)
-async def audit_seznam(
+def audit_seznam(
     request: Request,
     akcija: str = "",
     db: Session = Depends(get_db),
@@ -29,6 +29,8 @@ async def audit_seznam(
     if not is_admin(user):
         return RedirectResponse(url="/clani", status_code=302)
 
+    # Vnosi, ki še čakajo v vrsti paketnega pisalnika, naj bodo vidni takoj
+    izprazni_audit()
     query = db.query(AuditLog).order_by(AuditLog.cas.desc())
     if akcija:
         query = query.filter(AuditLog.akcija == akcija)
@@ -54,38 +56,29 @@ async def audit_seznam(
 
 
 @router.get("/izvoz")
-async def audit_izvoz(request: Request, db: Session = Depends(get_db)) -> Response:
+def audit_izvoz(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
     if not is_admin(user):
         return RedirectResponse(url="/clani", status_code=302)
 
-    vnosi = db.query(AuditLog).order_by(AuditLog.cas.desc()).all()
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Audit log"
-    from openpyxl.styles import Font
-    ws.append(["Čas", "Uporabnik", "IP", "Akcija", "Opis"])
-    for cell in ws[1]:
-        cell.font = Font(bold=True)
-
-    for v in vnosi:
-        ws.append([
+    izprazni_audit()
+    vnosi = db.query(AuditLog).order_by(AuditLog.cas.desc()).yield_per(1000)
+    vrstice = (
+        [
             v.cas.isoformat() if v.cas else "",
             v.uporabnik or "",
             v.ip or "",
             v.akcija,
             v.opis or "",
-        ])
+        ]
+        for v in vnosi
+    )
 
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
     today = datetime.today().date().isoformat()
     return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        xlsx_tok([XlsxList("Audit log", vrstice, glava=["Čas", "Uporabnik", "IP", "Akcija", "Opis"])]),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f'attachment; filename="audit_log_{today}.xlsx"'},
     )
@@ -1,4 +1,3 @@
-from collections import defaultdict
 from datetime import date
 
 from fastapi import APIRouter, Request, Form, Depends
@@ -11,6 +10,8 @@ from ..models import Clanarina, Clan
 from ..auth import require_login, is_editor, is_admin
 from ..csrf import get_csrf_token, csrf_protect
 from ..audit_log import log_akcija
+from ..fragmenti_clana import oznaci_spremembo
+from ..statistika import osvezi_leta, statistika_let, znesek_v_cente
 
 router = APIRouter(prefix="/clanarine")
 templates = Jinja2Templates(directory="app/templates")
@@ -18,7 +19,7 @@ templates.env.globals["csrf_token"] = get_csrf_token
 
 
 @router.get("", response_class=HTMLResponse)
-async def seznam(
+def seznam(
     request: Request,
     filter: str = "leto",
     db: Session = Depends(get_db),
@@ -40,18 +41,12 @@ async def seznam(
 
     clanarine = query.order_by(Clanarina.leto.desc()).all()
 
-    # Seštevki po letu (samo plačane)
-    sestevki: dict = defaultdict(lambda: {"stevilo_placanih": 0, "skupaj": 0.0})
-    for c in clanarine:
-        if c.datum_placila:
-            sestevki[c.leto]["stevilo_placanih"] += 1
-            if c.znesek:
-                try:
-                    val = float(c.znesek.replace(",", ".").replace("€", "").strip())
-                    sestevki[c.leto]["skupaj"] += val
-                except ValueError:
-                    pass
-    sestevki_sorted = sorted(sestevki.items(), reverse=True)
+    # Seštevki po letu (samo plačane) iz materializirane statistike za prikazana leta
+    sestevki_sorted = [
+        (leto, {"stevilo_placanih": s.placniki, "skupaj": s.skupaj_centi / 100})
+        for leto, s in sorted(statistika_let(db, {c.leto for c in clanarine}).items(), reverse=True)
+        if s.placniki
+    ]
 
     return templates.TemplateResponse(
         request,
@@ -69,7 +64,7 @@ async def seznam(
 
 
 @router.post("/dodaj")
-async def dodaj(
+def dodaj(
     request: Request,
     clan_id: int = Form(...),
     leto: int = Form(...),
@@ -99,6 +94,7 @@ async def dodaj(
     if obstoječa:
         obstoječa.datum_placila = datum_p
         obstoječa.znesek = znesek.strip() or None
+        obstoječa.znesek_centi = znesek_v_cente(obstoječa.znesek)
         obstoječa.opombe = opombe.strip() or None
     else:
         clanarina = Clanarina(
@@ -106,9 +102,12 @@ async def dodaj(
             leto=leto,
             datum_placila=datum_p,
             znesek=znesek.strip() or None,
+            znesek_centi=znesek_v_cente(znesek),
             opombe=opombe.strip() or None,
         )
         db.add(clanarina)
+    oznaci_spremembo(db, clan_id)
+    osvezi_leta(db, leto)
     db.commit()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "clanarina_dodana",
@@ -117,7 +116,7 @@ async def dodaj(
 
 
 @router.post("/uredi/{clanarina_id}")
-async def uredi(
+def uredi(
     request: Request,
     clanarina_id: int,
     clan_id: int = Form(...),
@@ -146,7 +145,10 @@ async def uredi(
         return RedirectResponse(url=f"/clani/{clan_id}", status_code=302)
 
     c.znesek = znesek.strip() or None
+    c.znesek_centi = znesek_v_cente(c.znesek)
     c.opombe = opombe.strip() or None
+    oznaci_spremembo(db, clan_id)
+    osvezi_leta(db, c.leto)
     db.commit()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "clanarina_uredi",
@@ -155,7 +157,7 @@ async def uredi(
 
 
 @router.post("/izbrisi/{clanarina_id}")
-async def izbrisi(
+def izbrisi(
     request: Request,
     clanarina_id: int,
     clan_id: int = Form(...),
@@ -174,6 +176,8 @@ async def izbrisi(
     ).first()
     if c:
         db.delete(c)
+        oznaci_spremembo(db, clan_id)
+        osvezi_leta(db, c.leto)
         db.commit()
         ip = request.client.host if request.client else None
         log_akcija(db, user.get("uporabnisko_ime") if user else None, "clanarina_izbrisana",
@@ -6,17 +6,20 @@ from typing import List
 from fastapi import APIRouter, Request, Form, Depends, Query
 from fastapi.responses import RedirectResponse, HTMLResponse, Response, StreamingResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import or_, and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, and_, func, exists
+from sqlalchemy.orm import Session, selectinload
 
-from ..database import get_db
+from ..database import get_db, get_bralna_db, BralnaSeja
 from ..models import Clan, Clanarina, EmailPredloga
 from ..auth import get_user, require_login, is_editor, is_admin
 from ..config import get_tipi_clanstva, get_operaterski_razredi, get_vloge_clanov, get_nastavitev
 from ..csrf import get_csrf_token, csrf_protect
 from ..audit_log import log_akcija
+from ..iskanje import fts_poizvedba, fts_na_voljo, fts_ids, fts_rang
 from ..email import posli_email, get_smtp_nastavitve
-from ..kartica import generiraj_kartico_pdf, get_kartica_polja, kartica_filename, _KARTICA_POLJA_LABELE
+from ..fragmenti_clana import CSRF_OZNAKA, fragment, vstavi_csrf, oznaci_spremembo, odstrani_clana
+from ..statistika import osvezi_tipe, osvezi_leta, leta_clana
+from ..kartica import generiraj_kartico_pdf, generiraj_tiskalno_polo, get_kartica_polja, kartica_filename, _KARTICA_POLJA_LABELE
 
 router = APIRouter(prefix="/clani")
 templates = Jinja2Templates(directory="app/templates")
@@ -38,7 +41,32 @@ def _normaliziraj_clan(priimek, ime, klicni_znak, elektronska_posta, tip_clanstv
     return priimek, ime, kz, email, tip_clanstva, None
 
 
-def _filtriraj_clane(
+def _iskalni_pogoj(db: Session, q: str):
+    """Iskalni pogoj za člane: FTS5 indeks (predpone, brez šumnikov), sicer LIKE.
+
+    LIKE varianta išče po priimku, imenu in klicnem znaku (z ubežanimi wildcardi).
+    """
+    fts = fts_poizvedba(q) if fts_na_voljo(db) else None
+    if fts:
+        return Clan.id.in_(fts_ids(fts))
+    escaped_q = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return or_(
+        Clan.priimek.ilike(f"%{escaped_q}%", escape="\\"),
+        Clan.ime.ilike(f"%{escaped_q}%", escape="\\"),
+        Clan.klicni_znak.ilike(f"%{escaped_q}%", escape="\\"),
+    )
+
+
+def _placal_pogoj(leto: int):
+    """Korelirani EXISTS: član ima za leto vnos članarine z datumom plačila."""
+    return exists().where(
+        Clanarina.clan_id == Clan.id,
+        Clanarina.leto == leto,
+        Clanarina.datum_placila != None,
+    )
+
+
+def _poizvedba_clanov(
     db: Session,
     q: str = "",
     tip: List[str] = None,
@@ -47,8 +75,14 @@ def _filtriraj_clane(
     operaterski_razred: List[str] = None,
     danes: date = None,
     kmalu_meja: date = None,
-) -> list:
-    """Vrne seznam članov z apliciranimi filtri (brez placal filtra)."""
+    placal: str = "",
+    leto: int = None,
+):
+    """Vrne (nesortirano) poizvedbo članov z apliciranimi filtri.
+
+    ``placal`` ("da"/"ne") se izvede kot korelirani (NOT) EXISTS na clanarine
+    za ``leto`` (privzeto tekoče leto), tako da bazo zapustijo samo ujemajoči člani.
+    """
     if danes is None:
         danes = date.today()
     if kmalu_meja is None:
@@ -65,14 +99,7 @@ def _filtriraj_clane(
         query = query.filter(Clan.aktiven == False)
 
     if q:
-        escaped_q = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
-        query = query.filter(
-            or_(
-                Clan.priimek.ilike(f"%{escaped_q}%", escape="\\"),
-                Clan.ime.ilike(f"%{escaped_q}%", escape="\\"),
-                Clan.klicni_znak.ilike(f"%{escaped_q}%", escape="\\"),
-            )
-        )
+        query = query.filter(_iskalni_pogoj(db, q))
 
     if tip:
         query = query.filter(Clan.tip_clanstva.in_(tip))
@@ -94,9 +121,93 @@ def _filtriraj_clane(
         if rd_conds:
             query = query.filter(or_(*rd_conds))
 
+    if placal in ("da", "ne"):
+        pogoj = _placal_pogoj(leto or danes.year)
+        query = query.filter(pogoj if placal == "da" else ~pogoj)
+
+    return query
+
+
+def _filtriraj_clane(
+    db: Session,
+    q: str = "",
+    tip: List[str] = None,
+    aktiven: str = "",
+    rd: List[str] = None,
+    operaterski_razred: List[str] = None,
+    danes: date = None,
+    kmalu_meja: date = None,
+    placal: str = "",
+    leto: int = None,
+) -> list:
+    """Vrne seznam članov z apliciranimi filtri (vključno s placal/leto)."""
+    query = _poizvedba_clanov(db, q=q, tip=tip, aktiven=aktiven, rd=rd,
+                              operaterski_razred=operaterski_razred,
+                              danes=danes, kmalu_meja=kmalu_meja,
+                              placal=placal, leto=leto)
     return query.order_by(Clan.priimek, Clan.ime).all()
 
 
+# ---------------------------------------------------------------------------
+# Seznam članov – server-side stranjenje (DataTables serverSide protokol)
+# ---------------------------------------------------------------------------
+
+_DOLZINA_STRANI = 25
+_MAX_DOLZINA_STRANI = 500
+
+# Indeks stolpca v tabeli #tabela-clanov → izrazi za ORDER BY
+# (stolpca Članarina in Akcije nista sortirna)
+_SORT_STOLPCI = {
+    0: (Clan.priimek, Clan.ime),
+    1: (Clan.klicni_znak,),
+    2: (Clan.tip_clanstva,),
+    3: (Clan.operaterski_razred,),
+    4: (Clan.veljavnost_rd,),
+}
+
+
+def _stran_clanov(
+    db: Session,
+    leto: int,
+    placal: str = "",
+    iskanje: str = "",
+    sort_stolpec: int = 0,
+    sort_smer: str = "asc",
+    zacetek: int = 0,
+    dolzina: int = _DOLZINA_STRANI,
+    **filtri,
+) -> tuple[list, int, int]:
+    """Vrne (vrstice, skupaj, filtrirano) za eno stran seznama članov.
+
+    Filtriranje, plačano/neplačano, sortiranje in LIMIT/OFFSET se izvedejo v SQL;
+    vrstice so pari (Clan, placal_leto). ``skupaj`` upošteva filtre obrazca,
+    ``filtrirano`` še dodatno iskanje iz DataTables iskalnega polja.
+    """
+    query = _poizvedba_clanov(db, placal=placal, leto=leto, **filtri)
+    skupaj = query.with_entities(func.count(Clan.id)).scalar()
+    if iskanje:
+        query = query.filter(_iskalni_pogoj(db, iskanje))
+        filtrirano = query.with_entities(func.count(Clan.id)).scalar()
+    else:
+        filtrirano = skupaj
+
+    stolpci = _SORT_STOLPCI.get(sort_stolpec, _SORT_STOLPCI[0])
+    if sort_smer == "desc":
+        stolpci = tuple(s.desc() for s in stolpci)
+    zacetek = max(zacetek, 0)
+    if dolzina <= 0 or dolzina > _MAX_DOLZINA_STRANI:
+        dolzina = _MAX_DOLZINA_STRANI
+
+    vrstice = (
+        query.add_columns(_placal_pogoj(leto).label("placal"))
+        .order_by(*stolpci, Clan.priimek, Clan.ime, Clan.id)
+        .offset(zacetek)
+        .limit(dolzina)
+        .all()
+    )
+    return vrstice, skupaj, filtrirano
+
+
 @router.get("", response_class=HTMLResponse)
 async def seznam(
     request: Request,
@@ -107,7 +218,7 @@ async def seznam(
     rd: List[str] = Query(default=[]),
     operaterski_razred: List[str] = Query(default=[]),
     leto_placila: int = 0,
-    db: Session = Depends(get_db),
+    db: BralnaSeja = Depends(get_bralna_db),
 ) -> Response:
     user, redirect = require_login(request)
     if redirect:
@@ -118,21 +229,17 @@ async def seznam(
     leto_zdaj = danes.year
     leto_ef = leto_placila if leto_placila else leto_zdaj
 
-    clani = _filtriraj_clane(db, q=q, tip=tip, aktiven=aktiven, rd=rd,
-                              operaterski_razred=operaterski_razred,
-                              danes=danes, kmalu_meja=kmalu_meja)
-
-    # Pripravi set članov ki so plačali za izbrano leto
-    placali_ids = {
-        c.clan_id
-        for c in db.query(Clanarina).filter(Clanarina.leto == leto_ef).all()
-        if c.datum_placila is not None
-    }
+    def _nalozi(s: Session):
+        # Samo prva stran – nadaljnje strani DataTables naloži prek /clani/podatki
+        vrstice, skupaj, _ = _stran_clanov(
+            s, leto_ef, placal=placal,
+            q=q, tip=tip, aktiven=aktiven, rd=rd,
+            operaterski_razred=operaterski_razred,
+            danes=danes, kmalu_meja=kmalu_meja,
+        )
+        return vrstice, skupaj, get_tipi_clanstva(s), get_operaterski_razredi(s)
 
-    if placal == "da":
-        clani = [c for c in clani if c.id in placali_ids]
-    elif placal == "ne":
-        clani = [c for c in clani if c.id not in placali_ids]
+    vrstice, skupaj, tipi_clanstva, operaterski_razredi = await db.izvedi(_nalozi)
 
     return templates.TemplateResponse(
         request,
@@ -140,16 +247,17 @@ async def seznam(
         {
             "request": request,
             "user": user,
-            "clani": clani,
+            "vrstice": vrstice,
+            "skupaj": skupaj,
+            "dolzina_strani": _DOLZINA_STRANI,
             "q": q,
             "tip": tip,
             "aktiven": aktiven,
             "placal": placal,
             "rd": rd,
             "operaterski_razred": operaterski_razred,
-            "tipi_clanstva": get_tipi_clanstva(db),
-            "operaterski_razredi": get_operaterski_razredi(db),
-            "placali_ids": placali_ids,
+            "tipi_clanstva": tipi_clanstva,
+            "operaterski_razredi": operaterski_razredi,
             "leto": leto_ef,
             "leto_zdaj": leto_zdaj,
             "leto_placila": leto_placila,
@@ -161,8 +269,69 @@ async def seznam(
     )
 
 
+@router.get("/podatki")
+async def seznam_podatki(
+    request: Request,
+    draw: int = 0,
+    start: int = 0,
+    length: int = _DOLZINA_STRANI,
+    sort_stolpec: int = Query(0, alias="order[0][column]"),
+    sort_smer: str = Query("asc", alias="order[0][dir]"),
+    iskanje: str = Query("", alias="search[value]"),
+    q: str = "",
+    tip: List[str] = Query(default=[]),
+    aktiven: str = "da",
+    placal: str = "",
+    rd: List[str] = Query(default=[]),
+    operaterski_razred: List[str] = Query(default=[]),
+    leto_placila: int = 0,
+    db: BralnaSeja = Depends(get_bralna_db),
+) -> Response:
+    """JSON vir za DataTables (serverSide) – vrne samo vidno stran seznama članov."""
+    user, redirect = require_login(request)
+    if redirect:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+
+    danes = date.today()
+    kmalu_meja = danes + timedelta(days=180)
+    leto_ef = leto_placila if leto_placila else danes.year
+
+    vrstice, skupaj, filtrirano = await db.izvedi(
+        _stran_clanov, leto_ef, placal=placal,
+        iskanje=iskanje.strip(),
+        sort_stolpec=sort_stolpec,
+        sort_smer=sort_smer,
+        zacetek=start,
+        dolzina=length,
+        q=q, tip=tip, aktiven=aktiven, rd=rd,
+        operaterski_razred=operaterski_razred,
+        danes=danes, kmalu_meja=kmalu_meja,
+    )
+
+    celice = templates.env.get_template("clani/_vrstica.html").module
+    urednik = is_editor(user)
+    data = [
+        [
+            str(celice.ime(clan)),
+            str(celice.klicni_znak(clan)),
+            str(celice.tip_clanstva(clan)),
+            str(celice.operaterski_razred(clan)),
+            str(celice.veljavnost_rd(clan, danes, kmalu_meja)),
+            str(celice.clanarina(placal_leto)),
+            str(celice.akcije(clan, placal_leto, leto_ef, urednik)),
+        ]
+        for clan, placal_leto in vrstice
+    ]
+    return JSONResponse({
+        "draw": draw,
+        "recordsTotal": skupaj,
+        "recordsFiltered": filtrirano,
+        "data": data,
+    })
+
+
 @router.get("/nov", response_class=HTMLResponse)
-async def nov_form(request: Request, db: Session = Depends(get_db)) -> Response:
+def nov_form(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -183,7 +352,7 @@ async def nov_form(request: Request, db: Session = Depends(get_db)) -> Response:
 
 
 @router.post("/nov", response_class=HTMLResponse)
-async def nov_shrani(
+def nov_shrani(
     request: Request,
     priimek: str = Form(...),
     ime: str = Form(...),
@@ -269,6 +438,7 @@ async def nov_shrani(
         aktiven=(aktiven == "da"),
     )
     db.add(clan)
+    osvezi_tipe(db)
     db.commit()
     db.refresh(clan)
     ip = request.client.host if request.client else None
@@ -277,11 +447,46 @@ async def nov_shrani(
     return RedirectResponse(url=f"/clani/{clan.id}", status_code=302)
 
 
+_ISKANJE_STOLPCI = (Clan.id, Clan.priimek, Clan.ime, Clan.klicni_znak, Clan.elektronska_posta, Clan.aktiven)
+
+
+def _isci_clane(db: Session, q: str, limit: int = 10) -> list:
+    """Autocomplete iskanje članov: FTS indeks z bm25 rangom (aktivni najprej), sicer LIKE.
+
+    Vrne vrstice samo s stolpci za JSON odgovor (brez nalaganja ORM objektov).
+    """
+    fts = fts_poizvedba(q) if fts_na_voljo(db) else None
+    if fts:
+        # Iz indeksa, razvrščeno po bm25 (aktivni najprej)
+        rang = fts_rang(fts)
+        clani = (
+            db.query(*_ISKANJE_STOLPCI)
+            .join(rang, rang.c.id == Clan.id)
+            .order_by(Clan.aktiven.desc(), rang.c.rang, Clan.priimek, Clan.ime)
+            .limit(limit)
+            .all()
+        )
+    else:
+        q_l = f"%{q.strip().lower()}%"
+        clani = (
+            db.query(*_ISKANJE_STOLPCI)
+            .filter(or_(
+                func.lower(Clan.priimek + " " + Clan.ime).like(q_l),
+                func.lower(Clan.ime + " " + Clan.priimek).like(q_l),
+                func.lower(Clan.klicni_znak).like(q_l),
+            ))
+            .order_by(Clan.aktiven.desc(), Clan.priimek, Clan.ime)
+            .limit(limit)
+            .all()
+        )
+    return clani
+
+
 @router.get("/iskanje")
 async def iskanje_clanov(
     request: Request,
     q: str = Query(""),
-    db: Session = Depends(get_db),
+    db: BralnaSeja = Depends(get_bralna_db),
 ) -> Response:
     user, redirect = require_login(request)
     if redirect:
@@ -290,18 +495,7 @@ async def iskanje_clanov(
         return JSONResponse({"error": "forbidden"}, status_code=403)
     if len(q.strip()) < 2:
         return JSONResponse([])
-    q_l = f"%{q.strip().lower()}%"
-    clani = (
-        db.query(Clan)
-        .filter(or_(
-            func.lower(Clan.priimek + " " + Clan.ime).like(q_l),
-            func.lower(Clan.ime + " " + Clan.priimek).like(q_l),
-            func.lower(Clan.klicni_znak).like(q_l),
-        ))
-        .order_by(Clan.aktiven.desc(), Clan.priimek, Clan.ime)
-        .limit(10)
-        .all()
-    )
+    clani = await db.izvedi(_isci_clane, q)
     return JSONResponse([{
         "id": c.id, "priimek": c.priimek, "ime": c.ime,
         "klicni_znak": c.klicni_znak or "",
@@ -310,52 +504,122 @@ async def iskanje_clanov(
     } for c in clani])
 
 
+@router.get("/kartice.pdf")
+def kartice_pdf(
+    request: Request,
+    q: str = "",
+    tip: List[str] = Query(default=[]),
+    aktiven: str = "da",
+    placal: str = "",
+    rd: List[str] = Query(default=[]),
+    operaterski_razred: List[str] = Query(default=[]),
+    leto_placila: int = 0,
+    leto: int = 0,
+    db: Session = Depends(get_db),
+) -> Response:
+    """Tiskalna pola A4 (10 kartic na list) za vse člane, ki ustrezajo filtrom seznama."""
+    user, redirect = require_login(request)
+    if redirect:
+        return redirect
+    if not is_editor(user):
+        return RedirectResponse(url="/clani", status_code=302)
+
+    danes = date.today()
+    leto_ef = leto_placila if leto_placila else danes.year
+    if not leto:
+        leto = danes.year
+
+    clani = _filtriraj_clane(
+        db, q=q, tip=tip, aktiven=aktiven, rd=rd,
+        operaterski_razred=operaterski_razred,
+        danes=danes, kmalu_meja=danes + timedelta(days=180),
+        placal=placal, leto=leto_ef,
+    )
+    pdf_bytes = generiraj_tiskalno_polo(
+        clani, leto, get_nastavitev(db, "klub_ime", ""),
+        get_nastavitev(db, "klub_oznaka", ""), get_kartica_polja(db),
+    )
+    ip = request.client.host if request.client else None
+    log_akcija(db, user.get("uporabnisko_ime") if user else None, "kartice_pdf",
+               f"{len(clani)} kartic za leto {leto}", ip=ip)
+
+    return StreamingResponse(
+        io.BytesIO(pdf_bytes),
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="kartice_{leto}.pdf"'},
+    )
+
+
 @router.get("/{clan_id}", response_class=HTMLResponse)
-async def detail(request: Request, clan_id: int, db: Session = Depends(get_db)) -> Response:
+def detail(request: Request, clan_id: int, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
 
-    clan = db.query(Clan).filter(Clan.id == clan_id).first()
+    # Vse relacije v enem krogu poizvedb (namesto lenih SELECT-ov med izrisom)
+    clan = (
+        db.query(Clan)
+        .options(selectinload(Clan.clanarine), selectinload(Clan.aktivnosti),
+                 selectinload(Clan.skupine), selectinload(Clan.vloge))
+        .filter(Clan.id == clan_id)
+        .first()
+    )
     if not clan:
         return RedirectResponse(url="/clani", status_code=302)
 
-    ip = request.client.host if request.client else None
-    log_akcija(db, user.get("uporabnisko_ime") if user else None, "clan_ogled",
-               f"{clan.priimek} {clan.ime} (ID {clan_id})", ip=ip)
-
-    # Vse clanarine za tega clana, plus prikaz neplacanih let
-    clanarine_dict = {c.leto: c for c in clan.clanarine}
-    leto_zdaj = date.today().year
-    # Prikaži leta od 2017 do trenutnega
-    vsa_leta = list(range(leto_zdaj, 2016, -1))
+    danes = date.today()
+    leto_zdaj = danes.year
+    urednik, admin = is_editor(user), is_admin(user)
+    deli = templates.env.get_template("clani/_detail.html").module
+
+    def _placila() -> str:
+        # Vse clanarine za tega clana, plus prikaz neplacanih let od 2017 do trenutnega
+        clanarine_dict = {c.leto: c for c in clan.clanarine}
+        vsa_leta = list(range(leto_zdaj, 2016, -1))
+        return deli.placila(clan, vsa_leta, clanarine_dict, leto_zdaj, urednik, CSRF_OZNAKA)
+
+    izrisi = {
+        "podatki": lambda: deli.podatki(clan, danes),
+        "placila": _placila,
+        "aktivnosti": lambda: deli.aktivnosti_tabela(clan, clan.aktivnosti, urednik, CSRF_OZNAKA),
+        "vloge": lambda: deli.vloge(clan, danes, urednik, admin, CSRF_OZNAKA),
+    }
+    zeton = get_csrf_token(request)
+    fragmenti = {
+        ime: vstavi_csrf(fragment((clan.id, clan.verzija, ime, urednik, admin, danes), fn), zeton)
+        for ime, fn in izrisi.items()
+    }
 
     flash_success = request.session.pop("flash_success", None)
     flash_warning = request.session.pop("flash_warning", None)
 
-    return templates.TemplateResponse(
+    odgovor = templates.TemplateResponse(
         request,
         "clani/detail.html",
         {
             "request": request,
             "user": user,
             "clan": clan,
-            "clanarine_dict": clanarine_dict,
-            "vsa_leta": vsa_leta,
+            "fragmenti": fragmenti,
             "leto_zdaj": leto_zdaj,
-            "today": date.today(),
+            "today": danes,
             "aktivnosti": clan.aktivnosti,
             "vloge_clanov": get_vloge_clanov(db),
-            "is_editor": is_editor(user),
-            "is_admin": is_admin(user),
+            "is_editor": urednik,
+            "is_admin": admin,
             "flash_success": flash_success,
             "flash_warning": flash_warning,
         },
     )
+    # Audit šele po izrisu: sinhroni zapis (commit) bi sicer expiral naložene relacije
+    ip = request.client.host if request.client else None
+    log_akcija(db, user.get("uporabnisko_ime") if user else None, "clan_ogled",
+               f"{clan.priimek} {clan.ime} (ID {clan_id})", ip=ip)
+    return odgovor
 
 
 @router.get("/{clan_id}/uredi", response_class=HTMLResponse)
-async def uredi_form(request: Request, clan_id: int, db: Session = Depends(get_db)) -> Response:
+def uredi_form(request: Request, clan_id: int, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -381,7 +645,7 @@ async def uredi_form(request: Request, clan_id: int, db: Session = Depends(get_d
 
 
 @router.post("/{clan_id}/uredi", response_class=HTMLResponse)
-async def uredi_shrani(
+def uredi_shrani(
     request: Request,
     clan_id: int,
     priimek: str = Form(...),
@@ -469,6 +733,8 @@ async def uredi_shrani(
     clan.es_stevilka = es_st
     clan.opombe = opombe.strip() or None
     clan.aktiven = aktiven == "da"
+    oznaci_spremembo(db, clan_id)
+    osvezi_tipe(db)
     db.commit()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "clan_urejen",
@@ -477,7 +743,7 @@ async def uredi_shrani(
 
 
 @router.post("/{clan_id}/izbrisi")
-async def izbrisi(request: Request, clan_id: int, db: Session = Depends(get_db), _csrf: None = Depends(csrf_protect)) -> RedirectResponse:
+def izbrisi(request: Request, clan_id: int, db: Session = Depends(get_db), _csrf: None = Depends(csrf_protect)) -> RedirectResponse:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -487,8 +753,13 @@ async def izbrisi(request: Request, clan_id: int, db: Session = Depends(get_db),
     clan = db.query(Clan).filter(Clan.id == clan_id).first()
     if clan:
         opis = f"{clan.priimek} {clan.ime} (ID {clan_id})"
+        leta = leta_clana(clan)
         db.delete(clan)
+        osvezi_leta(db, *leta)
+        osvezi_tipe(db)
         db.commit()
+        # SQLite lahko id izbrisanega člana dodeli novemu (z verzija 0)
+        odstrani_clana(clan_id)
         ip = request.client.host if request.client else None
         log_akcija(db, user.get("uporabnisko_ime") if user else None, "clan_izbrisan",
                    opis, ip=ip)
@@ -502,7 +773,7 @@ async def izbrisi(request: Request, clan_id: int, db: Session = Depends(get_db),
 
 
 @router.get("/{clan_id}/kartica", response_class=HTMLResponse)
-async def kartica_html(
+def kartica_html(
     request: Request, clan_id: int,
     leto: int = 0, db: Session = Depends(get_db),
 ) -> Response:
@@ -537,7 +808,7 @@ async def kartica_html(
 
 
 @router.get("/{clan_id}/kartica.pdf")
-async def kartica_pdf(
+def kartica_pdf(
     request: Request, clan_id: int,
     leto: int = 0, db: Session = Depends(get_db),
 ) -> Response:
@@ -570,7 +841,7 @@ async def kartica_pdf(
 
 
 @router.post("/{clan_id}/posli-kartico")
-async def posli_kartico(
+def posli_kartico(
     request: Request, clan_id: int,
     leto: int = Form(...),
     _csrf: None = Depends(csrf_protect),
@@ -1,28 +1,38 @@
 import asyncio
 import io
 import json
+import logging
 import os
 import re
-import uuid as uuid_lib
+import sqlite3
+import tempfile
 import xml.etree.ElementTree as ET
 from datetime import date, datetime, timedelta
 from typing import List
 
+import anyio
 import httpx
 from fastapi import APIRouter, Request, Form, Depends, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import RedirectResponse, HTMLResponse, StreamingResponse, Response
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import insert, update
 from sqlalchemy.orm import Session
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
+from openpyxl import load_workbook
 
 from ..database import get_db
 from ..models import Clan, Clanarina, Aktivnost, Nastavitev, ClanVloga
 from ..auth import require_login, is_admin, is_editor
-from ..config import get_nastavitev, get_tipi_clanstva, get_operaterski_razredi
+from ..config import get_nastavitev, get_tipi_clanstva, get_operaterski_razredi, shrani_nastavitve
 from ..csrf import get_csrf_token, csrf_protect
 from ..audit_log import log_akcija
+from ..fragmenti_clana import oznaci_spremembo
+from ..statistika import osvezi_leta, osvezi_tipe, statistika_let, znesek_v_cente
+from ..xlsx_tok import xlsx_tok, List as XlsxList, SLOG_GLAVA, MEDIA_TYPE as XLSX_MEDIA_TYPE
+from ..csv_tok import csv_tok, jsonl_tok, zip_tok, CSV_MEDIA_TYPE, JSONL_MEDIA_TYPE, ZIP_MEDIA_TYPE
+from ..uvoz_seje import shrani_sejo, nalozi_sejo, izbrisi_sejo
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/izvoz")
 templates = Jinja2Templates(directory="app/templates")
@@ -30,7 +40,6 @@ templates.env.globals["csrf_token"] = get_csrf_token
 
 MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10 MB
 DOVOLJENE_PRIPONE = {".xlsx"}
-TMP_DIR = "data/tmp"
 
 # ---------------------------------------------------------------------------
 # ZRS izvoz – konfigurabilni stolpci, mapiranja, transformacije
@@ -210,41 +219,78 @@ def _parse_referenca(vrednost) -> int | None:
     return int(m.group(1)) if m else None
 
 
-def _najdi_clana_po_referenci(ref_id: int, db: Session) -> Clan | None:
-    """Poišče člana po ID-ju iz reference; fallback na ES številko."""
-    clan = db.query(Clan).filter(Clan.id == ref_id).first()
-    if clan:
-        return clan
-    return db.query(Clan).filter(Clan.es_stevilka == ref_id).first()
+def _kljuc_clana(priimek: str, ime: str) -> tuple[str, str]:
+    """Normaliziran ključ za zaznavo duplikatov (brez presledkov na robu, casefold)."""
+    return priimek.strip().casefold(), ime.strip().casefold()
 
 
-def _parse_excel_placila_pregled(
-    vsebina: bytes, db: Session, mapping: dict[str, list[str]]
-) -> tuple[list[dict], list[dict]]:
-    """Parsira Excel plačil in vrne (za_uvoz, preskoceni) za predogled."""
-    ws, headers = _load_sheet(vsebina)
-    za_uvoz:    list[dict] = []
-    preskoceni: list[dict] = []
+class _IndeksClanov:
+    """Vsi člani (id, ES številka, ime) naloženi z eno poizvedbo za iskanje v pomnilniku."""
+
+    def __init__(self, db: Session):
+        self.po_id: dict[int, tuple] = {}
+        self.po_es: dict[int, tuple] = {}
+        self.po_imenu: dict[tuple[str, str], tuple] = {}
+        for clan in db.query(Clan.id, Clan.es_stevilka, Clan.priimek, Clan.ime).order_by(Clan.id):
+            self.po_id[clan.id] = clan
+            if clan.es_stevilka is not None:
+                self.po_es.setdefault(clan.es_stevilka, clan)
+            self.po_imenu.setdefault(_kljuc_clana(clan.priimek or "", clan.ime or ""), clan)
+
+    def najdi(self, ref_id: int | None, priimek: str, ime: str) -> tuple[tuple | None, str]:
+        """Vrne (član, metoda): referenca (ID, nato ES številka) ima prednost pred imenom."""
+        if ref_id is not None:
+            clan = self.po_id.get(ref_id) or self.po_es.get(ref_id)
+            if clan:
+                return clan, "referenca"
+        if priimek and ime:
+            return self.po_imenu.get(_kljuc_clana(priimek, ime)), "ime"
+        return None, "ime"
 
-    for row in ws.iter_rows(min_row=2):
-        ref_raw   = _col(row, headers, *mapping.get("referenca", [])) if mapping.get("referenca") else ""
-        ref_id    = _parse_referenca(ref_raw)
-        priimek   = _col(row, headers, *mapping["priimek"])
-        ime       = _col(row, headers, *mapping["ime"])
+
+def _preberi_placila(vsebina: bytes, mapping: dict[str, list[str]]) -> list[dict]:
+    """Prebere list plačil v normalizirane vrstice (brez dostopa do baze).
+
+    Vsaka vrstica ima ``ref_id``, ``priimek``, ``ime``, ``datum_placila``
+    (None, če datum ni veljaven) in ``znesek``; prazne vrstice se izpustijo.
+    """
+    ws, headers = _load_sheet(vsebina)
+    nacrt = _nacrt_stolpcev(headers, mapping, vsebuje=("datum",))
+    vrstice: list[dict] = []
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        ref_id  = _parse_referenca(_niz(row, nacrt.get("referenca")))
+        priimek = _niz(row, nacrt["priimek"])
+        ime     = _niz(row, nacrt["ime"])
 
         if not ref_id and not priimek and not ime:
             continue
 
-        priimek_n = (priimek or "").strip().title()
-        ime_n     = (ime or "").strip().title()
+        vrstice.append({
+            "ref_id":        ref_id,
+            "priimek":       priimek.title(),
+            "ime":           ime.title(),
+            "datum_placila": _parse_datum_celice(_celica(row, nacrt["datum"])),
+            "znesek":        _niz(row, nacrt["znesek"]),
+        })
+    return vrstice
+
 
-        # Datum iz stolpca
-        datum_val: date | None = None
-        for i, h in enumerate(headers):
-            if h and any(t.lower() in str(h).strip().lower() for t in mapping["datum"]):
-                datum_val = _parse_datum_celice(row[i].value)
-                break
+def _razvrsti_placila(vrstice: list[dict], db: Session) -> tuple[list[dict], list[dict]]:
+    """Razvrsti prebrane vrstice plačil v (za_uvoz, preskoceni) brez pisanja v bazo.
 
+    Člani in obstoječi ključi (clan_id, leto) se naložijo enkrat; ``za_uvoz``
+    vsebuje tudi ``clan_id`` za ``_upsert_clanarine``.
+    """
+    clani = _IndeksClanov(db)
+    placane = set(db.query(Clanarina.clan_id, Clanarina.leto).tuples())
+    za_uvoz:    list[dict] = []
+    preskoceni: list[dict] = []
+
+    for vrstica in vrstice:
+        priimek_n = vrstica["priimek"]
+        ime_n     = vrstica["ime"]
+
+        datum_val = vrstica["datum_placila"]
         if not datum_val:
             preskoceni.append({
                 "priimek": priimek_n, "ime": ime_n,
@@ -252,18 +298,7 @@ def _parse_excel_placila_pregled(
             })
             continue
 
-        # Identifikacija člana: referenca ima prednost pred imenom
-        clan: Clan | None = None
-        metoda = "ime"
-        if ref_id is not None:
-            clan = _najdi_clana_po_referenci(ref_id, db)
-            if clan:
-                metoda = "referenca"
-        if not clan and priimek_n and ime_n:
-            clan = db.query(Clan).filter(
-                Clan.priimek == priimek_n, Clan.ime == ime_n
-            ).first()
-
+        clan, metoda = clani.najdi(vrstica["ref_id"], priimek_n, ime_n)
         if not clan:
             preskoceni.append({
                 "priimek": priimek_n, "ime": ime_n,
@@ -272,85 +307,76 @@ def _parse_excel_placila_pregled(
             continue
 
         leto = datum_val.year
-        znesek = _col(row, headers, *mapping["znesek"])
-        obstaja = db.query(Clanarina).filter(
-            Clanarina.clan_id == clan.id, Clanarina.leto == leto
-        ).first()
-
         za_uvoz.append({
+            "clan_id":       clan.id,
             "priimek":       clan.priimek,
             "ime":           clan.ime,
             "leto":          leto,
             "datum_placila": datum_val,
-            "znesek":        znesek,
-            "posodobi":      obstaja is not None,
+            "znesek":        vrstica["znesek"],
+            "posodobi":      (clan.id, leto) in placane,
             "metoda":        metoda,
         })
+        placane.add((clan.id, leto))
 
     return za_uvoz, preskoceni
 
 
-def _uvozi_placila_workbook(
+def _parse_excel_placila_pregled(
     vsebina: bytes, db: Session, mapping: dict[str, list[str]]
-) -> tuple[int, int]:
-    """Uvozi plačila iz Excel. Vrne (uvozeni, preskoceni)."""
-    ws, headers = _load_sheet(vsebina)
-    uvozeni  = 0
-    preskoceni = 0
-
-    for row in ws.iter_rows(min_row=2):
-        ref_raw = _col(row, headers, *mapping.get("referenca", [])) if mapping.get("referenca") else ""
-        ref_id  = _parse_referenca(ref_raw)
-        priimek = _col(row, headers, *mapping["priimek"])
-        ime     = _col(row, headers, *mapping["ime"])
-
-        if not ref_id and not priimek and not ime:
-            continue
-
-        priimek_n = (priimek or "").strip().title()
-        ime_n     = (ime or "").strip().title()
-
-        datum_val: date | None = None
-        for i, h in enumerate(headers):
-            if h and any(t.lower() in str(h).strip().lower() for t in mapping["datum"]):
-                datum_val = _parse_datum_celice(row[i].value)
-                break
+) -> tuple[list[dict], list[dict]]:
+    """Parsira Excel plačil in vrne (za_uvoz, preskoceni) za predogled."""
+    return _razvrsti_placila(_preberi_placila(vsebina, mapping), db)
 
-        if not datum_val:
-            preskoceni += 1
-            continue
 
-        # Identifikacija: referenca ima prednost
-        clan: Clan | None = None
-        if ref_id is not None:
-            clan = _najdi_clana_po_referenci(ref_id, db)
-        if not clan and priimek_n and ime_n:
-            clan = db.query(Clan).filter(
-                Clan.priimek == priimek_n, Clan.ime == ime_n
-            ).first()
+def _upsert_clanarine(db: Session, vrstice: list[dict]) -> None:
+    """``INSERT ... ON CONFLICT(clan_id, leto) DO UPDATE`` za vse vrstice v enem paketu.
 
-        if not clan:
-            preskoceni += 1
-            continue
-
-        leto   = datum_val.year
-        znesek = _col(row, headers, *mapping["znesek"]) or None
+    Obstoječim članarinam posodobi datum plačila in znesek z ``znesek_centi`` (opombe ostanejo).
+    """
+    if not vrstice:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialekt_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialekt_insert
+    stavek = dialekt_insert(Clanarina)
+    stavek = stavek.on_conflict_do_update(
+        index_elements=["clan_id", "leto"],
+        set_={"datum_placila": stavek.excluded.datum_placila, "znesek": stavek.excluded.znesek,
+              "znesek_centi": stavek.excluded.znesek_centi},
+    )
+    db.execute(stavek, vrstice)
+
+
+def _uvozi_placila(db: Session, vrstice: list[dict]) -> tuple[int, int]:
+    """Uvozi prebrane vrstice plačil. Vrne (uvozeni, preskoceni)."""
+    za_uvoz, preskoceni = _razvrsti_placila(vrstice, db)
+    # Ista (clan_id, leto) večkrat v datoteki: velja zadnja vrstica
+    clanarine = {
+        (p["clan_id"], p["leto"]): {
+            "clan_id": p["clan_id"], "leto": p["leto"],
+            "datum_placila": p["datum_placila"], "znesek": p["znesek"] or None,
+            "znesek_centi": znesek_v_cente(p["znesek"]),
+        }
+        for p in za_uvoz
+    }
+    try:
+        _upsert_clanarine(db, list(clanarine.values()))
+        oznaci_spremembo(db, *{clan_id for clan_id, _ in clanarine})
+        osvezi_leta(db, *{leto for _, leto in clanarine})
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(za_uvoz), len(preskoceni)
 
-        obstoječe = db.query(Clanarina).filter(
-            Clanarina.clan_id == clan.id, Clanarina.leto == leto
-        ).first()
-        if obstoječe:
-            obstoječe.datum_placila = datum_val
-            obstoječe.znesek        = znesek
-        else:
-            db.add(Clanarina(
-                clan_id=clan.id, leto=leto,
-                datum_placila=datum_val, znesek=znesek,
-            ))
-        uvozeni += 1
 
-    db.commit()
-    return uvozeni, preskoceni
+def _uvozi_placila_workbook(
+    vsebina: bytes, db: Session, mapping: dict[str, list[str]]
+) -> tuple[int, int]:
+    """Uvozi plačila iz Excel. Vrne (uvozeni, preskoceni)."""
+    return _uvozi_placila(db, _preberi_placila(vsebina, mapping))
 
 
 # Labele za UI (kljuc brez "uvoz_stolpec_" predpone)
@@ -378,57 +404,68 @@ KLJUCI_UVOZ = [
 # Pomožne funkcije za branje Excel stolpcev
 # ---------------------------------------------------------------------------
 
-def _col(row, headers, *iskani) -> str:
-    """Vrni vrednost prvega stolpca ki se ujema z enim od iskalnih nizov."""
+def _indeks_stolpca(headers, iskani: list[str]) -> int | None:
+    """Indeks prvega stolpca, ki se ujema z enim od iskalnih nizov (ali None).
+
+    Najprej natančno ujemanje (v vrstnem redu ``iskani``), nato vsebovanost kot
+    cela beseda.
+    """
+    glave = [str(h).strip().lower() if h else "" for h in headers]
     # 1. pass: natančno ujemanje
     for iskanje in iskani:
-        for i, h in enumerate(headers):
-            if h and str(h).strip().lower() == iskanje.lower():
-                v = row[i].value
-                return str(v).strip() if v is not None else ""
+        s_l = iskanje.lower()
+        for i, h_l in enumerate(glave):
+            if h_l and h_l == s_l:
+                return i
     # 2. pass: vsebuje (celo besedo)
     for iskanje in iskani:
-        for i, h in enumerate(headers):
-            if h:
-                h_l = str(h).strip().lower()
-                s_l = iskanje.lower()
-                if re.search(r'(?<![a-zčšž])' + re.escape(s_l) + r'(?![a-zčšž])', h_l):
-                    v = row[i].value
-                    return str(v).strip() if v is not None else ""
-    return ""
-
-
-def _parse_rd(row, headers, iskani: list[str]) -> date | None:
-    """Vrne datum veljavnosti RD ali None. iskani = seznam možnih imen stolpca."""
+        vzorec = re.compile(r'(?<![a-zčšž])' + re.escape(iskanje.lower()) + r'(?![a-zčšž])')
+        for i, h_l in enumerate(glave):
+            if h_l and vzorec.search(h_l):
+                return i
+    return None
+
+
+def _indeks_vsebuje(headers, iskani: list[str]) -> int | None:
+    """Indeks prvega stolpca, katerega glava vsebuje enega od nizov (datumski stolpci)."""
     for i, h in enumerate(headers):
         if h and any(t.lower() in str(h).strip().lower() for t in iskani):
-            v = row[i].value
-            if v:
-                if hasattr(v, "date"):
-                    return v.date()
-                else:
-                    try:
-                        return datetime.strptime(str(v), "%Y-%m-%d").date()
-                    except Exception:
-                        pass
-            break
+            return i
     return None
 
 
-def _parse_datum_placila(row, headers, leto: int) -> date | None:
-    """Vrne datum plačila za izbrano leto ali None."""
-    for i, h in enumerate(headers):
-        if h and str(leto) in str(h):
-            v = row[i].value
-            if v:
-                if hasattr(v, "date"):
-                    return v.date()
-                elif str(v).strip().lower() not in ("", "ne", "n", "0"):
-                    try:
-                        return datetime.strptime(str(v), "%Y-%m-%d").date()
-                    except Exception:
-                        return date(leto, 1, 1)
-            break
+def _nacrt_stolpcev(headers, mapping: dict[str, list[str]], vsebuje: tuple[str, ...] = ()) -> dict[str, int | None]:
+    """Enkrat na list preslika polja iz mapiranja v indekse stolpcev.
+
+    Polja v ``vsebuje`` (datumi) se iščejo po podnizu glave, ostala kot pri
+    ``_indeks_stolpca``. Vrstice se nato berejo z ``iter_rows(values_only=True)``
+    in indeksiranjem terk (``_niz``, ``_celica``).
+    """
+    return {
+        polje: (_indeks_vsebuje if polje in vsebuje else _indeks_stolpca)(headers, iskani)
+        for polje, iskani in mapping.items()
+    }
+
+
+def _celica(row: tuple, i: int | None):
+    """Surova vrednost celice ali None (manjkajoč stolpec ali krajša vrstica)."""
+    return row[i] if i is not None and i < len(row) else None
+
+
+def _niz(row: tuple, i: int | None) -> str:
+    v = _celica(row, i)
+    return str(v).strip() if v is not None else ""
+
+
+def _datum_rd(v) -> date | None:
+    """Vrne datum veljavnosti RD iz vrednosti celice ali None."""
+    if v:
+        if hasattr(v, "date"):
+            return v.date()
+        try:
+            return datetime.strptime(str(v), "%Y-%m-%d").date()
+        except Exception:
+            pass
     return None
 
 
@@ -447,122 +484,149 @@ def _load_sheet(vsebina: bytes):
     return ws, headers
 
 
-def _parse_excel_pregled(vsebina: bytes, db: Session, mapping: dict[str, list[str]]) -> tuple[list[dict], list[dict]]:
-    """Parsira Excel in vrne (novi, preskoceni) za predogled, brez pisanja v DB."""
-    ws, headers = _load_sheet(vsebina)
-    tipi = get_tipi_clanstva(db)
-    novi: list[dict] = []
-    preskoceni: list[dict] = []
+_UVOZ_PAKET = 500  # vrstic na INSERT pri uvozu članov
 
-    for row in ws.iter_rows(min_row=2):
-        priimek = _col(row, headers, *mapping["priimek"])
-        ime = _col(row, headers, *mapping["ime"])
-        if not priimek or not ime:
-            continue
 
-        priimek_n = priimek.strip().title()
-        ime_n = ime.strip().title()
+def _preberi_clane(vsebina: bytes, mapping: dict[str, list[str]], tipi: list[str]) -> list[dict]:
+    """Prebere list članov v normalizirane slovarje stolpcev ``Clan`` (brez dostopa do baze).
 
-        obstaja = db.query(Clan).filter(
-            Clan.priimek == priimek_n, Clan.ime == ime_n
-        ).first()
+    Vrstice brez priimka ali imena se izpustijo. Rezultat se ob predogledu
+    shrani v sejo uvoza, potrditev pa ga uporabi brez ponovnega branja Excela.
+    """
+    ws, headers = _load_sheet(vsebina)
+    nacrt = _nacrt_stolpcev(headers, mapping, vsebuje=("veljavnost_rd",))
+    vrstice: list[dict] = []
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        priimek = _niz(row, nacrt["priimek"])
+        ime = _niz(row, nacrt["ime"])
+        if not priimek or not ime:
+            continue
 
-        tip = _col(row, headers, *mapping["tip_clanstva"])
+        tip = _niz(row, nacrt["tip_clanstva"])
         if tip not in tipi:
             tip = tipi[0] if tipi else "Osebni"
 
-        entry = {
-            "priimek": priimek_n,
-            "ime": ime_n,
-            "klicni_znak": _col(row, headers, *mapping["klicni_znak"]).strip().upper() or "–",
+        es_str = _niz(row, nacrt["es_stevilka"])
+        try:
+            es_stevilka = int(es_str) if es_str else None
+        except (ValueError, TypeError):
+            es_stevilka = None
+
+        vrstice.append({
+            "priimek": priimek.title(),
+            "ime": ime.title(),
+            "klicni_znak": _niz(row, nacrt["klicni_znak"]).upper() or None,
+            "naslov_ulica": _niz(row, nacrt["naslov_ulica"]) or None,
+            "naslov_posta": _niz(row, nacrt["naslov_posta"]) or None,
             "tip_clanstva": tip,
-            "veljavnost_rd": _parse_rd(row, headers, mapping["veljavnost_rd"]),
-        }
+            "klicni_znak_nosilci": _niz(row, nacrt["nosilci"]) or None,
+            "operaterski_razred": _niz(row, nacrt["operaterski_razred"]) or None,
+            "mobilni_telefon": _niz(row, nacrt["mobilni"]) or None,
+            "telefon_doma": _niz(row, nacrt["telefon_doma"]) or None,
+            "elektronska_posta": _niz(row, nacrt["email"]) or None,
+            "soglasje_op": _niz(row, nacrt["soglasje"]) or None,
+            "izjava": _niz(row, nacrt["izjava"]) or None,
+            "veljavnost_rd": _datum_rd(_celica(row, nacrt["veljavnost_rd"])),
+            "es_stevilka": es_stevilka,
+            "opombe": _niz(row, nacrt["opombe"]) or None,
+            "aktiven": True,
+        })
+    return vrstice
+
+
+def _razvrsti_clane(vrstice: list[dict], db: Session) -> tuple[list[dict], list[dict]]:
+    """Razvrsti prebrane vrstice v (novi, preskoceni) brez pisanja v bazo.
+
+    Obstoječi ključi (priimek, ime) in klicni znaki se naložijo z eno poizvedbo,
+    duplikati (v bazi ali znotraj same datoteke) pa se zaznajo v pomnilniku.
+    ``novi`` so slovarji stolpcev ``Clan`` za paketni INSERT; pri preskočenih
+    je dodan ``razlog``.
+    """
+    imena_baza: set[tuple[str, str]] = set()
+    znaki_baza: set[str] = set()
+    for priimek, ime, klicni_znak in db.query(Clan.priimek, Clan.ime, Clan.klicni_znak):
+        imena_baza.add(_kljuc_clana(priimek or "", ime or ""))
+        if klicni_znak and klicni_znak.strip():
+            znaki_baza.add(klicni_znak.strip().upper())
+    imena_datoteka: set[tuple[str, str]] = set()
+    znaki_datoteka: set[str] = set()
 
-        if obstaja:
-            preskoceni.append(entry)
+    novi: list[dict] = []
+    preskoceni: list[dict] = []
+    for clan in vrstice:
+        kljuc = _kljuc_clana(clan["priimek"], clan["ime"])
+        kz = clan["klicni_znak"]
+        if kljuc in imena_baza:
+            razlog = "Član že obstaja"
+        elif kljuc in imena_datoteka:
+            razlog = "Podvojen v datoteki"
+        elif kz and kz in znaki_baza:
+            razlog = "Klicni znak že obstaja"
+        elif kz and kz in znaki_datoteka:
+            razlog = "Klicni znak podvojen v datoteki"
         else:
-            novi.append(entry)
+            razlog = None
+
+        if razlog:
+            preskoceni.append({**clan, "razlog": razlog})
+            continue
+        imena_datoteka.add(kljuc)
+        if kz:
+            znaki_datoteka.add(kz)
+        novi.append(clan)
 
     return novi, preskoceni
 
 
-def _uvozi_workbook(vsebina: bytes, db: Session, mapping: dict[str, list[str]]) -> tuple[int, int]:
-    """Izvede dejanski uvoz članov iz Excel vsebine. Vrne (uvozeni, preskoceni)."""
-    ws, headers = _load_sheet(vsebina)
-    tipi = get_tipi_clanstva(db)
-    uvozeni = 0
-    preskoceni = 0
+def _za_predogled(clan: dict) -> dict:
+    return {
+        "priimek": clan["priimek"],
+        "ime": clan["ime"],
+        "klicni_znak": clan["klicni_znak"] or "–",
+        "tip_clanstva": clan["tip_clanstva"],
+        "veljavnost_rd": clan["veljavnost_rd"],
+        "razlog": clan.get("razlog"),
+    }
 
-    for row in ws.iter_rows(min_row=2):
-        priimek = _col(row, headers, *mapping["priimek"])
-        ime = _col(row, headers, *mapping["ime"])
-        if not priimek or not ime:
-            continue
 
-        priimek_n = priimek.strip().title()
-        ime_n = ime.strip().title()
+def _parse_excel_pregled(vsebina: bytes, db: Session, mapping: dict[str, list[str]]) -> tuple[list[dict], list[dict]]:
+    """Parsira Excel in vrne (novi, preskoceni) za predogled, brez pisanja v DB."""
+    novi, preskoceni = _razvrsti_clane(_preberi_clane(vsebina, mapping, get_tipi_clanstva(db)), db)
+    return [_za_predogled(c) for c in novi], [_za_predogled(c) for c in preskoceni]
 
-        obstaja = db.query(Clan).filter(
-            Clan.priimek == priimek_n, Clan.ime == ime_n
-        ).first()
-        if obstaja:
-            preskoceni += 1
-            continue
 
-        tip = _col(row, headers, *mapping["tip_clanstva"])
-        if tip not in tipi:
-            tip = tipi[0] if tipi else "Osebni"
+def _uvozi_clane(db: Session, vrstice: list[dict]) -> tuple[int, int]:
+    """Uvozi prebrane vrstice članov. Vrne (uvozeni, preskoceni).
 
-        es_str = _col(row, headers, *mapping["es_stevilka"])
-        try:
-            es_stevilka = int(es_str) if es_str else None
-        except (ValueError, TypeError):
-            es_stevilka = None
+    Duplikati se preverijo znova (baza se je od predogleda lahko spremenila).
+    Novi člani se vstavijo v paketih po ``_UVOZ_PAKET`` vrstic v eni transakciji;
+    napredek se po vsakem paketu izpiše v dnevnik.
+    """
+    novi, preskoceni = _razvrsti_clane(vrstice, db)
+    try:
+        for zacetek in range(0, len(novi), _UVOZ_PAKET):
+            db.execute(insert(Clan), novi[zacetek:zacetek + _UVOZ_PAKET])
+            vstavljeni = min(zacetek + _UVOZ_PAKET, len(novi))
+            logger.info("Uvoz članov: %d/%d", vstavljeni, len(novi))
+        osvezi_tipe(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(novi), len(preskoceni)
 
-        clan = Clan(
-            priimek=priimek_n,
-            ime=ime_n,
-            klicni_znak=(_col(row, headers, *mapping["klicni_znak"]).strip().upper() or None),
-            naslov_ulica=_col(row, headers, *mapping["naslov_ulica"]) or None,
-            naslov_posta=_col(row, headers, *mapping["naslov_posta"]) or None,
-            tip_clanstva=tip,
-            klicni_znak_nosilci=_col(row, headers, *mapping["nosilci"]) or None,
-            operaterski_razred=_col(row, headers, *mapping["operaterski_razred"]) or None,
-            mobilni_telefon=_col(row, headers, *mapping["mobilni"]) or None,
-            telefon_doma=_col(row, headers, *mapping["telefon_doma"]) or None,
-            elektronska_posta=_col(row, headers, *mapping["email"]) or None,
-            soglasje_op=_col(row, headers, *mapping["soglasje"]) or None,
-            izjava=_col(row, headers, *mapping["izjava"]) or None,
-            veljavnost_rd=_parse_rd(row, headers, mapping["veljavnost_rd"]),
-            es_stevilka=es_stevilka,
-            opombe=_col(row, headers, *mapping["opombe"]) or None,
-            aktiven=True,
-        )
-        db.add(clan)
-        uvozeni += 1
 
-    db.commit()
-    return uvozeni, preskoceni
+def _uvozi_workbook(vsebina: bytes, db: Session, mapping: dict[str, list[str]]) -> tuple[int, int]:
+    """Izvede dejanski uvoz članov iz Excel vsebine. Vrne (uvozeni, preskoceni)."""
+    return _uvozi_clane(db, _preberi_clane(vsebina, mapping, get_tipi_clanstva(db)))
 
 
 def _sestevki_placil(db: Session) -> list[dict]:
-    """Vrne seštevke plačil po letu: leto, st_placnikov, skupaj_znesek, brez_zneska."""
-    from collections import defaultdict
-    vsa = db.query(Clanarina).filter(Clanarina.datum_placila != None).all()
-    po_letu: dict = defaultdict(lambda: {"st_placnikov": 0, "skupaj": 0.0, "brez_zneska": 0})
-    for c in vsa:
-        po_letu[c.leto]["st_placnikov"] += 1
-        if c.znesek and c.znesek.strip():
-            try:
-                po_letu[c.leto]["skupaj"] += float(c.znesek.replace(",", "."))
-            except ValueError:
-                po_letu[c.leto]["brez_zneska"] += 1
-        else:
-            po_letu[c.leto]["brez_zneska"] += 1
+    """Vrne seštevke plačil po letu: leto, st_placnikov, skupaj_znesek, brez_zneska (iz ``statistika_leto``)."""
     return [
-        {"leto": leto, **vrednosti}
-        for leto, vrednosti in sorted(po_letu.items(), reverse=True)
+        {"leto": leto, "st_placnikov": s.placniki, "skupaj": s.skupaj_centi / 100, "brez_zneska": s.brez_zneska}
+        for leto, s in sorted(statistika_let(db).items(), reverse=True)
+        if s.placniki
     ]
 
 
@@ -571,7 +635,7 @@ def _sestevki_placil(db: Session) -> list[dict]:
 # ---------------------------------------------------------------------------
 
 @router.get("", response_class=HTMLResponse)
-async def izvoz_stran(request: Request, db: Session = Depends(get_db)) -> Response:
+def izvoz_stran(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -593,8 +657,54 @@ async def izvoz_stran(request: Request, db: Session = Depends(get_db)) -> Respon
     )
 
 
+# ---------------------------------------------------------------------------
+# Izvoz v Excel – pretočno (app/xlsx_tok.py), vrstice iz poizvedb z yield_per.
+# Iste tabele gredo tudi v CSV / JSON Lines (app/csv_tok.py).
+# ---------------------------------------------------------------------------
+
+_YIELD_PER = 500
+
+# končnica → (generator kosov, media type)
+_TEKSTOVNE_OBLIKE = {
+    "csv": (csv_tok, CSV_MEDIA_TYPE),
+    "jsonl": (jsonl_tok, JSONL_MEDIA_TYPE),
+}
+
+_GLAVA_CLANOV = [
+    "ID", "Priimek", "Ime", "Klicni znak", "Naslov - ulica/naselje",
+    "Naslov - pošta", "Tip članstva", "Klicni znak nosilci",
+    "Operaterski razred", "Mobilni telefon", "Telefon doma",
+    "E-pošta", "Soglasje OP", "Izjava", "Veljavnost RD",
+    "ES številka", "Aktiven", "Opombe",
+]
+
+
+def _vrstica_clana(clan: Clan) -> list:
+    """Vrstica lista "Clani" (backup-excel in filtrirani izvoz)."""
+    return [
+        clan.id,
+        clan.priimek,
+        clan.ime,
+        clan.klicni_znak or "",
+        clan.naslov_ulica or "",
+        clan.naslov_posta or "",
+        clan.tip_clanstva,
+        clan.klicni_znak_nosilci or "",
+        clan.operaterski_razred or "",
+        clan.mobilni_telefon or "",
+        clan.telefon_doma or "",
+        clan.elektronska_posta or "",
+        clan.soglasje_op or "",
+        clan.izjava or "",
+        clan.veljavnost_rd.isoformat() if clan.veljavnost_rd else "",
+        clan.es_stevilka or "",
+        "Da" if clan.aktiven else "Ne",
+        clan.opombe or "",
+    ]
+
+
 @router.get("/zrs")
-async def izvoz_zrs(
+def izvoz_zrs(
     request: Request,
     leto: int = date.today().year,
     db: Session = Depends(get_db),
@@ -608,75 +718,69 @@ async def izvoz_zrs(
     # Tipi ki so vključeni v izvoz (neprazen ZRS naziv)
     vkljuceni_tipi = {t for t, zrs_t in config["tipi"].items() if zrs_t}
 
-    placali_ids = {
-        c.clan_id
-        for c in db.query(Clanarina)
-        .filter(Clanarina.leto == leto, Clanarina.datum_placila != None)
-        .all()
-    }
-
-    if vkljuceni_tipi:
-        clani = [
-            c for c in db.query(Clan)
-            .filter(Clan.aktiven == True, Clan.tip_clanstva.in_(vkljuceni_tipi))
-            .order_by(Clan.priimek, Clan.ime)
-            .all()
-            if c.id in placali_ids
-        ]
-    else:
-        clani = []
-
     # Stolpci v želenem vrstnem redu (samo vključeni)
     aktivni_stolpci = sorted(
         [s for s in config["stolpci"] if s["vkljuci"]],
         key=lambda s: s["vrstni_red"],
     )
 
-    wb = Workbook()
-
-    # Sheet 1: Podatki radiokluba
-    ws_klub = wb.active
-    ws_klub.title = "Podatki radiokluba"
     klub_ime = get_nastavitev(db, "klub_ime", "")
     klub_oznaka = get_nastavitev(db, "klub_oznaka", "")
     klub_naslov = get_nastavitev(db, "klub_naslov", "")
     klub_posta = get_nastavitev(db, "klub_posta", "")
     klub_email = get_nastavitev(db, "klub_email", "")
-    ws_klub.append(["Ime radiokluba:", klub_ime])
-    ws_klub.append(["Klicni znak:", klub_oznaka])
-    ws_klub.append(["Naslov:", klub_naslov])
-    ws_klub.append(["Pošta:", klub_posta])
-    ws_klub.append(["E-pošta:", klub_email])
-    ws_klub.append(["Leto prijave:", leto])
-    ws_klub.column_dimensions["A"].width = 20
-    ws_klub.column_dimensions["B"].width = 40
-
-    # Sheet 2: Lista članov
-    ws = wb.create_sheet("ListaClanov")
-    header_font = Font(bold=True)
-    header_fill = PatternFill("solid", fgColor="DDEEFF")
-    ws.append([s["naziv"] for s in aktivni_stolpci])
-    for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center")
-
-    for zap_st, clan in enumerate(clani, start=1):
-        ws.append([_zrs_vrednost(clan, s["kljuc"], zap_st, config) for s in aktivni_stolpci])
-
-    for ci, stolpec in enumerate(aktivni_stolpci, start=1):
-        ws.column_dimensions[get_column_letter(ci)].width = _ZRS_COLUMN_WIDTHS.get(stolpec["kljuc"], 15)
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
+
+    def vrstice_clanov():
+        if not vkljuceni_tipi:
+            return
+        from .clani import _placal_pogoj
+        clani = (
+            db.query(Clan)
+            .filter(
+                Clan.aktiven == True,
+                Clan.tip_clanstva.in_(vkljuceni_tipi),
+                _placal_pogoj(leto),
+            )
+            .order_by(Clan.priimek, Clan.ime)
+            .yield_per(_YIELD_PER)
+        )
+        for zap_st, clan in enumerate(clani, start=1):
+            yield [_zrs_vrednost(clan, s["kljuc"], zap_st, config) for s in aktivni_stolpci]
+
+    listi = [
+        # Sheet 1: Podatki radiokluba
+        XlsxList(
+            "Podatki radiokluba",
+            [
+                ["Ime radiokluba:", klub_ime],
+                ["Klicni znak:", klub_oznaka],
+                ["Naslov:", klub_naslov],
+                ["Pošta:", klub_posta],
+                ["E-pošta:", klub_email],
+                ["Leto prijave:", leto],
+            ],
+            sirine={1: 20, 2: 40},
+        ),
+        # Sheet 2: Lista članov
+        XlsxList(
+            "ListaClanov",
+            vrstice_clanov(),
+            glava=[s["naziv"] for s in aktivni_stolpci],
+            slog_glave=SLOG_GLAVA,
+            sirine={
+                ci: _ZRS_COLUMN_WIDTHS.get(stolpec["kljuc"], 15)
+                for ci, stolpec in enumerate(aktivni_stolpci, start=1)
+            },
+        ),
+    ]
+
     filename = f"prijava_clanov_{leto}_{klub_oznaka}.xlsx"
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "izvoz_zrs",
                f"Leto {leto}", ip=ip)
     return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        xlsx_tok(listi),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
@@ -725,18 +829,35 @@ async def zrs_nastavitve_shrani(
     config = {"uppercase": uppercase, "tipi": tipi, "razredi": razredi, "stolpci": stolpci}
     raw = json.dumps(config, ensure_ascii=False)
 
-    n = db.query(Nastavitev).filter(Nastavitev.kljuc == ZRS_CONFIG_KEY).first()
-    if n:
-        n.vrednost = raw
-    else:
-        db.add(Nastavitev(kljuc=ZRS_CONFIG_KEY, vrednost=raw, opis="Konfiguracija ZRS izvoza (JSON)"))
-    db.commit()
+    await run_in_threadpool(
+        shrani_nastavitve, db, {ZRS_CONFIG_KEY: raw},
+        {ZRS_CONFIG_KEY: "Konfiguracija ZRS izvoza (JSON)"},
+    )
 
     return RedirectResponse(url="/izvoz?zrs_shranjeno=1", status_code=302)
 
 
+def _filtrirani_clani(
+    db: Session, q: str, tip: list[str], aktiven: str, placal: str,
+    rd: list[str], operaterski_razred: list[str], leto_placila: int,
+):
+    """Člani po filtrih seznama /clani (za vse oblike filtriranega izvoza)."""
+    from .clani import _poizvedba_clanov
+    danes = date.today()
+    kmalu_meja = danes + timedelta(days=180)
+    leto_ef = leto_placila if leto_placila else danes.year
+    return (
+        _poizvedba_clanov(db, q=q, tip=tip, aktiven=aktiven, rd=rd,
+                          operaterski_razred=operaterski_razred,
+                          danes=danes, kmalu_meja=kmalu_meja,
+                          placal=placal, leto=leto_ef)
+        .order_by(Clan.priimek, Clan.ime)
+        .yield_per(_YIELD_PER)
+    )
+
+
 @router.get("/clani-filtrirani")
-async def izvozi_filtrirane_clane(
+def izvozi_filtrirane_clane(
     request: Request,
     q: str = "",
     tip: List[str] = Query(default=[]),
@@ -753,214 +874,221 @@ async def izvozi_filtrirane_clane(
     if not is_editor(user):
         return RedirectResponse(url="/izvoz", status_code=302)
 
-    from .clani import _filtriraj_clane
-    danes = date.today()
-    kmalu_meja = danes + timedelta(days=180)
-    leto_ef = leto_placila if leto_placila else danes.year
-
-    clani = _filtriraj_clane(db, q=q, tip=tip, aktiven=aktiven, rd=rd,
-                              operaterski_razred=operaterski_razred,
-                              danes=danes, kmalu_meja=kmalu_meja)
+    clani = _filtrirani_clani(db, q, tip, aktiven, placal, rd, operaterski_razred, leto_placila)
 
-    if placal in ("da", "ne"):
-        placali_ids = {
-            c.clan_id
-            for c in db.query(Clanarina).filter(Clanarina.leto == leto_ef).all()
-            if c.datum_placila is not None
-        }
-        if placal == "da":
-            clani = [c for c in clani if c.id in placali_ids]
-        else:
-            clani = [c for c in clani if c.id not in placali_ids]
-
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Clani"
-    header_font = Font(bold=True)
-
-    headers = [
-        "ID", "Priimek", "Ime", "Klicni znak", "Naslov - ulica/naselje",
-        "Naslov - pošta", "Tip članstva", "Klicni znak nosilci",
-        "Operaterski razred", "Mobilni telefon", "Telefon doma",
-        "E-pošta", "Soglasje OP", "Izjava", "Veljavnost RD",
-        "ES številka", "Aktiven", "Opombe",
-    ]
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = header_font
-
-    for clan in clani:
-        ws.append([
-            clan.id,
-            clan.priimek,
-            clan.ime,
-            clan.klicni_znak or "",
-            clan.naslov_ulica or "",
-            clan.naslov_posta or "",
-            clan.tip_clanstva,
-            clan.klicni_znak_nosilci or "",
-            clan.operaterski_razred or "",
-            clan.mobilni_telefon or "",
-            clan.telefon_doma or "",
-            clan.elektronska_posta or "",
-            clan.soglasje_op or "",
-            clan.izjava or "",
-            clan.veljavnost_rd.isoformat() if clan.veljavnost_rd else "",
-            clan.es_stevilka or "",
-            "Da" if clan.aktiven else "Ne",
-            clan.opombe or "",
-        ])
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
     today = date.today().isoformat()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "izvoz_clani_filtrirani", ip=ip)
     return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        xlsx_tok([XlsxList("Clani", (_vrstica_clana(c) for c in clani), glava=_GLAVA_CLANOV)]),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f'attachment; filename="clani_izvoz_{today}.xlsx"'},
     )
 
 
-@router.get("/backup-excel")
-async def backup_excel(request: Request, db: Session = Depends(get_db)) -> Response:
+@router.get("/clani-filtrirani.{oblika}")
+def izvozi_filtrirane_clane_tekst(
+    request: Request,
+    oblika: str,
+    q: str = "",
+    tip: List[str] = Query(default=[]),
+    aktiven: str = "",
+    placal: str = "",
+    rd: List[str] = Query(default=[]),
+    operaterski_razred: List[str] = Query(default=[]),
+    leto_placila: int = Query(default=0),
+    db: Session = Depends(get_db),
+) -> Response:
+    """Filtrirani člani kot CSV (``.csv``) ali JSON Lines (``.jsonl``)."""
     user, redirect = require_login(request)
     if redirect:
         return redirect
-    if not is_admin(user):
+    if not is_editor(user):
         return RedirectResponse(url="/izvoz", status_code=302)
+    if oblika not in _TEKSTOVNE_OBLIKE:
+        return Response(status_code=404)
+    tok, media_type = _TEKSTOVNE_OBLIKE[oblika]
 
-    clani = db.query(Clan).order_by(Clan.priimek, Clan.ime).all()
+    clani = _filtrirani_clani(db, q, tip, aktiven, placal, rd, operaterski_razred, leto_placila)
+
+    today = date.today().isoformat()
+    ip = request.client.host if request.client else None
+    log_akcija(db, user.get("uporabnisko_ime") if user else None, "izvoz_clani_filtrirani",
+               oblika.upper(), ip=ip)
+    lst = XlsxList("clani", (_vrstica_clana(c) for c in clani), glava=_GLAVA_CLANOV)
+    # Izvoz za preglednico: formule v podatkih se ne izvedejo (backup.csv.zip ostane nespremenjen)
+    return StreamingResponse(
+        csv_tok(lst, brez_formul=True) if oblika == "csv" else tok(lst),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="clani_izvoz_{today}.{oblika}"'},
+    )
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Clani"
-    header_font = Font(bold=True)
 
-    # Glava
-    headers = [
-        "ID", "Priimek", "Ime", "Klicni znak", "Naslov - ulica/naselje",
-        "Naslov - pošta", "Tip članstva", "Klicni znak nosilci",
-        "Operaterski razred", "Mobilni telefon", "Telefon doma",
-        "E-pošta", "Soglasje OP", "Izjava", "Veljavnost RD",
-        "ES številka", "Aktiven", "Opombe",
+def _backup_listi(db: Session) -> list[XlsxList]:
+    """Tabele celotnega backupa (člani, članarine, aktivnosti, vloge) za vse oblike izvoza."""
+    clani = db.query(Clan).order_by(Clan.priimek, Clan.ime).yield_per(_YIELD_PER)
+    # Ostali listi dobijo ime člana z JOIN-om (namesto slovarja vseh članov v pomnilniku)
+    clanarine = (
+        db.query(
+            Clanarina.id, Clanarina.clan_id, Clan.priimek, Clan.ime, Clanarina.leto,
+            Clanarina.datum_placila, Clanarina.znesek, Clanarina.opombe,
+        )
+        .outerjoin(Clan, Clan.id == Clanarina.clan_id)
+        .order_by(Clanarina.clan_id, Clanarina.leto.desc())
+        .yield_per(_YIELD_PER)
+    )
+    aktivnosti = (
+        db.query(
+            Aktivnost.id, Aktivnost.clan_id, Clan.priimek, Clan.ime, Aktivnost.leto,
+            Aktivnost.datum, Aktivnost.opis, Aktivnost.delovne_ure,
+        )
+        .outerjoin(Clan, Clan.id == Aktivnost.clan_id)
+        .order_by(Aktivnost.clan_id, Aktivnost.leto.desc(), Aktivnost.datum.desc())
+        .yield_per(_YIELD_PER)
+    )
+    vloge = (
+        db.query(
+            Clan.priimek, Clan.ime, Clan.klicni_znak, ClanVloga.naziv,
+            ClanVloga.datum_od, ClanVloga.datum_do, ClanVloga.opombe,
+        )
+        .select_from(ClanVloga)
+        .outerjoin(Clan, Clan.id == ClanVloga.clan_id)
+        .order_by(ClanVloga.clan_id, ClanVloga.datum_od.desc())
+        .yield_per(_YIELD_PER)
+    )
+
+    return [
+        XlsxList("Clani", (_vrstica_clana(c) for c in clani), glava=_GLAVA_CLANOV),
+        XlsxList(
+            "Clanarine",
+            (
+                [c.id, c.clan_id, c.priimek or "", c.ime or "", c.leto,
+                 c.datum_placila.isoformat() if c.datum_placila else "",
+                 c.znesek or "", c.opombe or ""]
+                for c in clanarine
+            ),
+            glava=["ID", "Clan ID", "Priimek", "Ime", "Leto", "Datum plačila", "Znesek (€)", "Opombe"],
+        ),
+        XlsxList(
+            "Aktivnosti",
+            (
+                [a.id, a.clan_id, a.priimek or "", a.ime or "", a.leto,
+                 a.datum.isoformat() if a.datum else "",
+                 a.opis, a.delovne_ure if a.delovne_ure is not None else ""]
+                for a in aktivnosti
+            ),
+            glava=["ID", "Clan ID", "Priimek", "Ime", "Leto", "Datum aktivnosti", "Aktivnost", "Delovne ure"],
+        ),
+        XlsxList(
+            "Vloge",
+            (
+                [v.priimek or "", v.ime or "", v.klicni_znak or "", v.naziv,
+                 v.datum_od.isoformat() if v.datum_od else "",
+                 v.datum_do.isoformat() if v.datum_do else "",
+                 v.opombe or ""]
+                for v in vloge
+            ),
+            glava=["Priimek", "Ime", "Klicni znak", "Naziv", "Datum od", "Datum do", "Opombe"],
+        ),
     ]
-    ws.append(headers)
-    for cell in ws[1]:
-        cell.font = header_font
-
-    for clan in clani:
-        ws.append([
-            clan.id,
-            clan.priimek,
-            clan.ime,
-            clan.klicni_znak or "",
-            clan.naslov_ulica or "",
-            clan.naslov_posta or "",
-            clan.tip_clanstva,
-            clan.klicni_znak_nosilci or "",
-            clan.operaterski_razred or "",
-            clan.mobilni_telefon or "",
-            clan.telefon_doma or "",
-            clan.elektronska_posta or "",
-            clan.soglasje_op or "",
-            clan.izjava or "",
-            clan.veljavnost_rd.isoformat() if clan.veljavnost_rd else "",
-            clan.es_stevilka or "",
-            "Da" if clan.aktiven else "Ne",
-            clan.opombe or "",
-        ])
-
-    # Sheet za clanarine
-    ws2 = wb.create_sheet("Clanarine")
-    ws2.append(["ID", "Clan ID", "Priimek", "Ime", "Leto", "Datum plačila", "Znesek (€)", "Opombe"])
-    ws2[1][0].font = header_font
-    clanarine = db.query(Clanarina).order_by(Clanarina.clan_id, Clanarina.leto.desc()).all()
-    clan_map = {c.id: c for c in clani}
-    for c in clanarine:
-        clan = clan_map.get(c.clan_id)
-        ws2.append([
-            c.id,
-            c.clan_id,
-            clan.priimek if clan else "",
-            clan.ime if clan else "",
-            c.leto,
-            c.datum_placila.isoformat() if c.datum_placila else "",
-            c.znesek or "",
-            c.opombe or "",
-        ])
-
-    # Sheet za aktivnosti
-    ws3 = wb.create_sheet("Aktivnosti")
-    ws3.append(["ID", "Clan ID", "Priimek", "Ime", "Leto", "Datum aktivnosti", "Aktivnost", "Delovne ure"])
-    ws3[1][0].font = header_font
-    aktivnosti = db.query(Aktivnost).order_by(
-        Aktivnost.clan_id, Aktivnost.leto.desc(), Aktivnost.datum.desc()
-    ).all()
-    for a in aktivnosti:
-        clan = clan_map.get(a.clan_id)
-        ws3.append([
-            a.id,
-            a.clan_id,
-            clan.priimek if clan else "",
-            clan.ime if clan else "",
-            a.leto,
-            a.datum.isoformat() if a.datum else "",
-            a.opis,
-            a.delovne_ure if a.delovne_ure is not None else "",
-        ])
-
-    # Sheet za vloge
-    ws4 = wb.create_sheet("Vloge")
-    ws4.append(["Priimek", "Ime", "Klicni znak", "Naziv", "Datum od", "Datum do", "Opombe"])
-    ws4[1][0].font = header_font
-    vloge = db.query(ClanVloga).order_by(ClanVloga.clan_id, ClanVloga.datum_od.desc()).all()
-    for v in vloge:
-        clan = clan_map.get(v.clan_id)
-        ws4.append([
-            clan.priimek if clan else "",
-            clan.ime if clan else "",
-            clan.klicni_znak or "" if clan else "",
-            v.naziv,
-            v.datum_od.isoformat() if v.datum_od else "",
-            v.datum_do.isoformat() if v.datum_do else "",
-            v.opombe or "",
-        ])
-
-    buf = io.BytesIO()
-    wb.save(buf)
-    buf.seek(0)
+
+
+@router.get("/backup-excel")
+def backup_excel(request: Request, db: Session = Depends(get_db)) -> Response:
+    user, redirect = require_login(request)
+    if redirect:
+        return redirect
+    if not is_admin(user):
+        return RedirectResponse(url="/izvoz", status_code=302)
+
+    listi = _backup_listi(db)
+
     today = date.today().isoformat()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "izvoz_backup_excel", ip=ip)
     return StreamingResponse(
-        buf,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        xlsx_tok(listi),
+        media_type=XLSX_MEDIA_TYPE,
         headers={"Content-Disposition": f'attachment; filename="backup_clanstvo_{today}.xlsx"'},
     )
 
 
+@router.get("/backup.{oblika}.zip")
+def backup_tekst(request: Request, oblika: str, db: Session = Depends(get_db)) -> Response:
+    """Backup vseh tabel kot zip z eno CSV ali JSON Lines datoteko na tabelo."""
+    user, redirect = require_login(request)
+    if redirect:
+        return redirect
+    if not is_admin(user):
+        return RedirectResponse(url="/izvoz", status_code=302)
+    if oblika not in _TEKSTOVNE_OBLIKE:
+        return Response(status_code=404)
+    tok, _ = _TEKSTOVNE_OBLIKE[oblika]
+
+    datoteke = ((f"{lst.ime.lower()}.{oblika}", tok(lst)) for lst in _backup_listi(db))
+
+    today = date.today().isoformat()
+    ip = request.client.host if request.client else None
+    log_akcija(db, user.get("uporabnisko_ime") if user else None, "izvoz_backup_tekst",
+               oblika.upper(), ip=ip)
+    return StreamingResponse(
+        zip_tok(datoteke),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="backup_clanstvo_{today}.{oblika}.zip"'},
+    )
+
+
+_BACKUP_DB_POT = "data/clanstvo.db"
+
+
+def _posnetek_baze(db_path: str) -> str:
+    """Konsistentna kopija baze v začasni datoteki (SQLite Online Backup API).
+
+    Pri ``journal_mode=WAL`` so potrjene strani lahko še v ``-wal`` datoteki, zato
+    kopija same ``clanstvo.db`` ne bi vsebovala zadnjih sprememb. Vrne pot kopije.
+    """
+    fd, pot = tempfile.mkstemp(prefix="backup_", suffix=".db", dir=os.path.dirname(db_path) or ".")
+    os.close(fd)
+    try:
+        vir = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            cilj = sqlite3.connect(pot)
+            try:
+                vir.backup(cilj)
+            finally:
+                cilj.close()
+        finally:
+            vir.close()
+    except Exception:
+        os.unlink(pot)
+        raise
+    return pot
+
+
 @router.get("/backup-db")
-async def backup_db(request: Request, db: Session = Depends(get_db)) -> Response:
+def backup_db(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
     if not is_admin(user):
         return RedirectResponse(url="/izvoz", status_code=302)
 
-    db_path = "data/clanstvo.db"
+    db_path = _BACKUP_DB_POT
     if not os.path.exists(db_path):
         return RedirectResponse(url="/izvoz", status_code=302)
 
+    posnetek = _posnetek_baze(db_path)
     today = date.today().isoformat()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "izvoz_backup_db", ip=ip)
 
     def iter_file():
-        with open(db_path, "rb") as f:
-            yield from f
+        try:
+            with open(posnetek, "rb") as f:
+                while kos := f.read(64 * 1024):
+                    yield kos
+        finally:
+            os.unlink(posnetek)
 
     return StreamingResponse(
         iter_file(),
@@ -970,7 +1098,7 @@ async def backup_db(request: Request, db: Session = Depends(get_db)) -> Response
 
 
 @router.get("/uvozi", response_class=HTMLResponse)
-async def uvozi_stran(request: Request, db: Session = Depends(get_db)) -> Response:
+def uvozi_stran(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -1023,19 +1151,13 @@ async def uvozi_nastavitve_shrani(
         return RedirectResponse(url="/izvoz", status_code=302)
 
     form = await request.form()
-    for kljuc, _ in KLJUCI_UVOZ:
-        vrednost = str(form.get(kljuc, "")).strip()
-        n = db.query(Nastavitev).filter(Nastavitev.kljuc == kljuc).first()
-        if n:
-            n.vrednost = vrednost
-        else:
-            db.add(Nastavitev(kljuc=kljuc, vrednost=vrednost))
-    db.commit()
+    vrednosti = {kljuc: str(form.get(kljuc, "")).strip() for kljuc, _ in KLJUCI_UVOZ}
+    await run_in_threadpool(shrani_nastavitve, db, vrednosti)
     return RedirectResponse(url="/izvoz/uvozi?uvoz_shranjeno=1", status_code=302)
 
 
 @router.post("/uvozi", response_class=HTMLResponse)
-async def uvozi_pregled(
+def uvozi_pregled(
     request: Request,
     datoteka: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -1062,20 +1184,15 @@ async def uvozi_pregled(
     if not any(ime.endswith(p) for p in DOVOLJENE_PRIPONE):
         return _uvoz_err("Dovoljena je samo datoteka .xlsx.")
 
-    vsebina = await datoteka.read()
+    vsebina = datoteka.file.read()
     if len(vsebina) > MAX_UPLOAD_BYTES:
         return _uvoz_err("Datoteka je prevelika (max 10 MB).")
 
     mapping = _get_uvoz_mapping(db)
-    novi, preskoceni = _parse_excel_pregled(vsebina, db, mapping)
+    vrstice = _preberi_clane(vsebina, mapping, get_tipi_clanstva(db))
+    novi, preskoceni = _razvrsti_clane(vrstice, db)
 
-    os.makedirs(TMP_DIR, exist_ok=True)
-    uvoz_uuid = str(uuid_lib.uuid4())
-    tmp_pot = os.path.join(TMP_DIR, f"{uvoz_uuid}.xlsx")
-    with open(tmp_pot, "wb") as f:
-        f.write(vsebina)
-
-    request.session["_uvoz_uuid"] = uvoz_uuid
+    request.session["_uvoz_uuid"] = shrani_sejo("clani", vrstice)
 
     return templates.TemplateResponse(
         request,
@@ -1084,14 +1201,14 @@ async def uvozi_pregled(
             "request": request,
             "user": user,
             "is_admin": True,
-            "novi": novi,
-            "preskoceni": preskoceni,
+            "novi": [_za_predogled(c) for c in novi],
+            "preskoceni": [_za_predogled(c) for c in preskoceni],
         },
     )
 
 
 @router.post("/uvozi-potrdi", response_class=HTMLResponse)
-async def uvozi_potrdi(
+def uvozi_potrdi(
     request: Request,
     db: Session = Depends(get_db),
     _csrf: None = Depends(csrf_protect),
@@ -1118,17 +1235,15 @@ async def uvozi_potrdi(
     if not uvoz_uuid:
         return _potrdi_err("Seja je potekla. Prosim naložite datoteko znova.")
 
-    tmp_pot = os.path.join(TMP_DIR, f"{uvoz_uuid}.xlsx")
-    if not os.path.exists(tmp_pot):
-        return _potrdi_err("Začasna datoteka ni najdena. Prosim naložite datoteko znova.")
+    vrstice = nalozi_sejo("clani", uvoz_uuid)
+    if vrstice is None:
+        request.session.pop("_uvoz_uuid", None)
+        return _potrdi_err("Podatki uvoza so potekli ali niso najdeni. Prosim naložite datoteko znova.")
 
     uvozeni = 0
     preskoceni_st = 0
     try:
-        with open(tmp_pot, "rb") as f:
-            vsebina = f.read()
-        mapping = _get_uvoz_mapping(db)
-        uvozeni, preskoceni_st = _uvozi_workbook(vsebina, db, mapping)
+        uvozeni, preskoceni_st = _uvozi_clane(db, vrstice)
         ip = request.client.host if request.client else None
         log_akcija(
             db, user.get("uporabnisko_ime") if user else None,
@@ -1137,8 +1252,7 @@ async def uvozi_potrdi(
             ip=ip,
         )
     finally:
-        if os.path.exists(tmp_pot):
-            os.remove(tmp_pot)
+        izbrisi_sejo("clani", uvoz_uuid)
         request.session.pop("_uvoz_uuid", None)
 
     return templates.TemplateResponse(
@@ -1160,7 +1274,7 @@ async def uvozi_potrdi(
 
 
 @router.post("/uvozi-placila", response_class=HTMLResponse)
-async def uvozi_placila_pregled(
+def uvozi_placila_pregled(
     request: Request,
     datoteka: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -1187,20 +1301,15 @@ async def uvozi_placila_pregled(
     if not any(ime.endswith(p) for p in DOVOLJENE_PRIPONE):
         return _placila_err("Dovoljena je samo datoteka .xlsx.")
 
-    vsebina = await datoteka.read()
+    vsebina = datoteka.file.read()
     if len(vsebina) > MAX_UPLOAD_BYTES:
         return _placila_err("Datoteka je prevelika (max 10 MB).")
 
     mapping = _get_uvoz_placila_mapping(db)
-    za_uvoz, preskoceni = _parse_excel_placila_pregled(vsebina, db, mapping)
+    vrstice = _preberi_placila(vsebina, mapping)
+    za_uvoz, preskoceni = _razvrsti_placila(vrstice, db)
 
-    os.makedirs(TMP_DIR, exist_ok=True)
-    uvoz_uuid = str(uuid_lib.uuid4())
-    tmp_pot = os.path.join(TMP_DIR, f"{uvoz_uuid}.xlsx")
-    with open(tmp_pot, "wb") as f:
-        f.write(vsebina)
-
-    request.session["_placila_uuid"] = uvoz_uuid
+    request.session["_placila_uuid"] = shrani_sejo("placila", vrstice)
 
     return templates.TemplateResponse(
         request,
@@ -1216,7 +1325,7 @@ async def uvozi_placila_pregled(
 
 
 @router.post("/uvozi-placila-potrdi", response_class=HTMLResponse)
-async def uvozi_placila_potrdi(
+def uvozi_placila_potrdi(
     request: Request,
     db: Session = Depends(get_db),
     _csrf: None = Depends(csrf_protect),
@@ -1243,17 +1352,15 @@ async def uvozi_placila_potrdi(
     if not uvoz_uuid:
         return _potrdi_err("Seja je potekla. Prosim naložite datoteko znova.")
 
-    tmp_pot = os.path.join(TMP_DIR, f"{uvoz_uuid}.xlsx")
-    if not os.path.exists(tmp_pot):
-        return _potrdi_err("Začasna datoteka ni najdena. Prosim naložite datoteko znova.")
+    vrstice = nalozi_sejo("placila", uvoz_uuid)
+    if vrstice is None:
+        request.session.pop("_placila_uuid", None)
+        return _potrdi_err("Podatki uvoza so potekli ali niso najdeni. Prosim naložite datoteko znova.")
 
     uvozeni = 0
     preskoceni_st = 0
     try:
-        with open(tmp_pot, "rb") as f:
-            vsebina = f.read()
-        mapping = _get_uvoz_placila_mapping(db)
-        uvozeni, preskoceni_st = _uvozi_placila_workbook(vsebina, db, mapping)
+        uvozeni, preskoceni_st = _uvozi_placila(db, vrstice)
         ip = request.client.host if request.client else None
         log_akcija(
             db, user.get("uporabnisko_ime") if user else None,
@@ -1262,8 +1369,7 @@ async def uvozi_placila_potrdi(
             ip=ip,
         )
     finally:
-        if os.path.exists(tmp_pot):
-            os.remove(tmp_pot)
+        izbrisi_sejo("placila", uvoz_uuid)
         request.session.pop("_placila_uuid", None)
 
     return templates.TemplateResponse(
@@ -1428,26 +1534,47 @@ def _parse_akos_pregled(vsebina: bytes, db: Session) -> tuple[list[dict], int, l
     return posodobljeni, brez_ujemanja, napake
 
 
+def _akos_zapisi(posodobljeni: list[dict]) -> list[dict]:
+    """Iz predogleda AKOS obdrži le polja, ki jih potrebuje potrditev (za sejo uvoza)."""
+    return [
+        {"clan_id": z["clan_id"], "nova_veljavnost": z["nova_veljavnost"], "spremenjen": z["spremenjen"]}
+        for z in posodobljeni
+    ]
+
+
+def _uveljavi_akos(db: Session, zapisi: list[dict]) -> tuple[int, int]:
+    """Zapiše nove veljavnosti RD iz predogleda AKOS. Vrne (posodobljeni, preskoceni).
+
+    Člani, izbrisani po predogledu, se tiho izpustijo.
+    """
+    spremembe = {z["clan_id"]: z["nova_veljavnost"] for z in zapisi if z["spremenjen"]}
+    preskoceni = len(zapisi) - len(spremembe)
+    obstojeci = {
+        clan_id for (clan_id,) in db.query(Clan.id).filter(Clan.id.in_(spremembe))
+    } if spremembe else set()
+    vrstice = [
+        {"id": clan_id, "veljavnost_rd": nova}
+        for clan_id, nova in spremembe.items() if clan_id in obstojeci
+    ]
+    try:
+        if vrstice:
+            db.execute(update(Clan), vrstice)
+            oznaci_spremembo(db, *(v["id"] for v in vrstice))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(vrstice), preskoceni
+
+
 def _uvozi_akos_workbook(vsebina: bytes, db: Session) -> tuple[int, int]:
     """Posodobi veljavnost_rd za ujemajoče se člane. Vrne (posodobljeni, preskoceni)."""
     posodobljeni_list, _, _ = _parse_akos_pregled(vsebina, db)
-
-    posodobljeni = 0
-    preskoceni = 0
-    for zapis in posodobljeni_list:
-        if not zapis["spremenjen"]:
-            preskoceni += 1
-            continue
-        clan = db.query(Clan).filter(Clan.id == zapis["clan_id"]).first()
-        if clan:
-            clan.veljavnost_rd = zapis["nova_veljavnost"]
-            posodobljeni += 1
-    db.commit()
-    return posodobljeni, preskoceni
+    return _uveljavi_akos(db, _akos_zapisi(posodobljeni_list))
 
 
 @router.post("/uvozi-akos", response_class=HTMLResponse)
-async def uvozi_akos_pregled(
+def uvozi_akos_pregled(
     request: Request,
     datoteka: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -1475,7 +1602,7 @@ async def uvozi_akos_pregled(
     if not any(ime.endswith(p) for p in DOVOLJENE_PRIPONE):
         return _akos_err("Dovoljena je samo datoteka .xlsx.")
 
-    vsebina = await datoteka.read()
+    vsebina = datoteka.file.read()
     if len(vsebina) > MAX_UPLOAD_BYTES:
         return _akos_err("Datoteka je prevelika (max 10 MB).")
 
@@ -1484,12 +1611,7 @@ async def uvozi_akos_pregled(
     except ValueError as e:
         return _akos_err(str(e))
 
-    os.makedirs(TMP_DIR, exist_ok=True)
-    uvoz_uuid = str(uuid_lib.uuid4())
-    tmp_pot = os.path.join(TMP_DIR, f"akos_{uvoz_uuid}.xlsx")
-    with open(tmp_pot, "wb") as f:
-        f.write(vsebina)
-    request.session["_akos_uuid"] = uvoz_uuid
+    request.session["_akos_uuid"] = shrani_sejo("akos", _akos_zapisi(posodobljeni))
 
     return templates.TemplateResponse(
         request,
@@ -1505,7 +1627,7 @@ async def uvozi_akos_pregled(
 
 
 @router.post("/uvozi-akos-potrdi", response_class=HTMLResponse)
-async def uvozi_akos_potrdi(
+def uvozi_akos_potrdi(
     request: Request,
     db: Session = Depends(get_db),
     _csrf: None = Depends(csrf_protect),
@@ -1533,16 +1655,15 @@ async def uvozi_akos_potrdi(
     if not uvoz_uuid:
         return _potrdi_err("Seja je potekla. Prosim naložite datoteko znova.")
 
-    tmp_pot = os.path.join(TMP_DIR, f"akos_{uvoz_uuid}.xlsx")
-    if not os.path.exists(tmp_pot):
-        return _potrdi_err("Začasna datoteka ni najdena. Prosim naložite datoteko znova.")
+    zapisi = nalozi_sejo("akos", uvoz_uuid)
+    if zapisi is None:
+        request.session.pop("_akos_uuid", None)
+        return _potrdi_err("Podatki uvoza so potekli ali niso najdeni. Prosim naložite datoteko znova.")
 
     posodobljeni = 0
     preskoceni = 0
     try:
-        with open(tmp_pot, "rb") as f:
-            vsebina = f.read()
-        posodobljeni, preskoceni = _uvozi_akos_workbook(vsebina, db)
+        posodobljeni, preskoceni = _uveljavi_akos(db, zapisi)
         ip = request.client.host if request.client else None
         log_akcija(
             db, user.get("uporabnisko_ime") if user else None,
@@ -1551,8 +1672,7 @@ async def uvozi_akos_potrdi(
             ip=ip,
         )
     finally:
-        if os.path.exists(tmp_pot):
-            os.remove(tmp_pot)
+        izbrisi_sejo("akos", uvoz_uuid)
         request.session.pop("_akos_uuid", None)
 
     return templates.TemplateResponse(
@@ -1568,7 +1688,7 @@ async def uvozi_akos_potrdi(
 
 
 @router.post("/uvozi-akos-api", response_class=HTMLResponse)
-async def uvozi_akos_api_pregled(
+def uvozi_akos_api_pregled(
     request: Request,
     db: Session = Depends(get_db),
     _csrf: None = Depends(csrf_protect),
@@ -1601,7 +1721,8 @@ async def uvozi_akos_api_pregled(
     klicni_znaki = [(c.klicni_znak or "").strip().upper() for c in clani_s_kz if c.klicni_znak]
 
     try:
-        api_data = await _fetch_akos_all(klicni_znaki)
+        # Handler teče v threadpoolu; asinhrone HTTP klice izvedemo na event loopu
+        api_data = anyio.from_thread.run(_fetch_akos_all, klicni_znaki)
     except Exception as e:
         return _err(f"Napaka pri klicu AKOS API: {e}")
 
@@ -1613,20 +1734,7 @@ async def uvozi_akos_api_pregled(
         if kz not in api_data or api_data[kz] is None
     ]
 
-    os.makedirs(TMP_DIR, exist_ok=True)
-    uvoz_uuid = str(uuid_lib.uuid4())
-    tmp_pot = os.path.join(TMP_DIR, f"akos_api_{uvoz_uuid}.json")
-    tmp_data = [
-        {
-            "clan_id": z["clan_id"],
-            "nova_veljavnost": z["nova_veljavnost"].isoformat(),
-            "spremenjen": z["spremenjen"],
-        }
-        for z in posodobljeni
-    ]
-    with open(tmp_pot, "w") as f:
-        json.dump(tmp_data, f)
-    request.session["_akos_api_uuid"] = uvoz_uuid
+    request.session["_akos_api_uuid"] = shrani_sejo("akos_api", _akos_zapisi(posodobljeni))
 
     return templates.TemplateResponse(
         request,
@@ -1642,7 +1750,7 @@ async def uvozi_akos_api_pregled(
 
 
 @router.post("/uvozi-akos-api-potrdi", response_class=HTMLResponse)
-async def uvozi_akos_api_potrdi(
+def uvozi_akos_api_potrdi(
     request: Request,
     db: Session = Depends(get_db),
     _csrf: None = Depends(csrf_protect),
@@ -1669,24 +1777,15 @@ async def uvozi_akos_api_potrdi(
     if not uvoz_uuid:
         return _err("Seja je potekla. Prosim zaženite API osvežitev znova.")
 
-    tmp_pot = os.path.join(TMP_DIR, f"akos_api_{uvoz_uuid}.json")
-    if not os.path.exists(tmp_pot):
-        return _err("Začasna datoteka ni najdena. Prosim zaženite API osvežitev znova.")
+    zapisi = nalozi_sejo("akos_api", uvoz_uuid)
+    if zapisi is None:
+        request.session.pop("_akos_api_uuid", None)
+        return _err("Podatki osvežitve so potekli ali niso najdeni. Prosim zaženite API osvežitev znova.")
 
+    posodobljeni = 0
+    preskoceni = 0
     try:
-        with open(tmp_pot, "r") as f:
-            tmp_data = json.load(f)
-        posodobljeni = 0
-        preskoceni = 0
-        for zapis in tmp_data:
-            if not zapis.get("spremenjen"):
-                preskoceni += 1
-                continue
-            clan = db.query(Clan).filter(Clan.id == zapis["clan_id"]).first()
-            if clan:
-                clan.veljavnost_rd = date.fromisoformat(zapis["nova_veljavnost"])
-                posodobljeni += 1
-        db.commit()
+        posodobljeni, preskoceni = _uveljavi_akos(db, zapisi)
         ip = request.client.host if request.client else None
         log_akcija(
             db, user.get("uporabnisko_ime") if user else None,
@@ -1695,8 +1794,7 @@ async def uvozi_akos_api_potrdi(
             ip=ip,
         )
     finally:
-        if os.path.exists(tmp_pot):
-            os.remove(tmp_pot)
+        izbrisi_sejo("akos_api", uvoz_uuid)
         request.session.pop("_akos_api_uuid", None)
 
     return templates.TemplateResponse(
@@ -1723,12 +1821,6 @@ async def uvozi_placila_nastavitve_shrani(
         return RedirectResponse(url="/izvoz", status_code=302)
 
     form = await request.form()
-    for kljuc, _ in KLJUCI_UVOZ_PLACILA:
-        vrednost = str(form.get(kljuc, "")).strip()
-        n = db.query(Nastavitev).filter(Nastavitev.kljuc == kljuc).first()
-        if n:
-            n.vrednost = vrednost
-        else:
-            db.add(Nastavitev(kljuc=kljuc, vrednost=vrednost))
-    db.commit()
+    vrednosti = {kljuc: str(form.get(kljuc, "")).strip() for kljuc, _ in KLJUCI_UVOZ_PLACILA}
+    await run_in_threadpool(shrani_nastavitve, db, vrednosti)
     return RedirectResponse(url="/izvoz/uvozi?placila_shranjeno=1", status_code=302)
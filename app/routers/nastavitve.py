@@ -1,15 +1,24 @@
+import os
+
 from fastapi import APIRouter, Request, Form, Depends
-from fastapi.responses import RedirectResponse, HTMLResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import RedirectResponse, HTMLResponse, Response, JSONResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..models import Nastavitev
 from ..auth import require_login, is_admin
-from ..config import get_seznam, get_tipi_clanstva, get_operaterski_razredi
+from ..config import get_seznam, get_tipi_clanstva, get_operaterski_razredi, shrani_nastavitve, nastavitve_slovar
 from ..models import TIPI_CLANSTVA_PRIVZETO, OPERATERSKI_RAZREDI_PRIVZETO, VLOGE_CLANOV_PRIVZETO
 from ..csrf import get_csrf_token, csrf_protect
-from ..audit_log import log_akcija
+from ..audit_log import log_akcija, audit_metrike
+from ..smtp_bazen import smtp_metrike
+from ..predloge_jinja import predloge_metrike
+from ..upn import upn_metrike
+from ..fragmenti_clana import fragmenti_metrike
+from ..omejitev_prijav import omejitev_metrike
+from ..gesla_bazen import gesla_metrike
+from ..sqlite_profil import PRAGME, pragme_v_veljavi, VZDRZEVANJE_INTERVAL_S
 
 # Vsa polja članske kartice (v zaporedju prikaza)
 KARTICA_POLJA_VSA = [
@@ -63,14 +72,14 @@ KLJUCI_SMTP = [
 
 
 @router.get("", response_class=HTMLResponse)
-async def nastavitve_stran(request: Request, db: Session = Depends(get_db)) -> Response:
+def nastavitve_stran(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
     if not is_admin(user):
         return RedirectResponse(url="/clani", status_code=302)
 
-    nas = {n.kljuc: n.vrednost for n in db.query(Nastavitev).all()}
+    nas = dict(nastavitve_slovar(db))
 
     # Za sezname zagotovi privzete vrednosti če še niso shranjene
     for kljuc, _, privzeto in KLJUCI_SEZNAM:
@@ -120,28 +129,55 @@ async def nastavitve_shrani(request: Request, db: Session = Depends(get_db), _cs
     form = await request.form()
 
     vse_kljuce = [k for k, _ in KLJUCI_KLUB] + [k for k, _, _ in KLJUCI_SEZNAM] + [k for k, _ in KLJUCI_UPN] + [k for k, _ in KLJUCI_SMTP]
-    for kljuc in vse_kljuce:
-        vrednost = str(form.get(kljuc, "")).strip()
-        n = db.query(Nastavitev).filter(Nastavitev.kljuc == kljuc).first()
-        if n:
-            n.vrednost = vrednost
-        else:
-            db.add(Nastavitev(kljuc=kljuc, vrednost=vrednost))
+    vrednosti = {kljuc: str(form.get(kljuc, "")).strip() for kljuc in vse_kljuce}
 
     # kartica_polja – zberi čekirana polja v vejicami ločen niz (ohranj vrstni red)
     izbrana = [k for k, _ in KARTICA_POLJA_VSA if form.get(f"kartica_polje_{k}")]
-    kartica_vrednost = ",".join(izbrana)
-    n = db.query(Nastavitev).filter(Nastavitev.kljuc == "kartica_polja").first()
-    if n:
-        n.vrednost = kartica_vrednost
-    else:
-        db.add(Nastavitev(kljuc="kartica_polja", vrednost=kartica_vrednost))
+    vrednosti["kartica_polja"] = ",".join(izbrana)
+
+    # Zapis v bazo je blokirajoč – izven event loopa (handler je async zaradi request.form())
+    spremenjeni = list(vrednosti)
+    await run_in_threadpool(shrani_nastavitve, db, vrednosti)
+    await run_in_threadpool(
+        log_akcija, db, user["ime"], "nastavitve_urejene",
+        f"Posodobljene nastavitve: {', '.join(spremenjeni)}",
+        ip=request.client.host if request.client else None,
+    )
 
-    db.commit()
+    return RedirectResponse(url="/nastavitve?shranjen=1", status_code=302)
 
-    spremenjeni = [k for k, _ in KLJUCI_KLUB] + [k for k, _, _ in KLJUCI_SEZNAM] + [k for k, _ in KLJUCI_UPN] + [k for k, _ in KLJUCI_SMTP] + ["kartica_polja"]
-    log_akcija(db, user["ime"], "nastavitve_urejene",
-               f"Posodobljene nastavitve: {', '.join(spremenjeni)}",
-               ip=request.client.host if request.client else None)
 
-    return RedirectResponse(url="/nastavitve?shranjen=1", status_code=302)
+@router.get("/diagnostika")
+def diagnostika(request: Request, db: Session = Depends(get_db)) -> Response:
+    """JSON diagnostika baze: pragme, profil, stanje poola, metrike audit pisalnika, SMTP bazena in predpomnilnika predlog (samo admin)."""
+    user, redirect = require_login(request)
+    if redirect:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    if not is_admin(user):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+
+    bind = db.get_bind()
+    datoteke = {}
+    pot = bind.url.database if bind.dialect.name == "sqlite" else None
+    if pot and pot != ":memory:":
+        for koncnica in ("", "-wal", "-shm"):
+            try:
+                datoteke[pot + koncnica] = os.path.getsize(pot + koncnica)
+            except OSError:
+                pass
+
+    return JSONResponse({
+        "dialekt": bind.dialect.name,
+        "pragme": pragme_v_veljavi(bind),
+        "profil": PRAGME,
+        "pool": bind.pool.status(),
+        "vzdrzevanje_interval_s": VZDRZEVANJE_INTERVAL_S,
+        "datoteke": datoteke,
+        "audit_pisalnik": audit_metrike(),
+        "smtp": smtp_metrike(),
+        "predloge": predloge_metrike(),
+        "upn_qr": upn_metrike(),
+        "fragmenti_clana": fragmenti_metrike(),
+        "omejitev_prijav": omejitev_metrike(),
+        "gesla": gesla_metrike(),
+    })
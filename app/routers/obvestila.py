@@ -3,15 +3,16 @@ import logging
 from datetime import date, timedelta
 
 from fastapi import APIRouter, Request, Form, Depends
-from fastapi.responses import RedirectResponse, HTMLResponse, Response
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse, Response
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
 from ..database import get_db
-from ..models import Clan, Clanarina, EmailPredloga
+from ..models import Clan, Clanarina, EmailPredloga, EmailOutbox
 from ..auth import require_login, is_admin, is_editor as _is_editor
 from ..csrf import get_csrf_token, csrf_protect
 from ..email import get_smtp_nastavitve, posli_email
+from ..email_vrsta import ustvari_opravilo, oddaj_opravilo, napredek
 from ..audit_log import log_akcija
 from ..config import get_nastavitev
 from ..kartica import generiraj_kartico_pdf, get_kartica_polja, kartica_filename
@@ -38,7 +39,7 @@ def _require_editor(request: Request):
 # ---------------------------------------------------------------------------
 
 @router.get("", response_class=HTMLResponse)
-async def obvestila_seznam(request: Request, db: Session = Depends(get_db)) -> Response:
+def obvestila_seznam(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = _require_editor(request)
     if redirect:
         return redirect
@@ -66,7 +67,7 @@ async def obvestila_seznam(request: Request, db: Session = Depends(get_db)) -> R
 # ---------------------------------------------------------------------------
 
 @router.get("/nova", response_class=HTMLResponse)
-async def nova_predloga_get(request: Request, db: Session = Depends(get_db)) -> Response:
+def nova_predloga_get(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = _require_editor(request)
     if redirect:
         return redirect
@@ -87,7 +88,7 @@ async def nova_predloga_get(request: Request, db: Session = Depends(get_db)) ->
 
 
 @router.post("/nova")
-async def nova_predloga_post(
+def nova_predloga_post(
     request: Request,
     naziv: str = Form(...),
     zadeva: str = Form(...),
@@ -124,7 +125,7 @@ async def nova_predloga_post(
 # ---------------------------------------------------------------------------
 
 @router.get("/{predloga_id}/uredi", response_class=HTMLResponse)
-async def uredi_predloga_get(
+def uredi_predloga_get(
     request: Request,
     predloga_id: int,
     db: Session = Depends(get_db),
@@ -153,7 +154,7 @@ async def uredi_predloga_get(
 
 
 @router.post("/{predloga_id}/uredi")
-async def uredi_predloga_post(
+def uredi_predloga_post(
     request: Request,
     predloga_id: int,
     naziv: str = Form(...),
@@ -189,7 +190,7 @@ async def uredi_predloga_post(
 # ---------------------------------------------------------------------------
 
 @router.post("/{predloga_id}/izbrisi")
-async def izbrisi_predloga(
+def izbrisi_predloga(
     request: Request,
     predloga_id: int,
     _csrf: None = Depends(csrf_protect),
@@ -221,8 +222,71 @@ async def izbrisi_predloga(
 # Pošiljanje
 # ---------------------------------------------------------------------------
 
+def _prejemniki(db: Session, bulk_filter: str, leto: int) -> list[Clan]:
+    """Člani, ki jim je namenjeno skupinsko pošiljanje (filter določa skupino prejemnikov)."""
+    danes = date.today()
+    if bulk_filter == "placniki":
+        # Aktivni člani, ki so plačali za izbrano leto
+        clan_ids_placali = db.query(Clanarina.clan_id).filter(
+            Clanarina.leto == leto,
+            Clanarina.datum_placila != None,
+        )
+        clani = (
+            db.query(Clan)
+            .filter(Clan.aktiven == True, Clan.id.in_(clan_ids_placali))
+            .order_by(Clan.priimek, Clan.ime)
+            .all()
+        )
+    elif bulk_filter == "rd_potekla":
+        # Aktivni člani s potečeno veljavnostjo RD
+        clani = (
+            db.query(Clan)
+            .filter(Clan.aktiven == True, Clan.veljavnost_rd < danes)
+            .order_by(Clan.priimek, Clan.ime)
+            .all()
+        )
+    elif bulk_filter == "rd_kmalu":
+        # Aktivni člani, katerim RD poteče v naslednjih 180 dneh
+        meja = danes + timedelta(days=180)
+        clani = (
+            db.query(Clan)
+            .filter(Clan.aktiven == True, Clan.veljavnost_rd >= danes, Clan.veljavnost_rd <= meja)
+            .order_by(Clan.priimek, Clan.ime)
+            .all()
+        )
+    elif bulk_filter == "vsi_aktivni":
+        # Vsi aktivni člani
+        clani = (
+            db.query(Clan)
+            .filter(Clan.aktiven == True)
+            .order_by(Clan.priimek, Clan.ime)
+            .all()
+        )
+    elif bulk_filter == "vsi":
+        # Vsi člani (aktivni in neaktivni)
+        clani = (
+            db.query(Clan)
+            .order_by(Clan.priimek, Clan.ime)
+            .all()
+        )
+    else:
+        # Privzeto: vsi aktivni neplačniki za izbrano leto
+        # Štejemo samo tiste z datum_placila (enako kot v clani.py seznam)
+        clan_ids_placali = db.query(Clanarina.clan_id).filter(
+            Clanarina.leto == leto,
+            Clanarina.datum_placila != None,
+        )
+        clani = (
+            db.query(Clan)
+            .filter(Clan.aktiven == True, ~Clan.id.in_(clan_ids_placali))
+            .order_by(Clan.priimek, Clan.ime)
+            .all()
+        )
+    return clani
+
+
 @router.get("/posli", response_class=HTMLResponse)
-async def posli_get(
+def posli_get(
     request: Request,
     db: Session = Depends(get_db),
 ) -> Response:
@@ -266,7 +330,7 @@ async def posli_get(
 
 
 @router.post("/posli")
-async def posli_post(
+def posli_post(
     request: Request,
     predloga_id: int = Form(...),
     zadeva: str = Form(...),
@@ -340,85 +404,11 @@ async def posli_post(
         else:
             preskoceno = 1
     else:
-        # Bulk: filter določa skupino prejemnikov
-        danes = date.today()
-        if bulk_filter == "placniki":
-            # Aktivni člani, ki so plačali za izbrano leto
-            clan_ids_placali = db.query(Clanarina.clan_id).filter(
-                Clanarina.leto == leto,
-                Clanarina.datum_placila != None,
-            )
-            clani = (
-                db.query(Clan)
-                .filter(Clan.aktiven == True, Clan.id.in_(clan_ids_placali))
-                .order_by(Clan.priimek, Clan.ime)
-                .all()
-            )
-        elif bulk_filter == "rd_potekla":
-            # Aktivni člani s potečeno veljavnostjo RD
-            clani = (
-                db.query(Clan)
-                .filter(Clan.aktiven == True, Clan.veljavnost_rd < danes)
-                .order_by(Clan.priimek, Clan.ime)
-                .all()
-            )
-        elif bulk_filter == "rd_kmalu":
-            # Aktivni člani, katerim RD poteče v naslednjih 180 dneh
-            meja = danes + timedelta(days=180)
-            clani = (
-                db.query(Clan)
-                .filter(Clan.aktiven == True, Clan.veljavnost_rd >= danes, Clan.veljavnost_rd <= meja)
-                .order_by(Clan.priimek, Clan.ime)
-                .all()
-            )
-        elif bulk_filter == "vsi_aktivni":
-            # Vsi aktivni člani
-            clani = (
-                db.query(Clan)
-                .filter(Clan.aktiven == True)
-                .order_by(Clan.priimek, Clan.ime)
-                .all()
-            )
-        elif bulk_filter == "vsi":
-            # Vsi člani (aktivni in neaktivni)
-            clani = (
-                db.query(Clan)
-                .order_by(Clan.priimek, Clan.ime)
-                .all()
-            )
-        else:
-            # Privzeto: vsi aktivni neplačniki za izbrano leto
-            # Štejemo samo tiste z datum_placila (enako kot v clani.py seznam)
-            clan_ids_placali = db.query(Clanarina.clan_id).filter(
-                Clanarina.leto == leto,
-                Clanarina.datum_placila != None,
-            )
-            clani = (
-                db.query(Clan)
-                .filter(Clan.aktiven == True, ~Clan.id.in_(clan_ids_placali))
-                .order_by(Clan.priimek, Clan.ime)
-                .all()
-            )
-        napake = []
-        for clan in clani:
-            if not clan.elektronska_posta or "@" not in clan.elektronska_posta:
-                preskoceno += 1
-                continue
-            try:
-                posli_email(clan, zadeva, telo_html, leto, smtp_nas, db, vkljuci_qr=qr,
-                            priponke=_priponke_za_clana(clan))
-                poslano += 1
-            except Exception as e:
-                logger.error(f"Napaka pri pošiljanju emaila za {clan.elektronska_posta}: {e}")
-                napake.append(clan.elektronska_posta)
-                preskoceno += 1
-
-        if napake:
-            log_akcija(db, user.get("uporabnisko_ime"), "email_bulk_napaka",
-                       f"Napake pri bulk pošiljanju: {', '.join(napake[:5])}")
-
-        log_akcija(db, user.get("uporabnisko_ime"), "email_bulk_poslan",
-                   f"Bulk email ({bulk_filter}): {poslano} poslanih, {preskoceno} preskočenih, leto {leto}")
+        # Bulk: opravilo z enim prejemnikom na člana; pošilja ga delavec v ozadju
+        opravilo = ustvari_opravilo(db, user.get("uporabnisko_ime"), predloga, zadeva, telo_html,
+                                    leto, bulk_filter, _prejemniki(db, bulk_filter, leto))
+        oddaj_opravilo(db, opravilo.id)
+        return RedirectResponse(url=f"/obvestila/opravila/{opravilo.id}", status_code=302)
 
     request.session["obv_rezultat_poslano"] = poslano
     request.session["obv_rezultat_preskoceno"] = preskoceno
@@ -426,7 +416,7 @@ async def posli_post(
 
 
 @router.get("/rezultat", response_class=HTMLResponse)
-async def posli_rezultat(request: Request, db: Session = Depends(get_db)) -> Response:
+def posli_rezultat(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = _require_editor(request)
     if redirect:
         return redirect
@@ -446,3 +436,51 @@ async def posli_rezultat(request: Request, db: Session = Depends(get_db)) -> Res
             "preskoceno": preskoceno,
         },
     )
+
+
+# ---------------------------------------------------------------------------
+# Skupinsko pošiljanje v ozadju – napredek
+# ---------------------------------------------------------------------------
+
+@router.get("/opravila/{opravilo_id}", response_class=HTMLResponse)
+def opravilo_stran(request: Request, opravilo_id: int, db: Session = Depends(get_db)) -> Response:
+    user, redirect = _require_editor(request)
+    if redirect:
+        return redirect
+
+    stanje = napredek(db, opravilo_id)
+    if stanje is None:
+        return RedirectResponse(url="/obvestila/posli", status_code=302)
+    neuspesni = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.opravilo_id == opravilo_id, EmailOutbox.stanje.in_(("napaka", "preskoceno")))
+        .order_by(EmailOutbox.prejemnik)
+        .all()
+    )
+    return templates.TemplateResponse(
+        request,
+        "obvestila/opravilo.html",
+        {
+            "request": request,
+            "user": user,
+            "is_admin": is_admin(user),
+            "is_editor": True,
+            "stanje": stanje,
+            "neuspesni": neuspesni,
+        },
+    )
+
+
+@router.get("/opravila/{opravilo_id}/napredek")
+def opravilo_napredek(request: Request, opravilo_id: int, db: Session = Depends(get_db)) -> Response:
+    """JSON za sprotno osveževanje strani z napredkom (polling)."""
+    user, redirect = require_login(request)
+    if redirect:
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+    if not _is_editor(user):
+        return JSONResponse({"error": "forbidden"}, status_code=403)
+
+    stanje = napredek(db, opravilo_id)
+    if stanje is None:
+        return JSONResponse({"error": "not found"}, status_code=404)
+    return JSONResponse(stanje)
@@ -20,7 +20,7 @@ templates.env.globals["csrf_token"] = get_csrf_token
 
 
 @router.get("", response_class=HTMLResponse)
-async def profil_stran(request: Request, db: Session = Depends(get_db)) -> Response:
+def profil_stran(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -57,7 +57,7 @@ async def profil_stran(request: Request, db: Session = Depends(get_db)) -> Respo
 
 
 @router.post("/ime", response_class=HTMLResponse)
-async def shrani_ime(
+def shrani_ime(
     request: Request,
     ime_priimek: str = Form(""),
     db: Session = Depends(get_db),
@@ -81,7 +81,7 @@ async def shrani_ime(
 
 
 @router.post("/geslo", response_class=HTMLResponse)
-async def spremeni_geslo(
+def spremeni_geslo(
     request: Request,
     staro_geslo: str = Form(...),
     novo_geslo: str = Form(...),
@@ -141,7 +141,7 @@ def _generiraj_qr_svg(skrivnost: str, uporabnisko_ime: str, klub_ime: str) -> st
 
 
 @router.get("/2fa-nastavi", response_class=HTMLResponse)
-async def tfa_nastavi_stran(request: Request, db: Session = Depends(get_db)) -> Response:
+def tfa_nastavi_stran(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -170,7 +170,7 @@ async def tfa_nastavi_stran(request: Request, db: Session = Depends(get_db)) ->
 
 
 @router.post("/2fa-potrdi", response_class=HTMLResponse)
-async def tfa_potrdi(
+def tfa_potrdi(
     request: Request,
     koda: str = Form(...),
     db: Session = Depends(get_db),
@@ -217,7 +217,7 @@ async def tfa_potrdi(
 
 
 @router.post("/2fa-onemogoči", response_class=HTMLResponse)
-async def tfa_onemogoči(
+def tfa_onemogoči(
     request: Request,
     koda: str = Form(...),
     db: Session = Depends(get_db),
@@ -258,7 +258,7 @@ async def tfa_onemogoči(
 
 
 @router.post("/odjavi-naprave", response_class=HTMLResponse)
-async def odjavi_naprave(
+def odjavi_naprave(
     request: Request,
     db: Session = Depends(get_db),
     _csrf: None = Depends(csrf_protect),
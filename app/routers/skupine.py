@@ -7,6 +7,7 @@ from ..database import get_db
 from ..models import Clan, Skupina
 from ..auth import require_login, is_editor, is_admin
 from ..csrf import get_csrf_token, csrf_protect
+from ..fragmenti_clana import oznaci_spremembo
 
 router = APIRouter(prefix="/skupine")
 templates = Jinja2Templates(directory="app/templates")
@@ -14,7 +15,7 @@ templates.env.globals["csrf_token"] = get_csrf_token
 
 
 @router.get("", response_class=HTMLResponse)
-async def seznam(request: Request, db: Session = Depends(get_db)) -> Response:
+def seznam(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -54,7 +55,7 @@ async def nova_form(request: Request) -> Response:
 
 
 @router.post("/nova")
-async def nova_shrani(
+def nova_shrani(
     request: Request,
     ime: str = Form(...),
     opis: str = Form(""),
@@ -75,7 +76,7 @@ async def nova_shrani(
 
 
 @router.get("/{skupid}", response_class=HTMLResponse)
-async def detail(request: Request, skupid: int, db: Session = Depends(get_db)) -> Response:
+def detail(request: Request, skupid: int, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -109,7 +110,7 @@ async def detail(request: Request, skupid: int, db: Session = Depends(get_db)) -
 
 
 @router.post("/{skupid}/uredi")
-async def uredi(
+def uredi(
     request: Request,
     skupid: int,
     ime: str = Form(...),
@@ -129,12 +130,14 @@ async def uredi(
 
     skupina.ime = ime.strip()
     skupina.opis = opis.strip() or None
+    # Ime skupine je izpisano na strani vsakega člana skupine
+    oznaci_spremembo(db, *(c.id for c in skupina.clani))
     db.commit()
     return RedirectResponse(url=f"/skupine/{skupid}", status_code=302)
 
 
 @router.post("/{skupid}/izbrisi")
-async def izbrisi(
+def izbrisi(
     request: Request,
     skupid: int,
     db: Session = Depends(get_db),
@@ -148,13 +151,14 @@ async def izbrisi(
 
     skupina = db.query(Skupina).filter(Skupina.id == skupid).first()
     if skupina:
+        oznaci_spremembo(db, *(c.id for c in skupina.clani))
         db.delete(skupina)
         db.commit()
     return RedirectResponse(url="/skupine", status_code=302)
 
 
 @router.post("/{skupid}/dodaj-clana")
-async def dodaj_clana(
+def dodaj_clana(
     request: Request,
     skupid: int,
     clan_id: int = Form(...),
@@ -171,12 +175,13 @@ async def dodaj_clana(
     clan = db.query(Clan).filter(Clan.id == clan_id).first()
     if skupina and clan and clan not in skupina.clani:
         skupina.clani.append(clan)
+        oznaci_spremembo(db, clan.id)
         db.commit()
     return RedirectResponse(url=f"/skupine/{skupid}", status_code=302)
 
 
 @router.post("/{skupid}/odstrani-clana/{clan_id}")
-async def odstrani_clana(
+def odstrani_clana(
     request: Request,
     skupid: int,
     clan_id: int,
@@ -193,5 +198,6 @@ async def odstrani_clana(
     clan = db.query(Clan).filter(Clan.id == clan_id).first()
     if skupina and clan and clan in skupina.clani:
         skupina.clani.remove(clan)
+        oznaci_spremembo(db, clan.id)
         db.commit()
     return RedirectResponse(url=f"/skupine/{skupid}", status_code=302)
@@ -1,30 +1,34 @@
 from fastapi import APIRouter, Request, Depends
 from fastapi.responses import Response, RedirectResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from ..database import get_db
+from ..database import get_bralna_db, BralnaSeja
 from ..models import Clan
 from ..auth import require_login
 from ..config import get_nastavitev, get_clanarina_zneski
-from ..upn import generiraj_upn_svg, generiraj_upn_png
+from ..upn import _upn_vsebina, upn_kljuc, izris_upn
 
 router = APIRouter(prefix="/upn")
 
+# Brskalnik sme hraniti QR kodo, a jo mora pred uporabo preveriti (If-None-Match → 304)
+_CACHE_CONTROL = "private, no-cache"
 
-@router.get("/{clan_id}/{leto}")
-async def upn_qr(
-    request: Request,
-    clan_id: int,
-    leto: int,
-    db: Session = Depends(get_db),
-) -> Response:
-    user, redirect = require_login(request)
-    if redirect:
-        return redirect
 
+def _etag_ujema(request: Request, etag: str) -> bool:
+    """Ali ``If-None-Match`` vsebuje ``etag`` (šibka primerjava po RFC 9110, tudi ``*``)."""
+    glava = request.headers.get("if-none-match")
+    if not glava:
+        return False
+    oznake = [o.strip().removeprefix("W/") for o in glava.split(",")]
+    return "*" in oznake or etag in oznake
+
+
+def _upn_podatki(db: Session, clan_id: int, leto: int) -> tuple[Clan, dict] | None:
+    """Naloži člana in nastavitve kluba → (clan, kwargs za generiraj_upn_*) ali None."""
     clan = db.query(Clan).filter(Clan.id == clan_id).first()
     if not clan:
-        return RedirectResponse(url="/clani", status_code=302)
+        return None
 
     iban = get_nastavitev(db, "klub_iban", "")
     ime_kluba = get_nastavitev(db, "klub_ime", "")
@@ -44,7 +48,7 @@ async def upn_qr(
     zneski = get_clanarina_zneski(db)
     znesek = zneski.get(clan.tip_clanstva) if clan.tip_clanstva else None
 
-    svg = generiraj_upn_svg(
+    return clan, dict(
         ime_placnika=f"{clan.priimek} {clan.ime}",
         ulica_placnika=clan.naslov_ulica or "",
         kraj_placnika=clan.naslov_posta or "",
@@ -57,7 +61,32 @@ async def upn_qr(
         znesek_eur=znesek,
         namen=namen,
     )
-    return Response(content=svg, media_type="image/svg+xml")
+
+
+@router.get("/{clan_id}/{leto}")
+async def upn_qr(
+    request: Request,
+    clan_id: int,
+    leto: int,
+    db: BralnaSeja = Depends(get_bralna_db),
+) -> Response:
+    user, redirect = require_login(request)
+    if redirect:
+        return redirect
+
+    podatki = await db.izvedi(_upn_podatki, clan_id, leto)
+    if not podatki:
+        return RedirectResponse(url="/clani", status_code=302)
+
+    vsebina = _upn_vsebina(**podatki[1])
+    etag = f'"{upn_kljuc(vsebina)}-svg"'
+    glave = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    if _etag_ujema(request, etag):
+        return Response(status_code=304, headers=glave)
+
+    # Izris QR kode je CPU delo (ob zgrešitvi predpomnilnika) – ne na event loopu
+    svg = await run_in_threadpool(izris_upn, vsebina, "svg")
+    return Response(content=svg, media_type="image/svg+xml", headers=glave)
 
 
 @router.get("/{clan_id}/{leto}/png")
@@ -65,53 +94,26 @@ async def upn_qr_png(
     request: Request,
     clan_id: int,
     leto: int,
-    db: Session = Depends(get_db),
+    db: BralnaSeja = Depends(get_bralna_db),
 ) -> Response:
     """PNG različica UPN QR kode (za tiskanje / pošiljanje po emailu)."""
     user, redirect = require_login(request)
     if redirect:
         return redirect
 
-    clan = db.query(Clan).filter(Clan.id == clan_id).first()
-    if not clan:
+    podatki = await db.izvedi(_upn_podatki, clan_id, leto)
+    if not podatki:
         return Response(content=b"", status_code=404)
+    clan, upn = podatki
 
-    iban = get_nastavitev(db, "klub_iban", "")
-    ime_kluba = get_nastavitev(db, "klub_ime", "")
-    ulica_kluba = get_nastavitev(db, "klub_naslov", "")
-    kraj_kluba = get_nastavitev(db, "klub_posta", "")
-    ref_predloga = get_nastavitev(db, "upn_referenca_predloga", "SI00 5-{leto}")
-    namen = get_nastavitev(db, "upn_namen", "OTHR")
-    opis_predloga = get_nastavitev(db, "upn_opis_predloga", "Članarina {leto}")
-
-    referenca = ref_predloga.replace("{leto}", str(leto)).replace(
-        "{id}", str(clan.id)
-    ).replace(
-        "{es}", str(clan.es_stevilka) if clan.es_stevilka else ""
-    )
-    opis = opis_predloga.replace("{leto}", str(leto))
-
-    zneski = get_clanarina_zneski(db)
-    znesek = zneski.get(clan.tip_clanstva) if clan.tip_clanstva else None
-
-    png = generiraj_upn_png(
-        ime_placnika=f"{clan.priimek} {clan.ime}",
-        ulica_placnika=clan.naslov_ulica or "",
-        kraj_placnika=clan.naslov_posta or "",
-        iban_prejemnika=iban,
-        referenca=referenca,
-        ime_prejemnika=ime_kluba,
-        ulica_prejemnika=ulica_kluba,
-        kraj_prejemnika=kraj_kluba,
-        opis=opis,
-        znesek_eur=znesek,
-        namen=namen,
-    )
+    vsebina = _upn_vsebina(**upn)
+    etag = f'"{upn_kljuc(vsebina)}-png"'
     es = clan.es_stevilka or str(clan.id)
     filename = f"{es}_{leto}.png"
-    return Response(
-        content=png,
-        media_type="image/png",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-    )
+    glave = {"ETag": etag, "Cache-Control": _CACHE_CONTROL,
+             "Content-Disposition": f'attachment; filename="{filename}"'}
+    if _etag_ujema(request, etag):
+        return Response(status_code=304, headers=glave)
 
+    png = await run_in_threadpool(izris_upn, vsebina, "png")
+    return Response(content=png, media_type="image/png", headers=glave)
@@ -41,7 +41,7 @@ templates.env.globals["csrf_token"] = get_csrf_token
 
 
 @router.get("", response_class=HTMLResponse)
-async def seznam(request: Request, db: Session = Depends(get_db)) -> Response:
+def seznam(request: Request, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -82,7 +82,7 @@ async def nov_form(request: Request) -> Response:
 
 
 @router.post("/nov")
-async def nov_shrani(
+def nov_shrani(
     request: Request,
     uporabnisko_ime: str = Form(...),
     geslo: str = Form(...),
@@ -145,7 +145,7 @@ async def nov_shrani(
 
 
 @router.get("/{uid}/uredi", response_class=HTMLResponse)
-async def uredi_form(request: Request, uid: int, db: Session = Depends(get_db)) -> Response:
+def uredi_form(request: Request, uid: int, db: Session = Depends(get_db)) -> Response:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -174,7 +174,7 @@ async def uredi_form(request: Request, uid: int, db: Session = Depends(get_db))
 
 
 @router.post("/{uid}/reset-geslo")
-async def reset_geslo(request: Request, uid: int, db: Session = Depends(get_db), _csrf: None = Depends(csrf_protect)) -> RedirectResponse:
+def reset_geslo(request: Request, uid: int, db: Session = Depends(get_db), _csrf: None = Depends(csrf_protect)) -> RedirectResponse:
     user, redirect = require_login(request)
     if redirect:
         return redirect
@@ -195,7 +195,7 @@ async def reset_geslo(request: Request, uid: int, db: Session = Depends(get_db),
 
 
 @router.post("/{uid}/uredi")
-async def uredi_shrani(
+def uredi_shrani(
     request: Request,
     uid: int,
     ime_priimek: str = Form(""),
@@ -243,7 +243,7 @@ async def uredi_shrani(
 
 
 @router.post("/{uid}/izbrisi")
-async def izbrisi(request: Request, uid: int, db: Session = Depends(get_db), _csrf: None = Depends(csrf_protect)) -> RedirectResponse:
+def izbrisi(request: Request, uid: int, db: Session = Depends(get_db), _csrf: None = Depends(csrf_protect)) -> RedirectResponse:
     user, redirect = require_login(request)
     if redirect:
         return redirect
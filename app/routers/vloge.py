@@ -9,12 +9,13 @@ from ..models import ClanVloga
 from ..auth import require_login, is_editor, is_admin
 from ..csrf import csrf_protect
 from ..audit_log import log_akcija
+from ..fragmenti_clana import oznaci_spremembo
 
 router = APIRouter(prefix="/vloge")
 
 
 @router.post("/dodaj")
-async def dodaj(
+def dodaj(
     request: Request,
     clan_id: int = Form(...),
     naziv: str = Form(...),
@@ -48,6 +49,7 @@ async def dodaj(
         opombe=opombe.strip() or None,
     )
     db.add(vloga)
+    oznaci_spremembo(db, clan_id)
     db.commit()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "vloga_dodana",
@@ -56,7 +58,7 @@ async def dodaj(
 
 
 @router.post("/{vloga_id}/uredi")
-async def uredi_vlogo(
+def uredi_vlogo(
     request: Request,
     vloga_id: int,
     naziv: str = Form(...),
@@ -94,6 +96,7 @@ async def uredi_vlogo(
     v.datum_od = datum_od_parsed
     v.datum_do = datum_do_parsed
     v.opombe = opombe.strip() or None
+    oznaci_spremembo(db, clan_id)
     db.commit()
     ip = request.client.host if request.client else None
     log_akcija(db, user.get("uporabnisko_ime") if user else None, "vloga_uredi",
@@ -102,7 +105,7 @@ async def uredi_vlogo(
 
 
 @router.post("/izbrisi/{vloga_id}")
-async def izbrisi(
+def izbrisi(
     request: Request,
     vloga_id: int,
     clan_id: int = Form(...),
@@ -121,6 +124,7 @@ async def izbrisi(
     ).first()
     if v:
         db.delete(v)
+        oznaci_spremembo(db, clan_id)
         db.commit()
         ip = request.client.host if request.client else None
         log_akcija(db, user.get("uporabnisko_ime") if user else None, "vloga_izbrisana",
@@ -0,0 +1,231 @@
+"""Bazen SMTP povezav: prijavljene povezave se ponovno uporabijo za več sporočil.
+
+Prej je vsako sporočilo odprlo svojo povezavo (TCP + EHLO + STARTTLS + LOGIN),
+pri skupinskem pošiljanju 400 članom torej 400 TLS rokovanj. Zdaj ``smtp_seja``
+izposodi povezavo iz bazena (ali jo odpre ob prvem sporočilu), po koncu pa jo
+vrne za naslednjo sejo ali zahtevo.
+
+- Največ ``SMTP_POOL_VELIKOST`` povezav hkrati; ko so vse zasedene, seja
+  počaka največ ``SMTP_CAKANJE_S`` sekund.
+- Povezava se po ``SMTP_SPOROCIL_NA_POVEZAVO`` sporočilih zapre in odpre nova
+  (strežniki omejujejo število sporočil na sejo), prosta povezava pa po
+  ``SMTP_NEAKTIVNOST_S`` sekundah ni več ponovno uporabljena.
+- Ob ``SMTPServerDisconnected`` (ali odgovoru 421) se povezava enkrat odpre
+  znova in sporočilo ponovno pošlje.
+
+Metrike (``smtp_metrike``) so vidne v ``/nastavitve/diagnostika``.
+"""
+import logging
+import os
+import smtplib
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from email.message import Message
+from typing import Iterator
+
+logger = logging.getLogger(__name__)
+
+SMTP_POOL_VELIKOST = int(os.getenv("SMTP_POOL_VELIKOST", "2"))
+SMTP_SPOROCIL_NA_POVEZAVO = int(os.getenv("SMTP_SPOROCIL_NA_POVEZAVO", "100"))
+SMTP_NEAKTIVNOST_S = int(os.getenv("SMTP_NEAKTIVNOST_S", "60"))
+SMTP_CAKANJE_S = int(os.getenv("SMTP_CAKANJE_S", "30"))
+_TIMEOUT_S = 30
+
+
+def _kljuc(nastavitve: dict) -> tuple:
+    return (nastavitve["host"], nastavitve["port"], nastavitve["nacin"],
+            nastavitve["uporabnik"], nastavitve["geslo"])
+
+
+def _odpri(nastavitve: dict) -> "_Povezava":
+    """Odpre in prijavi SMTP povezavo (starttls – privzeto, ssl ali plain).
+
+    Povezava ostane odprta v ``ExitStack``; ``_zapri`` pošlje QUIT in zapre vtičnico.
+    """
+    host, port, nacin = nastavitve["host"], nastavitve["port"], nastavitve["nacin"]
+    izhod = ExitStack()
+    if nacin == "ssl":
+        server = izhod.enter_context(smtplib.SMTP_SSL(host, port, timeout=_TIMEOUT_S))
+    else:
+        server = izhod.enter_context(smtplib.SMTP(host, port, timeout=_TIMEOUT_S))
+    try:
+        if nacin not in ("ssl", "plain"):
+            server.ehlo()
+            server.starttls()
+            server.ehlo()
+        if nastavitve["uporabnik"]:
+            server.login(nastavitve["uporabnik"], nastavitve["geslo"])
+    except Exception:
+        _zapri_izhod(izhod)
+        raise
+    return _Povezava(server, izhod, _kljuc(nastavitve))
+
+
+def _zapri_izhod(izhod: ExitStack) -> None:
+    try:
+        izhod.close()
+    except Exception:
+        pass  # strežnik je povezavo že prekinil
+
+
+def _zapri(pov: "_Povezava") -> None:
+    _zapri_izhod(pov.izhod)
+
+
+def _prekinjena(napaka: Exception) -> bool:
+    """Ali napaka pomeni, da povezava ni več uporabna (ponovno povezovanje)."""
+    if isinstance(napaka, (smtplib.SMTPServerDisconnected, ConnectionError)):
+        return True
+    return isinstance(napaka, smtplib.SMTPResponseException) and napaka.smtp_code == 421
+
+
+class _Povezava:
+    __slots__ = ("smtp", "izhod", "kljuc", "poslanih", "prosta_od")
+
+    def __init__(self, smtp: smtplib.SMTP, izhod: ExitStack, kljuc: tuple):
+        self.smtp = smtp
+        self.izhod = izhod
+        self.kljuc = kljuc
+        self.poslanih = 0
+        self.prosta_od = 0.0
+
+
+class SmtpSeja:
+    """Ena izposojena povezava; ``posli`` jo po potrebi odpre ali zamenja."""
+
+    def __init__(self, bazen: "SmtpBazen", nastavitve: dict, povezava: _Povezava | None):
+        self._bazen = bazen
+        self._nastavitve = nastavitve
+        self._povezava = povezava
+
+    def posli(self, sporocilo: Message) -> None:
+        """Pošlje sporočilo; ob prekinjeni povezavi se enkrat poveže znova."""
+        bazen = self._bazen
+        zacetek = time.perf_counter()
+        try:
+            for poskus in range(2):
+                pov = self._povezava
+                if pov is not None and pov.poslanih >= bazen.sporocil_na_povezavo:
+                    self._zavrzi()
+                if self._povezava is None:
+                    self._povezava = _odpri(self._nastavitve)
+                    bazen._stej("povezave_odprte")
+                try:
+                    self._povezava.smtp.send_message(sporocilo)
+                    break
+                except Exception as e:
+                    if not _prekinjena(e):
+                        if isinstance(e, OSError) and not isinstance(e, smtplib.SMTPException):
+                            self._zavrzi()  # npr. timeout sredi sporočila – povezava ni več usklajena
+                        raise
+                    self._zavrzi()
+                    if poskus:
+                        raise
+                    bazen._stej("ponovne_povezave")
+                    logger.info("SMTP povezava prekinjena (%s) – povezujem znova", e)
+            self._povezava.poslanih += 1
+            bazen._stej("poslana")
+        except Exception:
+            bazen._stej("napake")
+            raise
+        finally:
+            bazen._stej("cas_posiljanja_s", time.perf_counter() - zacetek)
+
+    def _zavrzi(self) -> None:
+        if self._povezava is not None:
+            _zapri(self._povezava)
+            self._povezava = None
+
+
+class SmtpBazen:
+    """Omejen bazen prijavljenih SMTP povezav (varen za niti threadpoola)."""
+
+    def __init__(self, velikost: int = SMTP_POOL_VELIKOST,
+                 sporocil_na_povezavo: int = SMTP_SPOROCIL_NA_POVEZAVO,
+                 neaktivnost_s: int = SMTP_NEAKTIVNOST_S, cakanje_s: int = SMTP_CAKANJE_S):
+        self.velikost = velikost
+        self.sporocil_na_povezavo = sporocil_na_povezavo
+        self.neaktivnost_s = neaktivnost_s
+        self.cakanje_s = cakanje_s
+        self._mesta = threading.BoundedSemaphore(velikost)
+        self._prosta: list[_Povezava] = []
+        self._zaklep = threading.Lock()
+        self._metrike = {"poslana": 0, "napake": 0, "povezave_odprte": 0, "ponovne_povezave": 0,
+                         "cas_posiljanja_s": 0.0}
+
+    @contextmanager
+    def seja(self, nastavitve: dict) -> Iterator[SmtpSeja]:
+        """Izposodi povezavo za ``nastavitve``; ob izhodu jo vrne v bazen."""
+        if not self._mesta.acquire(timeout=self.cakanje_s):
+            raise smtplib.SMTPException("Vse SMTP povezave so zasedene. Poskusite znova.")
+        try:
+            seja = SmtpSeja(self, nastavitve, self._vzemi(_kljuc(nastavitve)))
+            try:
+                yield seja
+            finally:
+                self._vrni(seja._povezava)
+        finally:
+            self._mesta.release()
+
+    def _vzemi(self, kljuc: tuple) -> _Povezava | None:
+        meja = time.monotonic() - self.neaktivnost_s
+        najdena, ostale, zastarele = None, [], []
+        with self._zaklep:
+            for pov in self._prosta:
+                if pov.kljuc != kljuc or pov.prosta_od < meja:
+                    zastarele.append(pov)   # spremenjene nastavitve ali predolgo neaktivna
+                elif najdena is None:
+                    najdena = pov
+                else:
+                    ostale.append(pov)
+            self._prosta = ostale
+        for pov in zastarele:
+            _zapri(pov)
+        return najdena
+
+    def _vrni(self, pov: _Povezava | None) -> None:
+        if pov is None:
+            return
+        if pov.poslanih >= self.sporocil_na_povezavo:
+            _zapri(pov)
+            return
+        pov.prosta_od = time.monotonic()
+        with self._zaklep:
+            self._prosta.append(pov)
+
+    def zapri_vse(self) -> None:
+        """Zapre vse proste povezave (ob zaustavitvi aplikacije)."""
+        with self._zaklep:
+            prosta, self._prosta = self._prosta, []
+        for pov in prosta:
+            _zapri(pov)
+
+    def metrike(self) -> dict:
+        with self._zaklep:
+            m = dict(self._metrike)
+            m["proste"] = len(self._prosta)
+        cas = m.pop("cas_posiljanja_s")
+        m["cas_posiljanja_ms"] = round(cas * 1000)
+        m["sporocil_na_s"] = round(m["poslana"] / cas, 1) if cas else None
+        return m
+
+    def _stej(self, ime: str, n: float = 1) -> None:
+        with self._zaklep:
+            self._metrike[ime] += n
+
+
+_bazen = SmtpBazen()
+
+
+def smtp_seja(nastavitve: dict):
+    """Kontekst za pošiljanje več sporočil prek ene povezave iz skupnega bazena."""
+    return _bazen.seja(nastavitve)
+
+
+def smtp_metrike() -> dict:
+    return _bazen.metrike()
+
+
+def zapri_smtp_povezave() -> None:
+    _bazen.zapri_vse()
@@ -0,0 +1,110 @@
+"""Profil zmogljivosti za SQLite: pragme ob vsaki povezavi, velikost poola, periodično vzdrževanje WAL.
+
+Privzeti profil (WAL + synchronous=NORMAL + busy_timeout) omogoča, da bralci ne
+čakajo pisalcev (npr. ``log_akcija``) in da se sočasna pisanja počakajo namesto
+"database is locked". Vse vrednosti so nastavljive prek okolja (SQLITE_*).
+"""
+import asyncio
+import logging
+import os
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Pragme v vrstnem redu izvajanja; journal_mode najprej, ker synchronous=NORMAL brez WAL ni varen
+PRAGME: dict[str, str] = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    # negativna vrednost = KiB (ne strani); privzeto 20 MB na povezavo
+    "cache_size": str(-int(os.getenv("SQLITE_CACHE_KIB", "20000"))),
+    "mmap_size": str(int(os.getenv("SQLITE_MMAP_MB", "128")) * 1024 * 1024),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+POOL_VELIKOST = int(os.getenv("DB_POOL_VELIKOST", "10"))
+POOL_PRESEZEK = int(os.getenv("DB_POOL_PRESEZEK", "20"))
+POOL_CAKANJE_S = int(os.getenv("DB_POOL_CAKANJE_S", "30"))
+
+# Interval vzdrževanja (wal_checkpoint(TRUNCATE) + PRAGMA optimize); 0 = izklopljeno
+VZDRZEVANJE_INTERVAL_S = int(os.getenv("SQLITE_VZDRZEVANJE_S", "3600"))
+
+
+def je_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def je_pomnilniska(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or ":memory:" in url or "mode=memory" in url
+
+
+def engine_kwargs(url: str) -> dict:
+    """Dodatni argumenti za create_engine: omejen QueuePool za SQLite datoteke.
+
+    Privzeti pool (5 + 10) je manjši od threadpoola (THREADPOOL_NITI), zato bi
+    niti ob konicah čakale na povezavo; pri WAL lahko bralci tečejo vzporedno.
+    """
+    if not je_sqlite(url) or je_pomnilniska(url):
+        return {}
+    return {
+        "pool_size": POOL_VELIKOST,
+        "max_overflow": POOL_PRESEZEK,
+        "pool_timeout": POOL_CAKANJE_S,
+    }
+
+
+def _nastavi_pragme(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for ime, vrednost in PRAGME.items():
+            cursor.execute(f"PRAGMA {ime}={vrednost}")
+    finally:
+        cursor.close()
+
+
+def prijavi_profil(engine: Engine) -> None:
+    """Registrira connect dogodek, ki na vsaki novi SQLite povezavi nastavi PRAGME.
+
+    Za AsyncEngine podajte ``async_engine.sync_engine``.
+    """
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _nastavi_pragme)
+
+
+def pragme_v_veljavi(engine: Engine) -> dict[str, str]:
+    """Prebere dejanske vrednosti pragem na povezavi iz poola (za diagnostiko)."""
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.connect() as conn:
+        return {
+            ime: str(conn.execute(text(f"PRAGMA {ime}")).scalar())
+            for ime in PRAGME
+        }
+
+
+def vzdrzuj(engine: Engine) -> dict[str, int]:
+    """Izvede ``wal_checkpoint(TRUNCATE)`` in ``PRAGMA optimize``.
+
+    Vrne rezultat checkpointa (busy, strani v WAL, prenesene strani).
+    """
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.connect() as conn:
+        busy, wal_strani, prenesene = conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)")).one()
+        conn.execute(text("PRAGMA optimize"))
+        conn.commit()
+    return {"busy": busy, "wal_strani": wal_strani, "prenesene": prenesene}
+
+
+async def periodicno_vzdrzevanje(engine: Engine, interval: int = VZDRZEVANJE_INTERVAL_S) -> None:
+    """Neskončna zanka za lifespan: vsakih ``interval`` sekund pokliče vzdrzuj() v threadpoolu."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            rezultat = await run_in_threadpool(vzdrzuj, engine)
+            logger.info("SQLite vzdrževanje: %s", rezultat)
+        except Exception:
+            logger.exception("SQLite vzdrževanje ni uspelo")
@@ -0,0 +1,145 @@
+"""Materializirana statistika: seštevki po letu (``statistika_leto``) in člani po tipu (``statistika_tip``).
+
+Nadzorna plošča je prej ob vsakem ogledu izvedla sedem agregatnih poizvedb,
+pregled plačil (``/izvoz``, ``/clanarine``) pa je vse plačane članarine
+naložil v Python in ``znesek`` (besedilo) vsakič znova razčlenil. Zdaj so
+seštevki v dveh majhnih tabelah, branje je ena poizvedba po primarnem ključu.
+
+Vzdrževanje: pisalne poti pred ``commit`` pokličejo ``osvezi_leta`` (članarine,
+aktivnosti) oziroma ``osvezi_tipe`` (člani). Vrstica leta se vsakič izračuna
+znova iz izvornih tabel (po indeksu ``leto``), zato se napake ne seštevajo.
+Zneske sešteje SQL (``SUM(clanarine.znesek_centi)``); ``znesek_centi`` ob vsakem
+zapisu ``znesek`` nastavi pisalna pot z ``znesek_v_cente``.
+Obnova vsega: ``obnovi_statistiko`` (ob prvem zagonu samodejno,
+ročno ``python3 maintenance/obnovi_statistiko.py``).
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Iterable
+
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from .models import Clan, Clanarina, Aktivnost, StatistikaLeto, StatistikaTip
+
+_MEJA_CENTI = 2 ** 63   # SQLite INTEGER je 64-bitni
+
+
+def znesek_v_cente(znesek: str | None) -> int | None:
+    """``"25"``, ``"25,50"``, ``"25.5 €"`` → centi; prazen ali neberljiv znesek → None."""
+    if not znesek:
+        return None
+    niz = znesek.replace("€", "").replace(" ", "").replace(",", ".").strip()
+    try:
+        vrednost = Decimal(niz)
+        if not vrednost.is_finite():
+            return None
+        centi = int((vrednost * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+    except InvalidOperation:  # tudi quantize pri prevelikih vrednostih (npr. "1e30")
+        return None
+    return centi if -_MEJA_CENTI <= centi < _MEJA_CENTI else None
+
+
+def _izracunaj_leto(db: Session, leto: int) -> StatistikaLeto:
+    brez = Clanarina.znesek_centi == None
+    placniki, skupaj_centi, brez_zneska, neberljivi = db.query(
+        func.count(Clanarina.id),
+        func.sum(Clanarina.znesek_centi),
+        func.sum(case((brez, 1), else_=0)),
+        func.sum(case((and_(brez, func.trim(func.coalesce(Clanarina.znesek, "")) != ""), 1), else_=0)),
+    ).filter(Clanarina.leto == leto, Clanarina.datum_placila != None).one()
+    aktivnosti, ure = db.query(func.count(Aktivnost.id), func.sum(Aktivnost.delovne_ure)).filter(
+        Aktivnost.leto == leto,
+    ).one()
+    return StatistikaLeto(
+        leto=leto, placniki=placniki, skupaj_centi=skupaj_centi or 0, brez_zneska=brez_zneska or 0,
+        neberljivi=neberljivi or 0, aktivnosti=aktivnosti, ure=float(ure or 0),
+    )
+
+
+def osvezi_leta(db: Session, *leta: int | None) -> None:
+    """Znova izračuna vrstice ``statistika_leto`` za podana leta (v transakciji klicatelja)."""
+    db.flush()
+    for leto in {leto for leto in leta if leto is not None}:
+        vrstica = _izracunaj_leto(db, leto)
+        if vrstica.placniki or vrstica.aktivnosti:
+            db.merge(vrstica)
+        else:
+            db.query(StatistikaLeto).filter(StatistikaLeto.leto == leto).delete()
+
+
+def osvezi_tipe(db: Session) -> None:
+    """Znova izračuna ``statistika_tip`` (ena agregatna poizvedba po ``clani``)."""
+    db.flush()
+    vrstice = (
+        db.query(Clan.tip_clanstva, func.count(Clan.id),
+                 func.coalesce(func.sum(case((Clan.aktiven == True, 1), else_=0)), 0))
+        .group_by(Clan.tip_clanstva)
+        .all()
+    )
+    db.query(StatistikaTip).delete()
+    db.add_all(StatistikaTip(tip_clanstva=tip or "", vsi=vsi, aktivni=aktivni) for tip, vsi, aktivni in vrstice)
+
+
+def leta_clana(clan: Clan) -> set[int]:
+    """Leta članarin in aktivnosti člana – pred izbrisom (kaskada) za ``osvezi_leta``."""
+    return {c.leto for c in clan.clanarine} | {a.leto for a in clan.aktivnosti}
+
+
+def normaliziraj_zneske(db: Session, paket: int = 500) -> list[tuple[int, str]]:
+    """Znova izračuna ``clanarine.znesek_centi`` iz ``znesek`` v paketih po ``id``.
+
+    Vrne (id, znesek) neberljivih zneskov; ``commit`` je na klicatelju.
+    """
+    neberljivi: list[tuple[int, str]] = []
+    zadnji_id = 0
+    while True:
+        vrstice = (
+            db.query(Clanarina.id, Clanarina.znesek, Clanarina.znesek_centi)
+            .filter(Clanarina.id > zadnji_id)
+            .order_by(Clanarina.id)
+            .limit(paket)
+            .all()
+        )
+        if not vrstice:
+            return neberljivi
+        spremembe = []
+        for clanarina_id, znesek, centi in vrstice:
+            novi = znesek_v_cente(znesek)
+            if novi is None and znesek and znesek.strip():
+                neberljivi.append((clanarina_id, znesek))
+            if novi != centi:
+                spremembe.append({"id": clanarina_id, "znesek_centi": novi})
+        if spremembe:
+            db.bulk_update_mappings(Clanarina, spremembe)
+        zadnji_id = vrstice[-1][0]
+
+
+def obnovi_statistiko(db: Session) -> int:
+    """Izbriše in znova izračuna obe tabeli. Vrne število let; ``commit`` je na klicatelju."""
+    leta = [leto for (leto,) in db.query(Clanarina.leto).union(db.query(Aktivnost.leto))]
+    db.query(StatistikaLeto).delete()
+    osvezi_leta(db, *leta)
+    osvezi_tipe(db)
+    return len(leta)
+
+
+def obnovi_ce_prazna(db: Session) -> bool:
+    """Ob zagonu: napolni tabeli, če sta prazni, baza pa že ima člane (nadgradnja z migracijo 014)."""
+    if db.query(StatistikaTip).first() is not None or db.query(Clan.id).first() is None:
+        return False
+    obnovi_statistiko(db)
+    db.commit()
+    return True
+
+
+def statistika_let(db: Session, leta: Iterable[int] | None = None) -> dict[int, StatistikaLeto]:
+    """Vrstice ``statistika_leto`` po letu (vse ali samo podana leta)."""
+    query = db.query(StatistikaLeto)
+    if leta is not None:
+        query = query.filter(StatistikaLeto.leto.in_(list(leta)))
+    return {s.leto: s for s in query}
+
+
+def clani_po_tipu(db: Session) -> list[StatistikaTip]:
+    """Vrstice ``statistika_tip``, urejene po številu aktivnih članov (padajoče)."""
+    return db.query(StatistikaTip).order_by(StatistikaTip.aktivni.desc(), StatistikaTip.tip_clanstva).all()
@@ -3,9 +3,42 @@
 Format: https://www.zbs-giz.si/news/upn-qr
 19 podatkovnih polj ločenih z \\n, kontrolna vsota = 19 + vsota dolžin polj (3 mesta).
 Kodiranje: ISO-8859-2 (byte mode QR).
+
+Izrisi (SVG, PNG) so v predpomnilniku z naslavljanjem po vsebini: ključ je
+SHA-256 končne vsebine QR kode (19 polj + kontrolna vsota). Sprememba člana,
+leta ali nastavitev kluba da drugo vsebino in s tem drug ključ, zato
+razveljavitev ni potrebna. Prvi nivo je LRU v pomnilniku (``UPN_CACHE``
+vnosov), drugi neobvezen nivo so datoteke v ``UPN_CACHE_DIR`` (npr.
+``./data/cache/upn``), ki preživijo ponovni zagon. Ključ služi tudi kot
+ETag za ``/upn/...``.
+
+Datoteke na disku vsebujejo ime in naslov plačnika, zato jih naloga v ozadju
+(``periodicno_ciscenje_diska``) briše: starejše od ``UPN_CACHE_DIR_TTL_S``
+sekund in najstarejše nad ``UPN_CACHE_DIR_MAX`` datotek.
 """
+import asyncio
+import glob
+import hashlib
 import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
 import segno
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+UPN_CACHE = int(os.getenv("UPN_CACHE", "256"))
+UPN_CACHE_DIR = os.getenv("UPN_CACHE_DIR", "")
+UPN_CACHE_DIR_TTL_S = int(os.getenv("UPN_CACHE_DIR_TTL_S", str(30 * 24 * 3600)))
+UPN_CACHE_DIR_MAX = int(os.getenv("UPN_CACHE_DIR_MAX", "10000"))
+_CISCENJE_DISKA_S = 3600
+
+# Oblika izrisa → merilo (velikost modula v px)
+_OBLIKE = {"svg": 6, "png": 8}
 
 
 def _obreži(vrednost: str, max_d: int) -> str:
@@ -63,17 +96,157 @@ def _kontrolna_vsota(vsebina: str) -> str:
     return f"{19 + sum(len(f) for f in polja):03d}"
 
 
+def _qr_vsebina(vsebina: str) -> str:
+    """Končna vsebina QR kode: 19 polj + kontrolna vsota."""
+    return vsebina + _kontrolna_vsota(vsebina) + "\n"   # trailing \n po ZBS spec
+
+
+def upn_kljuc(vsebina: str) -> str:
+    """SHA-256 končne vsebine QR kode – ključ predpomnilnika in osnova ETag-a."""
+    return hashlib.sha256(_qr_vsebina(vsebina).encode("utf-8")).hexdigest()
+
+
 def _generiraj_qr(vsebina: str) -> segno.QRCode:
     """Generira segno QR objekt iz UPN vsebine."""
-    kv = _kontrolna_vsota(vsebina)
-    qr_vsebina = vsebina + kv + "\n"   # trailing \n po ZBS spec
-    qr_bytes = qr_vsebina.encode("iso-8859-2")
+    qr_bytes = _qr_vsebina(vsebina).encode("iso-8859-2")
     try:
         return segno.make(qr_bytes, error="M")
     except Exception:
         return segno.make(qr_bytes, error="L")
 
 
+class PredpomnilnikQr:
+    """Izrisi QR kod po ključu ``upn_kljuc``: LRU v pomnilniku + neobvezne datoteke na disku.
+
+    Varen za niti; izris teče izven zaklepa (dve niti lahko isto kodo izrišeta hkrati).
+    Napake diska (poln disk, pravice) se samo zabeležijo – izris se vrne vseeno.
+    """
+
+    def __init__(self, velikost: int = UPN_CACHE, mapa: str | None = UPN_CACHE_DIR or None):
+        self.velikost = max(velikost, 1)
+        self.mapa = mapa
+        self._izrisi: OrderedDict[str, bytes] = OrderedDict()
+        self._zaklep = threading.Lock()
+        self._metrike = {"zadetki": 0, "zadetki_disk": 0, "izrisi": 0, "izpadi": 0, "napake_disk": 0,
+                         "izbrisani_disk": 0}
+
+    def izris(self, vsebina: str, oblika: str) -> bytes:
+        """Vrne SVG ali PNG bajte za UPN vsebino (brez kontrolne vsote, kot jo vrne ``_upn_vsebina``)."""
+        ime = f"{upn_kljuc(vsebina)}.{oblika}"
+        with self._zaklep:
+            izris = self._izrisi.get(ime)
+            if izris is not None:
+                self._izrisi.move_to_end(ime)
+                self._metrike["zadetki"] += 1
+                return izris
+
+        izris = self._beri_disk(ime)
+        if izris is None:
+            buf = io.BytesIO()
+            _generiraj_qr(vsebina).save(buf, kind=oblika, scale=_OBLIKE[oblika], border=4)
+            izris = buf.getvalue()
+            self._pisi_disk(ime, izris)
+
+        with self._zaklep:
+            self._izrisi[ime] = izris
+            self._izrisi.move_to_end(ime)
+            while len(self._izrisi) > self.velikost:
+                self._izrisi.popitem(last=False)
+                self._metrike["izpadi"] += 1
+        return izris
+
+    def _beri_disk(self, ime: str) -> bytes | None:
+        if not self.mapa:
+            return None
+        try:
+            with open(os.path.join(self.mapa, ime), "rb") as f:
+                izris = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("UPN predpomnilnik: branje %s ni uspelo: %s", ime, e)
+            return None
+        with self._zaklep:
+            self._metrike["zadetki_disk"] += 1
+        return izris
+
+    def _pisi_disk(self, ime: str, izris: bytes) -> None:
+        with self._zaklep:
+            self._metrike["izrisi"] += 1
+        if not self.mapa:
+            return
+        pot = os.path.join(self.mapa, ime)
+        zacasna = f"{pot}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.mapa, exist_ok=True)
+            with open(zacasna, "wb") as f:
+                f.write(izris)
+            os.replace(zacasna, pot)   # atomarno: bralec nikoli ne vidi pol zapisane datoteke
+        except OSError as e:
+            with self._zaklep:
+                self._metrike["napake_disk"] += 1
+            logger.warning("UPN predpomnilnik: zapis %s ni uspel: %s", ime, e)
+
+    def pocisti_disk(self, ttl: int = UPN_CACHE_DIR_TTL_S, najvec: int = UPN_CACHE_DIR_MAX,
+                     zdaj: float | None = None) -> int:
+        """Izbriše datoteke, starejše od ``ttl`` sekund, in najstarejše nad ``najvec``; vrne število izbrisanih."""
+        if not self.mapa:
+            return 0
+        meja = (time.time() if zdaj is None else zdaj) - ttl
+        datoteke = []
+        for pot in glob.glob(os.path.join(self.mapa, "*")):
+            try:
+                datoteke.append((os.path.getmtime(pot), pot))
+            except OSError:
+                pass
+        datoteke.sort(reverse=True)   # najnovejše najprej
+        izbrisane = 0
+        for i, (mtime, pot) in enumerate(datoteke):
+            if mtime >= meja and i < najvec:
+                continue
+            try:
+                os.remove(pot)
+                izbrisane += 1
+            except OSError:
+                pass
+        with self._zaklep:
+            self._metrike["izbrisani_disk"] += izbrisane
+        return izbrisane
+
+    def izprazni(self) -> None:
+        """Izprazni pomnilniški nivo (datoteke na disku ostanejo)."""
+        with self._zaklep:
+            self._izrisi.clear()
+
+    def metrike(self) -> dict[str, int]:
+        with self._zaklep:
+            return {**self._metrike, "vnosov": len(self._izrisi)}
+
+
+_predpomnilnik = PredpomnilnikQr()
+
+
+def izris_upn(vsebina: str, oblika: str) -> bytes:
+    """SVG/PNG izris UPN vsebine iz skupnega predpomnilnika."""
+    return _predpomnilnik.izris(vsebina, oblika)
+
+
+def upn_metrike() -> dict[str, int]:
+    return _predpomnilnik.metrike()
+
+
+async def periodicno_ciscenje_diska(interval: int = _CISCENJE_DISKA_S) -> None:
+    """Ob zagonu in nato vsakih ``interval`` sekund počisti ``UPN_CACHE_DIR`` (lifespan)."""
+    while True:
+        try:
+            izbrisane = await run_in_threadpool(_predpomnilnik.pocisti_disk)
+            if izbrisane:
+                logger.info("UPN predpomnilnik: izbrisanih %d datotek", izbrisane)
+        except Exception:
+            logger.exception("Čiščenje UPN predpomnilnika na disku ni uspelo")
+        await asyncio.sleep(interval)
+
+
 def generiraj_upn_png(
     ime_placnika: str,
     ulica_placnika: str,
@@ -101,10 +274,7 @@ def generiraj_upn_png(
         znesek_eur=znesek_eur,
         namen=namen,
     )
-    qr = _generiraj_qr(vsebina)
-    buf = io.BytesIO()
-    qr.save(buf, kind="png", scale=8, border=4)
-    return buf.getvalue()
+    return izris_upn(vsebina, "png")
 
 
 def generiraj_upn_svg(
@@ -134,7 +304,4 @@ def generiraj_upn_svg(
         znesek_eur=znesek_eur,
         namen=namen,
     )
-    qr = _generiraj_qr(vsebina)
-    buf = io.BytesIO()
-    qr.save(buf, kind="svg", scale=6, border=4)
-    return buf.getvalue().decode("utf-8")
+    return izris_upn(vsebina, "svg").decode("utf-8")
@@ -0,0 +1,110 @@
+"""Seje dvostopenjskega uvoza (predogled → potrditev).
+
+Predogled datoteko razčleni enkrat in normalizirane vrstice shrani v
+``<UVOZ_SEJE_DIR>/<vrsta>_<uuid>.pkl`` (pickle, privzeto ``data/tmp``); UUID je v podpisani seji
+uporabnika. Potrditev vrstice samo prebere in uveljavi – brez ponovnega
+branja Excela.
+
+Seja velja ``UVOZ_SEJA_TTL_S`` sekund od predogleda. Pretečene seje (in
+ostanke starejših različic: ``*.xlsx``, ``akos_api_*.json``) briše
+``periodicno_ciscenje``, ki teče v ozadju (lifespan). Datoteke piše in bere
+samo strežnik; ``data/`` ni dostopna od zunaj.
+"""
+import asyncio
+import glob
+import logging
+import os
+import pickle
+import time
+import uuid as uuid_lib
+from typing import Any
+
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+UVOZ_SEJA_TTL_S = int(os.getenv("UVOZ_SEJA_TTL_S", "3600"))
+UVOZ_CISCENJE_S = int(os.getenv("UVOZ_CISCENJE_S", "300"))
+
+_PRIPONA = ".pkl"
+_STARI_VZORCI = ("*.xlsx", "akos_api_*.json")
+
+
+def _mapa() -> str:
+    """Mapa sej uvoza – prebere se ob vsaki uporabi (testi jo preusmerijo v začasno mapo)."""
+    return os.getenv("UVOZ_SEJE_DIR", "data/tmp")
+
+
+def _pot(vrsta: str, uvoz_uuid: str) -> str | None:
+    try:
+        uvoz_uuid = str(uuid_lib.UUID(uvoz_uuid))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return os.path.join(_mapa(), f"{vrsta}_{uvoz_uuid}{_PRIPONA}")
+
+
+def shrani_sejo(vrsta: str, podatki: Any) -> str:
+    """Shrani razčlenjene podatke predogleda in vrne UUID seje uvoza."""
+    os.makedirs(_mapa(), exist_ok=True)
+    uvoz_uuid = str(uuid_lib.uuid4())
+    pot = _pot(vrsta, uvoz_uuid)
+    zacasna = f"{pot}.{os.getpid()}.tmp"
+    with open(zacasna, "wb") as f:
+        pickle.dump(podatki, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(zacasna, pot)
+    return uvoz_uuid
+
+
+def nalozi_sejo(vrsta: str, uvoz_uuid: str | None, ttl: int | None = None) -> Any | None:
+    """Podatki seje uvoza ali None, če seja ne obstaja ali je potekla."""
+    pot = _pot(vrsta, uvoz_uuid) if uvoz_uuid else None
+    if pot is None:
+        return None
+    ttl = UVOZ_SEJA_TTL_S if ttl is None else ttl
+    try:
+        if time.time() - os.path.getmtime(pot) > ttl:
+            return None
+        with open(pot, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+
+def izbrisi_sejo(vrsta: str, uvoz_uuid: str | None) -> None:
+    pot = _pot(vrsta, uvoz_uuid) if uvoz_uuid else None
+    if pot is None:
+        return
+    try:
+        os.remove(pot)
+    except OSError:
+        pass
+
+
+def pocisti_seje(ttl: int | None = None) -> int:
+    """Izbriše pretečene seje uvoza in ostanke starega formata; vrne število izbrisanih."""
+    ttl = UVOZ_SEJA_TTL_S if ttl is None else ttl
+    meja = time.time() - ttl
+    izbrisane = 0
+    mapa = _mapa()
+    stari = [p for vzorec in _STARI_VZORCI for p in glob.glob(os.path.join(mapa, vzorec))]
+    seje = glob.glob(os.path.join(mapa, f"*{_PRIPONA}")) + glob.glob(os.path.join(mapa, "*.tmp"))
+    for pot in stari + seje:
+        try:
+            if pot in stari or os.path.getmtime(pot) < meja:
+                os.remove(pot)
+                izbrisane += 1
+        except OSError:
+            pass
+    return izbrisane
+
+
+async def periodicno_ciscenje(interval: int = UVOZ_CISCENJE_S) -> None:
+    """Ob zagonu in nato vsakih ``interval`` sekund počisti pretečene seje uvoza (lifespan)."""
+    while True:
+        try:
+            izbrisane = await run_in_threadpool(pocisti_seje)
+            if izbrisane:
+                logger.info("Počiščenih %d pretečenih sej uvoza", izbrisane)
+        except Exception:
+            logger.exception("Čiščenje sej uvoza ni uspelo")
+        await asyncio.sleep(interval)
@@ -0,0 +1,217 @@
+"""Pretočni XLSX zapisovalnik za izvoze (SpreadsheetML v zip, sproti po kosih).
+
+Vrstice se berejo iz iteratorjev (npr. poizvedb z ``yield_per``) in se takoj
+zapišejo v deflate tok; ``xlsx_tok`` vrača kose zip datoteke, ko nastajajo.
+Poraba pomnilnika je zato omejena ne glede na število vrstic, prvi bajti pa
+gredo odjemalcu, preden je izvoz končan.
+
+Nizi se zapisujejo kot ``inlineStr`` (brez tabele sharedStrings, ki bi morala
+biti v celoti v pomnilniku). Podprti tipi celic: str, int, float, Decimal,
+bool, date, datetime; None in "" pustita celico prazno.
+"""
+import io
+import re
+import zipfile
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, Sequence
+from xml.sax.saxutils import escape
+
+from openpyxl.utils import get_column_letter
+
+MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Slogi celic (indeksi v cellXfs v styles.xml)
+SLOG_KREPKO = 1
+SLOG_GLAVA = 2        # krepko + svetlo modro ozadje + sredinska poravnava (ZRS)
+_SLOG_DATUM = 3
+_SLOG_DATUM_CAS = 4
+
+_KOS_VRSTIC = 500          # po koliko vrsticah zapišemo v deflate
+_KOS_BAJTOV = 64 * 1024    # najmanjši kos, ki ga vrnemo odjemalcu
+_EPOHA = datetime(1899, 12, 30)
+_NEDOVOLJENI = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+@dataclass
+class List:
+    """En list delovnega zvezka; ``vrstice`` se preberejo šele med pretakanjem."""
+
+    ime: str
+    vrstice: Iterable[Sequence]
+    glava: Sequence[str] | None = None
+    slog_glave: int = SLOG_KREPKO
+    sirine: dict[int, float] = field(default_factory=dict)  # 1-based stolpec → širina
+
+
+class _Ponor(io.RawIOBase):
+    """Neiskalni izhod za ZipFile: zbira zapisane bajte, dokler jih ne poberemo."""
+
+    def __init__(self):
+        self._deli: list[bytes] = []
+        self._velikost = 0
+        self._pozicija = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._deli.append(bytes(b))
+        self._velikost += len(b)
+        self._pozicija += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pozicija
+
+    def velikost(self) -> int:
+        return self._velikost
+
+    def poberi(self) -> bytes:
+        podatki = b"".join(self._deli)
+        self._deli.clear()
+        self._velikost = 0
+        return podatki
+
+
+def _celica(ref: str, v, slog: int | None = None) -> str:
+    if v is None or v == "":
+        return ""
+    if isinstance(v, datetime):
+        serijska = (v.replace(tzinfo=None) - _EPOHA).total_seconds() / 86400
+        return f'<c r="{ref}" s="{slog or _SLOG_DATUM_CAS}"><v>{serijska}</v></c>'
+    if isinstance(v, date):
+        return f'<c r="{ref}" s="{slog or _SLOG_DATUM}"><v>{(v - _EPOHA.date()).days}</v></c>'
+    s = f' s="{slog}"' if slog else ""
+    if isinstance(v, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(v)}</v></c>'
+    if isinstance(v, (int, float, Decimal)):
+        return f'<c r="{ref}"{s}><v>{v}</v></c>'
+    besedilo = escape(_NEDOVOLJENI.sub("", str(v)))
+    return f'<c r="{ref}"{s} t="inlineStr"><is><t xml:space="preserve">{besedilo}</t></is></c>'
+
+
+def _vrstica(st: int, vrednosti: Sequence, crke: list[str], slog: int | None = None) -> str:
+    while len(crke) < len(vrednosti):
+        crke.append(get_column_letter(len(crke) + 1))
+    celice = "".join(_celica(f"{crke[i]}{st}", v, slog) for i, v in enumerate(vrednosti))
+    return f'<row r="{st}">{celice}</row>'
+
+
+_GLAVA_LISTA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="3"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '<fill><patternFill patternType="solid"><fgColor rgb="FFDDEEFF"/></patternFill></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="5">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="2" borderId="0" xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center"/></xf>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _metapodatki(imena: list[str]) -> dict[str, str]:
+    """Datoteke zvezka razen listov ([Content_Types], rels, workbook, styles)."""
+    listi_ct = "".join(
+        f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for i in range(1, len(imena) + 1)
+    )
+    listi_wb = "".join(
+        f'<sheet name="{escape(ime, {chr(34): "&quot;"})}" sheetId="{i}" r:id="rId{i}"/>'
+        for i, ime in enumerate(imena, start=1)
+    )
+    listi_rels = "".join(
+        f'<Relationship Id="rId{i}" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{i}.xml"/>'
+        for i in range(1, len(imena) + 1)
+    )
+    n = len(imena) + 1
+    xml = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return {
+        "[Content_Types].xml": (
+            xml + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{listi_ct}</Types>'
+        ),
+        "_rels/.rels": (
+            xml + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>'
+        ),
+        "xl/workbook.xml": (
+            xml + '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{listi_wb}</sheets></workbook>'
+        ),
+        "xl/_rels/workbook.xml.rels": (
+            xml + '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{listi_rels}<Relationship Id="rId{n}" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+            'Target="styles.xml"/></Relationships>'
+        ),
+        "xl/styles.xml": _STYLES,
+    }
+
+
+def xlsx_tok(listi: Iterable[List]) -> Iterator[bytes]:
+    """Generator kosov XLSX datoteke (za ``StreamingResponse``)."""
+    ponor = _Ponor()
+    imena: list[str] = []
+    with zipfile.ZipFile(ponor, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for st_lista, lst in enumerate(listi, start=1):
+            imena.append(lst.ime[:31])
+            crke: list[str] = []
+            with zf.open(f"xl/worksheets/sheet{st_lista}.xml", "w", force_zip64=False) as f:
+                deli = [_GLAVA_LISTA]
+                if lst.sirine:
+                    deli.append("<cols>")
+                    deli.extend(
+                        f'<col min="{s}" max="{s}" width="{w}" customWidth="1"/>'
+                        for s, w in sorted(lst.sirine.items())
+                    )
+                    deli.append("</cols>")
+                deli.append("<sheetData>")
+                st = 0
+                if lst.glava is not None:
+                    st += 1
+                    deli.append(_vrstica(st, lst.glava, crke, lst.slog_glave))
+                for vrednosti in lst.vrstice:
+                    st += 1
+                    deli.append(_vrstica(st, vrednosti, crke))
+                    if len(deli) >= _KOS_VRSTIC:
+                        f.write("".join(deli).encode("utf-8"))
+                        deli.clear()
+                        if ponor.velikost() >= _KOS_BAJTOV:
+                            yield ponor.poberi()
+                deli.append("</sheetData></worksheet>")
+                f.write("".join(deli).encode("utf-8"))
+            if ponor.velikost():
+                yield ponor.poberi()
+        for ime, vsebina in _metapodatki(imena).items():
+            zf.writestr(ime, vsebina)
+    yield ponor.poberi()
@@ -0,0 +1,73 @@
+"""Sintetični podatki za benchmarke (SQLite v pomnilniku ali začasni datoteki)."""
+import random
+from datetime import date
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base, Clan, Clanarina, Aktivnost, TIPI_CLANSTVA_PRIVZETO, OPERATERSKI_RAZREDI_PRIVZETO
+
+_OSNOVE = ["Nova", "Horva", "Kova", "Krajn", "Zupan", "Potoč", "Mlak", "Šušt", "Vidm", "Gol",
+           "Tur", "Bož", "Kral", "Bizj", "Hribe", "Rozm", "Žagar", "Petr", "Kos", "Lesja"]
+_KONCNICE = ["k", "t", "čič", "c", "čič", "nik", "ar", "ar", "ar", "ob", "k", "ič", "j", "ak", "rnik",
+             "an", "šek", "ovič", "el", "nc"]
+# ~300 različnih priimkov (osnova × končnica) – porazdelitev bližje pravemu registru kot nekaj pogostih
+PRIIMKI = sorted({o + k for o in _OSNOVE for k in _KONCNICE})
+IMENA = ["Janez", "Marko", "Ana", "Maja", "Luka", "Nina", "Jože", "Špela", "Peter", "Tina",
+         "Matej", "Urška", "Rok", "Eva", "Gregor", "Mojca", "Aleš", "Katja", "Boštjan", "Petra"]
+
+
+def ustvari_engine(url: str = "sqlite:///:memory:"):
+    """Ustvari engine s shemo aplikacije (create_all, brez Alembic)."""
+    kwargs = {"connect_args": {"check_same_thread": False}}
+    if url == "sqlite:///:memory:":
+        kwargs["poolclass"] = StaticPool
+    engine = create_engine(url, **kwargs)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def napolni(engine, st_clanov: int = 10_000, leta: range = range(2017, 2027), seme: int = 42) -> None:
+    """Napolni bazo s ``st_clanov`` člani, članarinami (~70 % plačnikov na leto) in aktivnostmi."""
+    rnd = random.Random(seme)
+    clani = []
+    for i in range(1, st_clanov + 1):
+        clani.append({
+            "id": i,
+            "priimek": rnd.choice(PRIIMKI),
+            "ime": rnd.choice(IMENA),
+            "klicni_znak": f"S5{rnd.randint(0, 9)}{chr(65 + i % 26)}{chr(65 + (i // 26) % 26)}{i}",
+            "tip_clanstva": rnd.choice(TIPI_CLANSTVA_PRIVZETO),
+            "operaterski_razred": rnd.choice(OPERATERSKI_RAZREDI_PRIVZETO),
+            "elektronska_posta": f"clan{i}@example.org",
+            "naslov_ulica": f"Ulica {i}",
+            "naslov_posta": "1000 Ljubljana",
+            "veljavnost_rd": date(rnd.randint(2020, 2032), rnd.randint(1, 12), 1),
+            "es_stevilka": i,
+            "aktiven": rnd.random() < 0.85,
+        })
+    clanarine = []
+    aktivnosti = []
+    for c in clani:
+        for leto in leta:
+            if rnd.random() < 0.7:
+                clanarine.append({
+                    "clan_id": c["id"], "leto": leto,
+                    "datum_placila": date(leto, rnd.randint(1, 12), 1),
+                    "znesek": rnd.choice(["25.00", "10,00", "35", ""]),
+                })
+        if rnd.random() < 0.3:
+            aktivnosti.append({
+                "clan_id": c["id"], "leto": rnd.choice(list(leta)),
+                "opis": "Tekmovanje", "delovne_ure": float(rnd.randint(1, 10)),
+            })
+    with engine.begin() as conn:
+        conn.execute(insert(Clan), clani)
+        conn.execute(insert(Clanarina), clanarine)
+        if aktivnosti:
+            conn.execute(insert(Aktivnost), aktivnosti)
+
+
+def seja(engine):
+    return sessionmaker(bind=engine)()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Primerjava enginov za bralne poti: sinhrona seja v threadpoolu proti AsyncSession (aiosqlite).
+
+Ista aplikacija, ista baza (začasna SQLite datoteka); zamenja se le odvisnost
+``get_bralna_db`` – enako kot z DB_ASYNC=0/1 v produkciji. Sočasni odjemalci
+krožijo po /clani/podatki, /clani/iskanje, /dashboard in /upn/{id}/{leto}.
+Poleg latence izpiše največje število hkrati zasedenih niti threadpoola.
+
+Uporaba:
+    python3 -m benchmarks.bench_async_engine
+    python3 -m benchmarks.bench_async_engine --clani 20000 --socasno 32 --zahtev 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import re
+import statistics
+import tempfile
+import time
+from datetime import date
+
+import anyio
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.auth import hash_geslo
+from app.database import get_db, get_bralna_db, BralnaSeja
+from app.main import app
+from app.models import Uporabnik
+from benchmarks._podatki import ustvari_engine, napolni, seja
+
+GESLO = "Veljavno1234!ab"
+
+
+def _poti(st_clanov: int) -> list[str]:
+    leto = date.today().year
+    return [
+        "/clani/podatki?draw=1&start=0&length=25&aktiven=",
+        "/clani/podatki?draw=2&start=100&length=25&order[0][column]=1&search[value]=S5",
+        "/clani/iskanje?q=nova",
+        "/dashboard",
+        f"/upn/{st_clanov // 2}/{leto}",
+    ]
+
+
+async def _prijava(client: httpx.AsyncClient) -> None:
+    resp = await client.get("/login")
+    csrf = re.search(r'name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+    await client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "bench", "geslo": GESLO})
+
+
+async def _obremeni(client: httpx.AsyncClient, poti: list[str], socasno: int, zahtev: int):
+    """Vrne (časi v ms, trajanje v s, največ hkrati zasedenih niti)."""
+    casi: list[float] = []
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    najvec_niti = 0
+    konec = asyncio.Event()
+
+    async def vzorci():
+        nonlocal najvec_niti
+        while not konec.is_set():
+            najvec_niti = max(najvec_niti, limiter.borrowed_tokens)
+            await asyncio.sleep(0.001)
+
+    async def delavec(zamik: int):
+        for pot in itertools.islice(itertools.cycle(poti), zamik, zamik + zahtev):
+            t0 = time.perf_counter()
+            resp = await client.get(pot)
+            resp.raise_for_status()
+            casi.append((time.perf_counter() - t0) * 1000)
+
+    vzorcevalnik = asyncio.create_task(vzorci())
+    t0 = time.perf_counter()
+    await asyncio.gather(*[delavec(i) for i in range(socasno)])
+    trajanje = time.perf_counter() - t0
+    konec.set()
+    await vzorcevalnik
+    return casi, trajanje, najvec_niti
+
+
+async def _zazeni(naziv: str, args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _prijava(client)
+        poti = _poti(args.clani)
+        await _obremeni(client, poti, 1, len(poti))  # ogrevanje
+        casi, trajanje, niti = await _obremeni(client, poti, args.socasno, args.zahtev)
+    casi.sort()
+    p95 = casi[max(int(len(casi) * 0.95) - 1, 0)]
+    print(f"{naziv:<22}{len(casi) / trajanje:>10.1f}{statistics.median(casi):>10.1f}"
+          f"{p95:>10.1f}{casi[-1]:>10.1f}{niti:>8}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sinhroni proti asinhronemu engineu na bralnih poteh.")
+    parser.add_argument("--clani", type=int, default=10_000, help="Število sintetičnih članov (privzeto: 10000)")
+    parser.add_argument("--socasno", type=int, default=16, help="Število sočasnih odjemalcev (privzeto: 16)")
+    parser.add_argument("--zahtev", type=int, default=15, help="Zahtev na odjemalca (privzeto: 15)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pot = os.path.join(tmp, "bench.db")
+        engine = ustvari_engine(f"sqlite:///{pot}")
+        napolni(engine, st_clanov=args.clani)
+        db = seja(engine)
+        db.add(Uporabnik(uporabnisko_ime="bench", geslo_hash=hash_geslo(GESLO), vloga="admin", aktiven=True))
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            s = seja(engine)
+            try:
+                yield s
+            finally:
+                s.close()
+
+        print(f"Sintetična baza: {args.clani} članov, {args.socasno} sočasnih odjemalcev\n")
+        print(f"{'engine':<22}{'zaht./s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'niti':>8}")
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            # Sinhrono: get_bralna_db vzame sejo iz get_db in jo izvaja v threadpoolu
+            asyncio.run(_zazeni("sync (threadpool)", args))
+
+            async def asinhrono():
+                a_engine = create_async_engine(f"sqlite+aiosqlite:///{pot}")
+                a_seja = async_sessionmaker(a_engine, autoflush=False, expire_on_commit=False)
+
+                async def override_bralna():
+                    async with a_seja() as s:
+                        yield BralnaSeja(s)
+
+                app.dependency_overrides[get_bralna_db] = override_bralna
+                try:
+                    await _zazeni("async (aiosqlite)", args)
+                finally:
+                    await a_engine.dispose()
+
+            asyncio.run(asinhrono())
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
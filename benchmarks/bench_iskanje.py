@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark iskanja članov (/clani/iskanje autocomplete): LIKE vs FTS5 indeks.
+
+Zgradi dve enaki sintetični bazi – eno s ``clani_fts`` (kot po migraciji 010),
+drugo brez – in za vsak iskalni niz izmeri mediano ``_isci_clane``.
+
+Uporaba:
+    python3 -m benchmarks.bench_iskanje
+    python3 -m benchmarks.bench_iskanje --clani 50000 --ponovitve 200
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.routers.clani import _isci_clane
+from benchmarks._podatki import ustvari_engine, napolni, seja
+
+ISKALNI_NIZI = ["no", "novak", "sustar", "S55", "novak jan", "clan4711"]
+
+
+def _izmeri(engine, q: str, ponovitve: int) -> tuple[int, float]:
+    db = seja(engine)
+    try:
+        _isci_clane(db, q)  # ogrevanje (FTS detekcija, cache stavkov)
+        casi = []
+        for _ in range(ponovitve):
+            t0 = time.perf_counter()
+            rezultat = _isci_clane(db, q)
+            casi.append(time.perf_counter() - t0)
+    finally:
+        db.close()
+    return len(rezultat), statistics.median(casi) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark iskanja članov: LIKE vs FTS5.")
+    parser.add_argument("--clani", type=int, default=50_000, help="Število sintetičnih članov (privzeto: 50000)")
+    parser.add_argument("--ponovitve", type=int, default=50, help="Število ponovitev na niz (privzeto: 50)")
+    args = parser.parse_args()
+
+    z_fts = ustvari_engine()
+    napolni(z_fts, st_clanov=args.clani, leta=range(2026, 2027))
+    brez_fts = ustvari_engine()
+    with brez_fts.begin() as conn:
+        conn.execute(text("DROP TABLE clani_fts"))
+        for prozilec in ("clani_fts_ai", "clani_fts_ad", "clani_fts_au"):
+            conn.execute(text(f"DROP TRIGGER {prozilec}"))
+    napolni(brez_fts, st_clanov=args.clani, leta=range(2026, 2027))
+
+    print(f"Sintetična baza: {args.clani} članov\n")
+    print(f"{'niz':<14}{'LIKE zadetki':>14}{'LIKE ms':>10}{'FTS zadetki':>14}{'FTS ms':>10}")
+    for q in ISKALNI_NIZI:
+        n_like, ms_like = _izmeri(brez_fts, q, args.ponovitve)
+        n_fts, ms_fts = _izmeri(z_fts, q, args.ponovitve)
+        print(f"{q:<14}{n_like:>14}{ms_like:>10.3f}{n_fts:>14}{ms_fts:>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
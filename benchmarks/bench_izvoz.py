@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Izvoz članov: openpyxl Workbook v pomnilniku, pretočni xlsx_tok, CSV in JSON Lines.
+
+Za vsako različico izmeri skupni čas, čas do prvega kosa (TTFB), vrstice/s in
+največjo porabo pomnilnika (tracemalloc) pri izvozu lista "Clani" iz sintetične
+baze. Vrstice pri vseh različicah pridejo iz iste poizvedbe in funkcije
+``_vrstica_clana``. Drugi del primerja celoten backup (vse štiri tabele iz
+``_backup_listi``): backup-excel proti backup.csv.zip in backup.jsonl.zip.
+
+Uporaba:
+    python3 -m benchmarks.bench_izvoz
+    python3 -m benchmarks.bench_izvoz --clani 50000
+    python3 -m benchmarks.bench_izvoz --brez-workbook
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from openpyxl import Workbook
+from openpyxl.styles import Font
+
+from app.models import Clan
+from app.csv_tok import csv_tok, jsonl_tok, zip_tok
+from app.models import Clanarina, Aktivnost, ClanVloga
+from app.routers.izvoz import _GLAVA_CLANOV, _vrstica_clana, _YIELD_PER, _backup_listi
+from app.xlsx_tok import xlsx_tok, List
+from benchmarks._podatki import ustvari_engine, napolni, seja
+
+
+def _workbook(db):
+    """Prejšnja izvedba: vse vrstice v Workbook, save v BytesIO, nato en kos."""
+    clani = db.query(Clan).order_by(Clan.priimek, Clan.ime).all()
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Clani"
+    ws.append(_GLAVA_CLANOV)
+    for cell in ws[1]:
+        cell.font = Font(bold=True)
+    for clan in clani:
+        ws.append(_vrstica_clana(clan))
+    buf = io.BytesIO()
+    wb.save(buf)
+    yield buf.getvalue()
+
+
+def _list_clanov(db) -> List:
+    clani = db.query(Clan).order_by(Clan.priimek, Clan.ime).yield_per(_YIELD_PER)
+    return List("Clani", (_vrstica_clana(c) for c in clani), glava=_GLAVA_CLANOV)
+
+
+def _pretocno(db):
+    yield from xlsx_tok([_list_clanov(db)])
+
+
+def _csv(db):
+    yield from csv_tok(_list_clanov(db))
+
+
+def _jsonl(db):
+    yield from jsonl_tok(_list_clanov(db))
+
+
+def _backup_xlsx(db):
+    yield from xlsx_tok(_backup_listi(db))
+
+
+def _backup_zip(tok, koncnica: str):
+    def izvoz(db):
+        yield from zip_tok((f"{lst.ime.lower()}.{koncnica}", tok(lst)) for lst in _backup_listi(db))
+    return izvoz
+
+
+def _izmeri(naziv: str, fn, engine, st_vrstic: int) -> None:
+    db = seja(engine)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    ttfb = None
+    velikost = 0
+    for kos in fn(db):
+        if ttfb is None:
+            ttfb = time.perf_counter() - t0
+        velikost += len(kos)
+    skupaj = time.perf_counter() - t0
+    _, vrh = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.close()
+    print(f"{naziv:<22}{skupaj * 1000:>10.0f}{ttfb * 1000:>10.0f}{st_vrstic / skupaj:>12.0f}"
+          f"{vrh / 2**20:>10.1f}{velikost / 2**20:>10.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Primerjava oblik izvoza (XLSX, CSV, JSON Lines).")
+    parser.add_argument("--clani", type=int, default=20_000, help="Število sintetičnih članov (privzeto: 20000)")
+    parser.add_argument("--brez-workbook", action="store_true",
+                        help="Izpusti počasno izvedbo z openpyxl Workbook")
+    args = parser.parse_args()
+
+    engine = ustvari_engine()
+    napolni(engine, st_clanov=args.clani)
+
+    db = seja(engine)
+    st_backup = args.clani + sum(db.query(m).count() for m in (Clanarina, Aktivnost, ClanVloga))
+    db.close()
+
+    print(f"Sintetična baza: {args.clani} članov, {st_backup} vrstic v backupu\n")
+    glava = f"{'različica':<22}{'ms':>10}{'TTFB ms':>10}{'vrstic/s':>12}{'vrh MiB':>10}{'MiB':>10}"
+    print("Filtrirani izvoz (list Clani)")
+    print(glava)
+    if not args.brez_workbook:
+        _izmeri("prej: Workbook", _workbook, engine, args.clani)
+    _izmeri("xlsx_tok (pretočno)", _pretocno, engine, args.clani)
+    _izmeri("csv_tok", _csv, engine, args.clani)
+    _izmeri("jsonl_tok", _jsonl, engine, args.clani)
+
+    print("\nCeloten backup (4 tabele)")
+    print(glava)
+    _izmeri("backup-excel", _backup_xlsx, engine, st_backup)
+    _izmeri("backup.csv.zip", _backup_zip(csv_tok, "csv"), engine, st_backup)
+    _izmeri("backup.jsonl.zip", _backup_zip(jsonl_tok, "jsonl"), engine, st_backup)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+PDF članske kartice: polna pisava za vsako kartico proti pisavam, pripravljenim enkrat na proces.
+
+Prejšnja izvedba ``generiraj_kartico_pdf`` je za vsako kartico z ``add_font``
+razčlenila oba celotna TTF-ja DejaVu (~6000 znakov) in ju ob izpisu podmnožila.
+Nova izvedba pisavi podmnoži enkrat na proces (``kartica._pisave``); paketni
+način (``generiraj_kartice_pdf``) pa vse kartice izriše v en PDF, kjer sta
+pisavi vdelani samo enkrat. Tiskalna pola (``generiraj_tiskalno_polo``,
+``/clani/kartice.pdf``) je paket s 10 karticami na list A4.
+
+Uporaba:
+    python3 -m benchmarks.bench_kartica
+    python3 -m benchmarks.bench_kartica --kartice 1000
+"""
+
+import argparse
+import time
+from datetime import date
+
+from fpdf import FPDF
+
+from app import kartica
+from app.models import Clan
+
+
+def _clani(n: int) -> list[Clan]:
+    return [
+        Clan(id=i, priimek=f"Čebašek{i}", ime="Žan", klicni_znak=f"S5{i % 10}A{i}", tip_clanstva="Osebni",
+             operaterski_razred="A", es_stevilka=i, veljavnost_rd=date(2030, 1, 1))
+        for i in range(1, n + 1)
+    ]
+
+
+def _prej(clani: list[Clan], polja: list[str]) -> None:
+    """Prejšnja logika: celotni pisavi v vsakem PDF-ju."""
+    for clan in clani:
+        pdf = FPDF(unit="mm", format=(kartica._W, kartica._H))
+        pdf.set_margins(0, 0, 0)
+        pdf.set_auto_page_break(False)
+        pdf.add_font("DejaVu", style="", fname=kartica._FONT_PATH)
+        pdf.add_font("DejaVu", style="B", fname=kartica._FONT_BOLD_PATH)
+        pdf.add_page()
+        kartica._narisi_kartico(pdf, clan, 2026, "Radio klub", "S59X", polja)
+        bytes(pdf.output())
+
+
+def _posamezno(clani: list[Clan], polja: list[str]) -> None:
+    for _ in kartica.generiraj_kartice(clani, 2026, "Radio klub", "S59X", polja):
+        pass
+
+
+def _paket(clani: list[Clan], polja: list[str]) -> None:
+    kartica.generiraj_kartice_pdf(clani, 2026, "Radio klub", "S59X", polja)
+
+
+def _pola(clani: list[Clan], polja: list[str]) -> None:
+    kartica.generiraj_tiskalno_polo(clani, 2026, "Radio klub", "S59X", polja)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="PDF kartice: polna pisava na kartico proti predpripravljenim pisavam.")
+    parser.add_argument("--kartice", type=int, default=100, help="Število kartic (privzeto: 100)")
+    args = parser.parse_args()
+
+    clani = _clani(args.kartice)
+    polja = kartica._KARTICA_POLJA_PRIVZETO.split(",")
+    t0 = time.perf_counter()
+    kartica._pisave()
+    print(f"Kartice: {args.kartice}; priprava pisav (enkrat na proces): {(time.perf_counter() - t0) * 1000:.0f} ms\n")
+
+    print(f"{'različica':<34}{'ms':>10}{'kartic/s':>12}")
+    casi = []
+    for naziv, fn in (("prej: celotni pisavi na kartico", _prej),
+                      ("pisave enkrat, PDF na kartico", _posamezno),
+                      ("paket: en PDF, vse kartice", _paket),
+                      ("tiskalna pola: 10 na list A4", _pola)):
+        t0 = time.perf_counter()
+        fn(clani, polja)
+        t = time.perf_counter() - t0
+        casi.append(t)
+        print(f"{naziv:<34}{t * 1000:>10.0f}{args.kartice / t:>12.0f}")
+    print(f"\nPospešek (PDF na kartico): {casi[0] / casi[1]:.1f}×, paket: {casi[0] / casi[2]:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
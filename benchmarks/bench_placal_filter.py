@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark filtra "plačano/neplačano" na seznamu članov.
+
+Primerja staro pot (vsi filtrirani člani + vse članarine leta v Python, filter s
+setom) z novo (korelirani EXISTS / NOT EXISTS v ``_filtriraj_clane``), z in brez
+indeksa ``ix_clanarine_leto_clan_id``. Izpiše število vrstic, ki zapustijo bazo,
+in mediano latence.
+
+Uporaba:
+    python3 -m benchmarks.bench_placal_filter
+    python3 -m benchmarks.bench_placal_filter --clani 10000 --ponovitve 20
+"""
+
+import argparse
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+from app.models import Clanarina
+from app.routers.clani import _filtriraj_clane
+from benchmarks._podatki import ustvari_engine, napolni, seja
+
+
+def _stara_pot(db, placal: str, leto: int) -> tuple[list, int]:
+    clani = _filtriraj_clane(db, aktiven="da")
+    clanarine = db.query(Clanarina).filter(Clanarina.leto == leto).all()
+    placali_ids = {c.clan_id for c in clanarine if c.datum_placila is not None}
+    if placal == "da":
+        rezultat = [c for c in clani if c.id in placali_ids]
+    else:
+        rezultat = [c for c in clani if c.id not in placali_ids]
+    return rezultat, len(clani) + len(clanarine)
+
+
+def _nova_pot(db, placal: str, leto: int) -> tuple[list, int]:
+    rezultat = _filtriraj_clane(db, aktiven="da", placal=placal, leto=leto)
+    return rezultat, len(rezultat)
+
+
+def _izmeri(fn, engine, placal: str, leto: int, ponovitve: int) -> tuple[int, int, float]:
+    casi = []
+    for _ in range(ponovitve):
+        db = seja(engine)
+        try:
+            t0 = time.perf_counter()
+            rezultat, prebrane = fn(db, placal, leto)
+            casi.append(time.perf_counter() - t0)
+        finally:
+            db.close()
+    return len(rezultat), prebrane, statistics.median(casi) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark filtra plačano/neplačano (Python set vs SQL EXISTS).")
+    parser.add_argument("--clani", type=int, default=10_000, help="Število sintetičnih članov (privzeto: 10000)")
+    parser.add_argument("--ponovitve", type=int, default=15, help="Število ponovitev na meritev (privzeto: 15)")
+    args = parser.parse_args()
+
+    engine = ustvari_engine()
+    napolni(engine, st_clanov=args.clani)
+    leto = date.today().year
+    with engine.connect() as conn:
+        st_clanarin = conn.execute(text("SELECT COUNT(*) FROM clanarine")).scalar()
+    print(f"Sintetična baza: {args.clani} članov, {st_clanarin} članarin, leto {leto}\n")
+    print(f"{'različica':<28}{'placal':>7}{'rezultat':>10}{'iz baze':>10}{'ms (med.)':>12}")
+
+    for placal in ("da", "ne"):
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_clanarine_leto_clan_id"))
+        for naziv, fn in (("prej: Python set", _stara_pot), ("EXISTS brez indeksa", _nova_pot)):
+            n, prebrane, ms = _izmeri(fn, engine, placal, leto, args.ponovitve)
+            print(f"{naziv:<28}{placal:>7}{n:>10}{prebrane:>10}{ms:>12.2f}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX ix_clanarine_leto_clan_id ON clanarine (leto, clan_id)"))
+        n, prebrane, ms = _izmeri(_nova_pot, engine, placal, leto, args.ponovitve)
+        print(f"{'EXISTS + (leto, clan_id)':<28}{placal:>7}{n:>10}{prebrane:>10}{ms:>12.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Render e-poštnih predlog: prevajanje za vsakega prejemnika proti predpomnilniku prevedenih predlog.
+
+Prejšnja izvedba ``posli_email`` je za vsakega prejemnika ustvarila nov
+``SandboxedEnvironment`` ter zadevo in telo prevedla z ``from_string``.
+Nova izvedba (``predloge_jinja``) predlogo prevede enkrat in jo nato samo
+renderira. Merjen je samo render zadeve in telesa (brez QR, MIME in SMTP) za
+privzeto predlogo »Potrdi podatke člana« – najdaljšo s 16 spremenljivkami.
+
+Uporaba:
+    python3 -m benchmarks.bench_predloge
+    python3 -m benchmarks.bench_predloge --prejemniki 2000
+"""
+
+import argparse
+import time
+from datetime import date
+
+from jinja2.sandbox import SandboxedEnvironment
+
+from app.email import _clan_context
+from app.email_predloge_seed import _PRIVZETE_PREDLOGE
+from app.models import Clan
+from app.predloge_jinja import PredpomnilnikPredlog
+
+
+def _clani(n: int) -> list[Clan]:
+    return [
+        Clan(id=i, priimek=f"Priimek{i}", ime="Ime", klicni_znak=f"S5{i}X", tip_clanstva="Osebni",
+             elektronska_posta=f"clan{i}@example.org", naslov_ulica=f"Ulica {i}", naslov_posta="1000 Ljubljana",
+             veljavnost_rd=date(2030, 1, 1), es_stevilka=i)
+        for i in range(1, n + 1)
+    ]
+
+
+def _prej(zadeva: str, telo: str, clani: list[Clan]) -> None:
+    """Prejšnja logika: novo okolje in prevajanje za vsakega prejemnika."""
+    for clan in clani:
+        ctx = _clan_context(clan, 2026)
+        SandboxedEnvironment(autoescape=False).from_string(telo).render(**ctx)
+        SandboxedEnvironment(autoescape=False).from_string(zadeva).render(**ctx)
+
+
+def _predpomnilnik(zadeva: str, telo: str, clani: list[Clan]) -> None:
+    pp = PredpomnilnikPredlog()
+    for clan in clani:
+        ctx = _clan_context(clan, 2026)
+        pp.render(telo, ctx)
+        pp.render(zadeva, ctx)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render predlog: prevajanje na prejemnika proti predpomnilniku.")
+    parser.add_argument("--prejemniki", type=int, default=500, help="Število prejemnikov (privzeto: 500)")
+    args = parser.parse_args()
+
+    predloga = next(p for p in _PRIVZETE_PREDLOGE if p["naziv"] == "Potrdi podatke člana")
+    clani = _clani(args.prejemniki)
+
+    print(f"Prejemniki: {args.prejemniki}, telo predloge {len(predloga['telo_html'])} znakov\n")
+    print(f"{'različica':<32}{'ms':>10}{'µs/sporočilo':>15}")
+    casi = []
+    for naziv, fn in (("prej: from_string za vsakega", _prej), ("predpomnilnik prevedenih", _predpomnilnik)):
+        t0 = time.perf_counter()
+        fn(predloga["zadeva"], predloga["telo_html"], clani)
+        t = time.perf_counter() - t0
+        casi.append(t)
+        print(f"{naziv:<32}{t * 1000:>10.0f}{t / args.prejemniki * 1e6:>15.0f}")
+    print(f"\nPospešek: {casi[0] / casi[1]:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
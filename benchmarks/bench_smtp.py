@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Skupinsko pošiljanje e-pošte: nova povezava za vsako sporočilo proti bazenu povezav.
+
+Prejšnja izvedba ``posli_email`` je za vsako sporočilo odprla povezavo
+(TCP, EHLO, pri starttls še STARTTLS in LOGIN) in jo po enem sporočilu zaprla.
+Nova izvedba (``smtp_bazen``) pošlje vsa sporočila prek ene povezave iz bazena.
+
+Strežnik je lokalni aiosmtpd (``requirements-dev.txt``) brez TLS; rokovanje
+s pravim strežnikom je dražje (omrežni RTT, TLS), zato ``--zakasnitev-ms``
+doda zamik pri EHLO, ki posnema odziv oddaljenega strežnika.
+
+Uporaba:
+    python3 -m benchmarks.bench_smtp
+    python3 -m benchmarks.bench_smtp --sporocila 400 --zakasnitev-ms 50
+"""
+
+import argparse
+import asyncio
+import smtplib
+import socket
+import time
+from email.message import EmailMessage
+
+from aiosmtpd.controller import Controller
+
+from app.smtp_bazen import SmtpBazen
+
+
+class _Prejemnik:
+    def __init__(self, zakasnitev_s: float):
+        self.zakasnitev_s = zakasnitev_s
+        self.povezave = 0
+        self.sporocila = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        self.povezave += 1
+        await asyncio.sleep(self.zakasnitev_s)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sporocila += 1
+        return "250 OK"
+
+
+def _sporocilo(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = "Članarina 2026"
+    msg["From"] = "klub@example.org"
+    msg["To"] = f"clan{i}@example.org"
+    msg.set_content("<p>Pozdravljeni, vljudno vas prosimo za plačilo članarine.</p>" * 20, subtype="html")
+    return msg
+
+
+def _prej(nastavitve: dict, sporocila: list) -> None:
+    """Prejšnja logika: nova povezava za vsako sporočilo."""
+    for msg in sporocila:
+        with smtplib.SMTP(nastavitve["host"], nastavitve["port"]) as server:
+            server.send_message(msg)
+
+
+def _bazen(nastavitve: dict, sporocila: list) -> None:
+    bazen = SmtpBazen()
+    with bazen.seja(nastavitve) as seja:
+        for msg in sporocila:
+            seja.posli(msg)
+    bazen.zapri_vse()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SMTP: povezava na sporočilo proti bazenu povezav.")
+    parser.add_argument("--sporocila", type=int, default=400, help="Število sporočil (privzeto: 400)")
+    parser.add_argument("--zakasnitev-ms", type=float, default=20.0,
+                        help="Zamik strežnika pri EHLO, posnema rokovanje (privzeto: 20)")
+    args = parser.parse_args()
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    prejemnik = _Prejemnik(args.zakasnitev_ms / 1000)
+    controller = Controller(prejemnik, hostname="127.0.0.1", port=port)
+    controller.start()
+    nastavitve = {"host": "127.0.0.1", "port": port, "nacin": "plain", "uporabnik": "", "geslo": ""}
+    sporocila = [_sporocilo(i) for i in range(args.sporocila)]
+
+    print(f"Sporočila: {args.sporocila}, zamik rokovanja: {args.zakasnitev_ms:.0f} ms\n")
+    print(f"{'različica':<28}{'ms':>10}{'sporočil/s':>12}{'povezav':>10}")
+    casi = []
+    try:
+        for naziv, fn in (("prej: povezava na sporočilo", _prej), ("bazen povezav", _bazen)):
+            prejemnik.povezave = prejemnik.sporocila = 0
+            t0 = time.perf_counter()
+            fn(nastavitve, sporocila)
+            t = time.perf_counter() - t0
+            assert prejemnik.sporocila == args.sporocila
+            casi.append(t)
+            print(f"{naziv:<28}{t * 1000:>10.0f}{args.sporocila / t:>12.0f}{prejemnik.povezave:>10}")
+    finally:
+        controller.stop()
+    print(f"\nPospešek: {casi[0] / casi[1]:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+UPN QR koda: izris ob vsaki zahtevi proti predpomnilniku z naslavljanjem po vsebini.
+
+Prejšnja izvedba ``generiraj_upn_svg`` / ``generiraj_upn_png`` je QR kodo
+(segno: kodiranje, maska, izris) zgradila znova ob vsakem ogledu seznama
+članov in za vsako e-pošto s QR kodo. Nova izvedba (``upn.PredpomnilnikQr``)
+izris poišče po SHA-256 končne vsebine QR kode – najprej v pomnilniku, nato
+(z ``--disk``) v datotekah.
+
+Uporaba:
+    python3 -m benchmarks.bench_upn
+    python3 -m benchmarks.bench_upn --clani 200 --ogledi 10 --disk
+"""
+
+import argparse
+import io
+import tempfile
+import time
+
+from app import upn
+
+
+def _vsebine(n: int) -> list[str]:
+    return [
+        upn._upn_vsebina(f"Čebašek{i} Žan", f"Ulica {i}", "1000 Ljubljana", "SI56 6100 0002 1234 567",
+                         f"SI00 {i}-2026", "Radio klub", "Klubska 2", "6250 Ilirska Bistrica",
+                         "Članarina 2026", 25.0, "MEMB")
+        for i in range(1, n + 1)
+    ]
+
+
+def _prej(vsebine: list[str], oblika: str) -> None:
+    """Prejšnja logika: nov segno QR in izris ob vsaki zahtevi."""
+    for vsebina in vsebine:
+        buf = io.BytesIO()
+        upn._generiraj_qr(vsebina).save(buf, kind=oblika, scale=upn._OBLIKE[oblika], border=4)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="UPN QR: izris ob vsaki zahtevi proti predpomnilniku.")
+    parser.add_argument("--clani", type=int, default=100, help="Število različnih QR kod (privzeto: 100)")
+    parser.add_argument("--ogledi", type=int, default=10, help="Ogledi vsake kode (privzeto: 10)")
+    parser.add_argument("--oblika", choices=sorted(upn._OBLIKE), default="svg")
+    parser.add_argument("--disk", action="store_true", help="Vključi tudi nivo na disku (začasna mapa)")
+    args = parser.parse_args()
+
+    vsebine = _vsebine(args.clani) * args.ogledi
+    n = len(vsebine)
+    print(f"QR kod: {args.clani}, ogledov: {n}, oblika: {args.oblika}\n")
+    print(f"{'različica':<34}{'ms':>10}{'µs/ogled':>12}")
+
+    t0 = time.perf_counter()
+    _prej(vsebine, args.oblika)
+    t_prej = time.perf_counter() - t0
+    print(f"{'prej: izris ob vsaki zahtevi':<34}{t_prej * 1000:>10.0f}{t_prej / n * 1e6:>12.0f}")
+
+    with tempfile.TemporaryDirectory() as mapa:
+        predpomnilnik = upn.PredpomnilnikQr(velikost=args.clani, mapa=mapa if args.disk else None)
+        t0 = time.perf_counter()
+        for vsebina in vsebine:
+            predpomnilnik.izris(vsebina, args.oblika)
+        t = time.perf_counter() - t0
+        print(f"{'predpomnilnik (pomnilnik)':<34}{t * 1000:>10.0f}{t / n * 1e6:>12.0f}")
+
+        if args.disk:
+            # Ponovni zagon: prazen pomnilnik, izrisi samo na disku
+            hladen = upn.PredpomnilnikQr(velikost=args.clani, mapa=mapa)
+            t0 = time.perf_counter()
+            for vsebina in vsebine[:args.clani]:
+                hladen.izris(vsebina, args.oblika)
+            t_disk = time.perf_counter() - t0
+            print(f"{'po zagonu (disk, prvi ogledi)':<34}{t_disk * 1000:>10.0f}"
+                  f"{t_disk / args.clani * 1e6:>12.0f}")
+        print(f"\nMetrike: {predpomnilnik.metrike()}")
+    print(f"Pospešek: {t_prej / t:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Uvoz bančnega izpiska plačil: poizvedbe za vsako vrstico proti indeksu članov in upsertu.
+
+Prejšnja izvedba je za vsako vrstico poiskala člana (ID, nato ES številka,
+nato ime – do tri poizvedbe), preverila obstoj članarine (clan_id, leto) in
+dodala/posodobila ORM objekt. Nova izvedba (``_uvozi_placila_workbook``)
+naloži indeks članov in ključe članarin enkrat ter zapiše vse v enem paketu
+``INSERT … ON CONFLICT(clan_id, leto) DO UPDATE``.
+
+Obe različici tečeta na enako napolnjeni bazi v pomnilniku in na istem
+izpisku (~80 % vrstic z referenco, ostale po imenu, ~70 % članov ima
+članarino za leto že vpisano). Čas vključuje branje lista (openpyxl).
+
+Uporaba:
+    python3 -m benchmarks.bench_uvoz_placil
+    python3 -m benchmarks.bench_uvoz_placil --vrstice 20000 --clani 10000
+"""
+
+import argparse
+import io
+import random
+import time
+from datetime import date
+
+from openpyxl import Workbook
+
+from app.models import Clan, Clanarina
+from app.routers.izvoz import (
+    UVOZ_PLACILA_STOLPCI_PRIVZETO, _load_sheet, _nacrt_stolpcev, _niz, _celica,
+    _parse_referenca, _parse_datum_celice, _uvozi_placila_workbook,
+)
+from benchmarks._podatki import ustvari_engine, napolni, seja
+
+_LETO = 2026
+
+
+def _izpisek(engine, st_vrstic: int) -> bytes:
+    rnd = random.Random(7)
+    db = seja(engine)
+    clani = db.query(Clan.id, Clan.priimek, Clan.ime).all()
+    db.close()
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Izpisek")
+    ws.append(["Priimek", "Ime", "Datum plačila", "Znesek", "Referenca"])
+    for _ in range(st_vrstic):
+        c = rnd.choice(clani)
+        datum = date(_LETO, rnd.randint(1, 12), rnd.randint(1, 28))
+        if rnd.random() < 0.8:
+            ws.append(["", "", datum, "25,00", f"SI00 {c.id}-{_LETO}"])
+        else:
+            ws.append([c.priimek, c.ime, datum, "25,00", ""])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _prej(vsebina: bytes, db, mapping) -> tuple[int, int]:
+    """Prejšnja logika: poizvedbe za vsako vrstico (branje vrstic že prek načrta stolpcev)."""
+    ws, headers = _load_sheet(vsebina)
+    nacrt = _nacrt_stolpcev(headers, mapping, vsebuje=("datum",))
+    uvozeni = preskoceni = 0
+    for row in ws.iter_rows(min_row=2, values_only=True):
+        ref_id = _parse_referenca(_niz(row, nacrt["referenca"]))
+        priimek_n = _niz(row, nacrt["priimek"]).title()
+        ime_n = _niz(row, nacrt["ime"]).title()
+        if not ref_id and not priimek_n and not ime_n:
+            continue
+        datum_val = _parse_datum_celice(_celica(row, nacrt["datum"]))
+        if not datum_val:
+            preskoceni += 1
+            continue
+        clan = None
+        if ref_id is not None:
+            clan = (db.query(Clan).filter(Clan.id == ref_id).first()
+                    or db.query(Clan).filter(Clan.es_stevilka == ref_id).first())
+        if not clan and priimek_n and ime_n:
+            clan = db.query(Clan).filter(Clan.priimek == priimek_n, Clan.ime == ime_n).first()
+        if not clan:
+            preskoceni += 1
+            continue
+        znesek = _niz(row, nacrt["znesek"]) or None
+        obstojece = db.query(Clanarina).filter(
+            Clanarina.clan_id == clan.id, Clanarina.leto == datum_val.year
+        ).first()
+        if obstojece:
+            obstojece.datum_placila = datum_val
+            obstojece.znesek = znesek
+        else:
+            db.add(Clanarina(clan_id=clan.id, leto=datum_val.year, datum_placila=datum_val, znesek=znesek))
+        uvozeni += 1
+    db.commit()
+    return uvozeni, preskoceni
+
+
+def _izmeri(naziv: str, fn, engine, vsebina: bytes, mapping, st_vrstic: int) -> float:
+    db = seja(engine)
+    t0 = time.perf_counter()
+    uvozeni, preskoceni = fn(vsebina, db, mapping)
+    skupaj = time.perf_counter() - t0
+    db.close()
+    print(f"{naziv:<28}{skupaj * 1000:>10.0f}{st_vrstic / skupaj:>12.0f}{uvozeni:>10}{preskoceni:>10}")
+    return skupaj
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Uvoz plačil: poizvedbe na vrstico proti paketnemu upsertu.")
+    parser.add_argument("--vrstice", type=int, default=5_000, help="Vrstic izpiska (privzeto: 5000)")
+    parser.add_argument("--clani", type=int, default=5_000, help="Število sintetičnih članov (privzeto: 5000)")
+    args = parser.parse_args()
+
+    mapping = {k: [s.strip() for s in v.split(",") if s.strip()] for k, v in UVOZ_PLACILA_STOLPCI_PRIVZETO.items()}
+    prej_engine, nov_engine = ustvari_engine(), ustvari_engine()
+    for e in (prej_engine, nov_engine):
+        napolni(e, st_clanov=args.clani)
+    vsebina = _izpisek(nov_engine, args.vrstice)
+
+    print(f"Izpisek: {args.vrstice} vrstic, baza: {args.clani} članov\n")
+    print(f"{'različica':<28}{'ms':>10}{'vrstic/s':>12}{'uvoženih':>10}{'preskoč.':>10}")
+    t_prej = _izmeri("prej: poizvedbe na vrstico", _prej, prej_engine, vsebina, mapping, args.vrstice)
+    t_nov = _izmeri("indeks + ON CONFLICT", _uvozi_placila_workbook, nov_engine, vsebina, mapping, args.vrstice)
+    print(f"\nPospešek: {t_prej / t_nov:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
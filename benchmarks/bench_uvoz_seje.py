@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Potrditev uvoza članov: ponovno branje Excela proti shranjeni seji uvoza.
+
+Prejšnja izvedba je ob predogledu shranila surovo .xlsx datoteko, potrditev
+pa jo je v celoti znova razčlenila z openpyxl (``_uvozi_workbook``). Nova
+izvedba ob predogledu shrani že prebrane vrstice (``shrani_sejo``, pickle),
+potrditev pa jih samo naloži in uvozi (``nalozi_sejo`` + ``_uvozi_clane``).
+
+Obe različici tečeta na prazni bazi v pomnilniku z istimi vrsticami; merjena
+je samo potrditev (predogled je v obeh primerih enak). Izpisani sta tudi
+velikosti shranjenih datotek.
+
+Uporaba:
+    python3 -m benchmarks.bench_uvoz_seje
+    python3 -m benchmarks.bench_uvoz_seje --vrstice 20000
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from openpyxl import Workbook
+
+from app import uvoz_seje
+from app.routers.izvoz import (
+    UVOZ_STOLPCI_PRIVZETO, _preberi_clane, _uvozi_clane, _uvozi_workbook,
+)
+from benchmarks._podatki import ustvari_engine, seja
+
+_GLAVA = ["Priimek", "Ime", "Klicni znak", "Naslov - ulica/naselje", "Naslov - pošta",
+          "Tip članstva", "Operaterski razred", "Elektronska posta", "ES številka"]
+_TIPI = ["Osebni", "Družinski", "Mladi", "Invalid", "Simpatizerji"]
+
+
+def _xlsx(st_vrstic: int) -> bytes:
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("ListaClanov")
+    ws.append(_GLAVA)
+    for i in range(1, st_vrstic + 1):
+        ws.append([f"Priimek{i}", "Ime", f"S5{i}X", f"Ulica {i}", "1000 Ljubljana",
+                   "Osebni", "A", f"clan{i}@example.org", i])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _izmeri(fn) -> tuple[float, int]:
+    db = seja(ustvari_engine())
+    t0 = time.perf_counter()
+    uvozeni, _ = fn(db)
+    skupaj = time.perf_counter() - t0
+    db.close()
+    return skupaj, uvozeni
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Potrditev uvoza: ponovno branje Excela proti seji uvoza.")
+    parser.add_argument("--vrstice", type=int, default=5_000, help="Število vrstic lista (privzeto: 5000)")
+    args = parser.parse_args()
+
+    mapping = {k: [s.strip() for s in v.split(",") if s.strip()] for k, v in UVOZ_STOLPCI_PRIVZETO.items()}
+    vsebina = _xlsx(args.vrstice)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["UVOZ_SEJE_DIR"] = tmp
+        uvoz_uuid = uvoz_seje.shrani_sejo("clani", _preberi_clane(vsebina, mapping, _TIPI))
+        velikost_seje = os.path.getsize(os.path.join(tmp, f"clani_{uvoz_uuid}.pkl"))
+
+        t_prej, n_prej = _izmeri(lambda db: _uvozi_workbook(vsebina, db, mapping))
+        t_nov, n_nov = _izmeri(lambda db: _uvozi_clane(db, uvoz_seje.nalozi_sejo("clani", uvoz_uuid)))
+    assert n_prej == n_nov == args.vrstice, "Različici uvozita različno število članov"
+
+    print(f"Uvoz: {args.vrstice} vrstic; .xlsx {len(vsebina) / 1024:.0f} KiB, seja {velikost_seje / 1024:.0f} KiB\n")
+    print(f"{'različica':<30}{'ms':>10}{'vrstic/s':>12}")
+    for naziv, t in (("prej: ponovno branje .xlsx", t_prej), ("seja uvoza (pickle)", t_nov)):
+        print(f"{naziv:<30}{t * 1000:>10.0f}{args.vrstice / t:>12.0f}")
+    print(f"\nPospešek: {t_prej / t_nov:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
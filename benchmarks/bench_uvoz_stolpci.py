@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Branje vrstic pri uvozu članov: iskanje po glavi za vsako polje proti načrtu stolpcev.
+
+Prejšnja izvedba je za vsako polje vsake vrstice znova pregledala glavo
+(``_col``: natančno ujemanje, nato regex za celo besedo) in brala celice kot
+objekte. Nova izvedba enkrat na list izračuna ``_nacrt_stolpcev`` in bere
+vrstice z ``iter_rows(values_only=True)`` ter indeksiranjem terk.
+
+Obe različici izvlečeta ista polja kot ``_uvozi_workbook`` (brez dostopa do
+baze) iz sintetičnega lista z glavo ZRS izvoza; rezultata se primerjata.
+Izpisana sta skupni čas (nalaganje + razčlenjevanje XML + izvleček) in čas
+samega izvlečka polj iz že prebranih vrstic – slednjega načrt stolpcev
+pospeši večkratno, skupni čas pa omejuje razčlenjevanje XML v openpyxl.
+
+Uporaba:
+    python3 -m benchmarks.bench_uvoz_stolpci
+    python3 -m benchmarks.bench_uvoz_stolpci --vrstice 50000
+"""
+
+import argparse
+import io
+import random
+import re
+import time
+from datetime import date, datetime
+
+from openpyxl import Workbook
+
+from app.routers.izvoz import (
+    UVOZ_STOLPCI_PRIVZETO, _load_sheet, _nacrt_stolpcev, _niz, _celica, _datum_rd,
+)
+from benchmarks._podatki import PRIIMKI, IMENA
+
+_GLAVA = [
+    "Zap. št.", "Priimek", "Ime", "Klicni znak", "Naslov - ulica/naselje", "Naslov - pošta",
+    "Tip članstva", "Klicni znak nosilci", "Operaterski razred", "Mobilni telefon",
+    "Telefon doma", "Elektronska posta", "Soglasje OP", "Izjava", "Veljavnost RD",
+    "ES številka", "Opombe",
+]
+_POLJA = [k for k in UVOZ_STOLPCI_PRIVZETO if k != "veljavnost_rd"]
+
+
+def _xlsx(st_vrstic: int) -> bytes:
+    rnd = random.Random(42)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("ListaClanov")
+    ws.append(_GLAVA)
+    for i in range(1, st_vrstic + 1):
+        ws.append([
+            i, rnd.choice(PRIIMKI), rnd.choice(IMENA), f"S5{i % 10}ABC", f"Ulica {i}", "1000 Ljubljana",
+            "Osebni", None, "A", "041 123 456", None, f"clan{i}@example.org", "DA", "DA",
+            datetime(rnd.randint(2020, 2032), 1, 1), i, "-",
+        ])
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+# --- prejšnja izvedba (iskanje po glavi za vsako celico) ---
+
+def _col(row, headers, *iskani) -> str:
+    for iskanje in iskani:
+        for i, h in enumerate(headers):
+            if h and str(h).strip().lower() == iskanje.lower():
+                v = row[i].value
+                return str(v).strip() if v is not None else ""
+    for iskanje in iskani:
+        for i, h in enumerate(headers):
+            if h:
+                h_l = str(h).strip().lower()
+                s_l = iskanje.lower()
+                if re.search(r'(?<![a-zčšž])' + re.escape(s_l) + r'(?![a-zčšž])', h_l):
+                    v = row[i].value
+                    return str(v).strip() if v is not None else ""
+    return ""
+
+
+def _parse_rd(row, headers, iskani: list[str]) -> date | None:
+    for i, h in enumerate(headers):
+        if h and any(t.lower() in str(h).strip().lower() for t in iskani):
+            v = row[i].value
+            if v:
+                return v.date() if hasattr(v, "date") else None
+            break
+    return None
+
+
+def _izvleci_prej(headers, vrstice, mapping) -> list[dict]:
+    rezultat = []
+    for row in vrstice:
+        zapis = {polje: _col(row, headers, *mapping[polje]) for polje in _POLJA}
+        zapis["veljavnost_rd"] = _parse_rd(row, headers, mapping["veljavnost_rd"])
+        rezultat.append(zapis)
+    return rezultat
+
+
+def _izvleci_nacrt(headers, vrstice, mapping) -> list[dict]:
+    nacrt = _nacrt_stolpcev(headers, mapping, vsebuje=("veljavnost_rd",))
+    indeksi = [(polje, nacrt[polje]) for polje in _POLJA]
+    i_rd = nacrt["veljavnost_rd"]
+    rezultat = []
+    for row in vrstice:
+        zapis = {polje: _niz(row, i) for polje, i in indeksi}
+        zapis["veljavnost_rd"] = _datum_rd(_celica(row, i_rd))
+        rezultat.append(zapis)
+    return rezultat
+
+
+def _prej(vsebina: bytes, mapping) -> list[dict]:
+    ws, headers = _load_sheet(vsebina)
+    return _izvleci_prej(headers, ws.iter_rows(min_row=2), mapping)
+
+
+def _nacrt(vsebina: bytes, mapping) -> list[dict]:
+    ws, headers = _load_sheet(vsebina)
+    return _izvleci_nacrt(headers, ws.iter_rows(min_row=2, values_only=True), mapping)
+
+
+def _cas(fn, *args) -> tuple[float, list]:
+    t0 = time.perf_counter()
+    rezultat = fn(*args)
+    return time.perf_counter() - t0, rezultat
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Načrt stolpcev proti iskanju po glavi za vsako celico.")
+    parser.add_argument("--vrstice", type=int, default=20_000, help="Število vrstic lista (privzeto: 20000)")
+    args = parser.parse_args()
+
+    mapping = {k: [s.strip() for s in v.split(",") if s.strip()] for k, v in UVOZ_STOLPCI_PRIVZETO.items()}
+    vsebina = _xlsx(args.vrstice)
+
+    print(f"List: {args.vrstice} vrstic × {len(_GLAVA)} stolpcev, {len(vsebina) / 2**20:.1f} MiB\n")
+    ws, headers = _load_sheet(vsebina)
+    celice = list(ws.iter_rows(min_row=2))
+    ws, headers = _load_sheet(vsebina)
+    vrednosti = list(ws.iter_rows(min_row=2, values_only=True))
+
+    t_prej, r_prej = _cas(_prej, vsebina, mapping)
+    t_nacrt, r_nacrt = _cas(_nacrt, vsebina, mapping)
+    i_prej, ri_prej = _cas(_izvleci_prej, headers, celice, mapping)
+    i_nacrt, ri_nacrt = _cas(_izvleci_nacrt, headers, vrednosti, mapping)
+    assert r_prej == r_nacrt == ri_prej == ri_nacrt, "Različici vrneta različne podatke"
+
+    print(f"{'različica':<26}{'skupaj ms':>12}{'vrstic/s':>12}{'izvleček ms':>14}{'vrstic/s':>12}")
+    for naziv, t, i in (("prej: _col na celico", t_prej, i_prej), ("načrt stolpcev", t_nacrt, i_nacrt)):
+        print(f"{naziv:<26}{t * 1000:>12.0f}{args.vrstice / t:>12.0f}{i * 1000:>14.0f}{args.vrstice / i:>12.0f}")
+    print(f"\nPospešek: skupaj {t_prej / t_nacrt:.1f}×, izvleček polj {i_prej / i_nacrt:.1f}×")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Obremenitveni test: latenca /clani med tekočim /izvoz/backup-excel.
+
+Aplikacijo kliče v istem procesu prek httpx ASGITransport (en event loop, kot
+uvicorn). Najprej izmeri latenco sočasnih /clani zahtev brez obremenitve, nato
+še med izvajanjem backup-excel izvoza. Če bi handlerji blokirali event loop, bi
+se latenca /clani med izvozom povzpela na trajanje izvoza.
+
+Uporaba:
+    python3 -m benchmarks.load_backup_excel
+    python3 -m benchmarks.load_backup_excel --clani 10000 --socasno 8 --zahtev 3
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from app.auth import hash_geslo
+from app.database import get_db
+from app.main import app
+from app.models import Uporabnik
+from benchmarks._podatki import ustvari_engine, napolni, seja
+
+GESLO = "Veljavno1234!ab"
+
+
+async def _prijava(client: httpx.AsyncClient) -> None:
+    resp = await client.get("/login")
+    csrf = re.search(r'name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+    await client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "bench", "geslo": GESLO})
+
+
+async def _obremeni_clani(client: httpx.AsyncClient, socasno: int, zahtev: int,
+                         dokler: asyncio.Task | None = None) -> list[float]:
+    """Sočasni odjemalci /clani; z ``dokler`` nadaljujejo, dokler naloga ni končana."""
+    casi: list[float] = []
+
+    async def delavec():
+        n = 0
+        while n < zahtev or (dokler is not None and not dokler.done()):
+            t0 = time.perf_counter()
+            resp = await client.get("/clani?aktiven=")
+            resp.raise_for_status()
+            casi.append((time.perf_counter() - t0) * 1000)
+            n += 1
+
+    await asyncio.gather(*[delavec() for _ in range(socasno)])
+    return casi
+
+
+def _povzetek(naziv: str, casi: list[float]) -> None:
+    casi = sorted(casi)
+    p95 = casi[max(int(len(casi) * 0.95) - 1, 0)]
+    print(f"{naziv:<34}{len(casi):>6}{statistics.median(casi):>10.1f}{p95:>10.1f}{casi[-1]:>10.1f}")
+
+
+async def _zazeni(args) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await _prijava(client)
+        await _obremeni_clani(client, 1, 2)  # ogrevanje
+
+        print(f"{'scenarij':<34}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+        _povzetek("/clani brez obremenitve", await _obremeni_clani(client, args.socasno, args.zahtev))
+
+        async def backup():
+            t0 = time.perf_counter()
+            resp = await client.get("/izvoz/backup-excel")
+            resp.raise_for_status()
+            return (time.perf_counter() - t0) * 1000, len(resp.content)
+
+        async def backup_z_zamikom():
+            await asyncio.sleep(0.2)  # odjemalci /clani že tečejo, ko se izvoz začne
+            return await backup()
+
+        naloga = asyncio.create_task(backup_z_zamikom())
+        casi = await _obremeni_clani(client, args.socasno, args.zahtev, dokler=naloga)
+        trajanje, velikost = await naloga
+        _povzetek("/clani med backup-excel", casi)
+        print(f"\nbackup-excel: {trajanje:.0f} ms, {velikost / 1024:.0f} KiB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Latenca /clani med tekočim backup-excel izvozom.")
+    parser.add_argument("--clani", type=int, default=5_000, help="Število sintetičnih članov (privzeto: 5000)")
+    parser.add_argument("--socasno", type=int, default=8, help="Število sočasnih odjemalcev (privzeto: 8)")
+    parser.add_argument("--zahtev", type=int, default=10, help="Zahtev na odjemalca (privzeto: 10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = ustvari_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        napolni(engine, st_clanov=args.clani)
+        db = seja(engine)
+        db.add(Uporabnik(uporabnisko_ime="bench", geslo_hash=hash_geslo(GESLO), vloga="admin", aktiven=True))
+        db.commit()
+        db.close()
+
+        def override_get_db():
+            s = seja(engine)
+            try:
+                yield s
+            finally:
+                s.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            asyncio.run(_zazeni(args))
+        finally:
+            app.dependency_overrides.clear()
+            engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
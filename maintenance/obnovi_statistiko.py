@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Obnova materializirane statistike (statistika_leto, statistika_tip) in
+številskih zneskov članarin (clanarine.znesek_centi).
+
+Tabeli sproti vzdržujejo pisalne poti aplikacije; ob prvem zagonu po
+migraciji 014 ju aplikacija napolni sama. Skripta ju znova izračuna iz
+članov, članarin in aktivnosti – po ročnem posegu v bazo (SQL, obnova
+iz backupa) ali če pregled plačil ne ustreza podatkom. Pred tem znova
+izračuna clanarine.znesek_centi iz besedilnega zneska in izpiše neberljive
+zneske (id in vrednost) za ročni popravek.
+
+Uporaba:
+    python3 maintenance/obnovi_statistiko.py
+    python3 maintenance/obnovi_statistiko.py --db /pot/do/baze.db
+
+Okoljska spremenljivka DATABASE_URL (privzeto: sqlite:///./data/clanstvo.db).
+
+Izhodni kodi:
+    0 – uspeh
+    1 – napaka (manjkajoča baza, napaka baze)
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.exc import SQLAlchemyError  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.statistika import normaliziraj_zneske, obnovi_statistiko  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Obnova materializirane statistike (statistika_leto, statistika_tip).",
+    )
+    parser.add_argument(
+        "--db",
+        default=None,
+        metavar="POT",
+        help="Pot do SQLite datoteke (privzeto: DATABASE_URL ali data/clanstvo.db)",
+    )
+    args = parser.parse_args()
+
+    if args.db:
+        if not Path(args.db).exists():
+            print(f"NAPAKA: Datoteka baze ne obstaja: {args.db}", file=sys.stderr)
+            return 1
+        database_url = f"sqlite:///{args.db}"
+    else:
+        database_url = os.getenv("DATABASE_URL", "sqlite:///./data/clanstvo.db")
+
+    engine = create_engine(database_url)
+    try:
+        with Session(engine) as db:
+            neberljivi = normaliziraj_zneske(db)
+            let = obnovi_statistiko(db)
+            db.commit()
+    except SQLAlchemyError as e:
+        print(f"NAPAKA: {e}", file=sys.stderr)
+        return 1
+    finally:
+        engine.dispose()
+    for clanarina_id, znesek in neberljivi:
+        print(f"OPOZORILO: članarina id={clanarina_id}: neberljiv znesek {znesek!r}", file=sys.stderr)
+    print(f"Statistika obnovljena ({let} let, neberljivih zneskov: {len(neberljivi)}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,17 @@ from fastapi.testclient import TestClient
 
 from app.models import Base
 from app.database import get_db
+from app.fragmenti_clana import izprazni_fragmente
+from app.omejitev_prijav import izprazni_omejitev
 from app.main import app
 
 
+@pytest.fixture(autouse=True)
+def _seje_uvoza_v_tmp(tmp_path, monkeypatch):
+    """Seje uvoza (pickle) gredo v začasno mapo testa, ne v data/tmp delovne kopije."""
+    monkeypatch.setenv("UVOZ_SEJE_DIR", str(tmp_path / "seje_uvoza"))
+
+
 @pytest.fixture(scope="function")
 def engine():
     e = create_engine(
@@ -41,6 +49,12 @@ def client(engine):
             s.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    # Vsak test ima novo bazo z istimi id-ji in verzijami članov
+    izprazni_fragmente()
     with TestClient(app, raise_server_exceptions=True) as c:
+        # lifespan naloži neuspele prijave iz data/; števec omejitve je za vsak test prazen,
+        # neuspele prijave testov pa se ob zaustavitvi ne zapišejo v data/
+        izprazni_omejitev()
         yield c
+        izprazni_omejitev()
     app.dependency_overrides.clear()
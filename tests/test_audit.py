@@ -24,3 +24,60 @@ def test_log_akcija_napaka_ne_propagira(db):
     db.commit = MagicMock(side_effect=Exception("DB napaka"))
     # Ne sme vreči exception
     log_akcija(db, "admin", "test_napaka")
+
+
+# ---------------------------------------------------------------------------
+# Paketni pisalnik
+# ---------------------------------------------------------------------------
+
+def test_pisalnik_zapise_paket_ob_izpraznitvi(engine, db):
+    from app.audit_log import AuditPisalnik
+
+    p = AuditPisalnik(engine, paket=1000, interval_ms=60_000)
+    p.zazeni()
+    try:
+        for i in range(25):
+            assert p.dodaj("admin", "paket_test", f"vnos {i}", "10.0.0.1")
+        assert db.query(AuditLog).filter(AuditLog.akcija == "paket_test").count() == 0
+        assert p.izprazni()
+        assert db.query(AuditLog).filter(AuditLog.akcija == "paket_test").count() == 25
+        m = p.metrike()
+        assert m["zapisani"] == 25 and m["paketi"] == 1 and m["izpusceni"] == 0
+    finally:
+        p.ustavi()
+
+
+def test_pisalnik_zapise_ob_polnem_paketu_in_ustavitvi(engine, db):
+    from app.audit_log import AuditPisalnik
+
+    p = AuditPisalnik(engine, paket=10, interval_ms=60_000)
+    p.zazeni()
+    for i in range(23):
+        p.dodaj(None, "paket_poln", None, None)
+    p.ustavi()
+    assert db.query(AuditLog).filter(AuditLog.akcija == "paket_poln").count() == 23
+    assert p.metrike()["paketi"] == 3
+
+
+def test_pisalnik_polna_vrsta_zavrze_in_steje(engine):
+    from app.audit_log import AuditPisalnik
+
+    # Nit ne teče → vrsta se ne prazni
+    p = AuditPisalnik(engine, velikost_vrste=3, cakanje_ms=10)
+    rezultati = [p.dodaj("admin", "poln", None, None) for _ in range(5)]
+    assert rezultati == [True, True, True, False, False]
+    m = p.metrike()
+    assert m["izpusceni"] == 2 and m["cakanja"] == 2 and m["v_vrsti"] == 3
+
+
+def test_log_akcija_uporabi_pisalnik_za_njegov_engine(engine, db):
+    import app.audit_log as audit_log
+
+    p = audit_log.zazeni_pisalnik(engine)
+    try:
+        log_akcija(db, "admin", "v_vrsto", "opis")
+        assert p.metrike()["sprejeti"] == 1
+        audit_log.izprazni_audit()
+        assert db.query(AuditLog).filter(AuditLog.akcija == "v_vrsto").one().opis == "opis"
+    finally:
+        audit_log.ustavi_pisalnik()
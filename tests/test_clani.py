@@ -2,6 +2,7 @@
 import re
 
 from app.auth import hash_geslo
+from app.fragmenti_clana import CSRF_OZNAKA, fragmenti_metrike
 from app.models import Uporabnik, Clan
 
 
@@ -58,3 +59,165 @@ def test_iskanje_po_klicnem_znaku(client, db):
 def test_iskanje_brez_seje(client, db):
     resp = client.get("/clani/iskanje?q=Jan", follow_redirects=False)
     assert resp.status_code in (302, 401)
+
+
+# ---------------------------------------------------------------------------
+# Testi za /clani/podatki (DataTables serverSide)
+# ---------------------------------------------------------------------------
+
+def test_podatki_stranjenje_in_stevci(client, db):
+    _login(client, db)
+    db.add_all([
+        Clan(priimek=f"Priimek{i:02d}", ime="Test", tip_clanstva="Osebni", aktiven=True)
+        for i in range(30)
+    ])
+    db.add(Clan(priimek="Neaktiven", ime="Test", tip_clanstva="Osebni", aktiven=False))
+    db.commit()
+    resp = client.get("/clani/podatki?draw=3&start=25&length=25&aktiven=da")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["draw"] == 3
+    assert data["recordsTotal"] == 30
+    assert data["recordsFiltered"] == 30
+    assert len(data["data"]) == 5
+    assert "Priimek25" in data["data"][0][0]
+
+
+def test_podatki_sortiranje_in_iskanje(client, db):
+    _login(client, db)
+    db.add_all([
+        Clan(priimek="Novak", ime="Janez", klicni_znak="S51AA", tip_clanstva="Osebni", aktiven=True),
+        Clan(priimek="Kos", ime="Ana", klicni_znak="S52BB", tip_clanstva="Osebni", aktiven=True),
+        Clan(priimek="Zupan", ime="Miha", tip_clanstva="Osebni", aktiven=True),
+    ])
+    db.commit()
+    resp = client.get("/clani/podatki?order[0][column]=0&order[0][dir]=desc")
+    imena = [vrstica[0] for vrstica in resp.json()["data"]]
+    assert "Zupan" in imena[0] and "Kos" in imena[-1]
+
+    resp = client.get("/clani/podatki?search[value]=S52")
+    data = resp.json()
+    assert data["recordsTotal"] == 3
+    assert data["recordsFiltered"] == 1
+    assert "Kos" in data["data"][0][0]
+
+
+def test_podatki_filter_placal(client, db):
+    from datetime import date
+    from app.models import Clanarina
+    _login(client, db)
+    placnik = Clan(priimek="Placnik", ime="Test", tip_clanstva="Osebni", aktiven=True)
+    neplacnik = Clan(priimek="Neplacnik", ime="Test", tip_clanstva="Osebni", aktiven=True)
+    db.add_all([placnik, neplacnik])
+    db.commit()
+    db.add(Clanarina(clan_id=placnik.id, leto=2024, datum_placila=date(2024, 3, 1)))
+    db.add(Clanarina(clan_id=neplacnik.id, leto=2024, datum_placila=None))
+    db.commit()
+
+    data = client.get("/clani/podatki?placal=da&leto_placila=2024").json()
+    assert data["recordsTotal"] == 1
+    assert "Placnik" in data["data"][0][0]
+    assert "bi-check-circle-fill" in data["data"][0][5]
+
+    data = client.get("/clani/podatki?placal=ne&leto_placila=2024").json()
+    assert data["recordsTotal"] == 1
+    assert "Neplacnik" in data["data"][0][0]
+    assert "/upn/" in data["data"][0][6]
+
+
+def test_podatki_brez_seje(client, db):
+    resp = client.get("/clani/podatki", follow_redirects=False)
+    assert resp.status_code == 401
+
+
+def test_filtriraj_clane_placal_exists(db):
+    from datetime import date
+    from app.models import Clanarina
+    from app.routers.clani import _filtriraj_clane
+    placnik = Clan(priimek="Placnik", ime="A", tip_clanstva="Osebni", aktiven=True)
+    brez_datuma = Clan(priimek="BrezDatuma", ime="B", tip_clanstva="Osebni", aktiven=True)
+    lani = Clan(priimek="Lani", ime="C", tip_clanstva="Osebni", aktiven=True)
+    db.add_all([placnik, brez_datuma, lani])
+    db.commit()
+    db.add_all([
+        Clanarina(clan_id=placnik.id, leto=2025, datum_placila=date(2025, 2, 1)),
+        Clanarina(clan_id=brez_datuma.id, leto=2025, datum_placila=None),
+        Clanarina(clan_id=lani.id, leto=2024, datum_placila=date(2024, 2, 1)),
+    ])
+    db.commit()
+    assert [c.priimek for c in _filtriraj_clane(db, placal="da", leto=2025)] == ["Placnik"]
+    assert [c.priimek for c in _filtriraj_clane(db, placal="ne", leto=2025)] == ["BrezDatuma", "Lani"]
+    assert len(_filtriraj_clane(db)) == 3
+
+
+# ---------------------------------------------------------------------------
+# FTS5 iskanje (clani_fts)
+# ---------------------------------------------------------------------------
+
+def test_iskanje_brez_sumnikov(client, db):
+    _login(client, db)
+    db.add(Clan(priimek="Šuštar", ime="Žiga", tip_clanstva="Osebni", aktiven=True))
+    db.commit()
+    resp = client.get("/clani/iskanje?q=sustar zig")
+    assert [r["priimek"] for r in resp.json()] == ["Šuštar"]
+
+
+def test_iskanje_po_emailu_in_rangiranje(client, db):
+    _login(client, db)
+    db.add_all([
+        Clan(priimek="Kranjc", ime="Ana", tip_clanstva="Osebni", aktiven=True,
+             opombe="Sestra od Novak"),
+        Clan(priimek="Novak", ime="Peter", tip_clanstva="Osebni", aktiven=True,
+             elektronska_posta="peter@radio.si"),
+    ])
+    db.commit()
+    assert client.get("/clani/iskanje?q=radio.si").json()[0]["priimek"] == "Novak"
+    # Ujemanje v priimku ima prednost pred ujemanjem v opombah
+    assert [r["priimek"] for r in client.get("/clani/iskanje?q=novak").json()] == ["Novak", "Kranjc"]
+
+
+def test_fts_indeks_sledi_spremembam(db):
+    from app.routers.clani import _filtriraj_clane
+    c = Clan(priimek="Potočnik", ime="Luka", tip_clanstva="Osebni", aktiven=True)
+    db.add(c)
+    db.commit()
+    assert len(_filtriraj_clane(db, q="potoc")) == 1
+    c.priimek = "Golob"
+    db.commit()
+    assert _filtriraj_clane(db, q="potoc") == []
+    assert len(_filtriraj_clane(db, q="golob")) == 1
+    db.delete(c)
+    db.commit()
+    assert _filtriraj_clane(db, q="golob") == []
+
+
+# ---------------------------------------------------------------------------
+# Testi za /clani/{id} – predpomnjeni deli strani
+# ---------------------------------------------------------------------------
+
+def test_detail_fragmenti_in_razveljavitev(client, db):
+    """Drugi ogled vzame bralne dele iz predpomnilnika; pisalna pot poveča verzijo člana."""
+    _login(client, db)
+    c = Clan(priimek="Novak", ime="Janez", tip_clanstva="Osebni", aktiven=True)
+    db.add(c)
+    db.commit()
+
+    prva = client.get(f"/clani/{c.id}").text
+    pred = fragmenti_metrike()
+    druga = client.get(f"/clani/{c.id}").text
+    po = fragmenti_metrike()
+    assert druga == prva
+    assert po["zadetki"] - pred["zadetki"] == 4 and po["izrisi"] == pred["izrisi"]
+    # Oznaka v predpomnjenem HTML se zamenja z žetonom seje
+    zetoni = set(re.findall(r'name="csrf_token" value="([^"]+)"', druga))
+    assert len(zetoni) == 1 and CSRF_OZNAKA not in druga
+
+    token = zetoni.pop()
+    client.post("/clanarine/dodaj", data={"csrf_token": token, "clan_id": c.id, "leto": 2025,
+                                          "datum_placila": "2025-03-01", "znesek": "25"})
+    client.post("/aktivnosti/dodaj", data={"csrf_token": token, "clan_id": c.id, "leto": 2025,
+                                           "opis": "Tekmovanje ARG"})
+    db.expire_all()
+    assert db.get(Clan, c.id).verzija == 2
+    stran = client.get(f"/clani/{c.id}").text
+    assert "01. 03. 2025" in stran and "Tekmovanje ARG" in stran
@@ -1,4 +1,10 @@
-from app.config import get_nastavitev, get_seznam, get_tipi_clanstva
+from sqlalchemy import event
+
+from app.config import (
+    get_nastavitev, get_seznam, get_tipi_clanstva, get_clanarina_zneski,
+    shrani_nastavitve, verzija_nastavitev, invalidiraj_nastavitve, nastavitve_iz_predpomnilnika,
+    nastavitve_slovar,
+)
 from app.models import Nastavitev, TIPI_CLANSTVA_PRIVZETO
 
 
@@ -22,3 +28,58 @@ def test_get_seznam_iz_baze(db):
 def test_get_tipi_clanstva_privzeti(db):
     result = get_tipi_clanstva(db)
     assert result == TIPI_CLANSTVA_PRIVZETO
+
+
+def _stej_poizvedbe(engine):
+    stevec = {"n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _stej(*args):
+        stevec["n"] += 1
+
+    return stevec
+
+
+def test_nastavitve_iz_predpomnilnika(engine, db):
+    db.add(Nastavitev(kljuc="klub_iban", vrednost="SI56 0000"))
+    db.add(Nastavitev(kljuc="clanarina_zneski", vrednost="Redno=25.00"))
+    db.commit()
+    get_nastavitev(db, "klub_iban")
+    stevec = _stej_poizvedbe(engine)
+    for _ in range(5):
+        assert get_nastavitev(db, "klub_iban") == "SI56 0000"
+        assert get_clanarina_zneski(db) == {"Redno": 25.0}
+        assert get_tipi_clanstva(db) == TIPI_CLANSTVA_PRIVZETO
+    assert stevec["n"] == 0
+
+
+def test_shrani_nastavitve_razveljavi_predpomnilnik(db):
+    db.add(Nastavitev(kljuc="klub_ime", vrednost="Stari klub"))
+    db.commit()
+    assert get_nastavitev(db, "klub_ime") == "Stari klub"
+    verzija = verzija_nastavitev()
+    shrani_nastavitve(db, {"klub_ime": "Novi klub", "klub_oznaka": "S59X"})
+    assert verzija_nastavitev() > verzija
+    assert get_nastavitev(db, "klub_ime") == "Novi klub"
+    assert get_nastavitev(db, "klub_oznaka") == "S59X"
+
+
+def test_rollback_ne_razveljavi(db):
+    get_nastavitev(db, "klub_ime")
+    verzija = verzija_nastavitev()
+    db.add(Nastavitev(kljuc="klub_ime", vrednost="Nepotrjeno"))
+    db.flush()
+    db.rollback()
+    assert verzija_nastavitev() == verzija
+    assert get_nastavitev(db, "klub_ime", "x") == "x"
+
+
+def test_posnetek_starejsi_od_spremembe_se_ne_shrani(engine, db):
+    """Seja, katere transakcija je začela pred spremembo nastavitev, ne napolni predpomnilnika."""
+    db.query(Nastavitev).all()
+    invalidiraj_nastavitve()  # commit druge seje/procesa med transakcijo
+    nastavitve_slovar(db)
+    assert nastavitve_iz_predpomnilnika(engine) is None
+    db.commit()
+    nastavitve_slovar(db)
+    assert nastavitve_iz_predpomnilnika(engine) is not None
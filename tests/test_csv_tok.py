@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+
+from app.csv_tok import csv_tok, jsonl_tok, zip_tok
+from app.xlsx_tok import List
+
+
+def test_csv_in_jsonl_vrednosti():
+    vrstice = [[1, 'Šušteršič, "Ana"', None, 2.5, date(2024, 1, 2)],
+               [2, "vrstica\nz novo", "", Decimal("25.00"), datetime(2024, 1, 2, 3, 4, 5)]]
+    glava = ["ID", "Ime", "Prazno", "Znesek", "Datum"]
+
+    besedilo = b"".join(csv_tok(List("t", vrstice, glava=glava))).decode("utf-8")
+    assert besedilo.startswith("\ufeff")
+    vrstice_csv = list(csv.reader(io.StringIO(besedilo[1:])))
+    assert vrstice_csv[0] == glava
+    assert vrstice_csv[1] == ["1", 'Šušteršič, "Ana"', "", "2.5", "2024-01-02"]
+    assert vrstice_csv[2][1] == "vrstica\nz novo"
+
+    objekti = [json.loads(v) for v in b"".join(jsonl_tok(List("t", vrstice, glava=glava))).splitlines()]
+    assert objekti[0] == {"ID": 1, "Ime": 'Šušteršič, "Ana"', "Prazno": None, "Znesek": 2.5,
+                          "Datum": "2024-01-02"}
+    assert objekti[1]["Znesek"] == "25.00" and objekti[1]["Datum"] == "2024-01-02T03:04:05"
+
+
+def test_csv_nevtralizira_formule():
+    """Z brez_formul besedilo, ki se začne z =, +, -, @, tabulatorjem ali CR, dobi predpono '; števila ostanejo."""
+    vrstice = [["=HYPERLINK(\"http://x\")", "+386 1 234", "-2+3", "@SUM(A1)", "\tx", "\rx", "a=b", -5, ""]]
+    besedilo = b"".join(csv_tok(List("t", vrstice), brez_formul=True)).decode("utf-8-sig")
+    assert next(csv.reader(io.StringIO(besedilo))) == [
+        "'=HYPERLINK(\"http://x\")", "'+386 1 234", "'-2+3", "'@SUM(A1)", "'\tx", "'\rx", "a=b", "-5", ""]
+    besedilo = b"".join(csv_tok(List("t", vrstice))).decode("utf-8-sig")
+    assert next(csv.reader(io.StringIO(besedilo))) == [str(v) for v in vrstice[0]]
+
+
+def test_zip_pretakanje_po_kosih():
+    """Prvi kos zipa pride, preden je prebrana zadnja vrstica; arhiv je na koncu veljaven."""
+    prebrano = []
+
+    def vrstice():
+        for i in range(50_000):
+            prebrano.append(i)
+            yield [i, f"vrstica {i}"]
+
+    tok = zip_tok([
+        ("veliko.csv", csv_tok(List("veliko", vrstice(), glava=["i", "besedilo"]))),
+        ("prazno.jsonl", jsonl_tok(List("prazno", [], glava=["x"]))),
+    ])
+    prvi = next(tok)
+    assert len(prebrano) < 50_000
+    zf = zipfile.ZipFile(io.BytesIO(prvi + b"".join(tok)))
+    assert zf.namelist() == ["veliko.csv", "prazno.jsonl"]
+    assert zf.read("veliko.csv").decode("utf-8-sig").count("\r\n") == 50_001
+    assert zf.read("prazno.jsonl") == b""
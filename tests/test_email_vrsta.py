@@ -0,0 +1,148 @@
+"""Testi za skupinsko pošiljanje v ozadju (email_outbox, ponovni poskusi, nadaljevanje, napredek)."""
+import re
+import smtplib
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import email_vrsta
+from app.smtp_bazen import zapri_smtp_povezave
+from app.auth import hash_geslo
+from app.models import Base, Uporabnik, Clan, EmailPredloga, EmailOpravilo, EmailOutbox, Nastavitev
+
+
+@pytest.fixture(autouse=True)
+def _prazen_bazen():
+    """Povezave iz bazena prejšnjega testa (mocki) se ne smejo ponovno uporabiti."""
+    zapri_smtp_povezave()
+    yield
+    zapri_smtp_povezave()
+
+
+def _login(client, db) -> str:
+    db.add(Uporabnik(uporabnisko_ime="testuser", geslo_hash=hash_geslo("Veljavno1234!ab"),
+                     vloga="admin", ime_priimek="Test User", aktiven=True))
+    db.commit()
+    resp = client.get("/login")
+    csrf = re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+    client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "testuser",
+                                "geslo": "Veljavno1234!ab"}, follow_redirects=False)
+    resp = client.get("/obvestila/posli")
+    return re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+
+
+def _pripravi(db, emaili=("ana@test.si", "bor@test.si", None)) -> EmailPredloga:
+    for i, email in enumerate(emaili):
+        db.add(Clan(priimek=f"Priimek{i}", ime="Ime", tip_clanstva="Osebni", aktiven=True,
+                    elektronska_posta=email))
+    for kljuc, vrednost in [("smtp_host", "smtp.test.si"), ("smtp_port", "587"), ("smtp_nacin", "plain"),
+                            ("smtp_od", "klub@test.si"), ("smtp_uporabnik", ""), ("smtp_geslo", "")]:
+        db.add(Nastavitev(kljuc=kljuc, vrednost=vrednost))
+    predloga = EmailPredloga(naziv="Test", zadeva="Zadeva {{ leto }}", telo_html="<p>{{ priimek }}</p>",
+                             je_privzeta=False, created_at=datetime.now(timezone.utc))
+    db.add(predloga)
+    db.commit()
+    return predloga
+
+
+def _opravilo(db, predloga) -> EmailOpravilo:
+    clani = db.query(Clan).order_by(Clan.id).all()
+    return email_vrsta.ustvari_opravilo(db, "testuser", predloga, predloga.zadeva, predloga.telo_html,
+                                        2026, "vsi", clani)
+
+
+def _stanja(db, opravilo_id) -> list[str]:
+    db.expire_all()
+    return [v.stanje for v in db.query(EmailOutbox).filter_by(opravilo_id=opravilo_id).order_by(EmailOutbox.id)]
+
+
+def test_stanje_po_prejemniku_in_napredek(client, db):
+    """Zahteva ustvari opravilo in preusmeri na stran z napredkom; JSON vrne števce po stanjih."""
+    token = _login(client, db)
+    predloga = _pripravi(db)
+    with patch("app.smtp_bazen.smtplib.SMTP") as smtp_cls:
+        resp = client.post("/obvestila/posli", data={
+            "csrf_token": token, "predloga_id": predloga.id, "zadeva": "Z", "telo_html": "<p>T</p>",
+            "leto": "2026", "clan_id": "", "bulk_filter": "vsi_aktivni",
+        }, follow_redirects=False)
+    assert resp.status_code == 302
+    assert re.fullmatch(r"/obvestila/opravila/\d+", resp.headers["location"])
+    assert smtp_cls.return_value.__enter__.return_value.send_message.call_count == 2
+
+    opravilo = db.query(EmailOpravilo).one()
+    assert opravilo.stanje == "koncano"
+    assert _stanja(db, opravilo.id) == ["poslano", "poslano", "preskoceno"]
+
+    stran = client.get(resp.headers["location"])
+    assert stran.status_code == 200 and "Ni e-poštnega naslova" in stran.text
+    napredek = client.get(f"/obvestila/opravila/{opravilo.id}/napredek").json()
+    assert napredek == {"id": opravilo.id, "stanje": "koncano", "sporocilo": None, "skupaj": 3,
+                        "koncano": True, "caka": 0, "poslano": 2, "napaka": 0, "preskoceno": 1}
+    assert client.get("/obvestila/opravila/999/napredek").status_code == 404
+
+
+def test_ponovni_poskus_z_odmikom(db):
+    """Neuspešno pošiljanje dobi naslednji_poskus z eksponentnim odmikom; po N poskusih ostane napaka."""
+    predloga = _pripravi(db, emaili=("ana@test.si", "bor@test.si"))
+    opravilo = _opravilo(db, predloga)
+    with patch("app.smtp_bazen.smtplib.SMTP") as smtp_cls:
+        smtp_cls.return_value.__enter__.return_value.send_message.side_effect = [
+            smtplib.SMTPRecipientsRefused({}), None,
+        ]
+        assert email_vrsta.obdelaj_opravilo(db, opravilo.id, poskusi=2, odmik_s=60) is False
+    assert _stanja(db, opravilo.id) == ["caka", "poslano"]
+    vrstica = db.query(EmailOutbox).filter_by(opravilo_id=opravilo.id, stanje="caka").one()
+    assert vrstica.poskusi == 1
+    zdaj = datetime.now(timezone.utc).replace(tzinfo=None)  # SQLite vrne naiven UTC čas
+    assert 55 < (vrstica.naslednji_poskus - zdaj).total_seconds() <= 60
+
+    # Odmik še ni potekel: nič se ne pošlje
+    with patch("app.smtp_bazen.smtplib.SMTP") as smtp_cls:
+        assert email_vrsta.obdelaj_opravilo(db, opravilo.id, poskusi=2) is False
+        assert smtp_cls.return_value.__enter__.return_value.send_message.call_count == 0
+
+    vrstica.naslednji_poskus = None
+    db.commit()
+    with patch("app.smtp_bazen.smtplib.SMTP") as smtp_cls:
+        smtp_cls.return_value.__enter__.return_value.send_message.side_effect = smtplib.SMTPDataError(554, "x")
+        assert email_vrsta.obdelaj_opravilo(db, opravilo.id, poskusi=2) is True
+    assert _stanja(db, opravilo.id) == ["napaka", "poslano"]
+    assert db.get(EmailOpravilo, opravilo.id).stanje == "koncano"
+
+
+def test_delavec_nadaljuje_prekinjeno_opravilo(tmp_path):
+    """Opravilo 'v_teku' (zaustavitev sredi pošiljanja) delavec ob zagonu prevzame in dokonča."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'vrsta.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Seja = sessionmaker(bind=engine)
+    with Seja() as db:
+        opravilo = _opravilo(db, _pripravi(db, emaili=("ana@test.si", "bor@test.si", "eva@test.si")))
+        prva = db.query(EmailOutbox).filter_by(opravilo_id=opravilo.id).order_by(EmailOutbox.id).first()
+        prva.stanje = "poslano"
+        opravilo.stanje = "v_teku"
+        db.commit()
+        opravilo_id = opravilo.id
+
+    delavec = email_vrsta.EmailDelavec(engine, niti=2, interval_s=0.05)
+    with patch("app.smtp_bazen.smtplib.SMTP") as smtp_cls:
+        smtp_cls.return_value.__enter__.return_value = MagicMock()
+        delavec.zazeni()
+        try:
+            rok = time.monotonic() + 10
+            while time.monotonic() < rok:
+                with Seja() as db:
+                    if db.get(EmailOpravilo, opravilo_id).stanje == "koncano":
+                        break
+                time.sleep(0.05)
+        finally:
+            delavec.ustavi()
+        # Že poslanemu prejemniku se sporočilo ne pošlje znova
+        assert smtp_cls.return_value.__enter__.return_value.send_message.call_count == 2
+    with Seja() as db:
+        assert _stanja(db, opravilo_id) == ["poslano", "poslano", "poslano"]
+        assert db.get(EmailOpravilo, opravilo_id).koncano is not None
+    engine.dispose()
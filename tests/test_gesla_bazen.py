@@ -0,0 +1,75 @@
+"""Testi za bazen gesel (omejen bcrypt, 503 ob polni vrsti), kalibracijo cene in preračun hashev."""
+import re
+import threading
+import time
+
+import bcrypt
+import pytest
+
+from app import main
+from app.gesla_bazen import GeslaBazen, BazenZaseden, izberi_cost, bcrypt_cost, potrebuje_nov_hash
+from app.models import Uporabnik
+
+
+def test_polna_vrsta_vrze_bazen_zaseden():
+    """Hkrati največ niti + vrsta izračunov; naslednji je takoj zavrnjen."""
+    bazen = GeslaBazen(niti=1, vrsta=1)
+    sprosti = threading.Event()
+    rezultati: list = []
+    niti = [threading.Thread(target=lambda: rezultati.append(bazen.izvedi(sprosti.wait, 5))) for _ in range(2)]
+    for nit in niti:
+        nit.start()
+    rok = time.monotonic() + 5
+    while bazen.metrike()["v_teku"] < 2 and time.monotonic() < rok:
+        time.sleep(0.01)
+
+    with pytest.raises(BazenZaseden):
+        bazen.izvedi(lambda: None)
+    sprosti.set()
+    for nit in niti:
+        nit.join(5)
+    assert rezultati == [True, True]
+    assert bazen.izvedi(lambda x: x + 1, 1) == 2
+    m = bazen.metrike()
+    assert (m["zavrnjeni"], m["izracuni"], m["najvec_hkrati"], m["v_teku"]) == (1, 3, 2, 0)
+
+
+def test_izberi_cost():
+    """Vsaka stopnja podvoji čas; meja navzdol je 12, navzgor 16."""
+    assert izberi_cost(0.010, cilj_ms=250) == 14      # 10 ms pri 10 → 160 ms pri 14
+    assert izberi_cost(0.500, cilj_ms=250) == 12
+    assert izberi_cost(0.000001, cilj_ms=250) == 16
+    assert potrebuje_nov_hash("$2b$04$" + "x" * 53) and not potrebuje_nov_hash("neveljaven")
+
+
+def _prijava(client, geslo: str):
+    stran = client.get("/login")
+    csrf = re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', stran.text).group(1)
+    return client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "testuser", "geslo": geslo},
+                       follow_redirects=False)
+
+
+def test_prijava_preracuna_hash_z_nizjo_ceno(client, db):
+    star = bcrypt.hashpw(b"Veljavno1234!ab", bcrypt.gensalt(rounds=4)).decode()
+    db.add(Uporabnik(uporabnisko_ime="testuser", geslo_hash=star, vloga="admin",
+                     ime_priimek="Test User", aktiven=True))
+    db.commit()
+
+    assert _prijava(client, "Veljavno1234!ab").status_code == 302
+    db.expire_all()
+    nov = db.query(Uporabnik).one().geslo_hash
+    assert nov != star and nov.startswith(f"$2b${bcrypt_cost():02d}$")
+    assert bcrypt.checkpw(b"Veljavno1234!ab", nov.encode())
+
+
+def test_prijava_503_ko_je_bazen_zaseden(client, db, monkeypatch):
+    db.add(Uporabnik(uporabnisko_ime="testuser", geslo_hash="$2b$12$" + "x" * 53, vloga="admin",
+                     ime_priimek="Test User", aktiven=True))
+    db.commit()
+
+    def zaseden(*_):
+        raise BazenZaseden()
+    monkeypatch.setattr(main, "preveri_geslo", zaseden)
+    resp = _prijava(client, "Veljavno1234!ab")
+    assert resp.status_code == 503 and resp.headers["retry-after"] == "5"
+    assert "preobremenjen" in resp.text
@@ -3,6 +3,7 @@ import re
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
+from app import kartica
 from app.auth import hash_geslo
 from app.models import Uporabnik, Clan, EmailPredloga, Nastavitev, AuditLog
 
@@ -145,3 +146,69 @@ def test_posli_kartico_mock_smtp(client, db):
     log = db.query(AuditLog).filter(AuditLog.akcija == "kartica_poslana").first()
     assert log is not None
     assert str(clan.id) in log.opis
+
+
+def test_kartice_paketno_in_pisave_enkrat():
+    """Paketni način: en PDF z N stranmi ali N ločenih PDF-jev; pisavi se pripravita enkrat na proces."""
+    clani = [Clan(id=i, priimek=f"Čebašek{i}", ime="Žan", klicni_znak=f"S5{i}ABC", tip_clanstva="Osebni")
+             for i in range(1, 4)]
+    polja = kartica._KARTICA_POLJA_PRIVZETO.split(",")
+
+    pdf = kartica.generiraj_kartice_pdf(clani, 2026, "Radio klub", "S59X", polja)
+    assert pdf.startswith(b"%PDF")
+    assert len(re.findall(rb"/Type /Page\b", pdf)) == 3
+    assert pdf.count(b"/FontFile2") == 2          # navadna in krepka pisava vdelani enkrat za ves paket
+
+    locene = list(kartica.generiraj_kartice(clani, 2026, "Radio klub", "S59X", polja))
+    assert [ime for ime, _ in locene] == ["kartica_S51ABC_2026.pdf", "kartica_S52ABC_2026.pdf",
+                                          "kartica_S53ABC_2026.pdf"]
+    assert all(vsebina.startswith(b"%PDF") for _, vsebina in locene)
+
+    poti = kartica._pisave()
+    with patch.object(kartica, "_podmnozi_pisavo") as podmnozi:
+        kartica.generiraj_kartico_pdf(clani[0], 2026, "Radio klub", "S59X", polja)
+        podmnozi.assert_not_called()
+    assert kartica._pisave() == poti
+
+
+def test_znaki_izven_podmnozice_iz_celotne_pisave():
+    """ẞ in vietnamščina sta v podmnožici; IPA in puščice pridejo iz celotne pisave (samo kadar so potrebni)."""
+    polja = kartica._KARTICA_POLJA_PRIVZETO.split(",")
+    assert {0x1E9E, 0x1EC5} <= kartica._PISAVE_NABOR
+    navaden = Clan(id=1, priimek="Nguyễn", ime="ẞtraße", klicni_znak="S51ABC", tip_clanstva="Osebni")
+    assert kartica.generiraj_kartico_pdf(navaden, 2026, "Radio klub", "S59X", polja).count(b"/FontFile2") == 2
+
+    poseben = Clan(id=2, priimek="Kɐ", ime="A → B", klicni_znak="S52ABC", tip_clanstva="Osebni")
+    pdf = kartica._nov_pdf()
+    pdf.add_page()
+    kartica._narisi_kartico(pdf, poseben, 2026, "Radio klub", "S59X", polja)
+    assert bytes(pdf.output()).count(b"/FontFile2") == 4
+    uporabljeni = {kljuc: {g.unicode[0] for g in f.subset._char_id_per_glyph} for kljuc, f in pdf.fonts.items()}
+    assert 0x0250 in uporabljeni["dejavucelotnaB"] and 0x2192 in uporabljeni["dejavucelotna"]
+
+
+def test_tiskalna_pola_po_filtrih(client, db):
+    """GET /clani/kartice.pdf → 10 kartic na A4 za člane, ki ustrezajo filtrom seznama."""
+    _login(client, db)
+    for i in range(12):
+        db.add(Clan(priimek=f"Aktiven{i}", ime="Ime", tip_clanstva="Osebni", aktiven=True))
+    db.add(Clan(priimek="Neaktiven", ime="Ime", tip_clanstva="Osebni", aktiven=False))
+    db.add(Clan(priimek="Druzinski", ime="Ime", tip_clanstva="Družinski", aktiven=True))
+    db.commit()
+
+    resp = client.get("/clani/kartice.pdf?leto=2026&tip=Osebni", follow_redirects=False)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/pdf"
+    assert 'filename="kartice_2026.pdf"' in resp.headers["content-disposition"]
+    assert len(re.findall(rb"/Type /Page\b", resp.content)) == 2   # 12 kartic → 10 + 2
+    assert re.search(rb"/MediaBox \[0 0 595\.28 841\.89\]", resp.content)
+    assert db.query(AuditLog).filter_by(akcija="kartice_pdf").one().opis == "12 kartic za leto 2026"
+
+    resp = client.get("/clani/kartice.pdf?aktiven=&q=Neaktiven")
+    assert len(re.findall(rb"/Type /Page\b", resp.content)) == 1
+
+
+def test_tiskalna_pola_brez_pravic(client, db):
+    _login(client, db, vloga="bralec")
+    resp = client.get("/clani/kartice.pdf", follow_redirects=False)
+    assert resp.status_code == 302
@@ -0,0 +1,61 @@
+"""Testi za omejevanje neuspešnih prijav (drseče okno v pomnilniku, obstojnost v login_poskusi)."""
+import re
+from datetime import datetime, timezone
+
+from app.models import LoginPoizkus
+from app.omejitev_prijav import OmejevalnikPrijav
+
+
+def test_zaklep_po_max_poskusih_in_drsece_okno():
+    """10 neuspehov v 15 minutah zaklene IP; ko najstarejši izpade iz okna, je IP spet dovoljen."""
+    o = OmejevalnikPrijav(max_poskusov=10, okno_s=900)
+    for i in range(9):
+        o.zabelezi("10.0.0.1", cas=1000.0 + i)
+    assert o.dovoljen("10.0.0.1", zdaj=1010.0)
+    o.zabelezi("10.0.0.1", cas=1009.0)
+    assert not o.dovoljen("10.0.0.1", zdaj=1010.0)
+    assert o.dovoljen("10.0.0.2", zdaj=1010.0)
+    assert not o.dovoljen("10.0.0.1", zdaj=1899.0)
+    assert o.dovoljen("10.0.0.1", zdaj=1900.5)
+    assert o.metrike()["zavrnjeni"] == 2
+
+
+def test_omejen_pomnilnik():
+    """Na IP se hrani največ max_poskusov časov; IP, ki najdlje ni poskusil, izpade."""
+    o = OmejevalnikPrijav(max_poskusov=3, okno_s=900, najvec_ip=2)
+    for i in range(50):
+        o.zabelezi("a", cas=1000.0 + i)
+    o.zabelezi("b", cas=1100.0)
+    o.zabelezi("a", cas=1101.0)
+    o.zabelezi("c", cas=1102.0)
+    assert len(o._poskusi["a"]) == 3
+    assert list(o._poskusi) == ["a", "c"]
+    assert o.metrike()["izpadi"] == 1
+
+
+def test_zapis_v_paketu_in_obnova(engine, db):
+    """Neuspehi se zapišejo v enem paketu (pretečeni se izbrišejo); nov proces iz njih obnovi zaklep."""
+    db.add(LoginPoizkus(ip="star", cas=datetime.fromtimestamp(10.0, timezone.utc)))
+    db.commit()
+    o = OmejevalnikPrijav(max_poskusov=3, okno_s=900)
+    for i in range(3):
+        o.zabelezi("10.0.0.1", cas=5000.0 + i)
+    assert o.zapisi(engine, zdaj=5010.0) == 3
+    assert o.metrike()["za_zapis"] == 0
+    assert [p.ip for p in db.query(LoginPoizkus)] == ["10.0.0.1"] * 3
+
+    nov = OmejevalnikPrijav(max_poskusov=3, okno_s=900)
+    assert nov.nalozi(db, zdaj=5010.0) == 3
+    assert not nov.dovoljen("10.0.0.1", zdaj=5010.0)
+
+
+def test_login_zaklenjen_brez_pisanja_v_bazo(client, db):
+    """Po 10 napačnih geslih je prijava zavrnjena; poskusi se ne zapisujejo sproti v login_poskusi."""
+    for _ in range(10):
+        stran = client.get("/login")
+        csrf = re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', stran.text).group(1)
+        resp = client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "nihce", "geslo": "napacno"})
+        assert "Napačno uporabniško ime ali geslo." in resp.text
+    resp = client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "nihce", "geslo": "napacno"})
+    assert "Preveč neuspešnih poskusov" in resp.text
+    assert db.query(LoginPoizkus).count() == 0
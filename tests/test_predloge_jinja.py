@@ -0,0 +1,33 @@
+"""Testi za predpomnilnik prevedenih e-poštnih predlog (LRU, sandbox)."""
+import pytest
+from jinja2 import TemplateSyntaxError
+from jinja2.exceptions import SecurityError
+
+from app.predloge_jinja import PredpomnilnikPredlog
+
+
+def test_lru_ponovna_uporaba_in_izpad():
+    """Ista izvorna koda se prevede enkrat; najdlje neuporabljena predloga izpade."""
+    pp = PredpomnilnikPredlog(velikost=2)
+    a, b, c = "A {{ ime }}", "B {{ ime }}", "C {{ ime }}"
+    for _ in range(3):
+        assert pp.render(a, {"ime": "Ana"}) == "A Ana"
+    assert pp.render(b, {"ime": "Bor"}) == "B Bor"
+    pp.render(a, {"ime": "Ana"})          # a je zdaj nazadnje uporabljena
+    pp.render(c, {"ime": "Cene"})         # izpade b
+    assert pp.metrike() == {"zadetki": 3, "prevajanja": 3, "izpadi": 1, "predlog": 2}
+    pp.render(a, {})
+    pp.render(b, {})
+    assert pp.metrike()["prevajanja"] == 4
+
+
+def test_sandbox_in_napaka_v_predlogi():
+    """Predpomnjena predloga ostane v sandboxu; napačna predloga se ne shrani."""
+    pp = PredpomnilnikPredlog()
+    with pytest.raises(SecurityError):
+        pp.render("{{ ime.__class__.__mro__[1].__subclasses__() }}", {"ime": "x"})
+    for _ in range(2):
+        with pytest.raises(TemplateSyntaxError):
+            pp.render("{% if %}", {})
+    assert pp.metrike()["prevajanja"] == 1
+    assert pp.render("<b>{{ ime }}</b>", {"ime": "<i>"}) == "<b><i></b>"   # brez autoescape (HTML predloge)
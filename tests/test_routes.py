@@ -300,6 +300,105 @@ def test_backup_excel_admin(client, db):
     assert "spreadsheetml" in resp.headers.get("content-type", "")
 
 
+def test_backup_excel_vsebina(client, db):
+    """Pretočni izvoz: vsi listi, glave, članarine z imenom člana (JOIN)."""
+    import io
+    from openpyxl import load_workbook
+
+    _login(client, db, vloga="admin")
+    c = Clan(priimek="Backupović", ime="Ana", klicni_znak="S59BK", tip_clanstva="Redno", aktiven=True)
+    db.add(c)
+    db.commit()
+    db.add(Clanarina(clan_id=c.id, leto=2025, datum_placila=date(2025, 3, 1), znesek="25.00"))
+    db.add(Aktivnost(clan_id=c.id, leto=2025, datum=date(2025, 5, 1), opis="Field day", delovne_ure=4.5))
+    db.commit()
+
+    resp = client.get("/izvoz/backup-excel")
+    wb = load_workbook(io.BytesIO(resp.content))
+    assert wb.sheetnames == ["Clani", "Clanarine", "Aktivnosti", "Vloge"]
+    ws = wb["Clani"]
+    assert ws["A1"].value == "ID" and ws["A1"].font.b
+    assert [ws["B2"].value, ws["D2"].value, ws["Q2"].value] == ["Backupović", "S59BK", "Da"]
+    vrstica = [c.value for c in wb["Clanarine"][2]]
+    assert vrstica[2:7] == ["Backupović", "Ana", 2025, "2025-03-01", "25.00"]
+    assert wb["Aktivnosti"]["H2"].value == 4.5
+
+
+def test_backup_db_vkljuci_wal(client, db, tmp_path, monkeypatch):
+    """backup-db vsebuje tudi potrjene strani, ki so še v -wal datoteki (Online Backup API)."""
+    import sqlite3
+    from app.routers import izvoz
+
+    pot = tmp_path / "clanstvo.db"
+    conn = sqlite3.connect(pot)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(100)])
+    conn.commit()
+    assert (tmp_path / "clanstvo.db-wal").stat().st_size > 0
+    monkeypatch.setattr(izvoz, "_BACKUP_DB_POT", str(pot))
+
+    _login(client, db, vloga="admin")
+    resp = client.get("/izvoz/backup-db")
+    conn.close()
+    assert resp.status_code == 200
+    kopija = tmp_path / "prenos.db"
+    kopija.write_bytes(resp.content)
+    with sqlite3.connect(kopija) as preneseno:
+        assert preneseno.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 100
+    assert [p.name for p in tmp_path.glob("backup_*.db")] == []
+
+
+def test_backup_csv_zip(client, db):
+    """backup.csv.zip: ena CSV datoteka na tabelo z istimi stolpci kot Excel backup; vrednosti nespremenjene."""
+    import csv
+    import io
+    import zipfile
+
+    _login(client, db, vloga="admin")
+    c = Clan(priimek="Csvović", ime="Ana", klicni_znak="S59CV", tip_clanstva="Redno", aktiven=True,
+             mobilni_telefon="+386 41 123 456", opombe="-")
+    db.add(c)
+    db.commit()
+    db.add(Clanarina(clan_id=c.id, leto=2025, datum_placila=date(2025, 3, 1), znesek="25.00"))
+    db.commit()
+
+    resp = client.get("/izvoz/backup.csv.zip")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/zip"
+    zf = zipfile.ZipFile(io.BytesIO(resp.content))
+    assert zf.namelist() == ["clani.csv", "clanarine.csv", "aktivnosti.csv", "vloge.csv"]
+    clani = list(csv.reader(io.StringIO(zf.read("clani.csv").decode("utf-8-sig"))))
+    assert clani[0][:4] == ["ID", "Priimek", "Ime", "Klicni znak"]
+    assert clani[1][1:4] == ["Csvović", "Ana", "S59CV"]
+    assert (clani[1][9], clani[1][17]) == ("+386 41 123 456", "-")   # brez predpone ' (backup za ponovni uvoz)
+    clanarine = list(csv.reader(io.StringIO(zf.read("clanarine.csv").decode("utf-8-sig"))))
+    assert clanarine[1][2:7] == ["Csvović", "Ana", "2025", "2025-03-01", "25.00"]
+
+
+def test_backup_jsonl_zip_in_neznana_oblika(client, db):
+    import io
+    import json
+    import zipfile
+
+    _login(client, db, vloga="admin")
+    db.add(Clan(priimek="Jsonović", ime="Eva", tip_clanstva="Redno", aktiven=True))
+    db.commit()
+
+    resp = client.get("/izvoz/backup.jsonl.zip")
+    zf = zipfile.ZipFile(io.BytesIO(resp.content))
+    clan = json.loads(zf.read("clani.jsonl").splitlines()[0])
+    assert clan["Priimek"] == "Jsonović" and clan["Aktiven"] == "Da"
+    assert client.get("/izvoz/backup.xml.zip").status_code == 404
+
+
+def test_backup_csv_urednik_zavrnjen(client, db):
+    _login(client, db, vloga="urednik")
+    resp = client.get("/izvoz/backup.csv.zip", follow_redirects=False)
+    assert resp.status_code == 302
+
+
 def test_backup_excel_urednik_zavrnjen(client, db):
     """Urednik dobi redirect – ne sme imeti dostopa."""
     _login(client, db, vloga="urednik")
@@ -457,6 +556,45 @@ def test_filtrirani_izvoz(client, db):
     assert "spreadsheetml" in resp.headers.get("content-type", "")
 
 
+def test_filtrirani_izvoz_csv(client, db):
+    """CSV različica filtriranega izvoza upošteva iste filtre kot Excel; formule se ne izvedejo."""
+    _login(client, db)
+    db.add(Clan(priimek="Aktivni", ime="Test", tip_clanstva="Osebni", aktiven=True,
+                opombe='=HYPERLINK("http://x")'))
+    db.add(Clan(priimek="Neaktivni", ime="Test", tip_clanstva="Osebni", aktiven=False))
+    db.commit()
+
+    resp = client.get("/izvoz/clani-filtrirani.csv?aktiven=da")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert "Aktivni" in resp.text and "Neaktivni" not in resp.text
+    assert "'=HYPERLINK" in resp.text
+
+
+def test_zrs_izvoz_vsebina(client, db):
+    """ZRS izvoz: list kluba in lista plačanih članov z obarvano glavo."""
+    import io
+    from openpyxl import load_workbook
+
+    _login(client, db, vloga="admin")
+    leto = date.today().year
+    c = Clan(priimek="Zrsovec", ime="Peter", tip_clanstva="Osebni", aktiven=True, es_stevilka=77)
+    db.add(c)
+    db.commit()
+    db.add(Clanarina(clan_id=c.id, leto=leto, datum_placila=date(leto, 1, 15)))
+    db.commit()
+
+    resp = client.get(f"/izvoz/zrs?leto={leto}")
+    assert resp.status_code == 200
+    wb = load_workbook(io.BytesIO(resp.content))
+    assert wb.sheetnames == ["Podatki radiokluba", "ListaClanov"]
+    assert wb["Podatki radiokluba"]["B6"].value == leto
+    ws = wb["ListaClanov"]
+    assert ws["A1"].fill.fgColor.rgb == "FFDDEEFF"
+    vrednosti = [c.value for c in ws[2]]
+    assert "ZRSOVEC" in vrednosti and 77 in vrednosti
+
+
 # ---------------------------------------------------------------------------
 # Uredi clanarine
 # ---------------------------------------------------------------------------
@@ -773,3 +911,98 @@ def test_audit_log_nastavitve_urejene(client, db):
     assert resp.status_code == 302
     log = db.query(AuditLog).filter(AuditLog.akcija == "nastavitve_urejene").first()
     assert log is not None
+
+
+# ---------------------------------------------------------------------------
+# Model izvajanja: blokirajoči handlerji tečejo v threadpoolu
+# ---------------------------------------------------------------------------
+
+# async handlerji, ki ne dostopajo do baze ali pa blokirajoče odseke izvedejo
+# prek run_in_threadpool (request.form()) oziroma BralnaSeja.izvedi (bralne poti)
+_ASYNC_HANDLERJI = {
+    "health", "root", "login_stran", "login_2fa_stran", "nova_form", "nov_form",
+    "nastavitve_shrani", "zrs_nastavitve_shrani", "uvozi_nastavitve_shrani",
+    "uvozi_placila_nastavitve_shrani",
+    "seznam", "seznam_podatki", "iskanje_clanov", "index", "upn_qr", "upn_qr_png",
+}
+
+
+def test_handlerji_z_bazo_niso_async():
+    """Handlerji s sinhronim DB dostopom morajo biti def, da ne blokirajo event loopa."""
+    import inspect
+    from fastapi.routing import APIRoute
+    from app.main import app
+
+    async_handlerji = {
+        r.endpoint.__name__
+        for r in app.routes
+        if isinstance(r, APIRoute) and inspect.iscoroutinefunction(r.endpoint)
+    }
+    assert async_handlerji <= _ASYNC_HANDLERJI, async_handlerji - _ASYNC_HANDLERJI
+
+
+def test_async_url():
+    from app.database import async_url
+
+    assert async_url("sqlite:///./data/clanstvo.db") == "sqlite+aiosqlite:///./data/clanstvo.db"
+    assert async_url("postgresql://u:g@h/db") == "postgresql+asyncpg://u:g@h/db"
+    assert async_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+
+def test_bralne_poti_z_async_engine(tmp_path):
+    """Bralne poti delujejo tudi prek AsyncSession (aiosqlite) – kot pri DB_ASYNC=1."""
+    import asyncio
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from fastapi.testclient import TestClient
+    from app.database import get_db, get_bralna_db, BralnaSeja
+    from app.main import app
+    from app.models import Base
+
+    pot = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{pot}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=sync_engine)
+    Seja = sessionmaker(bind=sync_engine)
+    a_engine = create_async_engine(f"sqlite+aiosqlite:///{pot}")
+    ASeja = async_sessionmaker(a_engine, expire_on_commit=False)
+
+    def override_get_db():
+        s = Seja()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    async def override_bralna():
+        async with ASeja() as s:
+            yield BralnaSeja(s)
+
+    db = Seja()
+    clan = Clan(priimek="Asinhron", ime="Andrej", klicni_znak="S59AA",
+                tip_clanstva="Redno", aktiven=True)
+    db.add(clan)
+    db.commit()
+    leto = date.today().year
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_bralna_db] = override_bralna
+    try:
+        with TestClient(app) as client:
+            _login(client, db)
+            r = client.get("/clani")
+            assert r.status_code == 200 and "Asinhron" in r.text
+            r = client.get("/clani/podatki?draw=1&start=0&length=10")
+            assert r.json()["recordsTotal"] == 1
+            r = client.get("/clani/iskanje?q=asin")
+            assert [c["priimek"] for c in r.json()] == ["Asinhron"]
+            assert client.get("/dashboard").status_code == 200
+            r = client.get(f"/upn/{clan.id}/{leto}")
+            assert r.status_code == 200 and r.headers["content-type"] == "image/svg+xml"
+            r = client.get(f"/upn/{clan.id}/{leto}/png")
+            assert r.status_code == 200 and r.content[:4] == b"\x89PNG"
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+        asyncio.run(a_engine.dispose())
+        sync_engine.dispose()
@@ -0,0 +1,119 @@
+"""Testi za bazen SMTP povezav (ponovna uporaba, ponovno povezovanje, omejitve)."""
+import smtplib
+import socket
+from email.message import EmailMessage
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.smtp_bazen import SmtpBazen
+
+_NASTAVITVE = {"host": "smtp.test.si", "port": 587, "nacin": "starttls",
+               "uporabnik": "klub", "geslo": "skrivno", "od": "klub@test.si"}
+
+
+def _sporocilo(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = f"Sporočilo {i}"
+    msg["From"] = "klub@test.si"
+    msg["To"] = f"clan{i}@test.si"
+    msg.set_content("Pozdravljeni")
+    return msg
+
+
+def test_povezava_se_ponovno_uporabi():
+    """Ena prijava za več sporočil in več zaporednih sej; bazen je omejen."""
+    bazen = SmtpBazen(velikost=1, cakanje_s=0)
+    with patch("app.smtp_bazen.smtplib.SMTP") as smtp_cls:
+        with bazen.seja(_NASTAVITVE) as seja:
+            for i in range(5):
+                seja.posli(_sporocilo(i))
+            with pytest.raises(smtplib.SMTPException):
+                with bazen.seja(_NASTAVITVE):
+                    pass
+        with bazen.seja(_NASTAVITVE) as seja:
+            seja.posli(_sporocilo(5))
+
+    assert smtp_cls.call_count == 1
+    povezava = smtp_cls.return_value.__enter__.return_value
+    assert povezava.starttls.call_count == 1
+    povezava.login.assert_called_once_with("klub", "skrivno")
+    assert povezava.send_message.call_count == 6
+    m = bazen.metrike()
+    assert (m["poslana"], m["povezave_odprte"], m["proste"], m["napake"]) == (6, 1, 1, 0)
+
+    bazen.zapri_vse()
+    smtp_cls.return_value.__exit__.assert_called_once()
+    assert bazen.metrike()["proste"] == 0
+
+
+def test_ponovna_povezava_ob_prekinitvi():
+    """SMTPServerDisconnected: odpre se nova povezava in sporočilo se pošlje znova."""
+    bazen = SmtpBazen()
+    prekinjena, nova = MagicMock(), MagicMock()
+    for povezava in (prekinjena, nova):
+        povezava.__enter__.return_value = povezava
+    prekinjena.send_message.side_effect = [None, smtplib.SMTPServerDisconnected("idle timeout")]
+    with patch("app.smtp_bazen.smtplib.SMTP", side_effect=[prekinjena, nova]):
+        with bazen.seja(_NASTAVITVE) as seja:
+            seja.posli(_sporocilo(1))
+            seja.posli(_sporocilo(2))
+            seja.posli(_sporocilo(3))
+
+    assert prekinjena.send_message.call_count == 2
+    assert nova.send_message.call_count == 2
+    m = bazen.metrike()
+    assert (m["poslana"], m["povezave_odprte"], m["ponovne_povezave"], m["napake"]) == (3, 2, 1, 0)
+
+
+def test_omejitev_sporocil_na_povezavo_in_nastavitve():
+    """Po N sporočilih se povezava zamenja; druge nastavitve ne dobijo obstoječe povezave."""
+    bazen = SmtpBazen(sporocil_na_povezavo=2)
+    with patch("app.smtp_bazen.smtplib.SMTP") as smtp_cls:
+        smtp_cls.side_effect = lambda *a, **kw: MagicMock()
+        with bazen.seja(_NASTAVITVE) as seja:
+            for i in range(5):
+                seja.posli(_sporocilo(i))
+        assert smtp_cls.call_count == 3
+        with bazen.seja({**_NASTAVITVE, "nacin": "plain", "uporabnik": ""}) as seja:
+            seja.posli(_sporocilo(6))
+        assert smtp_cls.call_count == 4
+    assert bazen.metrike()["poslana"] == 6
+
+
+def test_aiosmtpd_ena_povezava():
+    """Skupinsko pošiljanje proti lokalnemu strežniku aiosmtpd: ena povezava, vsa sporočila."""
+    controller_mod = pytest.importorskip("aiosmtpd.controller")
+
+    class Prejemnik:
+        def __init__(self):
+            self.ehlo = 0
+            self.sporocila = []
+
+        async def handle_EHLO(self, server, session, envelope, hostname, responses):
+            self.ehlo += 1
+            session.host_name = hostname
+            return responses
+
+        async def handle_DATA(self, server, session, envelope):
+            self.sporocila.append(envelope.rcpt_tos[0])
+            return "250 OK"
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    prejemnik = Prejemnik()
+    controller = controller_mod.Controller(prejemnik, hostname="127.0.0.1", port=port)
+    controller.start()
+    try:
+        bazen = SmtpBazen()
+        nastavitve = {**_NASTAVITVE, "host": "127.0.0.1", "port": port, "nacin": "plain", "uporabnik": ""}
+        with bazen.seja(nastavitve) as seja:
+            for i in range(10):
+                seja.posli(_sporocilo(i))
+        bazen.zapri_vse()
+    finally:
+        controller.stop()
+
+    assert prejemnik.sporocila == [f"clan{i}@test.si" for i in range(10)]
+    assert prejemnik.ehlo == 1
@@ -0,0 +1,75 @@
+import re
+
+from sqlalchemy import create_engine, text
+
+from app.auth import hash_geslo
+from app.models import Uporabnik
+from app.sqlite_profil import prijavi_profil, pragme_v_veljavi, vzdrzuj, engine_kwargs
+
+
+# ---------------------------------------------------------------------------
+# Unit testi – pragme in vzdrževanje
+# ---------------------------------------------------------------------------
+
+def _datotecni_engine(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profil.db'}"
+    e = create_engine(url, connect_args={"check_same_thread": False}, **engine_kwargs(url))
+    prijavi_profil(e)
+    return e
+
+
+def test_pragme_na_novi_povezavi(tmp_path):
+    e = _datotecni_engine(tmp_path)
+    pragme = pragme_v_veljavi(e)
+    assert pragme["journal_mode"] == "wal"
+    assert pragme["synchronous"] == "1"      # NORMAL
+    assert pragme["temp_store"] == "2"       # MEMORY
+    assert pragme["busy_timeout"] == "5000"
+    assert pragme["cache_size"] == "-20000"
+    e.dispose()
+
+
+def test_pool_samo_za_datoteko():
+    assert engine_kwargs("sqlite:///:memory:") == {}
+    assert engine_kwargs("postgresql://h/db") == {}
+    kw = engine_kwargs("sqlite:///./data/clanstvo.db")
+    assert kw["pool_size"] >= 5 and kw["max_overflow"] >= 0
+
+
+def test_vzdrzuj_izprazni_wal(tmp_path):
+    e = _datotecni_engine(tmp_path)
+    with e.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1), (2), (3)"))
+    rezultat = vzdrzuj(e)
+    assert rezultat["busy"] == 0
+    assert (tmp_path / "profil.db-wal").stat().st_size == 0
+    e.dispose()
+
+
+# ---------------------------------------------------------------------------
+# /nastavitve/diagnostika
+# ---------------------------------------------------------------------------
+
+def _login(client, db, vloga):
+    db.add(Uporabnik(uporabnisko_ime="diag", geslo_hash=hash_geslo("Veljavno1234!ab"),
+                     vloga=vloga, ime_priimek="Diag", aktiven=True))
+    db.commit()
+    resp = client.get("/login")
+    csrf = re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+    client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "diag",
+                                "geslo": "Veljavno1234!ab"}, follow_redirects=False)
+
+
+def test_diagnostika_admin(client, db):
+    _login(client, db, "admin")
+    resp = client.get("/nastavitve/diagnostika")
+    assert resp.status_code == 200
+    podatki = resp.json()
+    assert podatki["dialekt"] == "sqlite"
+    assert set(podatki["pragme"]) == set(podatki["profil"])
+
+
+def test_diagnostika_samo_admin(client, db):
+    _login(client, db, "urednik")
+    assert client.get("/nastavitve/diagnostika").status_code == 403
@@ -0,0 +1,135 @@
+"""Testi za materializirano statistiko (statistika_leto, statistika_tip) in njeno vzdrževanje."""
+import importlib.util
+import re
+from pathlib import Path
+
+from app.auth import hash_geslo
+from app.models import Uporabnik, Clan, Clanarina, Aktivnost, StatistikaLeto, StatistikaTip
+from app.statistika import (znesek_v_cente, normaliziraj_zneske, obnovi_statistiko, statistika_let,
+                            clani_po_tipu)
+
+
+def _login(client, db) -> str:
+    db.add(Uporabnik(uporabnisko_ime="testuser", geslo_hash=hash_geslo("Veljavno1234!ab"),
+                     vloga="admin", ime_priimek="Test User", aktiven=True))
+    db.commit()
+    resp = client.get("/login")
+    csrf = re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+    client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "testuser",
+                                "geslo": "Veljavno1234!ab"}, follow_redirects=False)
+    resp = client.get("/clani/nov")
+    return re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+
+
+def _posnetek(db) -> tuple[dict, dict]:
+    db.expire_all()
+    leta = {s.leto: (s.placniki, s.skupaj_centi, s.brez_zneska, s.neberljivi, s.aktivnosti, s.ure)
+            for s in statistika_let(db).values()}
+    tipi = {t.tip_clanstva: (t.aktivni, t.vsi) for t in clani_po_tipu(db)}
+    return leta, tipi
+
+
+def test_znesek_v_cente():
+    assert znesek_v_cente("25") == 2500
+    assert znesek_v_cente("25,50") == 2550
+    assert znesek_v_cente(" 25.5 € ") == 2550
+    assert znesek_v_cente("12,345") == 1235
+    assert znesek_v_cente("") is None and znesek_v_cente(None) is None
+    assert znesek_v_cente("plačano") is None and znesek_v_cente("NaN") is None
+
+
+def test_prevelik_znesek_je_neberljiv():
+    """Zneski izven 64-bitnega INTEGER (ali prevelik za quantize) so neberljivi – v aplikaciji in v migraciji 015."""
+    pot = Path(__file__).parents[1] / "alembic" / "versions" / "015_clanarine_znesek_centi.py"
+    spec = importlib.util.spec_from_file_location("migracija_015", pot)
+    migracija = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migracija)
+    for pretvori in (znesek_v_cente, migracija._v_cente):
+        assert pretvori("1e26") is None and pretvori("1e30") is None
+        assert pretvori("99999999999999999999") is None and pretvori("-99999999999999999999") is None
+        assert pretvori("92233720368547758.07") == 2 ** 63 - 1
+
+
+def test_dodaj_prevelik_znesek(client, db):
+    """POST /clanarine/dodaj z znesek=1e30 shrani plačilo z neberljivim zneskom (brez 500)."""
+    token = _login(client, db)
+    clan = Clan(priimek="Novak", ime="Ana", tip_clanstva="Osebni", aktiven=True)
+    db.add(clan)
+    db.commit()
+    resp = client.post("/clanarine/dodaj", data={"csrf_token": token, "clan_id": clan.id, "leto": 2025,
+                                                 "datum_placila": "2025-03-01", "znesek": "1e30"},
+                       follow_redirects=False)
+    assert resp.status_code == 302
+    db.expire_all()
+    assert db.query(Clanarina.znesek, Clanarina.znesek_centi).one() == ("1e30", None)
+    assert _posnetek(db)[0] == {2025: (1, 0, 1, 1, 0, 0.0)}
+
+
+def test_normaliziraj_zneske(db):
+    """znesek_centi se v paketih znova izračuna iz besedila; neberljivi zneski se vrnejo."""
+    clan = Clan(priimek="Novak", ime="Ana", tip_clanstva="Osebni", aktiven=True)
+    db.add(clan)
+    db.flush()
+    zneski = ["25", "25,50", "12 €", "25 EUR/2", None]
+    db.add_all(Clanarina(clan_id=clan.id, leto=2020 + i, znesek=z, znesek_centi=1) for i, z in enumerate(zneski))
+    db.commit()
+
+    neberljivi = normaliziraj_zneske(db, paket=2)
+    db.commit()
+    db.expire_all()
+    assert [z for _, z in neberljivi] == ["25 EUR/2"]
+    assert [c.znesek_centi for c in db.query(Clanarina).order_by(Clanarina.leto)] == [2500, 2550, 1200, None, None]
+
+
+def test_pisalne_poti_vzdrzujejo_statistiko(client, db):
+    """Po dodajanju, urejanju in brisanju je statistika enaka popolni obnovi."""
+    token = _login(client, db)
+    ana = Clan(priimek="Novak", ime="Ana", tip_clanstva="Osebni", aktiven=True)
+    bor = Clan(priimek="Kos", ime="Bor", tip_clanstva="Mladi", aktiven=False)
+    db.add_all([ana, bor])
+    db.commit()
+    obnovi_statistiko(db)
+    db.commit()
+
+    for clan, znesek in ((ana, "25,50"), (bor, "ni znano")):
+        client.post("/clanarine/dodaj", data={"csrf_token": token, "clan_id": clan.id, "leto": 2025,
+                                              "datum_placila": "2025-03-01", "znesek": znesek})
+    client.post("/aktivnosti/dodaj", data={"csrf_token": token, "clan_id": ana.id, "leto": 2025,
+                                           "opis": "Tekmovanje", "delovne_ure": "3,5"})
+    leta, tipi = _posnetek(db)
+    assert leta == {2025: (2, 2550, 1, 1, 1, 3.5)}
+    assert tipi == {"Osebni": (1, 1), "Mladi": (0, 1)}
+
+    aktivnost = db.query(Aktivnost).one()
+    client.post(f"/aktivnosti/uredi/{aktivnost.id}", data={"csrf_token": token, "clan_id": ana.id,
+                                                           "leto": 2024, "opis": "Tekmovanje",
+                                                           "delovne_ure": "2"})
+    clanarina = db.query(Clanarina).filter_by(clan_id=bor.id).one()
+    client.post(f"/clanarine/uredi/{clanarina.id}", data={"csrf_token": token, "clan_id": bor.id,
+                                                          "datum_placila": "2025-03-01", "znesek": "10"})
+    leta, _ = _posnetek(db)
+    assert leta == {2025: (2, 3550, 0, 0, 0, 0.0), 2024: (0, 0, 0, 0, 1, 2.0)}
+
+    client.post(f"/clani/{ana.id}/izbrisi", data={"csrf_token": token})
+    posnetek = _posnetek(db)
+    assert posnetek == ({2025: (1, 1000, 0, 0, 0, 0.0)}, {"Mladi": (0, 1)})
+
+    db.query(StatistikaLeto).delete()
+    db.query(StatistikaTip).delete()
+    obnovi_statistiko(db)
+    db.commit()
+    assert _posnetek(db) == posnetek
+
+
+def test_pregled_placil_bere_statistiko(client, db):
+    """Pregled plačil na /izvoz prikazuje številke iz statistika_leto (brez razčlenjevanja zneskov)."""
+    _login(client, db)
+    clan = Clan(priimek="Novak", ime="Ana", tip_clanstva="Osebni", aktiven=True)
+    db.add(clan)
+    db.flush()
+    db.add(Clanarina(clan_id=clan.id, leto=2025, datum_placila=None, znesek="25", znesek_centi=2500))
+    db.commit()
+    db.add(StatistikaLeto(leto=2025, placniki=7, skupaj_centi=12345, brez_zneska=0, neberljivi=0,
+                          aktivnosti=0, ure=0))
+    db.commit()
+    assert "123.45 €" in client.get("/izvoz").text
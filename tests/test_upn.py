@@ -1,5 +1,8 @@
+import os
 import re
+from unittest.mock import patch
 
+from app import upn
 from app.auth import hash_geslo
 from app.models import Uporabnik, Clan, Nastavitev
 from app.upn import _znesek_v_cente, _kontrolna_vsota, _upn_vsebina, generiraj_upn_svg
@@ -112,6 +115,41 @@ def test_generiraj_upn_svg_vrne_svg():
     assert "svg" in svg.lower()
 
 
+def test_predpomnilnik_qr_pomnilnik_in_disk(tmp_path):
+    """Isti UPN podatki → en izris; datoteka na disku preživi nov predpomnilnik (ponovni zagon)."""
+    vsebina = _upn_vsebina("Janez Novak", "", "", "SI56610000021234567", "SI00 5-2026",
+                           "Radio klub", "", "", "Članarina 2026", 25.0)
+    prvi = upn.PredpomnilnikQr(velikost=1, mapa=str(tmp_path))
+    png = prvi.izris(vsebina, "png")
+    assert png.startswith(b"\x89PNG") and prvi.izris(vsebina, "png") is png
+    prvi.izris(vsebina, "svg")   # izpodrine PNG iz pomnilnika (velikost 1)
+    assert prvi.metrike() == {"zadetki": 1, "zadetki_disk": 0, "izrisi": 2, "izpadi": 1,
+                              "napake_disk": 0, "izbrisani_disk": 0, "vnosov": 1}
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [f"{upn.upn_kljuc(vsebina)}.png", f"{upn.upn_kljuc(vsebina)}.svg"])
+
+    drugi = upn.PredpomnilnikQr(mapa=str(tmp_path))
+    with patch.object(upn, "_generiraj_qr") as generiraj:
+        assert drugi.izris(vsebina, "png") == png
+        generiraj.assert_not_called()
+    assert drugi.metrike()["zadetki_disk"] == 1
+    assert upn.upn_kljuc(vsebina.replace("2026", "2027")) != upn.upn_kljuc(vsebina)
+
+
+def test_predpomnilnik_qr_ciscenje_diska(tmp_path):
+    """Datoteke, starejše od TTL, in najstarejše nad največjim številom se izbrišejo."""
+    for i in range(5):
+        pot = tmp_path / f"{i}.png"
+        pot.write_bytes(b"x")
+        os.utime(pot, (1000 + i, 1000 + i))
+    predpomnilnik = upn.PredpomnilnikQr(mapa=str(tmp_path))
+    assert predpomnilnik.pocisti_disk(ttl=100, najvec=10, zdaj=1101.5) == 2        # 0 in 1 sta pretečeni
+    assert predpomnilnik.pocisti_disk(ttl=100, najvec=2, zdaj=1101.5) == 1         # 2 je najstarejša nad mejo
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["3.png", "4.png"]
+    assert predpomnilnik.metrike()["izbrisani_disk"] == 3
+    assert upn.PredpomnilnikQr(mapa=None).pocisti_disk() == 0
+
+
 # ---------------------------------------------------------------------------
 # Unit testi – config.get_clanarina_zneski
 # ---------------------------------------------------------------------------
@@ -194,3 +232,25 @@ def test_upn_endpoint_z_zneskom(client, db):
     resp = client.get(f"/upn/{clan.id}/2026")
     assert resp.status_code == 200
     assert "svg" in resp.text.lower()
+
+
+def test_upn_endpoint_etag_304(client, db):
+    """Močan ETag iz vsebine QR kode; If-None-Match → 304, sprememba podatkov → nov ETag."""
+    _login(client, db)
+    clan = _nov_clan(db)
+    resp = client.get(f"/upn/{clan.id}/2026")
+    etag = resp.headers["etag"]
+    assert re.fullmatch(r'"[0-9a-f]{64}-svg"', etag)
+    assert resp.headers["cache-control"] == "private, no-cache"
+
+    resp = client.get(f"/upn/{clan.id}/2026", headers={"If-None-Match": etag})
+    assert resp.status_code == 304 and resp.content == b""
+    png = client.get(f"/upn/{clan.id}/2026/png")
+    assert png.headers["etag"] != etag
+    assert client.get(f"/upn/{clan.id}/2026/png",
+                      headers={"If-None-Match": png.headers["etag"]}).status_code == 304
+
+    clan.naslov_ulica = "Nova ulica 5"
+    db.commit()
+    resp = client.get(f"/upn/{clan.id}/2026", headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.headers["etag"] != etag
@@ -0,0 +1,126 @@
+"""Testi za uvoz članov iz Excel (načrt stolpcev, predogled, uvoz)."""
+import io
+from datetime import date, datetime
+
+import openpyxl
+from sqlalchemy import event
+
+from app.models import Clan
+from app.routers import izvoz
+from app.routers.izvoz import (
+    UVOZ_STOLPCI_PRIVZETO, _nacrt_stolpcev, _parse_excel_pregled, _uvozi_workbook,
+)
+
+
+# ---------------------------------------------------------------------------
+# Pomožne funkcije
+# ---------------------------------------------------------------------------
+
+def _mapping() -> dict[str, list[str]]:
+    return {k: [s.strip() for s in v.split(",")] for k, v in UVOZ_STOLPCI_PRIVZETO.items()}
+
+
+def _clani_xlsx(glava: tuple, rows: list[tuple]) -> bytes:
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "ListaClanov"
+    ws.append(glava)
+    for row in rows:
+        ws.append(row)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+_GLAVA = ("Priimek", "Ime", "Klicni znak", "Tip članstva", "Veljavnost RD",
+          "Naslov - ulica/naselje", "Naslov - pošta", "E-mail", "ES številka", "Opombe")
+
+
+# ---------------------------------------------------------------------------
+# Testi: _nacrt_stolpcev
+# ---------------------------------------------------------------------------
+
+def test_nacrt_natancno_pred_vsebuje():
+    """Natančno ujemanje ima prednost; sicer cela beseda; datumi po podnizu glave."""
+    glava = ["Klicni znak nosilci", "Klicni znak", "Ime in priimek", "Ime", "Veljavnost RD do", None]
+    nacrt = _nacrt_stolpcev(glava, {
+        "klicni_znak": ["klicni znak"],
+        "ime": ["ime"],
+        "nosilci": ["nosilci"],
+        "veljavnost_rd": ["veljavnost"],
+        "opombe": ["opombe"],
+    }, vsebuje=("veljavnost_rd",))
+    assert nacrt == {"klicni_znak": 1, "ime": 3, "nosilci": 0, "veljavnost_rd": 4, "opombe": None}
+
+
+def test_nacrt_cela_beseda():
+    """'ime' se ne ujema s 'Priimek', pač pa z 'Ime člana'."""
+    nacrt = _nacrt_stolpcev(["Priimek", "Ime člana"], {"ime": ["ime"]})
+    assert nacrt["ime"] == 1
+
+
+# ---------------------------------------------------------------------------
+# Testi: predogled in uvoz
+# ---------------------------------------------------------------------------
+
+def test_pregled_in_uvoz(db):
+    db.add(Clan(priimek="Obstojec", ime="Janez", tip_clanstva="Osebni", aktiven=True))
+    db.commit()
+    xlsx = _clani_xlsx(_GLAVA, [
+        ("novak", "ana", "s59abc", "Družinski", datetime(2030, 5, 1), "Ulica 1", "1000 Ljubljana",
+         "ana@example.org", 123, None),
+        ("Obstojec", "Janez", None, "Osebni", None, None, None, None, None, None),
+        (None, "Brez priimka", None, None, None, None, None, None, None, None),
+        ("Kratka", "Vrstica"),
+    ])
+
+    novi, preskoceni = _parse_excel_pregled(xlsx, db, _mapping())
+    assert [(n["priimek"], n["ime"]) for n in novi] == [("Novak", "Ana"), ("Kratka", "Vrstica")]
+    assert novi[0]["klicni_znak"] == "S59ABC" and novi[0]["veljavnost_rd"] == date(2030, 5, 1)
+    assert novi[1]["klicni_znak"] == "–" and novi[1]["veljavnost_rd"] is None
+    assert [p["priimek"] for p in preskoceni] == ["Obstojec"]
+
+    uvozeni, preskoceni_st = _uvozi_workbook(xlsx, db, _mapping())
+    assert (uvozeni, preskoceni_st) == (2, 1)
+    ana = db.query(Clan).filter(Clan.priimek == "Novak").one()
+    assert ana.tip_clanstva == "Družinski" and ana.es_stevilka == 123
+    assert ana.naslov_posta == "1000 Ljubljana" and ana.elektronska_posta == "ana@example.org"
+    assert ana.opombe is None
+
+
+def test_duplikati_v_pomnilniku(db):
+    """Duplikati po imenu (ne glede na velikost črk) in klicnem znaku, tudi znotraj datoteke."""
+    db.add(Clan(priimek="Kovač", ime="Marko", klicni_znak="S50MK", tip_clanstva="Osebni", aktiven=True))
+    db.commit()
+    xlsx = _clani_xlsx(_GLAVA[:3], [
+        ("KOVAČ", "marko", None),          # že v bazi (drugačna velikost črk)
+        ("Zupan", "Maja", "s50mk"),        # klicni znak že v bazi
+        ("Horvat", "Luka", "S51HL"),
+        ("horvat ", "LUKA", None),         # podvojen v datoteki
+        ("Potočnik", "Eva", "S51HL"),      # klicni znak podvojen v datoteki
+        ("Potočnik", "Nina", None),
+    ])
+    novi, preskoceni = _parse_excel_pregled(xlsx, db, _mapping())
+    assert [(n["priimek"], n["ime"]) for n in novi] == [("Horvat", "Luka"), ("Potočnik", "Nina")]
+    assert [p["razlog"] for p in preskoceni] == [
+        "Član že obstaja", "Klicni znak že obstaja",
+        "Podvojen v datoteki", "Klicni znak podvojen v datoteki",
+    ]
+
+
+def test_uvoz_v_paketih(db, monkeypatch):
+    """Ena poizvedba za obstoječe člane, INSERT v paketih."""
+    monkeypatch.setattr(izvoz, "_UVOZ_PAKET", 2)
+    xlsx = _clani_xlsx(_GLAVA[:2], [(f"Priimek{i}", "Ime") for i in range(5)])
+
+    stavki: list[str] = []
+    poslusalec = lambda conn, cursor, stavek, *a: stavki.append(stavek.split()[0].upper())
+    event.listen(db.get_bind(), "before_cursor_execute", poslusalec)
+    try:
+        assert _uvozi_workbook(xlsx, db, _mapping()) == (5, 0)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", poslusalec)
+
+    assert stavki.count("SELECT") <= 3     # nastavitve (tipi) + obstoječi člani + statistika_tip
+    assert stavki.count("INSERT") == 4     # 3 paketi + statistika_tip
+    assert db.query(Clan).count() == 5
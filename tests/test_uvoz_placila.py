@@ -241,3 +241,50 @@ def test_uvoz_workbook_backward_compat(db):
 
     assert uvozeni == 1
     assert preskoceni == 0
+
+
+def test_uvoz_workbook_upsert(db):
+    """Obstoječa članarina se posodobi (opombe ostanejo), zadnja vrstica za isto leto velja."""
+    clan = Clan(priimek="Upsert", ime="Tina", aktiven=True)
+    drugi = Clan(priimek="Drugi", ime="Rok", aktiven=True)
+    db.add_all([clan, drugi])
+    db.commit()
+    db.add(Clanarina(clan_id=clan.id, leto=2026, datum_placila=None, znesek="10", opombe="ročno"))
+    db.commit()
+
+    xlsx = _placila_xlsx(
+        [("Upsert", "Tina", date(2026, 3, 1), "25", None),
+         ("Drugi", "Rok", date(2026, 4, 1), "20", None),
+         ("upsert", "TINA", date(2026, 5, 1), "30", None)],
+        z_referenco=True,
+    )
+    za_uvoz, _ = _parse_excel_placila_pregled(xlsx, db, _privzeto_mapping())
+    assert [p["posodobi"] for p in za_uvoz] == [True, False, True]
+
+    assert _uvozi_placila_workbook(xlsx, db, _privzeto_mapping()) == (3, 0)
+    db.expire_all()
+    c = db.query(Clanarina).filter(Clanarina.clan_id == clan.id).one()
+    assert (c.datum_placila, c.znesek, c.znesek_centi, c.opombe) == (date(2026, 5, 1), "30", 3000, "ročno")
+    assert db.query(Clanarina).filter(Clanarina.clan_id == drugi.id).one().znesek_centi == 2000
+
+
+def test_uvoz_workbook_stevilo_poizvedb(db):
+    """Število poizvedb ni odvisno od števila vrstic (en upsert paket)."""
+    from sqlalchemy import event
+
+    clani = [Clan(priimek=f"Priimek{i}", ime="Ime", es_stevilka=1000 + i, aktiven=True) for i in range(50)]
+    db.add_all(clani)
+    db.commit()
+    vrstice = [(None, None, date(2026, 1, 1), "25", f"SI00 {1000 + i}-2026") for i in range(50)]
+    xlsx = _placila_xlsx(vrstice, z_referenco=True)
+
+    stavki: list[str] = []
+    poslusalec = lambda conn, cursor, stavek, *a: stavki.append(stavek.split()[0].upper())
+    event.listen(db.get_bind(), "before_cursor_execute", poslusalec)
+    try:
+        assert _uvozi_placila_workbook(xlsx, db, _privzeto_mapping()) == (50, 0)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", poslusalec)
+    # 2 za uvoz + 3 za osvežitev statistika_leto (eno leto); INSERT: upsert paket + vrstica statistike
+    assert stavki.count("SELECT") == 5 and stavki.count("INSERT") == 2
+    assert db.query(Clanarina).count() == 50
@@ -0,0 +1,107 @@
+"""Testi za seje uvoza (predogled → potrditev brez ponovnega branja Excela)."""
+import io
+import os
+import re
+import time
+from datetime import date
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+from app import uvoz_seje
+from app.auth import hash_geslo
+from app.models import Uporabnik, Clan
+from app.routers import izvoz
+
+
+@pytest.fixture
+def tmp_seje():
+    """Mapa sej uvoza tega testa (UVOZ_SEJE_DIR nastavi conftest)."""
+    mapa = Path(os.environ["UVOZ_SEJE_DIR"])
+    mapa.mkdir(parents=True, exist_ok=True)
+    return mapa
+
+
+def _login(client, db, vloga="admin"):
+    u = Uporabnik(
+        uporabnisko_ime="testuser",
+        geslo_hash=hash_geslo("Veljavno1234!ab"),
+        vloga=vloga,
+        ime_priimek="Test User",
+        aktiven=True,
+    )
+    db.add(u)
+    db.commit()
+    resp = client.get("/login")
+    csrf = re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+    client.post("/login", data={"csrf_token": csrf, "uporabnisko_ime": "testuser",
+                                "geslo": "Veljavno1234!ab"}, follow_redirects=False)
+
+
+def _csrf(client, url="/izvoz/uvozi"):
+    resp = client.get(url)
+    return re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+
+
+# ---------------------------------------------------------------------------
+# Testi: shranjevanje, TTL, čiščenje
+# ---------------------------------------------------------------------------
+
+def test_shrani_nalozi_izbrisi(tmp_seje):
+    podatki = [{"priimek": "Novak", "veljavnost_rd": date(2030, 1, 1)}]
+    uvoz_uuid = uvoz_seje.shrani_sejo("clani", podatki)
+    assert uvoz_seje.nalozi_sejo("clani", uvoz_uuid) == podatki
+    assert uvoz_seje.nalozi_sejo("placila", uvoz_uuid) is None    # druga vrsta uvoza
+    assert uvoz_seje.nalozi_sejo("clani", "../../etc/passwd") is None
+    uvoz_seje.izbrisi_sejo("clani", uvoz_uuid)
+    assert uvoz_seje.nalozi_sejo("clani", uvoz_uuid) is None
+
+
+def test_potekla_seja_in_ciscenje(tmp_seje):
+    """Seja starejša od TTL se ne naloži; čiščenje jo izbriše skupaj z ostanki starega formata."""
+    stara = uvoz_seje.shrani_sejo("clani", [1])
+    sveza = uvoz_seje.shrani_sejo("clani", [2])
+    pot_stare = tmp_seje / f"clani_{stara}.pkl"
+    os.utime(pot_stare, (time.time() - 7200, time.time() - 7200))
+    (tmp_seje / "star_uvoz.xlsx").write_bytes(b"x")
+
+    assert uvoz_seje.nalozi_sejo("clani", stara, ttl=3600) is None
+    assert uvoz_seje.pocisti_seje(ttl=3600) == 2
+    assert sorted(os.listdir(tmp_seje)) == [f"clani_{sveza}.pkl"]
+    assert uvoz_seje.nalozi_sejo("clani", sveza, ttl=3600) == [2]
+
+
+# ---------------------------------------------------------------------------
+# Testi: potrditev ne bere Excela znova
+# ---------------------------------------------------------------------------
+
+def test_potrditev_brez_ponovnega_branja(client, db, tmp_seje, monkeypatch):
+    _login(client, db)
+    wb = openpyxl.Workbook()
+    wb.active.append(("Priimek", "Ime", "Klicni znak"))
+    wb.active.append(("Seja", "Test", "S59SEJ"))
+    buf = io.BytesIO()
+    wb.save(buf)
+
+    resp = client.post(
+        "/izvoz/uvozi",
+        files={"datoteka": ("clani.xlsx", buf.getvalue(),
+                            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        data={"csrf_token": _csrf(client)},
+    )
+    assert resp.status_code == 200 and "Seja" in resp.text
+    assert len(list(tmp_seje.glob("clani_*.pkl"))) == 1
+
+    def _ne_beri(*a, **kw):
+        raise AssertionError("potrditev ne sme znova brati Excela")
+    monkeypatch.setattr(izvoz, "load_workbook", _ne_beri)
+    csrf = re.search(r'<input[^>]*name="csrf_token"[^>]*value="([^"]+)"', resp.text).group(1)
+    resp2 = client.post("/izvoz/uvozi-potrdi", data={"csrf_token": csrf})
+    assert resp2.status_code == 200 and "1 uvoženih" in resp2.text
+    assert db.query(Clan).filter(Clan.klicni_znak == "S59SEJ").count() == 1
+    assert list(tmp_seje.iterdir()) == []
+
+    # Ponovna potrditev: seja je porabljena
+    resp3 = client.post("/izvoz/uvozi-potrdi", data={"csrf_token": csrf})
+    assert "naložite datoteko znova" in resp3.text
@@ -0,0 +1,40 @@
+import io
+from datetime import date, datetime
+
+from openpyxl import load_workbook
+
+from app.xlsx_tok import xlsx_tok, List, SLOG_GLAVA
+
+
+def test_tipi_celic_in_slogi():
+    vrstice = [[1, "a<&>\"b", None, 2.5, True, date(2024, 1, 2), datetime(2024, 1, 2, 3, 4, 5), "x\x01y"]]
+    vsebina = b"".join(xlsx_tok([
+        List("Prvi", vrstice, glava=["A", "B"], sirine={1: 20}),
+        List("Drugi", [], glava=["G"], slog_glave=SLOG_GLAVA),
+    ]))
+    wb = load_workbook(io.BytesIO(vsebina))
+    assert wb.sheetnames == ["Prvi", "Drugi"]
+    ws = wb["Prvi"]
+    assert [c.value for c in ws[2]] == [
+        1, 'a<&>"b', None, 2.5, True,
+        datetime(2024, 1, 2), datetime(2024, 1, 2, 3, 4, 5), "xy",
+    ]
+    assert ws["A1"].font.b and ws.column_dimensions["A"].width == 20
+    assert wb["Drugi"]["A1"].fill.fgColor.rgb == "FFDDEEFF"
+
+
+def test_pretakanje_po_kosih():
+    """Prvi kos pride, preden je prebrana zadnja vrstica; zip je na koncu veljaven."""
+    prebrano = []
+
+    def vrstice():
+        for i in range(30_000):
+            prebrano.append(i)
+            yield [i, f"vrstica {i}", i * 0.5]
+
+    tok = xlsx_tok([List("Veliko", vrstice(), glava=["i", "besedilo", "pol"])])
+    prvi = next(tok)
+    assert len(prebrano) < 30_000
+    vsebina = prvi + b"".join(tok)
+    ws = load_workbook(io.BytesIO(vsebina), read_only=True)["Veliko"]
+    assert sum(1 for _ in ws.iter_rows(values_only=True)) == 30_001